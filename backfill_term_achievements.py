@@ -0,0 +1,16 @@
+"""One-off job: rebuild term purchase counters and award missed achievements.
+
+Run it once with the bot stopped, after upgrading to the incremental
+term achievement evaluator:
+
+    python backfill_term_achievements.py
+"""
+
+from bot.database.models import register_models
+from bot.database.methods import backfill_term_achievements
+
+
+if __name__ == '__main__':
+    register_models()
+    counted, unlocked = backfill_term_achievements()
+    print(f"✅ Counted {counted} termed purchases, unlocked {unlocked} achievements.")
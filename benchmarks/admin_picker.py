@@ -0,0 +1,156 @@
+"""Admin picker with thousands of siblings: page size, callback data, latency.
+
+Bulk-inserts N subcategories under one category and N items in one of
+them, then drives the real picker handlers through a dispatcher with a bot
+that records requests instead of calling Telegram. Walks every page of
+both lists forwards and back, applies a filter and opens a category,
+checking that keyboards stay bounded and callback data fits Telegram's 64
+bytes. Times a page against the previous picker, which listed every child
+with two lookups each.
+
+    python benchmarks/admin_picker.py --siblings 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from common import use_temporary_database
+
+ADMIN_ID = 1
+CHAT = {'id': ADMIN_ID, 'type': 'private'}
+USER = {'id': ADMIN_ID, 'is_bot': False, 'first_name': 'admin'}
+
+
+def _legacy_page(parent: str) -> int:
+    """Buttons the previous picker built: every child, each with a title and a children lookup."""
+    from bot.database.methods import get_all_subcategories, get_category_title
+
+    buttons = 0
+    for name in get_all_subcategories(parent):
+        get_category_title(name)
+        buttons += 1 + bool(get_all_subcategories(name))
+    return buttons
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--siblings', type=int, default=5_000, help='subcategories and items in one branch')
+    args = parser.parse_args()
+
+    use_temporary_database()
+    from aiogram import Bot, Dispatcher, types
+    from bot.database import Database
+    from bot.database.methods import create_category
+    from bot.database.models import Categories, CategoryClosure, Goods
+    from bot.handlers.admin.picker import FILTER_STATE, PAGE_SIZE, register_picker, start_picker
+    from bot.handlers.admin.shop_management_states import register_shop_management
+    from bot.misc import TgConfig
+
+    edits: list[dict] = []
+
+    class RecordingBot(Bot):
+        async def request(self, method, data=None, files=None, **kwargs):
+            if method == 'editMessageText':
+                edits.append({**data, 'reply_markup': json.loads(data['reply_markup'])})
+            return True
+
+    bot = RecordingBot(token='123456:' + 'A' * 35)
+    Bot.set_current(bot)
+    dp = Dispatcher(bot)
+    register_picker(dp)
+    register_shop_management(dp)
+    TgConfig.RATE_LIMIT_MAX_CALLS = float('inf')
+
+    create_category('big', title='Big')
+    names = [f'sub-{n:05d}' for n in range(args.siblings)]
+    rows = [{'name': name, 'title': f'Sub {n:05d}', 'parent_name': 'big'} for n, name in enumerate(names)]
+    session = Database().session
+    session.execute(Categories.__table__.insert(), rows)
+    session.execute(CategoryClosure.__table__.insert(),
+                    [{'ancestor': name, 'descendant': name, 'depth': 0} for name in names]
+                    + [{'ancestor': 'big', 'descendant': name, 'depth': 1} for name in names])
+    create_category('sub-00000-child', 'sub-00000')
+    session.execute(Goods.__table__.insert(), [
+        {'name': f'item {n:05d}', 'description': 'd', 'price': 1.0, 'category_name': 'sub-00001'}
+        for n in range(args.siblings)
+    ])
+    session.commit()
+
+    updates = 0
+
+    async def press(data: str) -> dict:
+        nonlocal updates
+        updates += 1
+        message = {'message_id': 1, 'date': 0, 'chat': CHAT, 'text': ''}
+        call = {'id': str(updates), 'from': USER, 'chat_instance': '1', 'message': message, 'data': data}
+        await dp.process_update(types.Update(update_id=updates, callback_query=call))
+        return edits[-1]
+
+    async def send(text: str) -> dict:
+        nonlocal updates
+        updates += 1
+        message = {'message_id': 2, 'date': 0, 'chat': CHAT, 'from': USER, 'text': text}
+        await dp.process_update(types.Update(update_id=updates, message=message))
+        return edits[-1]
+
+    def buttons(edit: dict) -> list[dict]:
+        return [button for row in edit['reply_markup']['inline_keyboard'] for button in row]
+
+    async def walk(key: str) -> tuple[list[float], set[str], int]:
+        """Page to the end and back; return page times, entries seen and the tallest keyboard."""
+        samples, seen, tallest = [], set(), 0
+        edit = edits[-1]
+        for direction in ('n', 'v'):
+            while any(b['callback_data'] == f'pick:{key}:{direction}' for b in buttons(edit)):
+                started = time.perf_counter()
+                edit = await press(f'pick:{key}:{direction}')
+                samples.append((time.perf_counter() - started) * 1000)
+                page = buttons(edit)
+                tallest = max(tallest, len(edit['reply_markup']['inline_keyboard']))
+                assert all(len(b['callback_data'].encode()) <= 64 for b in page)
+                seen.update(b['text'] for b in page
+                            if b['callback_data'].split(':')[2] in ('o', 'p') and b['text'] != '➡️')
+        return samples, seen, tallest
+
+    results = {}
+    for key, parent, expected in (('uc', 'big', args.siblings), ('ui', 'sub-00001', args.siblings)):
+        started = time.perf_counter()
+        await start_picker(bot, ADMIN_ID, 1, ADMIN_ID, key, current=parent)
+        first_ms = (time.perf_counter() - started) * 1000
+        samples, seen, tallest = await walk(key)
+        assert len(seen) == expected, (key, len(seen), expected)
+        results[key] = (first_ms, samples, tallest)
+
+    await start_picker(bot, ADMIN_ID, 1, ADMIN_ID, 'uc', current='big')
+    await press('pick:uc:f')
+    assert TgConfig.STATE[ADMIN_ID] == FILTER_STATE
+    edit = await send('sub 00420')
+    filtered = [b['text'] for b in buttons(edit) if b['callback_data'].startswith('pick:uc:p:')]
+    assert filtered == ['Sub 00420'], filtered
+    edit = await press('pick:uc:x')
+    opened = next(b['callback_data'] for b in buttons(edit) if b['text'] == '➡️')
+    edit = await press(opened)
+    assert [b['text'] for b in buttons(edit) if b['callback_data'].startswith('pick:uc:p:')] == ['sub-00000-child']
+
+    started = time.perf_counter()
+    legacy_buttons = _legacy_page('big')
+    legacy_ms = (time.perf_counter() - started) * 1000
+
+    print(f'{args.siblings} subcategories and {args.siblings} items in one branch, '
+          f'{updates} updates through the dispatcher')
+    for key, label in (('uc', 'subcategories'), ('ui', 'items')):
+        first_ms, samples, tallest = results[key]
+        print(f'{label:<14} first page {first_ms:6.1f} ms, {len(samples)} page turns '
+              f'p50 {statistics.median(samples):5.1f} ms max {max(samples):5.1f} ms, '
+              f'at most {tallest} keyboard rows ({PAGE_SIZE} per page)')
+    print(f'previous picker: {legacy_buttons} buttons in one keyboard, built in {legacy_ms:.0f} ms')
+    print('filter, clear and open: ok; all callback data within 64 bytes')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,102 @@
+"""Admin broadcast end to end, over HTTP, against the fake Bot API.
+
+Starts :class:`fake_telegram.FakeTelegram` on a free local port, points a
+``QueuedBot`` at it and runs the real dispatcher with long polling, so
+updates, the send queue, aiohttp and aiogram's error mapping are all in
+play. The admin opens the broadcast prompt and sends a text, which goes to
+every seeded user. Some users have blocked the bot, and the fake server
+enforces Telegram's flood limits with 429 ``retry_after`` answers.
+
+Reports the broadcast duration, sends per second and the 429 and 403
+answers; with the send queue pacing correctly no 429 should show up.
+
+    python benchmarks/broadcast_load.py --users 300 --blocked 0.05 --latency 30
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+
+from common import use_temporary_database
+from fake_telegram import FakeTelegram, serve
+from harness import ADMIN_ID, seed
+
+
+async def _until(condition, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        await asyncio.sleep(0.01)
+    return True
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--blocked', type=float, default=0.05, help='share of users who blocked the bot')
+    parser.add_argument('--latency', type=float, default=20.0, help='milliseconds per Bot API call')
+    parser.add_argument('--jitter', type=float, default=10.0, help='up to this many extra milliseconds')
+    parser.add_argument('--global-rate', type=float, default=30.0, help='fake server flood limit, messages/s')
+    parser.add_argument('--chat-rate', type=float, default=1.0, help='fake server flood limit per chat')
+    parser.add_argument('--retry-share', type=float, default=0.0, help='share of sends answered with a flood wait')
+    parser.add_argument('--timeout', type=float, default=120.0, help='give up after this many seconds')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    use_temporary_database()
+    from aiogram import Dispatcher
+    from aiogram.bot.api import TelegramAPIServer
+    from aiogram.contrib.fsm_storage.memory import MemoryStorage
+    from bot.handlers import register_all_handlers
+    from bot.misc import TgConfig
+    from bot.utils.send_queue import QueuedBot, send_queue
+
+    rng = random.Random(args.seed)
+    shop = seed(args.users, 0, 0, 0, 0, rng)
+    blocked = set(rng.sample(shop.users, int(len(shop.users) * args.blocked)))
+    fake = FakeTelegram(args.latency / 1000, args.jitter / 1000, args.chat_rate, 3, args.global_rate,
+                        args.retry_share, 1, blocked, args.seed)
+    runner = await serve(fake, '127.0.0.1', 0)
+    port = runner.addresses[0][1]
+
+    bot = QueuedBot(token='123456:' + 'A' * 35, parse_mode='HTML',
+                    server=TelegramAPIServer.from_base(f'http://127.0.0.1:{port}'))
+    dp = Dispatcher(bot, storage=MemoryStorage())
+    register_all_handlers(dp)
+    TgConfig.RATE_LIMIT_MAX_CALLS = float('inf')
+    send_queue.start()
+    polling = asyncio.create_task(dp.start_polling(timeout=1))
+
+    try:
+        fake.push_update({'user': ADMIN_ID, 'data': 'send_message', 'message_id': 1})
+        if not await _until(lambda: fake.requests['editMessageText'], args.timeout):
+            raise SystemExit('the broadcast prompt never opened')
+        edits = fake.requests['editMessageText']
+        started = time.perf_counter()
+        fake.push_update({'user': ADMIN_ID, 'text': 'Load test broadcast'})
+        finished = await _until(lambda: fake.requests['editMessageText'] > edits, args.timeout)
+        elapsed = time.perf_counter() - started
+    finally:
+        dp.stop_polling()
+        await polling
+        await send_queue.stop()
+        await (await bot.get_session()).close()
+        await runner.cleanup()
+
+    delivered = sum(1 for _, message in fake.sent if 'edit_date' not in message and message['chat']['id'] != ADMIN_ID)
+    attempts = fake.requests['sendMessage']
+    print(f"{'finished' if finished else 'TIMED OUT'} after {elapsed:.2f} s")
+    print(f'users            {len(shop.users):>8}')
+    print(f'blocked (403)    {fake.errors["sendMessage 403"]:>8}  of {len(blocked)} blocked users')
+    print(f'delivered        {delivered:>8}  {delivered / elapsed:.1f}/s')
+    print(f'send attempts    {attempts:>8}')
+    print(f'flood waits (429){fake.errors["sendMessage 429"]:>8}')
+    print(f'getUpdates calls {fake.requests["getUpdates"]:>8}')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
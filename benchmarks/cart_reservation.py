@@ -0,0 +1,107 @@
+"""Cart stock reservation: per-unit delete loop vs the reservation ledger.
+
+Times a 100-unit cart spread over several items with both approaches,
+checks that releasing the reservation returns the stock, then races worker
+processes against the same stock and checks that no unit is handed out twice.
+
+    python benchmarks/cart_reservation.py --units 100 --workers 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+from common import ROOT, use_temporary_database
+
+ITEMS = ('alpha', 'beta', 'gamma', 'delta')
+
+
+def _seed(units_per_item: int) -> None:
+    from bot.database import Database
+    from bot.database.methods import create_category, create_item
+    from bot.database.models import ItemValues
+
+    create_category('bench')
+    session = Database().session
+    for item in ITEMS:
+        create_item(item, 'benchmark item', 1, 'bench')
+        session.bulk_save_objects(
+            [ItemValues(name=item, value=f'{item}-{n}', is_infinity=False) for n in range(units_per_item)]
+        )
+    session.commit()
+
+
+def _per_unit(quantities: dict[str, int]) -> None:
+    from bot.database.methods import buy_item, get_item_value
+
+    for item, quantity in quantities.items():
+        for _ in range(quantity):
+            value = get_item_value(item)
+            buy_item(value['id'], value['is_infinity'])
+
+
+def _race_worker(workdir: str, rounds: int, queue) -> None:
+    os.chdir(workdir)
+    sys.path.insert(0, ROOT)
+    from bot.database.methods import reserve_item_values
+
+    claimed_ids: list[int] = []
+    for round_no in range(rounds):
+        claimed = reserve_item_values({item: 3 for item in ITEMS}, f'race-{os.getpid()}-{round_no}')
+        if claimed is None:
+            continue
+        claimed_ids.extend(unit['id'] for units in claimed.values() for unit in units)
+    queue.put(claimed_ids)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--units', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    workdir = use_temporary_database()
+    from bot.database.methods import release_reservations, reserve_item_values, select_item_values_amount
+
+    per_item = args.units // len(ITEMS)
+    quantities = {item: per_item for item in ITEMS}
+    _seed(per_item * 2 + 200)
+
+    started = time.perf_counter()
+    _per_unit(quantities)
+    loop_ms = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    claimed = reserve_item_values(quantities, 'bench')
+    batch_ms = (time.perf_counter() - started) * 1000
+    assert claimed is not None and sum(len(units) for units in claimed.values()) == per_item * len(ITEMS)
+    print(f'{per_item * len(ITEMS)}-unit cart, get_item_value + buy_item per unit: {loop_ms:8.1f} ms')
+    print(f'{per_item * len(ITEMS)}-unit cart, reserve_item_values:              {batch_ms:8.1f} ms')
+    reserved = select_item_values_amount(ITEMS[0])
+    release_reservations('bench')
+    assert select_item_values_amount(ITEMS[0]) == reserved + per_item
+
+    # Spawned workers open their own SQLite connections, like separate bot processes.
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    workers = [
+        context.Process(target=_race_worker, args=(workdir, 40, queue))
+        for _ in range(args.workers)
+    ]
+    for worker in workers:
+        worker.start()
+    results = [queue.get() for _ in workers]
+    for worker in workers:
+        worker.join()
+    handed_out = [unit_id for ids in results for unit_id in ids]
+    duplicates = len(handed_out) - len(set(handed_out))
+    print(f'race: {args.workers} workers claimed {len(handed_out)} units, {duplicates} sold twice')
+    if duplicates:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Cart settlement: per-unit commits vs ``settle_cart_purchase``.
+
+Settles carts of growing size for a buyer with a referrer, once with the
+old per-unit sequence (charge, purchase row, referral credit, streak,
+lottery ticket, each committed on its own) and once in a single
+transaction, and prints the wall time of both.
+
+    python benchmarks/cart_settlement.py --sizes 1 10 50 100
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime
+import time
+
+from common import use_temporary_database
+
+BUYER = 1001
+REFERRER = 1000
+REFERRAL_PERCENT = 5
+
+
+def _seed() -> None:
+    from bot.database.methods import create_category, create_item, create_user, update_balance
+
+    now = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    create_user(REFERRER, now, None)
+    create_user(BUYER, now, REFERRER)
+    update_balance(BUYER, 10 ** 9)
+    create_category('bench')
+    create_item('alpha', 'benchmark item', 3, 'bench')
+
+
+def _units(size: int, offset: int) -> list[dict]:
+    return [
+        {'item_name': 'alpha', 'value': {'item_name': 'alpha', 'value': f'alpha-{offset + n}'}, 'amount': 3}
+        for n in range(size)
+    ]
+
+
+def _per_unit(units: list[dict], sold_at: str) -> None:
+    from bot.database.methods import (
+        add_bought_item, buy_item_for_balance, can_get_referral_reward, get_item_info,
+        process_purchase_streak, update_balance, update_lottery_tickets,
+    )
+
+    for unit in units:
+        value = unit['value']
+        price = float(unit['amount'])
+        buy_item_for_balance(BUYER, price)
+        item_info = get_item_info(value['item_name'], BUYER)
+        add_bought_item(value['item_name'], value['value'], price, BUYER, sold_at, item_info.get('term_code'))
+        if can_get_referral_reward(value['item_name']):
+            update_balance(REFERRER, round(price * REFERRAL_PERCENT / 100, 2))
+        process_purchase_streak(BUYER)
+    update_lottery_tickets(BUYER, len(units))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 10, 50, 100])
+    args = parser.parse_args()
+
+    use_temporary_database()
+    from bot.database.methods import settle_cart_purchase
+
+    _seed()
+    sold_at = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    offset = 0
+    print(f"{'units':>6} {'per-unit ms':>12} {'settle ms':>10}")
+    for size in args.sizes:
+        started = time.perf_counter()
+        _per_unit(_units(size, offset), sold_at)
+        loop_ms = (time.perf_counter() - started) * 1000
+        offset += size
+        started = time.perf_counter()
+        summary = settle_cart_purchase(BUYER, _units(size, offset), sold_at, REFERRER, REFERRAL_PERCENT)
+        settle_ms = (time.perf_counter() - started) * 1000
+        offset += size
+        assert len(summary['sales']) == size
+        print(f'{size:>6} {loop_ms:>12.1f} {settle_ms:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
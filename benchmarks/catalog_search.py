@@ -0,0 +1,110 @@
+"""Catalog search latency on the FTS5 index, compared with a LIKE scan.
+
+Bulk-inserts N items (the triggers index them as they arrive) across a
+two-level category tree, stocks most of them, then times ``search_catalog``
+for a mix of one- and two-word queries against a ``LIKE '%word%'`` scan
+over names and descriptions.
+
+    python benchmarks/catalog_search.py --items 100000 --queries 300
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import time
+
+from common import use_temporary_database
+
+COMMON = (
+    'premium family basic standard ultra account key code gift card license lifetime monthly yearly '
+    'music video movie series sport news course book audio game skin coins credits cloud storage'
+).split()
+SYLLABLES = 'ka lo mi ne ru to spo ti fy net flix dis ney ste am xb ox vi pro zen nor dra vel qu in'.split()
+
+
+def _vocabulary(rng: random.Random, size: int) -> list[str]:
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choices(SYLLABLES, k=rng.randint(2, 4))))
+    return sorted(words)
+
+
+def _percentile(samples: list[float], share: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=100_000)
+    parser.add_argument('--queries', type=int, default=300)
+    args = parser.parse_args()
+
+    use_temporary_database()
+    from sqlalchemy import or_
+    from bot.database import Database
+    from bot.database.methods import create_category, search_catalog
+    from bot.database.models import Goods, ItemValues
+
+    rng = random.Random(7)
+    brands = _vocabulary(rng, 5_000)
+    for root in range(10):
+        create_category(f'root{root}', title=rng.choice(COMMON).title())
+        for sub in range(10):
+            create_category(f'root{root}-{sub}', f'root{root}', title=rng.choice(brands).title())
+    leaves = [f'root{root}-{sub}' for root in range(10) for sub in range(10)]
+
+    session = Database().session
+    goods, values = [], []
+    for n in range(args.items):
+        name = f"{' '.join(rng.sample(brands, 2)).title()} {rng.choice(COMMON).title()}__{n:08x}"
+        description = ' '.join(rng.choices(brands, k=4) + rng.choices(COMMON, k=8))
+        goods.append({'name': name, 'description': description, 'price': 1.0 + n % 90,
+                      'category_name': leaves[n % len(leaves)]})
+        if n % 4:
+            values.append({'item_name': name, 'value': f'KEY-{n}', 'is_infinity': False})
+    started = time.perf_counter()
+    for offset in range(0, len(goods), 10_000):
+        session.execute(Goods.__table__.insert(), goods[offset:offset + 10_000])
+    session.execute(ItemValues.__table__.insert(), values)
+    session.commit()
+    insert_s = time.perf_counter() - started
+
+    def timed(queries: list[str]) -> list[float]:
+        samples = []
+        for query in queries:
+            started = time.perf_counter()
+            search_catalog(query)
+            samples.append((time.perf_counter() - started) * 1000)
+        return samples
+
+    # Product words as users type them, sometimes cut short, sometimes two of them.
+    queries = [' '.join(rng.sample(brands, rng.choice((1, 2))))[:-rng.randint(0, 2) or None]
+               for _ in range(args.queries)]
+    fts = timed(queries)
+    common = timed([rng.choice(COMMON) for _ in range(max(1, args.queries // 10))])
+    like = []
+    for query in queries[: max(1, args.queries // 10)]:
+        word = query.split()[0]
+        started = time.perf_counter()
+        (
+            session.query(Goods.name, Goods.price)
+            .filter(or_(Goods.name.like(f'%{word}%'), Goods.description.like(f'%{word}%')))
+            .limit(11)
+            .all()
+        )
+        like.append((time.perf_counter() - started) * 1000)
+
+    print(f'{args.items} items indexed by triggers during bulk insert in {insert_s:.1f} s')
+    for label, samples in (
+        ('FTS5, product words', fts),
+        ('FTS5, common word', common),
+        ('LIKE scan, unranked', like),
+    ):
+        print(f'{label:<20} p50 {statistics.median(samples):7.2f} ms  p99 {_percentile(samples, 0.99):7.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
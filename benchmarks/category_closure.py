@@ -0,0 +1,95 @@
+"""Discount/referral eligibility: parent walk vs the category closure table.
+
+Builds a tree of the given depth with about N categories and one item in
+each deepest category, blocks discounts on some top-level categories, and
+times ``can_use_discount`` against the previous one-query-per-level walk.
+Also reports what maintaining the closure costs on create and move.
+
+    python benchmarks/category_closure.py --categories 5000 --depth 6
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from common import measure, use_temporary_database
+
+
+def _legacy_can_use_discount(item_name: str) -> bool:
+    """The previous implementation, walking up one parent per query."""
+    from bot.database import Database
+    from bot.database.models import Categories, Goods
+
+    session = Database().session
+    category_name = session.query(Goods.category_name).filter(Goods.name == item_name).scalar()
+    if not category_name:
+        return True
+    while True:
+        category = session.query(Categories.parent_name, Categories.allow_discounts) \
+            .filter(Categories.name == category_name).first()
+        if not category:
+            return True
+        parent, allow = category
+        if parent is None:
+            return bool(allow)
+        category_name = parent
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--categories', type=int, default=5_000)
+    parser.add_argument('--depth', type=int, default=6)
+    parser.add_argument('--lookups', type=int, default=2_000)
+    args = parser.parse_args()
+
+    use_temporary_database()
+    from bot.database import Database
+    from bot.database.methods import can_use_discount, create_category, create_item
+    from bot.database.models import Goods
+    from bot.database.methods.update import move_category
+
+    roots, fanout = 4, 2
+    while roots * sum(fanout ** level for level in range(args.depth)) < args.categories:
+        fanout += 1
+    level = [(f'r{r}', None) for r in range(roots)]
+    created = leaves = 0
+    started = time.perf_counter()
+    for depth in range(args.depth):
+        next_level = []
+        for name, parent in level:
+            if created >= args.categories:
+                break
+            create_category(name, parent, allow_discounts=not name.startswith('r0'))
+            created += 1
+            if depth == args.depth - 1:
+                create_item(f'{name}-item', 'd', 1.0, name)
+                leaves += 1
+            next_level.extend((f'{name}.{n}', name) for n in range(fanout))
+        level = next_level
+    create_ms = (time.perf_counter() - started) / created * 1000
+
+    items = [name for name, in Database().session.query(Goods.name)]
+    random.seed(1)
+    sample = [random.choice(items) for _ in range(args.lookups)]
+    assert all(can_use_discount(item) == _legacy_can_use_discount(item) for item in sample[:200])
+
+    lookups = iter(sample * 2)
+    legacy_us = measure(lambda: _legacy_can_use_discount(next(lookups)), args.lookups)
+    lookups = iter(sample * 2)
+    closure_us = measure(lambda: can_use_discount(next(lookups)), args.lookups)
+
+    started = time.perf_counter()
+    move_category('r1.0', 'r2')
+    move_ms = (time.perf_counter() - started) * 1000
+    assert not can_use_discount(next(item for item in items if item.startswith('r0')))
+
+    print(f'{created} categories over {args.depth} levels (fanout {fanout}), {leaves} items in leaf categories')
+    print(f'parent walk ({args.depth + 1} queries): {legacy_us:8.0f} us per check')
+    print(f'closure EXISTS (1 query):  {closure_us:8.0f} us per check')
+    print(f'create_category with closure rows: {create_ms:.2f} ms, moving a 5-level subtree: {move_ms:.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
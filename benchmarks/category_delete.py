@@ -0,0 +1,143 @@
+"""Category deletion: atomicity under an injected failure, and timing.
+
+Builds a category branch with goods, stock values and stock files, makes
+the ``DELETE FROM goods`` statement fail half way through
+``delete_category`` and exits non-zero if anything was removed. Then deletes the
+branch for real, runs the deferred file cleanup, and times both against the
+previous level-by-level deletion with a commit per category.
+
+    python benchmarks/category_delete.py --depth 4 --fanout 5 --items 10 --values 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+from common import use_temporary_database
+
+
+class InjectedFailure(RuntimeError):
+    pass
+
+
+def _build(prefix: str, depth: int, fanout: int, items: int, values: int) -> None:
+    from bot.database import Database
+    from bot.database.models import Categories, Goods, ItemValues
+    from bot.utils.files import ensure_item_folder
+
+    categories, goods, stock = [], [], []
+    level = [(f'{prefix}', None)]
+    for _ in range(depth):
+        next_level = []
+        for name, parent in level:
+            categories.append({'name': name, 'title': name, 'parent_name': parent})
+            next_level.extend((f'{name}.{n}', name) for n in range(fanout))
+        level = next_level
+    for category in categories:
+        for n in range(items):
+            item = f"{category['name']}-item{n}"
+            goods.append({'name': item, 'description': 'd', 'price': 1.0, 'category_name': category['name']})
+            folder = ensure_item_folder(item)
+            for v in range(values):
+                path = os.path.join(folder, f'{v}.jpg')
+                if v == 0:
+                    open(path, 'wb').close()
+                stock.append({'item_name': item, 'value': path if v == 0 else f'KEY-{item}-{v}', 'is_infinity': False})
+    session = Database().session
+    session.execute(Categories.__table__.insert(), categories)
+    session.execute(Goods.__table__.insert(), goods)
+    session.execute(ItemValues.__table__.insert(), stock)
+    session.commit()
+
+
+def _counts() -> tuple[int, int, int]:
+    from sqlalchemy import func
+    from bot.database import Database
+    from bot.database.models import Categories, Goods, ItemValues
+
+    session = Database().session
+    return tuple(session.query(func.count()).select_from(model).scalar() for model in (Categories, Goods, ItemValues))
+
+
+def _legacy_delete(category_name: str) -> None:
+    """The deletion used before: one level at a time, files inline, commit per category."""
+    from bot.database import Database
+    from bot.database.models import Categories, Goods, ItemValues
+
+    session = Database().session
+    for sub, in session.query(Categories.name).filter(Categories.parent_name == category_name).all():
+        _legacy_delete(sub)
+    for item, in session.query(Goods.name).filter(Goods.category_name == category_name).all():
+        for value, in session.query(ItemValues.value).filter(ItemValues.item_name == item).all():
+            if os.path.isfile(value):
+                os.remove(value)
+        session.query(ItemValues).filter(ItemValues.item_name == item).delete()
+    session.query(Goods).filter(Goods.category_name == category_name).delete()
+    session.query(Categories).filter(Categories.name == category_name).delete()
+    session.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--depth', type=int, default=4)
+    parser.add_argument('--fanout', type=int, default=5)
+    parser.add_argument('--items', type=int, default=10, help='goods per category')
+    parser.add_argument('--values', type=int, default=10, help='stock values per item, the first one a file')
+    args = parser.parse_args()
+
+    use_temporary_database()
+    from sqlalchemy import event
+    from bot.database import Database
+    from bot.database.methods import delete_category
+    from bot.utils.files import remove_deleted_files
+
+    _build('fresh', args.depth, args.fanout, args.items, args.values)
+    _build('legacy', args.depth, args.fanout, args.items, args.values)
+    before = _counts()
+    print(f'categories, goods, values: {before}')
+
+    engine = Database().engine
+
+    def fail_on_goods(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().startswith('DELETE FROM goods'):
+            raise InjectedFailure('injected failure while deleting goods')
+
+    event.listen(engine, 'before_cursor_execute', fail_on_goods)
+    try:
+        delete_category('fresh')
+    except InjectedFailure:
+        pass
+    else:
+        raise SystemExit('the injected failure did not fire')
+    finally:
+        event.remove(engine, 'before_cursor_execute', fail_on_goods)
+    after_failure = _counts()
+    print(f'after injected failure:    {after_failure} -> {"intact" if after_failure == before else "PARTIAL DELETE"}')
+    if after_failure != before:
+        sys.exit(1)
+
+    started = time.perf_counter()
+    cleanup = delete_category('fresh')
+    delete_s = time.perf_counter() - started
+    started = time.perf_counter()
+    remove_deleted_files(**cleanup)
+    cleanup_s = time.perf_counter() - started
+    left = sum(os.path.exists(path) for path in cleanup['files'])
+
+    started = time.perf_counter()
+    _legacy_delete('legacy')
+    legacy_s = time.perf_counter() - started
+
+    print(f'after both deletes:        {_counts()}')
+    print(f'one transaction:           {delete_s * 1000:8.0f} ms (+{cleanup_s * 1000:.0f} ms file cleanup '
+          f'in the background, {len(cleanup["files"])} files, {left} left)')
+    print(f'level by level, inline:    {legacy_s * 1000:8.0f} ms')
+    if _counts() != (0, 0, 0) or left:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
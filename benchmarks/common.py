@@ -0,0 +1,70 @@
+"""Shared helpers for the offline benchmark scripts.
+
+``bot.database.Database`` opens ``database.db`` relative to the working
+directory, so every benchmark switches to a fresh temporary directory
+before the bot modules are imported.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import time
+from typing import Callable
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def use_temporary_database() -> str:
+    """Switch to an empty working directory and create the schema there."""
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    workdir = tempfile.mkdtemp(prefix='bot-bench-')
+    os.chdir(workdir)
+    import bot.database.methods  # noqa: F401 - resolves the methods/utils import order
+    from bot.database.models import register_models
+
+    register_models()
+    return workdir
+
+
+def local_bot(requests: dict | None = None):
+    """A ``QueuedBot`` that answers Bot API calls locally instead of calling Telegram.
+
+    Import it after :func:`use_temporary_database`. Sends and edits return a
+    minimal message, so handlers run as they would against the real API.
+    When given, ``requests`` counts the calls by Bot API method.
+    """
+    from aiogram import Bot
+    from bot.utils.send_queue import QueuedBot
+
+    class LocalApi(Bot):
+        async def request(self, method, data=None, files=None, **kwargs):
+            if requests is not None:
+                requests[method] = requests.get(method, 0) + 1
+            chat = {'id': int((data or {}).get('chat_id') or 1), 'type': 'private'}
+            if method.startswith(('send', 'edit', 'copy', 'forward')):
+                return {'message_id': 1, 'date': 0, 'chat': chat, 'text': ''}
+            if method == 'getChat':
+                return chat
+            if method == 'getMe':
+                return {'id': 1, 'is_bot': True, 'first_name': 'bot', 'username': 'bot'}
+            if method == 'getChatMember':
+                return {'status': 'member', 'user': {'id': chat['id'], 'is_bot': False, 'first_name': 'u'}}
+            return True
+
+    class LocalBot(QueuedBot, LocalApi):
+        pass
+
+    bot = LocalBot(token='123456:' + 'A' * 35)
+    Bot.set_current(bot)
+    return bot
+
+
+def measure(func: Callable[[], object], repeat: int) -> float:
+    """Return the mean wall time of ``func`` in microseconds."""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) / repeat * 1e6
@@ -0,0 +1,124 @@
+"""Delayed jobs: sleeping asyncio tasks vs the ``delayed_jobs`` table.
+
+Measures the Python memory held by N pending jobs both ways, then throws
+the first scheduler away as a restart would, starts a fresh one against the
+same database and reports how late the jobs fire. Exits 1 when the stored
+jobs hold more than ``--max-memory`` MiB, when any job fires early or more
+than ``--max-lateness`` seconds late, or when a job is lost or runs twice.
+
+    python benchmarks/delayed_jobs.py --jobs 100000 --spread 30 --max-memory 8 --max-lateness 1
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from collections import Counter
+import tracemalloc
+
+from common import use_temporary_database
+
+
+async def _sleeping_tasks(count: int, delay: float) -> int:
+    async def job() -> None:
+        await asyncio.sleep(delay)
+
+    tracemalloc.start()
+    tasks = [asyncio.create_task(job()) for _ in range(count)]
+    await asyncio.sleep(0)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return size
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--jobs', type=int, default=100_000)
+    parser.add_argument('--spread', type=float, default=30.0, help='seconds over which the jobs fall due')
+    parser.add_argument('--start', type=float, default=20.0, help='seconds until the first job is due')
+    parser.add_argument('--max-memory', type=float, default=8.0, help='MiB the stored jobs may hold')
+    parser.add_argument('--max-lateness', type=float, default=1.0, help='seconds a job may fire late')
+    args = parser.parse_args()
+
+    use_temporary_database()
+    from bot.database import Database
+    from bot.database.models import DelayedJob
+    from bot.utils.scheduler import JobScheduler
+
+    task_bytes = await _sleeping_tasks(args.jobs, 3600)
+
+    before = JobScheduler()
+    before.start(bot=None)
+    base = time.time() + args.start
+    due = [base + args.spread * n / args.jobs for n in range(args.jobs)]
+    tracemalloc.start()
+    started = time.perf_counter()
+    for offset in range(0, len(due), 10_000):
+        now = time.time()
+        before.schedule_many([('bench', {'n': offset + n, 'due': at}, at - now)
+                              for n, at in enumerate(due[offset:offset + 10_000])])
+    schedule_s = time.perf_counter() - started
+    del due
+    table_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f'{args.jobs} pending jobs as asyncio tasks: {task_bytes / 2**20:8.1f} MiB')
+    print(f'{args.jobs} pending jobs in delayed_jobs:   {table_bytes / 2**20:8.1f} MiB '
+          f'(stored in {schedule_s:.1f} s)')
+
+    # Simulated restart: the old scheduler is gone, a new one picks the jobs up.
+    await before.stop()
+    lateness: list[float] = []
+    fired: Counter = Counter()
+    done = asyncio.Event()
+
+    async def record(_bot, payload: dict) -> None:
+        lateness.append(time.time() - payload['due'])
+        fired[payload['n']] += 1
+        if len(lateness) == args.jobs:
+            done.set()
+
+    after = JobScheduler()
+    after.register('bench', record)
+    after.start(bot=None)
+    try:
+        await asyncio.wait_for(done.wait(), timeout=args.start + args.spread + 600)
+    except asyncio.TimeoutError:
+        pass
+    # Give a duplicate run the chance to show up before stopping.
+    await asyncio.sleep(1)
+    await after.stop()
+    pending = Database().session.query(DelayedJob).count()
+    if not lateness:
+        sys.exit('FAIL: no job fired after the restart')
+    lateness.sort()
+    p99 = lateness[int(len(lateness) * 0.99) - 1]
+    print(f'after restart: fired {len(lateness)} jobs, lateness p50 {statistics.median(lateness) * 1000:.0f} ms, '
+          f'p99 {p99 * 1000:.0f} ms, max {lateness[-1] * 1000:.0f} ms, early {sum(1 for x in lateness if x < 0)}')
+
+    failures = []
+    if table_bytes / 2**20 > args.max_memory:
+        failures.append(f'stored jobs held {table_bytes / 2**20:.1f} MiB, over {args.max_memory} MiB')
+    if lateness[0] < 0:
+        failures.append(f'{sum(1 for x in lateness if x < 0)} jobs fired early')
+    if lateness[-1] > args.max_lateness:
+        failures.append(f'a job fired {lateness[-1]:.2f} s late, over {args.max_lateness} s')
+    lost = args.jobs - len(fired)
+    if lost or pending:
+        failures.append(f'{lost} jobs never ran, {pending} left in delayed_jobs')
+    twice = sum(1 for count in fired.values() if count > 1)
+    if twice:
+        failures.append(f'{twice} jobs ran more than once')
+    for failure in failures:
+        print(f'FAIL: {failure}')
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
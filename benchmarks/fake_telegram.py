@@ -0,0 +1,269 @@
+"""Local stand-in for the Telegram Bot API, for offline load tests.
+
+Serves ``/bot<token>/<method>`` for the methods the bot uses (getUpdates,
+sendMessage, editMessageText, sendPhoto, sendDocument,
+answerCallbackQuery, getChat, plus getMe, deleteMessage and deleteWebhook)
+with Telegram's response and error shapes, so aiogram raises its usual
+``RetryAfter`` and ``BotBlocked``. It can add latency, answer with flood
+waits (per-chat and global rate limits, or at random), refuse blocked
+users, and feed ``getUpdates`` from a script. ``GET /stats`` returns the
+request counts.
+
+A script is JSON lines, each either a full update or a shorthand:
+``{"user": 5, "text": "/start"}`` for a message, ``{"user": 5, "data":
+"shop"}`` for a callback, with an optional ``"delay"`` in seconds before it.
+
+Point the bot at it with ``TELEGRAM_API_BASE=http://127.0.0.1:8081``:
+
+    python benchmarks/fake_telegram.py --port 8081 --latency 40 --chat-rate 1 --blocked 1003 --updates script.jsonl
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import random
+import time
+from collections import Counter, defaultdict
+
+from aiohttp import web
+
+BOT_USER = {'id': 1, 'is_bot': True, 'first_name': 'Fake bot', 'username': 'fake_bot'}
+CHAT_METHODS = frozenset({'sendMessage', 'editMessageText', 'sendPhoto', 'sendDocument', 'getChat'})
+
+
+class _Bucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def wait(self) -> float:
+        """Take a token and return 0, or return the seconds until one is available."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class FakeTelegram:
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, chat_rate: float = 0.0, chat_burst: int = 3,
+                 global_rate: float = 0.0, retry_share: float = 0.0, retry_after: int = 1,
+                 blocked: set[int] | frozenset = frozenset(), seed: int = 1):
+        self.latency = latency
+        self.jitter = jitter
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.retry_share = retry_share
+        self.retry_after = retry_after
+        self.blocked = set(blocked)
+        self.rng = random.Random(seed)
+        self.requests: Counter = Counter()
+        self.errors: Counter = Counter()
+        self.sent: list[tuple[float, dict]] = []
+        self._global = _Bucket(global_rate, global_rate) if global_rate else None
+        self._chats: dict[int, _Bucket] = {}
+        self._message_ids: dict[int, itertools.count] = defaultdict(lambda: itertools.count(1))
+        self._update_ids = itertools.count(1)
+        self._updates: list[dict] = []
+        self._arrived = asyncio.Event()
+
+    def push_update(self, update: dict) -> dict:
+        """Queue an update (or shorthand, see the module docstring) for getUpdates."""
+        update = self._expand(update)
+        self._updates.append(update)
+        self._arrived.set()
+        return update
+
+    async def play(self, script: list[dict]) -> None:
+        """Push scripted updates, sleeping each one's ``delay`` first."""
+        for entry in script:
+            await asyncio.sleep(entry.get('delay', 0))
+            self.push_update(entry)
+
+    def _expand(self, entry: dict) -> dict:
+        update_id = next(self._update_ids)
+        if 'user' not in entry:
+            return {key: value for key, value in entry.items() if key != 'delay'} | {'update_id': update_id}
+        user = {'id': entry['user'], 'is_bot': False, 'first_name': f"user{entry['user']}",
+                'username': f"user{entry['user']}"}
+        chat = {'id': entry['user'], 'type': 'private', 'first_name': user['first_name']}
+        message = {'message_id': next(self._message_ids[entry['user']]), 'date': int(time.time()),
+                   'chat': chat, 'from': user, 'text': entry.get('text', '')}
+        if 'data' in entry:
+            bot_message = dict(message, **{'from': BOT_USER, 'message_id': entry.get('message_id', 1)})
+            return {'update_id': update_id, 'callback_query': {
+                'id': str(update_id), 'from': user, 'chat_instance': str(entry['user']),
+                'message': bot_message, 'data': entry['data']}}
+        return {'update_id': update_id, 'message': message}
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_route('*', '/bot{token}/{method}', self._handle)
+        app.router.add_get('/stats', self._stats)
+        return app
+
+    async def _stats(self, request: web.Request) -> web.Response:
+        return web.json_response({'requests': self.requests, 'errors': self.errors, 'pending_updates': len(self._updates)})
+
+    async def _params(self, request: web.Request) -> dict:
+        params = dict(request.query)
+        if request.content_type == 'application/json':
+            params.update(await request.json())
+        elif request.can_read_body:
+            for key, value in (await request.post()).items():
+                params[key] = value if isinstance(value, str) else getattr(value, 'filename', None) or key
+        return params
+
+    @staticmethod
+    def _ok(result) -> web.Response:
+        return web.json_response({'ok': True, 'result': result})
+
+    def _error(self, method: str, code: int, description: str, **parameters) -> web.Response:
+        self.errors[f'{method} {code}'] += 1
+        body = {'ok': False, 'error_code': code, 'description': description}
+        if parameters:
+            body['parameters'] = parameters
+        return web.json_response(body, status=code)
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info['method']
+        self.requests[method] += 1
+        params = await self._params(request)
+        handler = getattr(self, f'_{method}', None)
+        if handler is None:
+            return self._error(method, 404, 'Not Found: method not found')
+        if method == 'getUpdates':
+            return await handler(params)
+        if self.latency or self.jitter:
+            await asyncio.sleep(self.latency + self.rng.uniform(0, self.jitter))
+        if method in CHAT_METHODS:
+            chat_id = int(params.get('chat_id', 0))
+            if chat_id in self.blocked:
+                return self._error(method, 403, 'Forbidden: bot was blocked by the user')
+            wait = self._flood_wait(chat_id)
+            if wait:
+                return self._error(method, 429, f'Too Many Requests: retry after {wait}', retry_after=wait)
+        return self._ok(await handler(params))
+
+    def _flood_wait(self, chat_id: int) -> int:
+        if self.retry_share and self.rng.random() < self.retry_share:
+            return self.retry_after
+        waits = []
+        if self._global:
+            waits.append(self._global.wait())
+        if self.chat_rate:
+            bucket = self._chats.setdefault(chat_id, _Bucket(self.chat_rate, self.chat_burst))
+            waits.append(bucket.wait())
+        return math.ceil(max(waits, default=0.0))
+
+    async def _getUpdates(self, params: dict):
+        offset = int(params.get('offset') or 0)
+        limit = int(params.get('limit') or 100)
+        if offset < 0:
+            self._updates = self._updates[offset:]
+        elif offset:
+            self._updates = [update for update in self._updates if update['update_id'] >= offset]
+        if not self._updates and float(params.get('timeout') or 0) > 0:
+            self._arrived.clear()
+            try:
+                await asyncio.wait_for(self._arrived.wait(), float(params['timeout']))
+            except asyncio.TimeoutError:
+                pass
+        return self._ok(self._updates[:limit])
+
+    def _message(self, params: dict, **content) -> dict:
+        chat_id = int(params['chat_id'])
+        chat = {'id': chat_id, 'type': 'private' if chat_id > 0 else 'supergroup'}
+        message_id = int(params['message_id']) if 'message_id' in params else next(self._message_ids[chat_id])
+        message = {'message_id': message_id, 'date': int(time.time()), 'chat': chat, 'from': BOT_USER, **content}
+        self.sent.append((time.monotonic(), message))
+        return message
+
+    async def _sendMessage(self, params):
+        return self._message(params, text=params.get('text', ''))
+
+    async def _editMessageText(self, params):
+        if 'inline_message_id' in params:
+            return True
+        return self._message(params, text=params.get('text', ''), edit_date=int(time.time()))
+
+    async def _sendPhoto(self, params):
+        photo = {'file_id': f'photo-{len(self.sent)}', 'file_unique_id': f'p{len(self.sent)}',
+                 'width': 512, 'height': 512}
+        return self._message(params, photo=[photo], caption=params.get('caption', ''))
+
+    async def _sendDocument(self, params):
+        document = {'file_id': f'document-{len(self.sent)}', 'file_unique_id': f'd{len(self.sent)}',
+                    'file_name': params.get('document') if isinstance(params.get('document'), str) else 'file'}
+        return self._message(params, document=document, caption=params.get('caption', ''))
+
+    async def _answerCallbackQuery(self, params):
+        return True
+
+    async def _getChat(self, params):
+        chat_id = int(params['chat_id'])
+        if chat_id < 0:
+            return {'id': chat_id, 'type': 'supergroup', 'title': f'group{-chat_id}'}
+        return {'id': chat_id, 'type': 'private', 'first_name': f'user{chat_id}', 'username': f'user{chat_id}'}
+
+    async def _getMe(self, params):
+        return BOT_USER
+
+    async def _deleteMessage(self, params):
+        return True
+
+    async def _deleteWebhook(self, params):
+        return True
+
+
+async def serve(fake: FakeTelegram, host: str, port: int) -> web.AppRunner:
+    """Start serving ``fake``; returns the runner (``await runner.cleanup()`` to stop)."""
+    runner = web.AppRunner(fake.app())
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency', type=float, default=0.0, help='milliseconds added to every call')
+    parser.add_argument('--jitter', type=float, default=0.0, help='up to this many extra milliseconds')
+    parser.add_argument('--chat-rate', type=float, default=0.0, help='messages per second per chat before 429')
+    parser.add_argument('--chat-burst', type=int, default=3)
+    parser.add_argument('--global-rate', type=float, default=0.0, help='messages per second in total before 429')
+    parser.add_argument('--retry-share', type=float, default=0.0, help='share of sends answered with a flood wait')
+    parser.add_argument('--retry-after', type=int, default=1, help='seconds in injected flood waits')
+    parser.add_argument('--blocked', type=int, action='append', default=[], help='user id that blocked the bot')
+    parser.add_argument('--updates', help='JSON lines script fed to getUpdates')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    fake = FakeTelegram(args.latency / 1000, args.jitter / 1000, args.chat_rate, args.chat_burst, args.global_rate,
+                        args.retry_share, args.retry_after, set(args.blocked), args.seed)
+    runner = await serve(fake, args.host, args.port)
+    print(f'Fake Bot API on http://{args.host}:{args.port} (TELEGRAM_API_BASE), stats on /stats')
+    try:
+        if args.updates:
+            with open(args.updates, encoding='utf-8') as file:
+                await fake.play([json.loads(line) for line in file if line.strip()])
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+        print(json.dumps({'requests': fake.requests, 'errors': fake.errors}, indent=2))
+
+
+if __name__ == '__main__':
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
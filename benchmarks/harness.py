@@ -0,0 +1,144 @@
+"""Drive the real handlers offline: seeded data, a local bot and synthetic updates.
+
+:class:`Harness` registers every handler on a dispatcher whose bot answers
+Bot API calls locally, and feeds it ``Message`` and ``CallbackQuery``
+updates the way polling does, so all middlewares run. Each update returns
+an :class:`UpdateSample` with its latency, SQL statements (from the query
+profiler) and Bot API requests. :func:`seed` bulk-inserts a shop at a
+given scale. Call :func:`common.use_temporary_database` first.
+"""
+
+from __future__ import annotations
+
+import datetime
+import random
+import time
+from dataclasses import dataclass, field
+
+from common import local_bot
+
+ADMIN_ID = 1
+FIRST_USER_ID = 1000
+
+
+@dataclass
+class UpdateSample:
+    handler: str
+    ms: float
+    queries: int
+    requests: int
+
+
+@dataclass
+class Shop:
+    users: list[int]
+    categories: list[str]
+    leaves: list[str]
+    items: list[str]
+    stock: dict[str, int] = field(default_factory=dict)
+
+
+def seed(users: int, categories: int, items: int, stock: int, purchases: int, rng: random.Random) -> Shop:
+    """Bulk-insert a shop: an owner, ``users`` customers with balance and a two-level catalog.
+
+    ``categories`` top-level categories get five subcategories each; ``items``
+    goods are spread over the subcategories with ``stock`` values apiece, and
+    ``purchases`` past sales with matching operations feed the statistics.
+    """
+    from bot.database import Database
+    from bot.database.methods import create_category, get_role_id_by_name
+    from bot.database.models import BoughtGoods, Goods, ItemValues, Operations, User
+
+    session = Database().session
+    now = datetime.datetime.now()
+    registered = now.strftime('%Y-%m-%d %H:%M:%S')
+    owner = get_role_id_by_name('OWNER')
+    user_ids = [FIRST_USER_ID + n for n in range(users)]
+    session.execute(User.__table__.insert(), [
+        {'telegram_id': ADMIN_ID, 'role_id': owner, 'balance': 0, 'language': 'en', 'registration_date': registered},
+        *({'telegram_id': user_id, 'role_id': 1, 'balance': 10_000, 'language': 'en', 'username': f'user{user_id}',
+           'registration_date': registered} for user_id in user_ids),
+    ])
+    session.commit()
+
+    roots, leaves = [], []
+    for root in range(categories):
+        roots.append(f'cat{root}')
+        create_category(f'cat{root}', title=f'Category {root}')
+        for sub in range(5):
+            leaves.append(f'cat{root}-{sub}')
+            create_category(f'cat{root}-{sub}', f'cat{root}', title=f'Sub {root}.{sub}')
+    names = [f'{leaves[n % len(leaves)]}-item{n}' for n in range(items)]
+    if names:
+        session.execute(Goods.__table__.insert(), [
+            {'name': name, 'description': 'd', 'price': 5.0 + n % 20, 'category_name': leaves[n % len(leaves)]}
+            for n, name in enumerate(names)
+        ])
+    if names and stock:
+        session.execute(ItemValues.__table__.insert(), [
+            {'item_name': name, 'value': f'KEY-{name}-{v}', 'is_infinity': False}
+            for name in names for v in range(stock)
+        ])
+    sold, operations = [], []
+    for n in range(purchases):
+        when = (now - datetime.timedelta(minutes=n * 7)).strftime('%Y-%m-%d %H:%M:%S')
+        buyer = rng.choice(user_ids)
+        sold.append({'item_name': rng.choice(names), 'value': f'SOLD-{n}', 'price': 5, 'buyer_id': buyer,
+                     'bought_datetime': when, 'unique_id': n + 1})
+        operations.append({'user_id': buyer, 'operation_value': 5, 'operation_time': when})
+    if sold:
+        session.execute(BoughtGoods.__table__.insert(), sold)
+        session.execute(Operations.__table__.insert(), operations)
+    session.commit()
+    return Shop(user_ids, roots, leaves, names, {name: stock for name in names})
+
+
+class Harness:
+    def __init__(self):
+        from aiogram import Dispatcher
+        from bot.database import Database
+        from bot.handlers import register_all_handlers
+        from bot.misc import TgConfig
+        from bot.utils.query_profiler import QueryProfilerMiddleware, profile_engine
+
+        self.requests: dict[str, int] = {}
+        self.profiles = []
+        self.bot = local_bot(self.requests)
+        self.dp = Dispatcher(self.bot)
+        Dispatcher.set_current(self.dp)
+        profile_engine(Database().engine)
+        self.dp.middleware.setup(QueryProfilerMiddleware(repeat_warning=10 ** 9, on_profile=self.profiles.append))
+        register_all_handlers(self.dp)
+        TgConfig.RATE_LIMIT_MAX_CALLS = float('inf')
+        self.update_id = 0
+
+    def _message(self, user_id: int, text: str) -> dict:
+        return {
+            'message_id': self.update_id, 'date': int(time.time()), 'text': text,
+            'chat': {'id': user_id, 'type': 'private'},
+            'from': {'id': user_id, 'is_bot': False, 'first_name': f'user{user_id}', 'username': f'user{user_id}'},
+        }
+
+    async def _feed(self, **payload) -> UpdateSample:
+        from aiogram import types
+
+        self.update_id += 1
+        update = types.Update(update_id=self.update_id, **payload)
+        requests = sum(self.requests.values())
+        started = time.perf_counter()
+        await self.dp.process_updates([update])
+        ms = (time.perf_counter() - started) * 1000
+        profile = self.profiles.pop() if self.profiles else None
+        self.profiles.clear()
+        return UpdateSample(profile.handler if profile else 'none', ms,
+                            profile.queries if profile else 0, sum(self.requests.values()) - requests)
+
+    async def message(self, user_id: int, text: str) -> UpdateSample:
+        return await self._feed(message=self._message(user_id, text))
+
+    async def callback(self, user_id: int, data: str) -> UpdateSample:
+        message = self._message(user_id, '')
+        return await self._feed(callback_query={
+            'id': str(self.update_id), 'from': message['from'], 'chat_instance': '1',
+            'message': message, 'data': data,
+        })
@@ -0,0 +1,91 @@
+"""Duplicate stock values: the ``(item_name, value_hash)`` index vs a value scan.
+
+First replays the migration on a copy of the old schema (no ``value_hash``
+column, repeated values) and checks the backfill. Then, for growing stock
+sizes with large text values, times rejecting a duplicate through the unique
+index against finding it by comparing ``value`` as the handlers used to.
+
+    python benchmarks/item_value_hash.py --sizes 1000 10000 100000 --value-size 2048
+"""
+
+from __future__ import annotations
+
+import argparse
+
+from common import measure, use_temporary_database
+
+
+def _check_migration() -> None:
+    from sqlalchemy import text
+    from bot.database import Database
+    from bot.database.methods import create_category, create_item
+    from bot.database.models import register_models
+
+    legacy = ('a', 'b', 'a', ' b ', 'c')
+    create_category('legacy')
+    create_item('old', 'd', 1.0, 'legacy')
+    Database().session.close()
+    engine = Database().engine
+    with engine.begin() as connection:
+        # The table as it was before value_hash existed.
+        connection.execute(text("DROP TABLE item_values"))
+        connection.execute(text(
+            "CREATE TABLE item_values (id INTEGER NOT NULL PRIMARY KEY, "
+            "item_name VARCHAR(100) NOT NULL REFERENCES goods (name), value TEXT, is_infinity BOOLEAN NOT NULL)"
+        ))
+        connection.execute(
+            text("INSERT INTO item_values (item_name, value, is_infinity) VALUES ('old', :value, 0)"),
+            [{'value': value} for value in legacy],
+        )
+        # The new database already recorded the migration; forget it so it replays.
+        connection.execute(text("DELETE FROM schema_version WHERE name = 'item_values.value_hash'"))
+    register_models()
+    with engine.connect() as connection:
+        hashed = connection.execute(text(
+            "SELECT COUNT(*) FROM item_values WHERE item_name = 'old' AND value_hash IS NOT NULL"
+        )).scalar()
+        kept = connection.execute(text("SELECT COUNT(*) FROM item_values WHERE item_name = 'old'")).scalar()
+        index = connection.execute(text(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'index' AND name = 'uq_item_value_hash'"
+        )).scalar()
+    print(f'migration: kept {kept} legacy rows, hashed {hashed} distinct values, unique index present: {bool(index)}')
+    if kept != len(legacy) or hashed != len({value.strip() for value in legacy}) or not index:
+        raise SystemExit('FAIL: the value_hash migration did not backfill the legacy rows')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--value-size', type=int, default=2048, help='characters per stock value')
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    use_temporary_database()
+    from bot.database import Database
+    from bot.database.methods import add_item_values, add_values_to_item, create_category, create_item
+    from bot.database.models import ItemValues
+
+    _check_migration()
+    create_category('bench')
+    padding = 'x' * args.value_size
+    print(f'{"values":>8} {"index reject":>14} {"value scan":>12}')
+    for size in args.sizes:
+        item = f'item-{size}'
+        create_item(item, 'd', 1.0, 'bench')
+        for start in range(0, size, 5_000):
+            add_item_values(item, [f'{n:010d}{padding}' for n in range(start, min(size, start + 5_000))])
+        duplicate = f'{size // 2:010d}{padding}'
+        session = Database().session
+
+        def reject() -> None:
+            assert add_values_to_item(item, duplicate, False) is False
+
+        def scan() -> None:
+            assert session.query(ItemValues.id).filter(
+                ItemValues.item_name == item, ItemValues.value == duplicate).first() is not None
+
+        print(f'{size:>8} {measure(reject, args.repeat):>11.0f} us {measure(scan, max(1, args.repeat // 20)):>9.0f} us')
+
+
+if __name__ == '__main__':
+    main()
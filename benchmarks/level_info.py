@@ -0,0 +1,36 @@
+"""Micro-benchmark for ``get_level_info``.
+
+Compares the cached settings path with a cold registry, which re-reads and
+re-parses the ``level_settings`` row the way every call used to.
+
+    python benchmarks/level_info.py --calls 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+
+from common import measure, use_temporary_database
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calls', type=int, default=5000)
+    args = parser.parse_args()
+
+    use_temporary_database()
+    from bot.database.methods.settings_registry import settings_registry
+    from bot.utils.level import get_level_info
+
+    def cold() -> None:
+        settings_registry.invalidate('levels')
+        get_level_info(37, 'en')
+
+    cold_us = measure(cold, args.calls)
+    warm_us = measure(lambda: get_level_info(37, 'en'), args.calls)
+    print(f'get_level_info, settings re-parsed: {cold_us:8.1f} us/call')
+    print(f'get_level_info, cached settings:    {warm_us:8.1f} us/call')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""Metrics endpoint: drive synthetic updates, then scrape ``/metrics``.
+
+Registers every handler with the metrics middleware and the SQLAlchemy
+hooks, feeds N synthetic users through /start, the captcha and a few menu
+callbacks with a bot that answers Bot API calls locally, then scrapes the
+metrics server over HTTP and checks the update, query and API request
+series. Reports the time per update and the slowest handlers.
+
+    python benchmarks/metrics_endpoint.py --users 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import threading
+import time
+import urllib.request
+
+from common import local_bot, use_temporary_database
+
+CALLBACKS = ('profile', 'shop', 'rules', 'help', 'back_to_menu')
+
+
+def _samples(text: str) -> dict[str, float]:
+    values = {}
+    for line in text.splitlines():
+        if line and not line.startswith('#'):
+            name, value = line.rsplit(' ', 1)
+            values[name] = float(value)
+    return values
+
+
+def _total(samples: dict[str, float], prefix: str) -> float:
+    return sum(value for name, value in samples.items() if name.startswith(prefix))
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=50)
+    args = parser.parse_args()
+
+    use_temporary_database()
+    from aiogram import Dispatcher, types
+    from werkzeug.serving import make_server
+    from bot.database import Database
+    from bot.handlers import register_all_handlers
+    from bot.metrics_server import app
+    from bot.misc import TgConfig
+    from bot.utils.metrics import MetricsMiddleware, instrument_engine
+
+    bot = local_bot()
+    dp = Dispatcher(bot)
+    Dispatcher.set_current(dp)
+    instrument_engine(Database().engine)
+    dp.middleware.setup(MetricsMiddleware())
+    register_all_handlers(dp)
+    TgConfig.RATE_LIMIT_MAX_CALLS = float('inf')
+
+    updates = 0
+
+    async def feed(user_id: int, **payload) -> None:
+        nonlocal updates
+        updates += 1
+        await dp.process_updates([types.Update(update_id=updates, **payload)])
+
+    def message(user_id: int, text: str) -> dict:
+        user = {'id': user_id, 'is_bot': False, 'first_name': f'user{user_id}'}
+        return {'message_id': updates, 'date': 0, 'chat': {'id': user_id, 'type': 'private'},
+                'from': user, 'text': text}
+
+    started = time.perf_counter()
+    for user_id in range(1000, 1000 + args.users):
+        await feed(user_id, message=message(user_id, '/start'))
+        answer = TgConfig.STATE.get(f'{user_id}_captcha_answer')
+        await feed(user_id, message=message(user_id, str(answer)))
+        for data in CALLBACKS:
+            call = {'id': str(updates), 'from': message(user_id, '')['from'], 'chat_instance': '1',
+                    'message': message(user_id, ''), 'data': data}
+            await feed(user_id, callback_query=call)
+    per_update_ms = (time.perf_counter() - started) / updates * 1000
+
+    server = make_server('127.0.0.1', 0, app)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_port}/metrics'
+    with urllib.request.urlopen(url) as response:
+        content_type = response.headers['Content-Type']
+        body = response.read().decode()
+    server.shutdown()
+
+    samples = _samples(body)
+    handled = _total(samples, 'bot_update_seconds_count')
+    queries = _total(samples, 'bot_db_query_seconds_count')
+    requests = _total(samples, 'bot_api_requests_total')
+    errors = _total(samples, 'bot_update_errors_total')
+    assert content_type.startswith('text/plain; version=0.0.4'), content_type
+    assert handled == updates, (handled, updates)
+    assert queries > 0 and requests > 0
+    assert 'bot_send_queue_depth 0' in body and 'bot_payment_polls_waiting 0' in body
+
+    slowest = sorted(
+        ((samples[name.replace('_count', '_sum', 1)] / value, name) for name, value in samples.items()
+         if name.startswith('bot_update_seconds_count')), reverse=True)[:3]
+    print(f'{updates} updates from {args.users} users, {per_update_ms:.2f} ms per update including handlers')
+    print(f'scraped {len(body.splitlines())} lines: {handled:.0f} updates timed, {errors:.0f} errors, '
+          f'{queries:.0f} SQL statements, {requests:.0f} Bot API requests')
+    for mean, name in slowest:
+        print(f'  {name[len("bot_update_seconds_count"):]} mean {mean * 1000:.2f} ms')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,116 @@
+"""Queries per update, per handler, from the query profiler.
+
+Seeds a catalog with stock, then sends N synthetic users through /start,
+the captcha, the shop tree down to an item, their profile and the home
+menu with every handler registered and the profiler middleware installed.
+Prints statement counts and time per handler and the most repeated
+statement shapes (likely N+1 patterns).
+
+With ``--budget`` the profiler runs in strict mode: any update whose
+handler runs more statements than the budget fails the run.
+
+    python benchmarks/query_budget.py --users 20 --budget 60
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import sys
+from collections import defaultdict
+
+from common import local_bot, use_temporary_database
+
+
+def _seed() -> list[str]:
+    """Create three top-level categories of ten subcategories with stocked items; return the callback path."""
+    from bot.database import Database
+    from bot.database.methods import create_category
+    from bot.database.models import Goods, ItemValues
+
+    goods, values = [], []
+    for root in range(3):
+        create_category(f'root{root}', title=f'Root {root}')
+        for sub in range(10):
+            category = f'root{root}-{sub}'
+            create_category(category, f'root{root}', title=f'Sub {root}.{sub}')
+            for n in range(15):
+                item = f'{category}-item{n}'
+                goods.append({'name': item, 'description': 'd', 'price': 5.0, 'category_name': category})
+                values.extend({'item_name': item, 'value': f'KEY-{item}-{v}', 'is_infinity': False}
+                              for v in range(3))
+    session = Database().session
+    session.execute(Goods.__table__.insert(), goods)
+    session.execute(ItemValues.__table__.insert(), values)
+    session.commit()
+    return ['shop', 'category_root0', 'category_root0-1', 'item_root0-1-item3', 'profile', 'home_menu']
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--budget', type=int, default=None, help='fail when an update runs more statements')
+    parser.add_argument('--repeat', type=int, default=10, help='warn at this many runs of one statement shape')
+    args = parser.parse_args()
+
+    use_temporary_database()
+    from aiogram import Dispatcher, types
+    from bot.database import Database
+    from bot.handlers import register_all_handlers
+    from bot.misc import TgConfig
+    from bot.utils.query_profiler import QueryBudgetExceeded, QueryProfilerMiddleware, profile_engine
+
+    callbacks = _seed()
+    profiles = []
+    bot = local_bot()
+    dp = Dispatcher(bot)
+    Dispatcher.set_current(dp)
+    profile_engine(Database().engine)
+    dp.middleware.setup(QueryProfilerMiddleware(args.repeat, default_budget=args.budget,
+                                                strict=args.budget is not None, on_profile=profiles.append))
+    register_all_handlers(dp)
+    TgConfig.RATE_LIMIT_MAX_CALLS = float('inf')
+
+    updates = 0
+    failures: list[str] = []
+
+    async def feed(**payload) -> None:
+        nonlocal updates
+        updates += 1
+        try:
+            await dp.process_updates([types.Update(update_id=updates, **payload)])
+        except QueryBudgetExceeded as e:
+            failures.append(str(e))
+
+    def message(user_id: int, text: str) -> dict:
+        user = {'id': user_id, 'is_bot': False, 'first_name': f'user{user_id}'}
+        return {'message_id': updates, 'date': 0, 'chat': {'id': user_id, 'type': 'private'},
+                'from': user, 'text': text}
+
+    for user_id in range(1000, 1000 + args.users):
+        await feed(message=message(user_id, '/start'))
+        await feed(message=message(user_id, str(TgConfig.STATE.get(f'{user_id}_captcha_answer'))))
+        for data in callbacks:
+            await feed(callback_query={'id': str(updates), 'from': message(user_id, '')['from'],
+                                       'chat_instance': '1', 'message': message(user_id, ''), 'data': data})
+
+    by_handler = defaultdict(list)
+    for profile in profiles:
+        by_handler[profile.handler].append(profile)
+    print(f'{updates} updates from {args.users} users')
+    print(f'{"handler":<34} {"updates":>7} {"queries":>8} {"max":>5} {"ms":>7}  most repeated statement')
+    for handler, runs in sorted(by_handler.items(), key=lambda entry: -max(p.queries for p in entry[1])):
+        worst = max(runs, key=lambda p: p.queries)
+        shape, count = worst.shapes.most_common(1)[0] if worst.shapes else ('', 0)
+        print(f'{handler:<34} {len(runs):>7} {statistics.mean(p.queries for p in runs):>8.1f} '
+              f'{worst.queries:>5} {statistics.mean(p.seconds for p in runs) * 1000:>7.2f}  {count}x {shape[:60]}')
+    if failures:
+        print(f'\n{len(failures)} updates over the budget of {args.budget} statements:')
+        for failure in sorted(set(failures)):
+            print(f'  {failure}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
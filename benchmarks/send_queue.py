@@ -0,0 +1,129 @@
+"""Send queue: pacing and priorities against a bot that records sends.
+
+A fake bot records the time of every request instead of calling Telegram.
+A bulk broadcast runs while a user keeps sending interactive messages and
+one chat answers with a flood wait. Reports the busiest one-second window,
+the worst per-chat burst, interactive latency and the flood-wait retry, and
+exits 1 if a global or per-chat limit was exceeded, a bulk send went out
+ahead of a waiting interactive one, or the flood-waited send was dropped or
+retried before its ``retry_after``.
+
+    python benchmarks/send_queue.py --chats 300 --interactive 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import bisect
+import statistics
+import sys
+import time
+from collections import defaultdict
+
+from common import use_temporary_database
+
+INTERACTIVE_CHAT = 1
+FLOOD_CHAT = 2
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--chats', type=int, default=300, help='bulk broadcast recipients')
+    parser.add_argument('--interactive', type=int, default=20, help='interactive messages during the broadcast')
+    args = parser.parse_args()
+
+    use_temporary_database()
+    from aiogram.utils.exceptions import RetryAfter
+    from bot.utils.send_queue import (
+        BULK, GLOBAL_BURST, GLOBAL_RATE, PRIVATE_CHAT_BURST, PRIVATE_CHAT_RATE,
+        QueuedBot, send_priority, send_queue,
+    )
+
+    sent: list[tuple[float, int]] = []
+    flooded: list[float] = []
+
+    class RecordingBot(QueuedBot):
+        async def _direct_request(self, method, data=None, files=None, **kwargs):
+            chat_id = int(data['chat_id'])
+            now = time.monotonic()
+            if chat_id == FLOOD_CHAT and not flooded:
+                flooded.append(now)
+                raise RetryAfter(1)
+            sent.append((now, chat_id))
+            return {'message_id': len(sent), 'date': 0, 'chat': {'id': chat_id, 'type': 'private'}, 'text': ''}
+
+    bot = RecordingBot(token='123456:' + 'A' * 35)
+    send_queue.start()
+    started = time.monotonic()
+
+    async def broadcast() -> None:
+        with send_priority(BULK):
+            await asyncio.gather(*(
+                bot.send_message(chat_id, 'news') for chat_id in range(FLOOD_CHAT, FLOOD_CHAT + args.chats)
+            ))
+
+    submitted: list[float] = []
+
+    async def interactive() -> list[float]:
+        latencies = []
+        for _ in range(args.interactive):
+            await asyncio.sleep(1.0)
+            before = time.monotonic()
+            submitted.append(before)
+            await bot.send_message(INTERACTIVE_CHAT, 'reply')
+            latencies.append(time.monotonic() - before)
+        return latencies
+
+    _, latencies = await asyncio.gather(broadcast(), interactive())
+    elapsed = time.monotonic() - started
+    await send_queue.stop()
+
+    times = sorted(at for at, _ in sent)
+    busiest = max(bisect.bisect_right(times, at + 1.0) - i for i, at in enumerate(times))
+    per_chat: dict[int, list[float]] = defaultdict(list)
+    for at, chat_id in sent:
+        per_chat[chat_id].append(at)
+    worst_chat = 0.0
+    for stamps in per_chat.values():
+        first = stamps[0]
+        for n, at in enumerate(stamps, start=1):
+            allowed = PRIVATE_CHAT_BURST + PRIVATE_CHAT_RATE * (at - first)
+            worst_chat = max(worst_chat, n / allowed)
+    retried = [at for at, chat_id in sent if chat_id == FLOOD_CHAT]
+    # Bulk sends that went out while an interactive send was already queued.
+    # One may be mid-dispatch when the interactive send arrives.
+    replies = [at for at, chat_id in sent if chat_id == INTERACTIVE_CHAT]
+    overtaken = max((sum(1 for at, chat_id in sent if chat_id != INTERACTIVE_CHAT and queued < at < reply)
+                     for queued, reply in zip(submitted, replies)), default=0)
+
+    print(f'{len(sent)} sends in {elapsed:.1f} s')
+    print(f'busiest 1 s window: {busiest} sends (limit {GLOBAL_RATE + GLOBAL_BURST:.0f} incl. burst)')
+    print(f'worst per-chat use of its bucket: {worst_chat:.2f} (<= 1.00 is within limits)')
+    print(f'interactive latency during broadcast: p50 {statistics.median(latencies) * 1000:.0f} ms, '
+          f'max {max(latencies) * 1000:.0f} ms')
+    print(f'most bulk sends ahead of a queued interactive send: {overtaken}')
+    if retried and flooded:
+        print(f'flood-waited chat retried after {retried[0] - flooded[0]:.2f} s (retry_after 1 s)')
+    else:
+        print('flood-waited chat was not retried')
+
+    failures = []
+    if busiest > GLOBAL_RATE + GLOBAL_BURST:
+        failures.append('global rate exceeded')
+    if worst_chat > 1.0 + 1e-6:
+        failures.append('per-chat rate exceeded')
+    if overtaken > 1:
+        failures.append('an interactive send waited behind bulk sends')
+    if not (retried and flooded):
+        failures.append('the flood-waited send was dropped')
+    elif retried[0] - flooded[0] < 1.0:
+        failures.append('the flood-waited send was retried before its retry_after')
+    for failure in failures:
+        print(f'FAIL: {failure}')
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,113 @@
+"""Startup time: dependency check, imports and schema setup, each in a fresh interpreter.
+
+Measures the phases ``run.py`` goes through before polling starts:
+
+- ``requirements``: ``run.ensure_requirements`` (``find_spec``) next to the
+  old check that imported every package in ``REQUIRED_MODULES``;
+- ``import``: loading ``bot.main`` and ``bot.ipn_server``, and whether a
+  payment SDK got imported along the way;
+- ``register_models`` on a new database, on an up-to-date one and on one
+  from before ``schema_version`` (every migration checked once).
+
+Each sample is a new ``python`` process, so import caches do not carry
+over; the median of ``--repeat`` runs is printed.
+
+    python benchmarks/startup.py --repeat 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from common import ROOT
+
+_REQUIREMENTS = """
+import importlib, importlib.util, json, time
+import run
+started = time.perf_counter()
+missing = [module for module in run.REQUIRED_MODULES if importlib.util.find_spec(module) is None]
+find_spec = time.perf_counter() - started
+started = time.perf_counter()
+for module in run.REQUIRED_MODULES:
+    try:
+        importlib.import_module(module)
+    except Exception:
+        pass
+imported = time.perf_counter() - started
+print(json.dumps({'find_spec': find_spec, 'import_all': imported, 'missing': missing}))
+"""
+
+_IMPORT = """
+import json, sys, time
+started = time.perf_counter()
+import bot.main, bot.ipn_server
+elapsed = time.perf_counter() - started
+sdks = sorted(m for m in ('yoomoney', 'requests', 'solana', 'xrpl', 'web3', 'bitcoinrpc') if m in sys.modules)
+print(json.dumps({'import': elapsed, 'sdks': sdks}))
+"""
+
+_REGISTER = """
+import json, time
+import bot.database.methods
+from bot.database.models import register_models
+from bot.database import Database
+from sqlalchemy.orm import configure_mappers
+configure_mappers()  # a one-off cost the first query pays anyway
+if {legacy}:
+    register_models()
+    with Database().engine.begin() as connection:
+        connection.exec_driver_sql('DROP TABLE schema_version')
+started = time.perf_counter()
+applied = register_models()
+print(json.dumps({{'register_models': time.perf_counter() - started, 'applied': len(applied)}}))
+"""
+
+
+def _run(code: str, workdir: str) -> dict:
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    result = subprocess.run([sys.executable, '-c', code], cwd=workdir, env=env, capture_output=True, text=True)
+    if result.returncode:
+        raise SystemExit(result.stderr)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def _median(samples: list[dict], key: str) -> float:
+    return statistics.median(sample[key] for sample in samples) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    requirements = [_run(_REQUIREMENTS, ROOT) for _ in range(args.repeat)]
+    print(f"{'requirements (find_spec)':<36} {_median(requirements, 'find_spec'):>9.1f} ms")
+    print(f"{'requirements (import all)':<36} {_median(requirements, 'import_all'):>9.1f} ms")
+    if requirements[0]['missing']:
+        print(f"{'':<36} missing here: {', '.join(requirements[0]['missing'])}")
+
+    with tempfile.TemporaryDirectory(prefix='bot-bench-') as workdir:
+        imports = [_run(_IMPORT, workdir) for _ in range(args.repeat)]
+    print(f"{'import bot.main, bot.ipn_server':<36} {_median(imports, 'import'):>9.1f} ms"
+          f"  payment SDKs loaded: {', '.join(imports[0]['sdks']) or 'none'}")
+
+    for name, legacy, keep in (('new database', False, False), ('up to date', False, True),
+                               ('before schema_version', True, False)):
+        samples = []
+        for _ in range(args.repeat):
+            with tempfile.TemporaryDirectory(prefix='bot-bench-') as workdir:
+                if keep:
+                    _run(_REGISTER.format(legacy=False), workdir)
+                samples.append(_run(_REGISTER.format(legacy=legacy), workdir))
+        print(f"{'register_models, ' + name:<36} {_median(samples, 'register_models'):>9.1f} ms"
+              f"  {samples[0]['applied']} migrations applied")
+
+
+if __name__ == '__main__':
+    main()
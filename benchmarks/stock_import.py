@@ -0,0 +1,72 @@
+"""Stock import: one ``add_values_to_item`` commit per value vs ``import_stock``.
+
+Writes N values (with some duplicates) to a text file, imports them with
+``import_stock`` in chunked transactions and compares that with the
+per-value loop the admin handlers used before, timed on a sample and
+extrapolated to N.
+
+    python benchmarks/stock_import.py --values 100000 --loop-sample 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import time
+
+from common import use_temporary_database
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--values', type=int, default=100_000)
+    parser.add_argument('--loop-sample', type=int, default=5_000,
+                        help='values timed with the per-value loop (0 runs all of them)')
+    parser.add_argument('--duplicates', type=float, default=0.05, help='share of repeated lines in the file')
+    args = parser.parse_args()
+
+    use_temporary_database()
+    from bot.database.methods import add_values_to_item, create_category, create_item, select_item_values_amount
+    from bot.utils.stock_import import import_stock, iter_stock_file
+
+    create_category('bench')
+    create_item('loop', 'd', 1.0, 'bench')
+    create_item('bulk', 'd', 1.0, 'bench')
+
+    unique = int(args.values * (1 - args.duplicates))
+    path = os.path.abspath('stock.txt')
+    with open(path, 'w') as f:
+        for n in range(args.values):
+            f.write(f'KEY-{n % unique:08d}-XXXX-XXXX\n')
+
+    sample = args.loop_sample or args.values
+    started = time.perf_counter()
+    for n in range(sample):
+        add_values_to_item('loop', f'KEY-{n:08d}', False)
+    loop_s = (time.perf_counter() - started) * args.values / sample
+
+    reports = []
+
+    async def progress(added: int, skipped: int) -> None:
+        reports.append(added)
+
+    started = time.perf_counter()
+    added, skipped = await import_stock('bulk', iter_stock_file(path), progress)
+    bulk_s = time.perf_counter() - started
+    stored = select_item_values_amount('bulk')
+
+    label = 'extrapolated' if sample != args.values else 'measured'
+    print(f'per-value loop, {args.values} values ({label} from {sample}): {loop_s:8.2f} s')
+    print(f'import_stock,   {args.values} values:                        {bulk_s:8.2f} s '
+          f'({added} added, {skipped} duplicates skipped, {len(reports)} progress edits)')
+    print(f'stored {stored} values; speedup x{loop_s / bulk_s:.0f}')
+
+    # A second import of the same file only finds duplicates.
+    started = time.perf_counter()
+    added, skipped = await import_stock('bulk', iter_stock_file(path))
+    print(f're-import of the same file: {added} added, {skipped} skipped in {time.perf_counter() - started:.2f} s')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+"""Stock report: per-item tree walk vs one GROUP BY query rendered to CSV.
+
+Builds a catalog of top-level categories, subcategories and items with a
+few stock values each, then times the old walk (``get_item_info`` and a
+count query per item) against ``get_stock_report_rows`` plus CSV rendering.
+
+    python benchmarks/stock_report.py --items 10000 --values-per-item 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from common import use_temporary_database
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=10_000)
+    parser.add_argument('--roots', type=int, default=20)
+    parser.add_argument('--subs', type=int, default=10, help='subcategories per top-level category')
+    parser.add_argument('--values-per-item', type=int, default=3)
+    args = parser.parse_args()
+
+    use_temporary_database()
+    from bot.database import Database
+    from bot.database.models import Categories, Goods, ItemValues
+    from bot.database.methods import (
+        get_all_category_names, get_all_item_names, get_all_subcategories, get_item_info,
+        get_stock_report_rows, select_item_values_amount,
+    )
+    from bot.utils import display_name
+    from bot.utils.stock_report import render_stock_csv
+
+    session = Database().session
+    categories, goods, values = [], [], []
+    for r in range(args.roots):
+        root = f'root{r}'
+        categories.append({'name': root, 'title': root, 'parent_name': None})
+        for s in range(args.subs):
+            categories.append({'name': f'{root}-sub{s}', 'title': f'{root}-sub{s}', 'parent_name': root})
+    leaves = [c['name'] for c in categories if c['parent_name']]
+    for n in range(args.items):
+        name = f'item{n:06d}'
+        goods.append({'name': name, 'description': 'd', 'price': 1.0 + n % 50, 'category_name': leaves[n % len(leaves)]})
+        values.extend({'item_name': name, 'value': f'{name}-{v}', 'is_infinity': False}
+                      for v in range(args.values_per_item))
+    session.execute(Categories.__table__.insert(), categories)
+    session.execute(Goods.__table__.insert(), goods)
+    session.execute(ItemValues.__table__.insert(), values)
+    session.commit()
+
+    started = time.perf_counter()
+    lines = []
+    for category in get_all_category_names():
+        lines.append(category)
+        for sub in get_all_subcategories(category):
+            lines.append(sub)
+            for item in get_all_item_names(sub):
+                info = get_item_info(item)
+                count = select_item_values_amount(item)
+                lines.append(f"{display_name(item)} ({info['price']:.2f}€, {count})")
+        for item in get_all_item_names(category):
+            info = get_item_info(item)
+            count = select_item_values_amount(item)
+            lines.append(f"{display_name(item)} ({info['price']:.2f}€, {count})")
+    walk_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    rows = get_stock_report_rows()
+    query_s = time.perf_counter() - started
+    document = render_stock_csv(rows)
+    report_s = time.perf_counter() - started
+
+    assert len(rows) == args.items and sum(row[4] for row in rows) == len(values)
+    print(f'{args.items} items, {len(values)} stock values')
+    for label, seconds in (
+        (f'tree walk, {2 * args.items + len(categories) + 1} queries', walk_s),
+        ('GROUP BY query', query_s),
+        (f'query + CSV ({len(document.getvalue()) / 1024:.0f} KiB)', report_s),
+    ):
+        print(f'{label:<32} {seconds * 1000:8.0f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+"""Hot-path benchmark suite: latency and queries per update, as JSON.
+
+Seeds a temporary database at the given scale and runs each scenario
+through the real handlers with :class:`harness.Harness`:
+
+- ``menu``: home menu and profile;
+- ``catalog``: shop, category, subcategory and item pages;
+- ``checkout``: add to cart, view it, check out and pay from balance;
+- ``broadcast``: an admin broadcast to every user;
+- ``admin_statistics``: the admin statistics view.
+
+Prints one JSON report (p50/p99/mean latency, statements and Bot API
+requests per update, per scenario). Everything runs offline and seeded, so
+two reports from different commits can be compared with ``--compare``.
+
+    python benchmarks/suite.py --users 500 --items 2000 --output before.json
+    python benchmarks/suite.py --users 500 --items 2000 --compare before.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+
+from common import ROOT, use_temporary_database
+from harness import ADMIN_ID, Harness, seed
+
+async def _menu(harness, shop, rng, rounds):
+    samples = []
+    for _ in range(rounds):
+        user_id = rng.choice(shop.users)
+        samples.append(await harness.callback(user_id, 'home_menu'))
+        samples.append(await harness.callback(user_id, 'profile'))
+    return samples
+
+
+async def _catalog(harness, shop, rng, rounds):
+    samples = []
+    for _ in range(rounds):
+        user_id = rng.choice(shop.users)
+        item = rng.choice(shop.items)
+        leaf = item.rsplit('-item', 1)[0]
+        samples.append(await harness.callback(user_id, 'shop'))
+        samples.append(await harness.callback(user_id, f'category_{leaf.split("-")[0]}'))
+        samples.append(await harness.callback(user_id, f'category_{leaf}'))
+        samples.append(await harness.callback(user_id, f'item_{item}'))
+    return samples
+
+
+async def _checkout(harness, shop, rng, rounds):
+    samples = []
+    for _ in range(rounds):
+        user_id = rng.choice(shop.users)
+        item = rng.choice([name for name, left in shop.stock.items() if left])
+        shop.stock[item] -= 1
+        samples.append(await harness.callback(user_id, f'cart_add_{item}'))
+        samples.append(await harness.callback(user_id, 'cart_view'))
+        samples.append(await harness.callback(user_id, 'cart_checkout'))
+        samples.append(await harness.callback(user_id, 'cartpay_BTC'))
+    return samples
+
+
+async def _broadcast(harness, shop, rng, rounds):
+    samples = []
+    for n in range(rounds):
+        await harness.callback(ADMIN_ID, 'send_message')
+        samples.append(await harness.message(ADMIN_ID, f'news {n}'))
+    return samples
+
+
+async def _admin_statistics(harness, shop, rng, rounds):
+    return [await harness.callback(ADMIN_ID, 'statistics') for _ in range(rounds)]
+
+
+SCENARIOS = {
+    'menu': _menu,
+    'catalog': _catalog,
+    'checkout': _checkout,
+    'broadcast': _broadcast,
+    'admin_statistics': _admin_statistics,
+}
+
+
+def _percentile(values: list[float], share: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+
+def _summary(samples) -> dict:
+    ms = [sample.ms for sample in samples]
+    queries = [sample.queries for sample in samples]
+    handlers = sorted({sample.handler for sample in samples})
+    return {
+        'updates': len(samples),
+        'p50_ms': round(statistics.median(ms), 3),
+        'p99_ms': round(_percentile(ms, 0.99), 3),
+        'mean_ms': round(statistics.mean(ms), 3),
+        'queries_per_update': round(statistics.mean(queries), 2),
+        'max_queries': max(queries),
+        'requests_per_update': round(statistics.mean(sample.requests for sample in samples), 2),
+        'handlers': handlers,
+    }
+
+
+def _commit() -> str | None:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _compare(report: dict, baseline: dict) -> None:
+    print(f"\n{'scenario':<18} {'p50 ms':>24} {'p99 ms':>24} {'queries/update':>24}", file=sys.stderr)
+    for name, now in report['scenarios'].items():
+        before = baseline.get('scenarios', {}).get(name)
+        if not before:
+            continue
+        cells = []
+        for key in ('p50_ms', 'p99_ms', 'queries_per_update'):
+            change = (now[key] - before[key]) / before[key] * 100 if before[key] else 0.0
+            cells.append(f'{before[key]:.4g} > {now[key]:.4g} ({change:+.0f}%)')
+        print(f'{name:<18} {cells[0]:>24} {cells[1]:>24} {cells[2]:>24}', file=sys.stderr)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--categories', type=int, default=10, help='top-level categories, five subcategories each')
+    parser.add_argument('--items', type=int, default=500)
+    parser.add_argument('--stock', type=int, default=5, help='stock values per item')
+    parser.add_argument('--purchases', type=int, default=5_000, help='past sales for the statistics view')
+    parser.add_argument('--rounds', type=int, default=50, help='iterations per scenario')
+    parser.add_argument('--scenario', action='append', choices=list(SCENARIOS), help='run only these (repeatable)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    parser.add_argument('--compare', help='a previous JSON report to print changes against')
+    args = parser.parse_args()
+
+    use_temporary_database()
+    rng = random.Random(args.seed)
+    shop = seed(args.users, args.categories, args.items, args.stock, args.purchases, rng)
+    harness = Harness()
+    results = {}
+    for name in args.scenario or SCENARIOS:
+        rounds = max(1, args.rounds // 10) if name == 'broadcast' else args.rounds
+        results[name] = _summary(await SCENARIOS[name](harness, shop, rng, rounds))
+
+    report = {
+        'commit': _commit(),
+        'python': platform.python_version(),
+        'scale': {key: getattr(args, key) for key in ('users', 'categories', 'items', 'stock', 'purchases',
+                                                      'rounds', 'seed')},
+        'scenarios': results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(text + '\n')
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            _compare(report, json.load(file))
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
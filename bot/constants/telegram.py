@@ -0,0 +1,5 @@
+"""Bot API limits the senders split and trim against."""
+
+MESSAGE_LIMIT = 4096
+CAPTION_LIMIT = 1024
+MEDIA_GROUP_SIZE = 10
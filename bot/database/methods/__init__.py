@@ -7,3 +7,7 @@ from bot.database.methods.profile import *
 from bot.database.methods.terms import *
 from bot.database.methods.quests import *
 from bot.database.methods.achievements import *
+from bot.database.methods.reservations import *
+from bot.database.methods.checkout import *
+from bot.database.methods.jobs import *
+from bot.database.methods.search import *
@@ -2,20 +2,32 @@
 
 from __future__ import annotations
 
+import datetime
 import json
+from collections import Counter
+from dataclasses import dataclass
+from typing import Mapping
+
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 from bot.constants.achievements import DEFAULT_ACHIEVEMENTS, ACHIEVEMENT_TYPES
 from bot.database import Database
-from bot.database.models import Achievement
+from bot.database.models import Achievement, BoughtGoods, UserAchievement, UserTermPurchases
 from bot.database.methods.terms import normalise_term_code
+from bot.database.methods.settings_registry import settings_registry, freeze, thaw
 
 __all__ = [
+    'AchievementDefinitions',
+    'get_achievement_definitions',
     'list_achievements',
     'get_achievement',
     'set_achievement_titles',
     'configure_term_achievement',
     'create_custom_achievement',
     'delete_custom_achievement',
+    'term_achievement_targets',
+    'record_term_purchase',
+    'backfill_term_achievements',
 ]
 
 
@@ -28,6 +40,7 @@ def _ensure_entry(code: str) -> Achievement:
         session.add(entry)
         session.commit()
         session.refresh(entry)
+        settings_registry.invalidate('achievements')
     return entry
 
 
@@ -42,14 +55,44 @@ def _merge_defaults(code: str, config: dict) -> dict:
     return merged
 
 
-def list_achievements() -> list[dict]:
+@dataclass(frozen=True)
+class AchievementDefinitions:
+    entries: tuple[Mapping, ...]
+    by_term: Mapping[str, tuple[tuple[str, int], ...]]
+
+
+def _load_achievement_definitions() -> AchievementDefinitions:
     session = Database().session
     entries = session.query(Achievement).order_by(Achievement.code.asc()).all()
     result: list[dict] = []
+    by_term: dict[str, list[tuple[str, int]]] = {}
     for entry in entries:
         config = _merge_defaults(entry.code, entry.config_dict())
         result.append({'code': entry.code, 'config': config})
-    return result
+        if config.get('type') != 'term_purchase' or not config.get('term'):
+            continue
+        try:
+            target = int(config.get('target') or 0)
+        except (TypeError, ValueError):
+            continue
+        if target > 0:
+            by_term.setdefault(config['term'], []).append((entry.code, target))
+    return AchievementDefinitions(
+        entries=freeze(result),
+        by_term=freeze(by_term),
+    )
+
+
+settings_registry.register('achievements', _load_achievement_definitions)
+
+
+def get_achievement_definitions() -> AchievementDefinitions:
+    """Return cached achievement definitions indexed by term."""
+    return settings_registry.get('achievements')
+
+
+def list_achievements() -> list[dict]:
+    return thaw(get_achievement_definitions().entries)
 
 
 def get_achievement(code: str) -> dict | None:
@@ -63,6 +106,7 @@ def get_achievement(code: str) -> dict | None:
 def _update_entry(entry: Achievement, config: dict) -> dict:
     entry.config = json.dumps(config, ensure_ascii=False)
     Database().session.commit()
+    settings_registry.invalidate('achievements')
     return {'code': entry.code, 'config': config}
 
 
@@ -106,6 +150,7 @@ def create_custom_achievement(code: str, titles: dict[str, str], term_code: str,
     session.add(entry)
     session.commit()
     session.refresh(entry)
+    settings_registry.invalidate('achievements')
     configure_term_achievement(normalised_code, term_code, target)
     return set_achievement_titles(normalised_code, titles)
 
@@ -119,4 +164,120 @@ def delete_custom_achievement(code: str) -> bool:
         return False
     session.delete(entry)
     session.commit()
+    settings_registry.invalidate('achievements')
     return True
+
+
+def term_achievement_targets(term_code: str) -> tuple[tuple[str, int], ...]:
+    """Return ``(code, target)`` pairs of term purchase achievements for a term."""
+    return get_achievement_definitions().by_term.get(term_code, ())
+
+
+def _unlock_reached(user_id: int, term_code: str, count: int, achieved_at: str) -> list[str]:
+    # Imported here because ``create`` records term purchases through this module.
+    from bot.database.methods.create import grant_achievement
+
+    reached = [code for code, target in term_achievement_targets(term_code) if count >= target]
+    if not reached:
+        return []
+    session = Database().session
+    owned = {
+        row[0]
+        for row in session.query(UserAchievement.achievement_code).filter(
+            UserAchievement.user_id == user_id,
+            UserAchievement.achievement_code.in_(reached),
+        )
+    }
+    return [
+        code for code in reached
+        if code not in owned and grant_achievement(user_id, code, achieved_at, commit=False)
+    ]
+
+
+def record_term_purchase(user_id: int, term_code: str | None, achieved_at: str,
+                         amount: int = 1) -> list[str]:
+    """Count ``amount`` sales of a termed product and unlock achievements they complete.
+
+    The counter is kept for every term, so an achievement configured later
+    starts from the purchases already made; only achievements configured for
+    ``term_code`` are checked. Nothing is committed; the caller's transaction
+    covers the counter and the unlocks. Returns the codes unlocked by these
+    sales.
+    """
+    if not term_code:
+        return []
+    session = Database().session
+    counters = UserTermPurchases.__table__
+    session.execute(
+        sqlite_insert(counters)
+        .values(user_id=user_id, term_code=term_code, count=amount)
+        .on_conflict_do_update(
+            index_elements=[counters.c.user_id, counters.c.term_code],
+            set_={'count': counters.c.count + amount},
+        )
+    )
+    if not term_achievement_targets(term_code):
+        return []
+    count = session.query(UserTermPurchases.count).filter(
+        UserTermPurchases.user_id == user_id,
+        UserTermPurchases.term_code == term_code,
+    ).scalar() or 0
+    return _unlock_reached(user_id, term_code, int(count), achieved_at)
+
+
+def backfill_term_achievements(chunk_size: int = 5000) -> tuple[int, int]:
+    """Rebuild term purchase counters from ``bought_goods`` and grant missed unlocks.
+
+    Purchases are read in id order, ``chunk_size`` rows at a time, and each
+    chunk is committed on its own. Meant to be run once while the bot is
+    stopped. Returns ``(purchases counted, achievements unlocked)``.
+    """
+    session = Database().session
+    session.query(UserTermPurchases).delete(synchronize_session=False)
+    session.commit()
+    counters = UserTermPurchases.__table__
+    counted = 0
+    last_id = 0
+    while True:
+        rows = (
+            session.query(BoughtGoods.id, BoughtGoods.buyer_id, BoughtGoods.term_code)
+            .filter(BoughtGoods.id > last_id, BoughtGoods.term_code.isnot(None))
+            .order_by(BoughtGoods.id.asc())
+            .limit(chunk_size)
+            .all()
+        )
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        counted += len(rows)
+        chunk = Counter((buyer_id, term_code) for _, buyer_id, term_code in rows)
+        for (buyer_id, term_code), amount in chunk.items():
+            session.execute(
+                sqlite_insert(counters)
+                .values(user_id=buyer_id, term_code=term_code, count=amount)
+                .on_conflict_do_update(
+                    index_elements=[counters.c.user_id, counters.c.term_code],
+                    set_={'count': counters.c.count + amount},
+                )
+            )
+        session.commit()
+
+    achieved_at = datetime.datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+    unlocked = 0
+    last_id = 0
+    while True:
+        rows = (
+            session.query(UserTermPurchases.id, UserTermPurchases.user_id,
+                          UserTermPurchases.term_code, UserTermPurchases.count)
+            .filter(UserTermPurchases.id > last_id)
+            .order_by(UserTermPurchases.id.asc())
+            .limit(chunk_size)
+            .all()
+        )
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        for _, user_id, term_code, count in rows:
+            unlocked += len(_unlock_reached(user_id, term_code, int(count or 0), achieved_at))
+        session.commit()
+    return counted, unlocked
@@ -0,0 +1,209 @@
+"""Database helpers for settling paid carts."""
+
+from __future__ import annotations
+
+import random
+from collections import Counter
+from decimal import Decimal
+from typing import Sequence
+
+from sqlalchemy import func
+
+from bot.database import Database
+from bot.database.models import User, Goods, Categories, BoughtGoods
+from bot.database.methods.create import add_bought_item, grant_achievement
+from bot.database.methods.read import can_get_referral_reward
+from bot.database.methods.update import process_purchase_streak
+from bot.database.methods.quests import record_quest_purchase, redeem_quest_discount
+from bot.database.methods.achievements import record_term_purchase
+from bot.database.methods.reservations import consume_reserved_values
+
+__all__ = ['settle_cart_purchase', 'settle_item_purchase']
+
+
+def settle_cart_purchase(user_id: int, units: Sequence[dict], sold_at: str,
+                         referral_id: int | None = None, referral_percent: float = 0,
+                         invoice_id: str | None = None) -> dict:
+    """Record every sale of a reserved cart in one transaction.
+
+    ``units`` are dicts with ``item_name``, ``value`` and ``amount``. The
+    units reserved under ``invoice_id`` are taken out of stock, and the
+    balance charge, purchase rows, referral credit, streak, lottery tickets,
+    quest and term counters and the first purchase achievement are computed
+    up front and committed together; on error nothing is written and the
+    exception propagates. Returns a summary the caller uses for messaging.
+    """
+    session = Database().session
+    units = [unit for unit in units if unit.get('value')]
+    if not units:
+        raise ValueError('cart has nothing to settle')
+    try:
+        if invoice_id:
+            consume_reserved_values(
+                invoice_id,
+                [unit['value']['id'] for unit in units if not unit['value'].get('is_infinity')],
+                commit=False,
+            )
+        item_names = {unit['value']['item_name'] for unit in units}
+        items = {
+            name: (category, term_code)
+            for name, category, term_code in session.query(
+                Goods.name, Goods.category_name, Goods.term_code
+            ).filter(Goods.name.in_(item_names))
+        }
+        categories = {category for category, _ in items.values() if category}
+        parents = dict(
+            session.query(Categories.name, Categories.parent_name).filter(Categories.name.in_(categories))
+        ) if categories else {}
+        referral_items = set()
+        if referral_id and referral_percent:
+            referral_items = {name for name in item_names if can_get_referral_reward(name)}
+
+        balance_before = session.query(User.balance).filter(User.telegram_id == user_id).scalar() or 0
+        purchases_before = session.query(func.count()).filter(BoughtGoods.buyer_id == user_id).scalar() or 0
+
+        balance = Decimal(str(balance_before))
+        referral_reward = 0.0
+        terms: Counter = Counter()
+        rows = []
+        sales = []
+        for position, unit in enumerate(units, start=1):
+            value_data = unit['value']
+            item_name = value_data['item_name']
+            price = float(unit.get('amount', 0))
+            category, term_code = items.get(item_name, (None, None))
+            unique_id = random.randint(1000000000, 9999999999)
+            balance -= Decimal(str(price))
+            if item_name in referral_items:
+                referral_reward += round(price * referral_percent / 100, 2)
+            if term_code:
+                terms[term_code] += 1
+            rows.append({
+                'item_name': item_name,
+                'value': value_data['value'],
+                'price': price,
+                'buyer_id': user_id,
+                'bought_datetime': sold_at,
+                'unique_id': unique_id,
+                'term_code': term_code,
+            })
+            sales.append({
+                'item_name': item_name,
+                'value': value_data['value'],
+                'price': price,
+                'unique_id': unique_id,
+                'category_name': category,
+                'parent_category': parents.get(category),
+                'term_code': term_code,
+                'balance': float(balance),
+                'purchases': purchases_before + position,
+            })
+        total = float(Decimal(str(balance_before)) - balance)
+
+        session.query(User).filter(User.telegram_id == user_id).update(
+            values={
+                User.balance: User.balance - total,
+                User.lottery_tickets: User.lottery_tickets + len(sales),
+            },
+            synchronize_session=False,
+        )
+        session.execute(BoughtGoods.__table__.insert(), rows)
+        referral_reward = round(referral_reward, 2)
+        if referral_reward:
+            session.query(User).filter(User.telegram_id == referral_id).update(
+                values={User.balance: User.balance + referral_reward}, synchronize_session=False)
+        process_purchase_streak(user_id, commit=False)
+
+        unlocked = []
+        quest_reward = None
+        for term_code, count in terms.items():
+            quest_reward = record_quest_purchase(user_id, term_code, sold_at, amount=count) or quest_reward
+            unlocked.extend(record_term_purchase(user_id, term_code, sold_at, amount=count))
+        if grant_achievement(user_id, 'first_purchase', sold_at, commit=False):
+            unlocked.append('first_purchase')
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+
+    return {
+        'total': total,
+        'balance': float(balance),
+        'purchases_before': purchases_before,
+        'purchases': purchases_before + len(sales),
+        'sales': sales,
+        'referral_reward': referral_reward,
+        'lottery_tickets': len(sales),
+        'quest_reward': quest_reward,
+        'achievements': unlocked,
+    }
+
+
+def settle_item_purchase(user_id: int, value_data: dict, price: float, sold_at: str, invoice_id: str,
+                         gift_to: int | None = None, gift_name: str | None = None,
+                         referral_id: int | None = None, referral_percent: float = 0,
+                         quest_discount: int | None = None) -> dict:
+    """Record the sale of a paid single item invoice in one transaction.
+
+    The unit reserved under ``invoice_id`` is taken out of stock, and the
+    balance charge, purchase rows (the recipient's and a "Gifted to" row for
+    a gift), referral credit, lottery ticket, streak, quest and term
+    counters, quest discount and the first purchase and gift achievements
+    are committed together. If the unit was sold elsewhere after the
+    reservation lapsed, :class:`ValueError` is raised and nothing is
+    written. Returns a summary the caller uses for messaging.
+    """
+    session = Database().session
+    item_name = value_data['item_name']
+    try:
+        consume_reserved_values(invoice_id, [] if value_data['is_infinity'] else [value_data['id']], commit=False)
+        category, term_code = session.query(Goods.category_name, Goods.term_code).filter(
+            Goods.name == item_name).first() or (None, None)
+        parent = session.query(Categories.parent_name).filter(
+            Categories.name == category).scalar() if category else None
+        purchases_before = session.query(func.count()).filter(BoughtGoods.buyer_id == user_id).scalar() or 0
+
+        session.query(User).filter(User.telegram_id == user_id).update(
+            values={
+                User.balance: User.balance - price,
+                User.lottery_tickets: User.lottery_tickets + 1,
+            },
+            synchronize_session=False,
+        )
+        sales = {}
+        if gift_to:
+            sales[gift_to] = add_bought_item(item_name, value_data['value'], price, gift_to, sold_at, term_code,
+                                             commit=False)
+            sales[user_id] = add_bought_item(item_name, f'Gifted to @{gift_name}', price, user_id, sold_at,
+                                             term_code, commit=False)
+        else:
+            sales[user_id] = add_bought_item(item_name, value_data['value'], price, user_id, sold_at, term_code,
+                                             commit=False)
+        referral_reward = 0.0
+        if referral_id and referral_percent and can_get_referral_reward(item_name):
+            referral_reward = round(price * referral_percent / 100, 2)
+            session.query(User).filter(User.telegram_id == referral_id).update(
+                values={User.balance: User.balance + referral_reward}, synchronize_session=False)
+        process_purchase_streak(user_id, commit=False)
+        if quest_discount:
+            redeem_quest_discount(user_id, quest_discount, sold_at, commit=False)
+        unlocked = sales[user_id]['achievements']
+        if grant_achievement(user_id, 'first_purchase', sold_at, commit=False):
+            unlocked.append('first_purchase')
+        if gift_to and grant_achievement(user_id, 'gift_sent', sold_at, commit=False):
+            unlocked.append('gift_sent')
+        balance = session.query(User.balance).filter(User.telegram_id == user_id).scalar() or 0
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+
+    return {
+        'balance': float(balance),
+        'purchases_before': purchases_before,
+        'purchases': purchases_before + 1,
+        'category_name': category,
+        'parent_category': parent,
+        'referral_reward': referral_reward,
+        'sales': sales,
+    }
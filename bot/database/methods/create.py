@@ -4,6 +4,8 @@ import random
 from typing import Sequence
 
 import sqlalchemy.exc
+from sqlalchemy import literal, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 from bot.database.models import (
     User,
@@ -15,13 +17,19 @@ from bot.database.models import (
     UnfinishedOperations,
     PromoCode,
     UserAchievement,
+    AchievementStats,
     StockNotification,
     Reseller,
     ResellerPrice,
     CartItem,
     CategoryPassword,
+    CategoryClosure,
+    item_value_hash,
 )
 from bot.database import Database
+from bot.database.methods.read import invalidate_user_count_cache
+from bot.database.methods.quests import record_quest_purchase
+from bot.database.methods.achievements import record_term_purchase
 
 
 def create_user(telegram_id: int, registration_date, referral_id, role: int = 1,
@@ -43,6 +51,7 @@ def create_user(telegram_id: int, registration_date, referral_id, role: int = 1,
                 User(telegram_id=telegram_id, role_id=role, registration_date=registration_date,
                      referral_id=None, language=language, username=username))
             session.commit()
+        invalidate_user_count_cache()
 
 
 def create_item(item_name: str, item_description: str, item_price: int, category_name: str,
@@ -54,15 +63,36 @@ def create_item(item_name: str, item_description: str, item_price: int, category
     session.commit()
 
 
-def add_values_to_item(item_name: str, value: str, is_infinity: bool) -> None:
+def add_values_to_item(item_name: str, value: str, is_infinity: bool) -> bool:
+    """Add one stock value; False when the item already holds it."""
     session = Database().session
-    if is_infinity is False:
-        session.add(
-            ItemValues(name=item_name, value=value, is_infinity=False))
-    else:
-        session.add(
-            ItemValues(name=item_name, value=value, is_infinity=True))
+    result = session.execute(
+        sqlite_insert(ItemValues.__table__)
+        .values(item_name=item_name, value=value, value_hash=item_value_hash(value), is_infinity=bool(is_infinity))
+        .on_conflict_do_nothing(index_elements=['item_name', 'value_hash'])
+    )
     session.commit()
+    return result.rowcount > 0
+
+
+def add_item_values(item_name: str, values: Sequence[str]) -> int:
+    """Insert a chunk of stock values with one executemany and one commit.
+
+    Values the item already holds are ignored by the ``(item_name,
+    value_hash)`` unique index; returns how many rows were inserted.
+    """
+    if not values:
+        return 0
+    session = Database().session
+    result = session.execute(
+        sqlite_insert(ItemValues.__table__).on_conflict_do_nothing(index_elements=['item_name', 'value_hash']),
+        [
+            {'item_name': item_name, 'value': value, 'value_hash': item_value_hash(value), 'is_infinity': False}
+            for value in values
+        ],
+    )
+    session.commit()
+    return result.rowcount
 
 
 def create_category(
@@ -82,6 +112,14 @@ def create_category(
             allow_referral_rewards=allow_referral_rewards,
         )
     )
+    closure = CategoryClosure.__table__
+    session.execute(closure.insert().values(descendant=category_name, ancestor=category_name, depth=0))
+    if parent:
+        session.execute(closure.insert().from_select(
+            ['descendant', 'ancestor', 'depth'],
+            select(literal(category_name), closure.c.ancestor, closure.c.depth + 1)
+            .where(closure.c.descendant == parent),
+        ))
     session.commit()
 
 
@@ -100,14 +138,22 @@ def start_operation(user_id: int, value: int, operation_id: str, message_id: int
 
 
 def add_bought_item(item_name: str, value: str, price: int, buyer_id: int,
-                    bought_time: str, term_code: str | None = None) -> int:
+                    bought_time: str, term_code: str | None = None, commit: bool = True) -> dict:
+    """Record one sale.
+
+    Returns its ``unique_id``, the ``achievements`` it unlocked and the
+    ``quest_reward`` it completed, if any. Pass ``commit=False`` to leave the
+    transaction open for the caller."""
     session = Database().session
     unique_id = random.randint(1000000000, 9999999999)
     session.add(
         BoughtGoods(name=item_name, value=value, price=price, buyer_id=buyer_id, bought_datetime=bought_time,
                     unique_id=str(unique_id), term_code=term_code))
-    session.commit()
-    return unique_id
+    quest_reward = record_quest_purchase(buyer_id, term_code, bought_time)
+    unlocked = record_term_purchase(buyer_id, term_code, bought_time)
+    if commit:
+        session.commit()
+    return {'unique_id': unique_id, 'achievements': unlocked, 'quest_reward': quest_reward}
 
 
 def create_promocode(code: str, discount: int, expires_at: str | None,
@@ -126,10 +172,29 @@ def create_promocode(code: str, discount: int, expires_at: str | None,
     session.commit()
 
 
-def grant_achievement(user_id: int, code: str, achieved_at: str) -> None:
+def grant_achievement(user_id: int, code: str, achieved_at: str, commit: bool = True) -> bool:
+    """Unlock an achievement for a user.
+
+    Returns False when the user already had it. The unique index on
+    ``(user_id, achievement_code)`` makes concurrent grants safe, and the
+    per-achievement unlock counter is bumped in the same transaction.
+    Pass ``commit=False`` to leave the transaction open for the caller."""
     session = Database().session
-    session.add(UserAchievement(user_id=user_id, achievement_code=code, achieved_at=achieved_at))
-    session.commit()
+    inserted = session.execute(
+        sqlite_insert(UserAchievement.__table__)
+        .values(user_id=user_id, achievement_code=code, achieved_at=achieved_at)
+        .on_conflict_do_nothing()
+    ).rowcount
+    if inserted:
+        stats = AchievementStats.__table__
+        session.execute(
+            sqlite_insert(stats)
+            .values(code=code, unlocked=1)
+            .on_conflict_do_update(index_elements=[stats.c.code], set_={'unlocked': stats.c.unlocked + 1})
+        )
+    if commit:
+        session.commit()
+    return bool(inserted)
 
 
 def add_stock_notification(user_id: int, item_name: str) -> None:
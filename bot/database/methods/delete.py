@@ -1,11 +1,15 @@
 import os
 
+from sqlalchemy import select
+
 from bot.utils.files import sanitize_name
 from bot.database.models import (
     Database,
     Goods,
     ItemValues,
+    StockReservation,
     Categories,
+    CategoryClosure,
     UnfinishedOperations,
     PromoCode,
     Reseller,
@@ -16,17 +20,38 @@ from bot.database.models import (
 )
 
 
-def delete_item(item_name: str) -> None:
-    values = Database().session.query(ItemValues.value).filter(ItemValues.item_name == item_name).all()
-    for val in values:
-        if os.path.isfile(val[0]):
-            os.remove(val[0])
-    Database().session.query(Goods).filter(Goods.name == item_name).delete()
-    Database().session.query(ItemValues).filter(ItemValues.item_name == item_name).delete()
-    Database().session.commit()
-    folder = os.path.join('assets', 'uploads', sanitize_name(item_name))
-    if os.path.isdir(folder) and not os.listdir(folder):
-        os.rmdir(folder)
+def _delete_goods(session, goods_filter) -> dict:
+    """Delete goods matching ``goods_filter`` with their stock, without committing.
+
+    Returns the files and folders that belonged to them so they can be
+    removed once the transaction has been committed.
+    """
+    goods = select(Goods.name).where(goods_filter)
+    item_names = [name for name, in session.execute(goods)]
+    files = [
+        value for value, in session.query(ItemValues.value).filter(ItemValues.item_name.in_(goods))
+        if value and ('/' in value or os.sep in value)
+    ]
+    session.query(StockReservation).filter(StockReservation.item_name.in_(goods)).delete(synchronize_session=False)
+    session.query(ItemValues).filter(ItemValues.item_name.in_(goods)).delete(synchronize_session=False)
+    session.query(Goods).filter(goods_filter).delete(synchronize_session=False)
+    return {
+        'files': files,
+        'empty_folders': [os.path.join('assets', 'uploads', sanitize_name(name)) for name in item_names],
+        'folders': [os.path.join('assets', 'product_photos', name) for name in item_names],
+    }
+
+
+def delete_item(item_name: str) -> dict:
+    """Delete an item and its stock; return the files to remove after commit."""
+    session = Database().session
+    try:
+        cleanup = _delete_goods(session, Goods.name == item_name)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    return cleanup
 
 
 def delete_only_items(item_name: str) -> None:
@@ -40,24 +65,29 @@ def delete_only_items(item_name: str) -> None:
         os.rmdir(folder)
 
 
-def delete_category(category_name: str) -> None:
-    # delete subcategories recursively
-    subs = Database().session.query(Categories.name).filter(Categories.parent_name == category_name).all()
-    for sub in subs:
-        delete_category(sub.name)
-    goods = Database().session.query(Goods.name).filter(Goods.category_name == category_name).all()
-    for item in goods:
-        values = Database().session.query(ItemValues.value).filter(ItemValues.item_name == item.name).all()
-        for val in values:
-            if os.path.isfile(val[0]):
-                os.remove(val[0])
-        Database().session.query(ItemValues).filter(ItemValues.item_name == item.name).delete()
-        folder = os.path.join('assets', 'uploads', sanitize_name(item.name))
-        if os.path.isdir(folder) and not os.listdir(folder):
-            os.rmdir(folder)
-    Database().session.query(Goods).filter(Goods.category_name == category_name).delete()
-    Database().session.query(Categories).filter(Categories.name == category_name).delete()
-    Database().session.commit()
+def delete_category(category_name: str) -> dict:
+    """Delete a category with all subcategories, goods and stock in one transaction.
+
+    The branch is selected with a recursive CTE, so any failure leaves the
+    whole tree in place. Returns the files to remove after commit.
+    """
+    # nesting keeps WITH inside each statement's subquery: pysqlite only opens
+    # the transaction for statements that start with DELETE/INSERT/UPDATE.
+    tree = select(Categories.name).where(Categories.name == category_name).cte(
+        'category_tree', recursive=True, nesting=True)
+    tree = tree.union_all(select(Categories.name).where(Categories.parent_name == tree.c.name))
+    branch = select(tree.c.name)
+    session = Database().session
+    try:
+        cleanup = _delete_goods(session, Goods.category_name.in_(branch))
+        session.query(CategoryClosure).filter(CategoryClosure.descendant.in_(branch)).delete(
+            synchronize_session=False)
+        session.query(Categories).filter(Categories.name.in_(branch)).delete(synchronize_session=False)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    return cleanup
 
 
 def delete_user_category_password(user_id: int, category_name: str) -> None:
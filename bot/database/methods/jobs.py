@@ -0,0 +1,84 @@
+"""Database helpers for the delayed job queue."""
+
+from __future__ import annotations
+
+import json
+import time
+from typing import Iterable
+
+from sqlalchemy import func
+
+from bot.database import Database
+from bot.database.models import DelayedJob
+
+__all__ = [
+    'add_delayed_jobs',
+    'claim_due_jobs',
+    'finish_delayed_jobs',
+    'retry_delayed_job',
+    'next_delayed_job_time',
+]
+
+
+def add_delayed_jobs(jobs: Iterable[tuple[str, dict, float]]) -> int:
+    """Store ``(kind, payload, run_at)`` jobs in one bulk insert."""
+    rows = [
+        {'kind': kind, 'payload': json.dumps(payload, ensure_ascii=False), 'run_at': run_at, 'attempts': 0}
+        for kind, payload, run_at in jobs
+    ]
+    if not rows:
+        return 0
+    session = Database().session
+    session.execute(DelayedJob.__table__.insert(), rows)
+    session.commit()
+    return len(rows)
+
+
+def claim_due_jobs(limit: int, lease: float, now: float | None = None) -> list[tuple[int, str, dict, int]]:
+    """Lease up to ``limit`` due jobs and return ``(id, kind, payload, attempts)``.
+
+    Claimed jobs are pushed ``lease`` seconds into the future; a job that is
+    not finished or retried before then is handed out again.
+    """
+    now = time.time() if now is None else now
+    session = Database().session
+    rows = (
+        session.query(DelayedJob.id, DelayedJob.kind, DelayedJob.payload, DelayedJob.attempts)
+        .filter(DelayedJob.run_at <= now)
+        .order_by(DelayedJob.run_at.asc())
+        .limit(limit)
+        .all()
+    )
+    if not rows:
+        return []
+    session.query(DelayedJob).filter(DelayedJob.id.in_([row.id for row in rows])).update(
+        values={DelayedJob.run_at: now + lease, DelayedJob.attempts: DelayedJob.attempts + 1},
+        synchronize_session=False,
+    )
+    session.commit()
+    claimed = []
+    for row in rows:
+        try:
+            payload = json.loads(row.payload)
+        except (TypeError, ValueError):
+            payload = {}
+        claimed.append((row.id, row.kind, payload, row.attempts + 1))
+    return claimed
+
+
+def finish_delayed_jobs(job_ids: list[int], chunk_size: int = 500) -> None:
+    session = Database().session
+    for start in range(0, len(job_ids), chunk_size):
+        session.query(DelayedJob).filter(DelayedJob.id.in_(job_ids[start:start + chunk_size])).delete(
+            synchronize_session=False)
+    session.commit()
+
+
+def retry_delayed_job(job_id: int, run_at: float) -> None:
+    Database().session.query(DelayedJob).filter(DelayedJob.id == job_id).update(
+        values={DelayedJob.run_at: run_at}, synchronize_session=False)
+    Database().session.commit()
+
+
+def next_delayed_job_time() -> float | None:
+    return Database().session.query(func.min(DelayedJob.run_at)).scalar()
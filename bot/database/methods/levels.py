@@ -3,15 +3,20 @@
 from __future__ import annotations
 
 import json
-from typing import Iterable, Sequence
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Iterable, Mapping, Sequence
 
 from sqlalchemy import func
 
 from bot.constants.levels import DEFAULT_LEVEL_NAMES, DEFAULT_LEVEL_THRESHOLDS
 from bot.database import Database
 from bot.database.models import BoughtGoods, LevelSettings, User
+from bot.database.methods.settings_registry import settings_registry, freeze, thaw
 
 __all__ = [
+    'LevelConfig',
+    'get_level_config',
     'get_level_settings',
     'set_level_thresholds',
     'set_level_names',
@@ -23,6 +28,17 @@ __all__ = [
 _LEVEL_LANGUAGE_FALLBACK = 'en'
 
 
+@dataclass(frozen=True)
+class LevelConfig:
+    thresholds: tuple[int, ...]
+    names: Mapping[str, tuple[str, ...]]
+    rewards: tuple[int, ...]
+
+    def level_index(self, purchases: int) -> int:
+        """Return the index of the highest threshold reached by ``purchases``."""
+        return max(bisect_right(self.thresholds, purchases) - 1, 0)
+
+
 def _ensure_entry() -> LevelSettings:
     session = Database().session
     entry = session.query(LevelSettings).first()
@@ -151,8 +167,7 @@ def _load_rewards(raw: str | None, length: int) -> list[int]:
     return rewards
 
 
-def get_level_settings() -> tuple[list[int], dict[str, list[str]], list[int]]:
-    """Return current level thresholds, localized names, and rewards."""
+def _load_level_config() -> LevelConfig:
     entry = _ensure_entry()
     session = Database().session
     try:
@@ -178,7 +193,21 @@ def get_level_settings() -> tuple[list[int], dict[str, list[str]], list[int]]:
         session.commit()
     if changed:
         session.expire(entry)
-    return thresholds, names, rewards
+    return LevelConfig(tuple(thresholds), freeze(names), tuple(rewards))
+
+
+settings_registry.register('levels', _load_level_config)
+
+
+def get_level_config() -> LevelConfig:
+    """Return the cached level configuration."""
+    return settings_registry.get('levels')
+
+
+def get_level_settings() -> tuple[list[int], dict[str, list[str]], list[int]]:
+    """Return current level thresholds, localized names, and rewards."""
+    config = get_level_config()
+    return list(config.thresholds), thaw(config.names), list(config.rewards)
 
 
 def set_level_thresholds(thresholds: Sequence[int]) -> list[int]:
@@ -192,6 +221,7 @@ def set_level_thresholds(thresholds: Sequence[int]) -> list[int]:
     entry.names = json.dumps(names, ensure_ascii=False)
     entry.rewards = json.dumps(rewards)
     session.commit()
+    settings_registry.invalidate('levels')
     return cleaned
 
 
@@ -210,6 +240,7 @@ def set_level_names(language: str, names: Sequence[str]) -> list[str]:
     current[language] = sanitized
     entry.names = json.dumps(current, ensure_ascii=False)
     session.commit()
+    settings_registry.invalidate('levels')
     return sanitized
 
 
@@ -234,6 +265,7 @@ def set_level_rewards(rewards: Sequence[int]) -> list[int]:
         cleaned.append(value)
     entry.rewards = json.dumps(cleaned)
     session.commit()
+    settings_registry.invalidate('levels')
     return cleaned
 
 
@@ -248,6 +280,7 @@ def reset_level_settings() -> tuple[list[int], dict[str, list[str]], list[int]]:
     entry.names = json.dumps(names, ensure_ascii=False)
     entry.rewards = json.dumps(rewards)
     session.commit()
+    settings_registry.invalidate('levels')
     return thresholds, names, rewards
 
 
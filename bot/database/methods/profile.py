@@ -3,7 +3,8 @@
 from __future__ import annotations
 
 import json
-from typing import Any
+from dataclasses import dataclass
+from typing import Any, Mapping
 
 from bot.constants.profile import (
     PROFILE_BOOLEAN_FIELDS,
@@ -12,6 +13,15 @@ from bot.constants.profile import (
 )
 from bot.database.main import Database
 from bot.database.models.main import ProfileSettings
+from bot.database.methods.settings_registry import settings_registry, freeze, thaw
+
+
+@dataclass(frozen=True)
+class ProfileConfig:
+    options: Mapping[str, Any]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.options.get(key, default)
 
 
 def _get_or_create_profile_settings(session) -> ProfileSettings:
@@ -23,11 +33,22 @@ def _get_or_create_profile_settings(session) -> ProfileSettings:
     return settings
 
 
+def _load_profile_config() -> ProfileConfig:
+    settings = _get_or_create_profile_settings(Database().session)
+    return ProfileConfig(freeze(settings.as_dict()))
+
+
+settings_registry.register('profile', _load_profile_config)
+
+
+def get_profile_config() -> ProfileConfig:
+    """Return the cached profile configuration."""
+    return settings_registry.get('profile')
+
+
 def get_profile_settings() -> dict[str, Any]:
     """Return merged profile settings."""
-    session = Database().session
-    settings = _get_or_create_profile_settings(session)
-    return settings.as_dict()
+    return thaw(get_profile_config().options)
 
 
 def update_profile_settings(updates: dict[str, Any]) -> dict[str, Any]:
@@ -45,6 +66,7 @@ def update_profile_settings(updates: dict[str, Any]) -> dict[str, Any]:
     settings.options = json.dumps(current, ensure_ascii=False)
     session.add(settings)
     session.commit()
+    settings_registry.invalidate('profile')
     return current
 
 
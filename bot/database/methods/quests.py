@@ -2,18 +2,27 @@
 
 from __future__ import annotations
 
+import datetime
 import json
 import uuid
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Mapping
+
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 from bot.constants.quests import (
     DEFAULT_QUEST_TITLES,
     DEFAULT_QUEST_REWARD,
 )
 from bot.database import Database
-from bot.database.models import QuestSettings
+from bot.database.models import QuestSettings, QuestProgress, QuestReward
 from bot.database.methods.terms import normalise_term_code
+from bot.database.methods.settings_registry import settings_registry, freeze, thaw
 
 __all__ = [
+    'QuestConfig',
+    'get_quest_config',
     'get_weekly_quest',
     'set_weekly_quest_titles',
     'set_weekly_quest_reset',
@@ -21,8 +30,15 @@ __all__ = [
     'update_weekly_quest_task',
     'delete_weekly_quest_task',
     'set_weekly_quest_reward',
+    'quest_period_start',
+    'record_quest_purchase',
+    'get_weekly_quest_progress',
+    'get_quest_discount',
+    'redeem_quest_discount',
 ]
 
+_TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
 
 def _ensure_entry() -> QuestSettings:
     session = Database().session
@@ -93,14 +109,46 @@ def _serialise_task(term: str, count: int, titles: dict[str, str], task_id: str
     }
 
 
-def get_weekly_quest() -> dict:
+@dataclass(frozen=True)
+class QuestConfig:
+    titles: Mapping[str, Mapping[str, str]]
+    tasks: tuple[Mapping, ...]
+    reward: Mapping
+    reset_weekday: int
+    reset_hour: int
+
+    @cached_property
+    def terms(self) -> frozenset[str]:
+        return frozenset(task['term'] for task in self.tasks if task.get('term'))
+
+
+def _load_quest_config() -> QuestConfig:
     entry = _ensure_entry()
+    return QuestConfig(
+        titles=freeze(entry.titles_dict()),
+        tasks=freeze(entry.tasks_list()),
+        reward=freeze(entry.reward_dict()),
+        reset_weekday=entry.reset_weekday,
+        reset_hour=entry.reset_hour,
+    )
+
+
+settings_registry.register('quests', _load_quest_config)
+
+
+def get_quest_config() -> QuestConfig:
+    """Return the cached weekly quest configuration."""
+    return settings_registry.get('quests')
+
+
+def get_weekly_quest() -> dict:
+    config = get_quest_config()
     return {
-        'titles': entry.titles_dict(),
-        'tasks': entry.tasks_list(),
-        'reward': entry.reward_dict(),
-        'reset_weekday': entry.reset_weekday,
-        'reset_hour': entry.reset_hour,
+        'titles': thaw(config.titles),
+        'tasks': thaw(config.tasks),
+        'reward': thaw(config.reward),
+        'reset_weekday': config.reset_weekday,
+        'reset_hour': config.reset_hour,
     }
 
 
@@ -113,6 +161,7 @@ def set_weekly_quest_titles(language: str, title: str, description: str) -> dict
     }
     entry.titles = json.dumps(_serialise_titles(titles), ensure_ascii=False)
     Database().session.commit()
+    settings_registry.invalidate('quests')
     return get_weekly_quest()
 
 
@@ -123,6 +172,7 @@ def set_weekly_quest_reset(weekday: int, hour: int) -> dict:
     entry.reset_weekday = weekday
     entry.reset_hour = hour
     Database().session.commit()
+    settings_registry.invalidate('quests')
     return get_weekly_quest()
 
 
@@ -133,6 +183,7 @@ def add_weekly_quest_task(term: str, count: int, titles: dict[str, str]) -> dict
     tasks.append(task)
     entry.tasks = json.dumps(tasks, ensure_ascii=False)
     Database().session.commit()
+    settings_registry.invalidate('quests')
     return task
 
 
@@ -160,6 +211,7 @@ def update_weekly_quest_task(task_id: str, term: str | None = None, count: int |
         raise ValueError('Task not found')
     entry.tasks = json.dumps(tasks, ensure_ascii=False)
     Database().session.commit()
+    settings_registry.invalidate('quests')
     return updated
 
 
@@ -171,6 +223,7 @@ def delete_weekly_quest_task(task_id: str) -> bool:
         return False
     entry.tasks = json.dumps(filtered, ensure_ascii=False)
     Database().session.commit()
+    settings_registry.invalidate('quests')
     return True
 
 
@@ -178,4 +231,171 @@ def set_weekly_quest_reward(reward: dict) -> dict:
     entry = _ensure_entry()
     entry.reward = json.dumps(_serialise_reward(reward), ensure_ascii=False)
     Database().session.commit()
+    settings_registry.invalidate('quests')
     return get_weekly_quest()['reward']
+
+
+def _shop_now() -> datetime.datetime:
+    # Purchase timestamps are stored in shop time (UTC+3), see the checkout handlers.
+    return datetime.datetime.utcnow() + datetime.timedelta(hours=3)
+
+
+def quest_period_start(moment: datetime.datetime, reset_weekday: int, reset_hour: int) -> datetime.datetime:
+    """Return the start of the weekly quest window that contains ``moment``."""
+    start = moment.replace(hour=reset_hour, minute=0, second=0, microsecond=0)
+    start -= datetime.timedelta(days=(moment.weekday() - reset_weekday) % 7)
+    if start > moment:
+        start -= datetime.timedelta(days=7)
+    return start
+
+
+def _parse_time(value: str | datetime.datetime | None) -> datetime.datetime:
+    if isinstance(value, datetime.datetime):
+        return value
+    if value:
+        try:
+            return datetime.datetime.strptime(value, _TIME_FORMAT)
+        except ValueError:
+            pass
+    return _shop_now()
+
+
+def _progress_counts(user_id: int, period_start: str, terms: frozenset[str]) -> dict[str, int]:
+    if not terms:
+        return {}
+    rows = (
+        Database().session.query(QuestProgress.term_code, QuestProgress.count)
+        .filter(
+            QuestProgress.user_id == user_id,
+            QuestProgress.period_start == period_start,
+            QuestProgress.term_code.in_(list(terms)),
+        )
+        .all()
+    )
+    return {term: int(count or 0) for term, count in rows}
+
+
+def _tasks_completed(tasks, counts: dict[str, int]) -> bool:
+    return bool(tasks) and all(
+        counts.get(task.get('term'), 0) >= int(task.get('count') or 0) for task in tasks
+    )
+
+
+def record_quest_purchase(user_id: int, term_code: str | None,
+                          bought_time: str | datetime.datetime | None = None,
+                          amount: int = 1) -> dict | None:
+    """Count ``amount`` sales towards the weekly quest without committing.
+
+    Only terms referenced by a configured task are tracked. Returns the reward
+    when this sale completes the quest for the current window; the unique
+    ``(user_id, period_start)`` key on ``quest_rewards`` guarantees it is
+    granted once per window. A stock reward is marked redeemed right away,
+    since the caller delivers its value with the grant message; a discount
+    stays open until :func:`redeem_quest_discount`. The caller owns the
+    transaction.
+    """
+    if not term_code:
+        return None
+    config = get_quest_config()
+    terms = config.terms
+    if term_code not in terms:
+        return None
+    moment = _parse_time(bought_time)
+    period_start = quest_period_start(moment, config.reset_weekday, config.reset_hour).strftime(_TIME_FORMAT)
+    session = Database().session
+    progress = QuestProgress.__table__
+    session.execute(
+        sqlite_insert(progress)
+        .values(user_id=user_id, period_start=period_start, term_code=term_code, count=amount)
+        .on_conflict_do_update(
+            index_elements=[progress.c.user_id, progress.c.period_start, progress.c.term_code],
+            set_={'count': progress.c.count + amount},
+        )
+    )
+    if not _tasks_completed(config.tasks, _progress_counts(user_id, period_start, terms)):
+        return None
+    reward = thaw(config.reward)
+    granted_at = moment.strftime(_TIME_FORMAT)
+    granted = session.execute(
+        sqlite_insert(QuestReward.__table__)
+        .values(
+            user_id=user_id,
+            period_start=period_start,
+            reward=json.dumps(reward, ensure_ascii=False),
+            granted_at=granted_at,
+            redeemed_at=granted_at if reward.get('type') == 'stock' else None,
+        )
+        .on_conflict_do_nothing()
+    ).rowcount
+    return reward if granted else None
+
+
+def get_quest_discount(user_id: int) -> tuple[int, int] | None:
+    """Return ``(reward id, percent)`` of the user's oldest unused quest discount."""
+    rows = (
+        Database().session.query(QuestReward)
+        .filter(QuestReward.user_id == user_id, QuestReward.redeemed_at.is_(None))
+        .order_by(QuestReward.id.asc())
+        .all()
+    )
+    for row in rows:
+        reward = row.reward_dict()
+        if reward.get('type') != 'discount':
+            continue
+        try:
+            percent = int(reward.get('value') or 0)
+        except (TypeError, ValueError):
+            continue
+        if 0 < percent <= 100:
+            return row.id, percent
+    return None
+
+
+def redeem_quest_discount(user_id: int, reward_id: int, redeemed_at: str, commit: bool = True) -> bool:
+    """Mark a quest discount as used; ``False`` if it was already redeemed.
+
+    Pass ``commit=False`` to leave the transaction open for the caller."""
+    session = Database().session
+    redeemed = (
+        session.query(QuestReward)
+        .filter(
+            QuestReward.id == reward_id,
+            QuestReward.user_id == user_id,
+            QuestReward.redeemed_at.is_(None),
+        )
+        .update({QuestReward.redeemed_at: redeemed_at}, synchronize_session=False)
+    )
+    if commit:
+        session.commit()
+    return bool(redeemed)
+
+
+def get_weekly_quest_progress(user_id: int, reference: datetime.datetime | None = None) -> dict:
+    """Return the user's progress for the current quest window.
+
+    Reads one counter row per task term plus the reward row, independent of
+    the user's purchase history.
+    """
+    config = get_quest_config()
+    moment = reference or _shop_now()
+    start = quest_period_start(moment, config.reset_weekday, config.reset_hour)
+    period_start = start.strftime(_TIME_FORMAT)
+    counts = _progress_counts(user_id, period_start, config.terms)
+    progress: list[dict] = []
+    for task in thaw(config.tasks):
+        target = int(task.get('count') or 0)
+        done = min(counts.get(task.get('term'), 0), target)
+        progress.append({**task, 'progress': done, 'completed': done >= target})
+    reward_row = (
+        Database().session.query(QuestReward)
+        .filter(QuestReward.user_id == user_id, QuestReward.period_start == period_start)
+        .first()
+    )
+    return {
+        'period_start': start,
+        'resets_at': start + datetime.timedelta(days=7),
+        'tasks': progress,
+        'completed': _tasks_completed(config.tasks, counts),
+        'reward': reward_row.reward_dict() if reward_row else None,
+        'rewarded_at': reward_row.granted_at if reward_row else None,
+    }
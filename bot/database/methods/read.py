@@ -1,11 +1,12 @@
 import datetime
 
 import json
+import time
 
 from typing import Sequence
 
 import sqlalchemy
-from sqlalchemy import exc, func
+from sqlalchemy import and_, exc, func, tuple_
 
 from bot.database.models import (
     Database,
@@ -13,6 +14,7 @@ from bot.database.models import (
     ItemValues,
     Goods,
     Categories,
+    CategoryClosure,
     Role,
     BoughtGoods,
     Operations,
@@ -20,6 +22,7 @@ from bot.database.models import (
     PromoCode,
     Achievement,
     UserAchievement,
+    AchievementStats,
     StockNotification,
     Reseller,
     ResellerPrice,
@@ -30,6 +33,7 @@ from bot.database.models import (
     MainMenuText,
     UiEmoji,
 )
+from bot.database.methods.reservations import unreserved_value
 from bot.constants.main_menu import DEFAULT_MAIN_MENU_BUTTONS, DEFAULT_MAIN_MENU_TEXTS
 
 
@@ -82,6 +86,24 @@ def get_user_count() -> int:
     return Database().session.query(User).count()
 
 
+_USER_COUNT_TTL = 300.0
+_user_count_cache: dict[str, float] = {}
+
+
+def get_cached_user_count() -> int:
+    """Return the user total, re-counting at most every ``_USER_COUNT_TTL`` seconds."""
+    now = time.monotonic()
+    cached_at = _user_count_cache.get('at')
+    if cached_at is None or now - cached_at > _USER_COUNT_TTL:
+        _user_count_cache['value'] = get_user_count()
+        _user_count_cache['at'] = now
+    return int(_user_count_cache['value'])
+
+
+def invalidate_user_count_cache() -> None:
+    _user_count_cache.clear()
+
+
 def select_admins() -> int | None:
     try:
         return Database().session.query(func.count()).filter(User.role_id > 1).scalar()
@@ -170,6 +192,68 @@ def get_all_subcategories(parent_name: str) -> list[str]:
     ]
 
 
+def _like_pattern(query: str) -> str:
+    escaped = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{escaped}%'
+
+
+def get_category_children_page(
+    parent_name: str | None,
+    after: tuple[str, str] | None = None,
+    limit: int = 20,
+    query: str | None = None,
+) -> tuple[list[tuple[str, str]], bool]:
+    """Return one page of ``(name, title)`` children of a category and whether more follow.
+
+    Pages are keyed on ``(title, name)`` rather than offsets, so any page
+    costs the same; ``query`` keeps only titles containing it.
+    """
+    session = Database().session
+    parent = Categories.parent_name.is_(None) if parent_name is None else Categories.parent_name == parent_name
+    rows = session.query(Categories.name, Categories.title).filter(parent)
+    if query:
+        rows = rows.filter(Categories.title.ilike(_like_pattern(query), escape='\\'))
+    if after is not None:
+        rows = rows.filter(tuple_(Categories.title, Categories.name) > tuple_(*after))
+    rows = rows.order_by(Categories.title, Categories.name).limit(limit + 1).all()
+    return [(name, title) for name, title in rows[:limit]], len(rows) > limit
+
+
+def get_item_names_page(
+    category_name: str,
+    after: str | None = None,
+    limit: int = 20,
+    query: str | None = None,
+) -> tuple[list[str], bool]:
+    """Return one page of item names in a category, by name, and whether more follow."""
+    rows = Database().session.query(Goods.name).filter(Goods.category_name == category_name)
+    if query:
+        rows = rows.filter(Goods.name.ilike(_like_pattern(query), escape='\\'))
+    if after is not None:
+        rows = rows.filter(Goods.name > after)
+    rows = rows.order_by(Goods.name).limit(limit + 1).all()
+    return [name for name, in rows[:limit]], len(rows) > limit
+
+
+def get_categories_with_children(names: Sequence[str]) -> set[str]:
+    """Return which of the given categories have subcategories."""
+    if not names:
+        return set()
+    rows = (
+        Database().session.query(Categories.parent_name)
+        .filter(Categories.parent_name.in_(list(names)))
+        .distinct()
+        .all()
+    )
+    return {name for name, in rows}
+
+
+def category_has_children(parent_name: str | None) -> bool:
+    """Whether a category, or the top level for ``None``, has subcategories."""
+    parent = Categories.parent_name.is_(None) if parent_name is None else Categories.parent_name == parent_name
+    return Database().session.query(sqlalchemy.exists().where(parent)).scalar()
+
+
 def get_subcategories(parent_name: str) -> list[str]:
     subs = [c[0] for c in Database().session.query(Categories.name)
             .filter(Categories.parent_name == parent_name).all()]
@@ -517,6 +601,20 @@ def get_achievement_users(code: str) -> int:
     ).scalar()
 
 
+def get_user_achievement_codes(user_id: int) -> set[str]:
+    """Return codes of every achievement the user has unlocked."""
+    rows = Database().session.query(UserAchievement.achievement_code).filter(
+        UserAchievement.user_id == user_id
+    ).all()
+    return {row[0] for row in rows}
+
+
+def get_achievement_unlock_counts() -> dict[str, int]:
+    """Return unlock counters maintained by ``grant_achievement``."""
+    rows = Database().session.query(AchievementStats.code, AchievementStats.unlocked).all()
+    return {code: int(unlocked or 0) for code, unlocked in rows}
+
+
 def get_all_admins() -> list[int]:
     return [admin[0] for admin in Database().session.query(User.telegram_id).filter(User.role_id == 'ADMIN').all()]
 
@@ -531,43 +629,32 @@ def check_category(category_name: str) -> dict | None:
     return result.__dict__ if result else None
 
 
+def _main_category_allows(item_name: str, flag) -> bool:
+    """False when the top-level ancestor of the item's category has ``flag`` unset."""
+    session = Database().session
+    blocked = (
+        session.query(CategoryClosure.ancestor)
+        .join(Goods, Goods.category_name == CategoryClosure.descendant)
+        .join(Categories, Categories.name == CategoryClosure.ancestor)
+        .filter(Goods.name == item_name, Categories.parent_name.is_(None), flag.is_(False))
+        .exists()
+    )
+    return not session.query(blocked).scalar()
+
+
 def can_use_discount(item_name: str) -> bool:
     """Return True if item's main category allows discounts."""
-    session = Database().session
-    category_name = session.query(Goods.category_name).filter(Goods.name == item_name).scalar()
-    if not category_name:
-        return True
-    while True:
-        category = session.query(Categories.parent_name, Categories.allow_discounts) \
-            .filter(Categories.name == category_name).first()
-        if not category:
-            return True
-        parent, allow = category
-        if parent is None:
-            return bool(allow)
-        category_name = parent
+    return _main_category_allows(item_name, Categories.allow_discounts)
 
 
 def can_get_referral_reward(item_name: str) -> bool:
     """Return True if item's main category allows referral rewards."""
-    session = Database().session
-    category_name = session.query(Goods.category_name).filter(Goods.name == item_name).scalar()
-    if not category_name:
-        return True
-    while True:
-        category = session.query(Categories.parent_name, Categories.allow_referral_rewards) \
-            .filter(Categories.name == category_name).first()
-        if not category:
-            return True
-        parent, allow = category
-        if parent is None:
-            return bool(allow)
-        category_name = parent
-
+    return _main_category_allows(item_name, Categories.allow_referral_rewards)
 
 
 def get_item_value(item_name: str) -> dict | None:
-    result = Database().session.query(ItemValues).filter(ItemValues.item_name == item_name).first()
+    result = Database().session.query(ItemValues).filter(
+        ItemValues.item_name == item_name, unreserved_value()).order_by(ItemValues.id.asc()).first()
     return result.__dict__ if result else None
 
 
@@ -580,21 +667,40 @@ def get_item_value_by_id(value_id: int) -> dict | None:
     return result.__dict__ if result else None
 
 
+def get_stock_report_rows() -> list[tuple[str | None, str, str, float, int]]:
+    """``(parent category, category, item, price, stock)`` for every item in one query."""
+    return (
+        Database().session.query(
+            Categories.parent_name,
+            Goods.category_name,
+            Goods.name,
+            Goods.price,
+            func.count(ItemValues.id),
+        )
+        .outerjoin(Categories, Categories.name == Goods.category_name)
+        .outerjoin(ItemValues, and_(ItemValues.item_name == Goods.name, unreserved_value()))
+        .group_by(Goods.name)
+        .order_by(
+            func.coalesce(Categories.parent_name, Goods.category_name),
+            Categories.parent_name.isnot(None),
+            Goods.category_name,
+            Goods.name,
+        )
+        .all()
+    )
+
+
 def select_item_values_amount(item_name: str) -> int:
-    return Database().session.query(func.count()).filter(ItemValues.item_name == item_name).scalar()
+    return Database().session.query(func.count(ItemValues.id)).filter(
+        ItemValues.item_name == item_name, unreserved_value()).scalar()
 
 
 def check_value(item_name: str) -> bool | None:
     try:
-        result = False
-        values = select_item_values_amount(item_name)
-        for i in range(values):
-            is_inf = Database().session.query(ItemValues).filter(ItemValues.item_name == item_name).first()
-            if is_inf and is_inf.is_infinity:
-                result = True
+        first = Database().session.query(ItemValues.is_infinity).filter(ItemValues.item_name == item_name).first()
+        return bool(first and first.is_infinity and select_item_values_amount(item_name))
     except exc.NoResultFound:
         return False
-    return result
 
 
 def has_stock_notification(user_id: int, item_name: str) -> bool:
@@ -608,6 +714,17 @@ def get_item_subscribers(item_name: str) -> list[int]:
             .filter(StockNotification.item_name == item_name).all()]
 
 
+def get_item_subscriber_languages(item_name: str) -> list[tuple[int, str | None]]:
+    """Return ``(user_id, language)`` for every restock subscriber of an item."""
+    return (
+        Database().session.query(StockNotification.user_id, User.language)
+        .outerjoin(User, User.telegram_id == StockNotification.user_id)
+        .filter(StockNotification.item_name == item_name)
+        .distinct()
+        .all()
+    )
+
+
 def select_user_items(buyer_id: int) -> int:
     return Database().session.query(func.count()).filter(BoughtGoods.buyer_id == buyer_id).scalar()
 
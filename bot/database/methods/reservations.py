@@ -0,0 +1,183 @@
+"""Database helpers for the stock reservation ledger.
+
+Stock held for an unpaid invoice stays in ``item_values``; a row in
+``stock_reservations`` keyed by the value id marks it as taken until it
+expires, is released or is converted into a sale.
+"""
+
+from __future__ import annotations
+
+import datetime
+from typing import Iterable
+
+import sqlalchemy.exc
+from sqlalchemy import exists
+
+from bot.database import Database
+from bot.database.models import ItemValues, StockReservation
+
+__all__ = [
+    'RESERVATION_GRACE',
+    'unreserved_value',
+    'reserve_item_values',
+    'reserve_item_value',
+    'assign_reservations',
+    'release_reservations',
+    'release_expired_reservations',
+    'consume_reserved_values',
+]
+
+_TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Seconds a reservation outlives its invoice, so late payment confirmations
+# can still be converted into sales.
+RESERVATION_GRACE = 15 * 60
+
+
+def _shop_now() -> datetime.datetime:
+    return datetime.datetime.utcnow() + datetime.timedelta(hours=3)
+
+
+def unreserved_value(now: str | None = None):
+    """Filter matching ``item_values`` rows without an active reservation."""
+    now = now or _shop_now().strftime(_TIME_FORMAT)
+    return ~exists().where(
+        StockReservation.value_id == ItemValues.id,
+        StockReservation.expires_at > now,
+    )
+
+
+def _release_expired(now: str) -> int:
+    return (
+        Database().session.query(StockReservation)
+        .filter(StockReservation.expires_at <= now)
+        .delete(synchronize_session=False)
+    )
+
+
+def reserve_item_values(quantities: dict[str, int], invoice_id: str, user_id: int | None = None,
+                        ttl: int = RESERVATION_GRACE, attempts: int = 3) -> dict[str, list[dict]] | None:
+    """Reserve stock for several items in a single transaction.
+
+    Runs one ``SELECT ... LIMIT`` per item over unreserved values and one
+    bulk insert into the ledger. Infinite items hand out their value without
+    being reserved. Returns the claimed units per item, or None when any item
+    lacks stock. If another buyer reserved a selected row first, the primary
+    key on ``value_id`` rejects the insert and the transaction is retried, so a
+    unit is never handed out twice.
+    """
+    session = Database().session
+    moment = _shop_now()
+    now = moment.strftime(_TIME_FORMAT)
+    expires_at = (moment + datetime.timedelta(seconds=ttl)).strftime(_TIME_FORMAT)
+    for _ in range(attempts):
+        _release_expired(now)
+        claimed: dict[str, list[dict]] = {}
+        ledger: list[dict] = []
+        for item_name, quantity in quantities.items():
+            if quantity <= 0:
+                continue
+            rows = (
+                session.query(ItemValues.id, ItemValues.item_name, ItemValues.value, ItemValues.is_infinity)
+                .filter(ItemValues.item_name == item_name, unreserved_value(now))
+                .order_by(ItemValues.id.asc())
+                .limit(quantity)
+                .all()
+            )
+            if rows and rows[0].is_infinity:
+                rows = [rows[0]] * quantity
+            if len(rows) < quantity:
+                session.rollback()
+                return None
+            claimed[item_name] = [
+                {'id': row.id, 'item_name': row.item_name, 'value': row.value, 'is_infinity': row.is_infinity}
+                for row in rows
+            ]
+            ledger.extend(
+                {
+                    'value_id': row.id,
+                    'item_name': row.item_name,
+                    'invoice_id': invoice_id,
+                    'user_id': user_id,
+                    'expires_at': expires_at,
+                }
+                for row in rows if not row.is_infinity
+            )
+        try:
+            if ledger:
+                session.execute(StockReservation.__table__.insert(), ledger)
+            session.commit()
+        except sqlalchemy.exc.IntegrityError:
+            session.rollback()
+            continue
+        return claimed
+    return None
+
+
+def reserve_item_value(item_name: str, invoice_id: str, user_id: int | None = None,
+                       ttl: int = RESERVATION_GRACE) -> dict | None:
+    """Reserve one unit of ``item_name``; see :func:`reserve_item_values`."""
+    claimed = reserve_item_values({item_name: 1}, invoice_id, user_id, ttl)
+    return claimed[item_name][0] if claimed else None
+
+
+def assign_reservations(reservation_id: str, invoice_id: str) -> None:
+    """Re-key reservations made before the payment provider issued an invoice id."""
+    session = Database().session
+    session.query(StockReservation).filter(StockReservation.invoice_id == reservation_id).update(
+        values={StockReservation.invoice_id: invoice_id}, synchronize_session=False)
+    session.commit()
+
+
+def release_reservations(invoice_id: str) -> int:
+    """Return the stock held for an invoice to sale."""
+    session = Database().session
+    released = (
+        session.query(StockReservation)
+        .filter(StockReservation.invoice_id == invoice_id)
+        .delete(synchronize_session=False)
+    )
+    session.commit()
+    return released
+
+
+def release_expired_reservations() -> int:
+    """Drop every reservation past its expiry in one statement."""
+    session = Database().session
+    released = _release_expired(_shop_now().strftime(_TIME_FORMAT))
+    session.commit()
+    return released
+
+
+def consume_reserved_values(invoice_id: str, value_ids: Iterable[int], commit: bool = True) -> None:
+    """Convert an invoice's reserved units into sales.
+
+    The values are removed from stock and the invoice's reservations are
+    dropped in the caller's transaction. A unit whose reservation lapsed is
+    still sold unless another invoice has reserved it since; if any unit is
+    gone, :class:`ValueError` is raised and nothing is removed.
+    """
+    session = Database().session
+    value_ids = list(value_ids)
+    now = _shop_now().strftime(_TIME_FORMAT)
+    try:
+        if value_ids:
+            taken_elsewhere = exists().where(
+                StockReservation.value_id == ItemValues.id,
+                StockReservation.invoice_id != invoice_id,
+                StockReservation.expires_at > now,
+            )
+            removed = (
+                session.query(ItemValues)
+                .filter(ItemValues.id.in_(value_ids), ~taken_elsewhere)
+                .delete(synchronize_session=False)
+            )
+            if removed != len(value_ids):
+                raise ValueError('reserved stock is no longer available')
+        session.query(StockReservation).filter(StockReservation.invoice_id == invoice_id).delete(
+            synchronize_session=False)
+    except Exception:
+        session.rollback()
+        raise
+    if commit:
+        session.commit()
@@ -0,0 +1,57 @@
+"""Catalog search over the ``catalog_search`` FTS5 index.
+
+The index holds item names, descriptions and the titles of each item's
+category path; triggers on ``goods`` and ``categories`` keep it in sync.
+"""
+
+from __future__ import annotations
+
+import re
+
+from sqlalchemy import column, exists, literal_column, table, text
+
+from bot.database import Database
+from bot.database.models import Categories, CategoryClosure, Goods, ItemValues
+from bot.database.methods.reservations import unreserved_value
+
+__all__ = ['catalog_match_query', 'search_catalog']
+
+_TOKEN = re.compile(r'\w+', re.UNICODE)
+
+_catalog_search = table('catalog_search', column('rowid'), column('rank'))
+
+
+def catalog_match_query(query: str) -> str | None:
+    """Turn user input into an FTS5 query matching all words as prefixes."""
+    tokens = _TOKEN.findall(query)[:8]
+    if not tokens:
+        return None
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def search_catalog(query: str, page: int = 0, per_page: int = 10) -> tuple[list[tuple[str, float]], bool]:
+    """Return one page of ``(item name, price)`` matches and whether more follow.
+
+    Only items in stock and outside password protected categories are
+    returned, best match first.
+    """
+    match = catalog_match_query(query)
+    if match is None:
+        return [], False
+    in_stock = exists().where(ItemValues.item_name == Goods.name, unreserved_value())
+    locked = exists().where(
+        CategoryClosure.descendant == Goods.category_name,
+        Categories.name == CategoryClosure.ancestor,
+        Categories.requires_password.is_(True),
+    )
+    rows = (
+        Database().session.query(Goods.name, Goods.price)
+        .select_from(_catalog_search)
+        .join(Goods, literal_column('goods.rowid') == _catalog_search.c.rowid)
+        .filter(text('catalog_search MATCH :query').bindparams(query=match), in_stock, ~locked)
+        .order_by(_catalog_search.c.rank)
+        .limit(per_page + 1)
+        .offset(page * per_page)
+        .all()
+    )
+    return [(name, price) for name, price in rows[:per_page]], len(rows) > per_page
@@ -0,0 +1,64 @@
+"""Process-wide cache of parsed settings rows.
+
+Settings are stored as JSON text columns. Each settings module registers a
+loader that parses and sanitises its row once into an immutable snapshot;
+the module's writers invalidate the snapshot after committing.
+"""
+
+from __future__ import annotations
+
+from threading import RLock
+from types import MappingProxyType
+from typing import Any, Callable, Mapping
+
+__all__ = ['settings_registry', 'freeze', 'thaw']
+
+
+def freeze(value: Any) -> Any:
+    """Return a read-only copy of decoded JSON data."""
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """Return a mutable copy of data produced by :func:`freeze`."""
+    if isinstance(value, Mapping):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(item) for item in value]
+    return value
+
+
+class SettingsRegistry:
+    def __init__(self):
+        self._loaders: dict[str, Callable[[], Any]] = {}
+        self._values: dict[str, Any] = {}
+        self._lock = RLock()
+
+    def register(self, name: str, loader: Callable[[], Any]) -> None:
+        with self._lock:
+            self._loaders[name] = loader
+            self._values.pop(name, None)
+
+    def get(self, name: str) -> Any:
+        try:
+            return self._values[name]
+        except KeyError:
+            pass
+        with self._lock:
+            if name not in self._values:
+                self._values[name] = self._loaders[name]()
+            return self._values[name]
+
+    def invalidate(self, *names: str) -> None:
+        with self._lock:
+            if not names:
+                self._values.clear()
+            for name in names:
+                self._values.pop(name, None)
+
+
+settings_registry = SettingsRegistry()
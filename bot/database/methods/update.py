@@ -1,11 +1,14 @@
 import datetime
 import json
 
+from sqlalchemy import select, true
+
 from bot.database.models import (
     User,
     ItemValues,
     Goods,
     Categories,
+    CategoryClosure,
     PromoCode,
     StockNotification,
     ResellerPrice,
@@ -86,6 +89,36 @@ def update_category(category_name: str, new_name: str) -> None:
     Database().session.commit()
 
 
+def move_category(category_name: str, new_parent: str | None) -> None:
+    """Move a category with its subtree under ``new_parent`` (or to the top level)."""
+    session = Database().session
+    closure = CategoryClosure.__table__
+    subtree = select(closure.c.descendant).where(closure.c.ancestor == category_name)
+    if new_parent is not None and session.query(
+            select(closure).where(closure.c.ancestor == category_name, closure.c.descendant == new_parent).exists()
+    ).scalar():
+        raise ValueError(f'cannot move {category_name} under its own subcategory {new_parent}')
+    try:
+        # Detach the subtree from its old ancestors, then attach it below the new parent's ancestors.
+        session.execute(closure.delete().where(
+            closure.c.descendant.in_(subtree), closure.c.ancestor.not_in(subtree)))
+        if new_parent is not None:
+            above = closure.alias('above')
+            below = closure.alias('below')
+            session.execute(closure.insert().from_select(
+                ['descendant', 'ancestor', 'depth'],
+                select(below.c.descendant, above.c.ancestor, above.c.depth + below.c.depth + 1)
+                .select_from(above.join(below, true()))
+                .where(above.c.descendant == new_parent, below.c.ancestor == category_name),
+            ))
+        session.query(Categories).filter(Categories.name == category_name).update(
+            values={Categories.parent_name: new_parent})
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+
+
 def set_category_options(category_name: str,
                          allow_discounts: bool | None = None,
                          allow_referral_rewards: bool | None = None) -> None:
@@ -145,6 +178,17 @@ def clear_stock_notifications(item_name: str) -> None:
     Database().session.commit()
 
 
+def remove_stock_notifications(item_name: str, user_ids: list[int], chunk_size: int = 500) -> None:
+    """Drop the restock subscriptions of ``user_ids`` for one item."""
+    session = Database().session
+    for start in range(0, len(user_ids), chunk_size):
+        session.query(StockNotification).filter(
+            StockNotification.item_name == item_name,
+            StockNotification.user_id.in_(user_ids[start:start + chunk_size]),
+        ).delete(synchronize_session=False)
+    session.commit()
+
+
 def set_cart_quantity(user_id: int, item_name: str, quantity: int) -> None:
     """Update stored quantity for a cart item, removing it when quantity <= 0."""
     session = Database().session
@@ -363,8 +407,10 @@ def clear_generated_password_usage(password_id: int) -> None:
     session.commit()
 
 
-def process_purchase_streak(telegram_id: int) -> None:
-    """Update streak data after a successful purchase."""
+def process_purchase_streak(telegram_id: int, commit: bool = True) -> None:
+    """Update streak data after a successful purchase.
+
+    Pass ``commit=False`` to leave the transaction open for the caller."""
     session = Database().session
     user = session.query(User).filter(User.telegram_id == telegram_id).one()
     today = datetime.date.today()
@@ -389,4 +435,5 @@ def process_purchase_streak(telegram_id: int) -> None:
         user.purchase_streak = 0
         user.streak_discount = True
 
-    session.commit()
+    if commit:
+        session.commit()
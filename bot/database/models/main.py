@@ -1,4 +1,5 @@
 import datetime
+import hashlib
 import json
 
 from sqlalchemy import (
@@ -9,6 +10,8 @@ from sqlalchemy import (
     ForeignKey,
     Text,
     Boolean,
+    Float,
+    Index,
     VARCHAR,
     UniqueConstraint,
     inspect,
@@ -139,6 +142,9 @@ class Categories(Database.BASE):
     allow_referral_rewards = Column(Boolean, nullable=False, default=True)
     requires_password = Column(Boolean, nullable=False, default=False)
     item = relationship("Goods", back_populates="category")
+    __table_args__ = (
+        Index('ix_categories_parent_title', 'parent_name', 'title', 'name'),
+    )
 
     def __init__(
         self,
@@ -157,6 +163,31 @@ class Categories(Database.BASE):
         self.requires_password = requires_password
 
 
+class CategoryClosure(Database.BASE):
+    """Every (ancestor, descendant) pair of the category tree, self pairs included."""
+    __tablename__ = 'category_closure'
+    descendant = Column(String(100), primary_key=True)
+    ancestor = Column(String(100), primary_key=True, index=True)
+    depth = Column(Integer, nullable=False)
+
+    @staticmethod
+    def rebuild(connection) -> None:
+        """Recompute the whole table from ``categories.parent_name``."""
+        connection.execute(text("DELETE FROM category_closure"))
+        connection.execute(
+            text(
+                "INSERT OR IGNORE INTO category_closure (descendant, ancestor, depth) "
+                "WITH RECURSIVE tree(descendant, ancestor, depth) AS ("
+                "SELECT name, name, 0 FROM categories "
+                "UNION ALL "
+                "SELECT tree.descendant, categories.parent_name, tree.depth + 1 FROM tree "
+                "JOIN categories ON categories.name = tree.ancestor "
+                "WHERE categories.parent_name IS NOT NULL AND tree.depth < 64) "
+                "SELECT descendant, ancestor, depth FROM tree"
+            )
+        )
+
+
 class Term(Database.BASE):
     __tablename__ = 'terms'
 
@@ -189,6 +220,9 @@ class Goods(Database.BASE):
     category = relationship("Categories", back_populates="item")
     term = relationship("Term", lazy='joined')
     values = relationship("ItemValues", back_populates="item")
+    __table_args__ = (
+        Index('ix_goods_category_name', 'category_name', 'name'),
+    )
 
     def __init__(self, name: str, price: int, description: str, category_name: str,
                  delivery_description: str | None = None, term_code: str | None = None):
@@ -200,20 +234,50 @@ class Goods(Database.BASE):
         self.term_code = term_code
 
 
+def item_value_hash(value: str | None) -> str | None:
+    """SHA-256 of a stock value with surrounding whitespace removed."""
+    if value is None:
+        return None
+    return hashlib.sha256(value.strip().encode('utf-8')).hexdigest()
+
+
 class ItemValues(Database.BASE):
     __tablename__ = 'item_values'
+    __table_args__ = (
+        UniqueConstraint('item_name', 'value_hash', name='uq_item_value_hash'),
+    )
+
     id = Column(Integer, nullable=False, primary_key=True)
     item_name = Column(String(100), ForeignKey('goods.name'), nullable=False)
     value = Column(Text, nullable=True)
+    value_hash = Column(String(64), nullable=True)
     is_infinity = Column(Boolean, nullable=False)
     item = relationship("Goods", back_populates="values")
 
     def __init__(self, name: str, value: str, is_infinity: bool):
         self.item_name = name
         self.value = value
+        self.value_hash = item_value_hash(value)
         self.is_infinity = is_infinity
 
 
+class StockReservation(Database.BASE):
+    __tablename__ = 'stock_reservations'
+    value_id = Column(Integer, ForeignKey('item_values.id'), primary_key=True)
+    item_name = Column(String(100), nullable=False)
+    invoice_id = Column(String(100), nullable=False, index=True)
+    user_id = Column(BigInteger, nullable=True)
+    expires_at = Column(VARCHAR, nullable=False, index=True)
+
+    def __init__(self, value_id: int, item_name: str, invoice_id: str, expires_at: str,
+                 user_id: int | None = None):
+        self.value_id = value_id
+        self.item_name = item_name
+        self.invoice_id = invoice_id
+        self.expires_at = expires_at
+        self.user_id = user_id
+
+
 class BoughtGoods(Database.BASE):
     __tablename__ = 'bought_goods'
     id = Column(Integer, nullable=False, primary_key=True)
@@ -288,6 +352,10 @@ class Achievement(Database.BASE):
 
 class UserAchievement(Database.BASE):
     __tablename__ = 'user_achievements'
+    __table_args__ = (
+        UniqueConstraint('user_id', 'achievement_code', name='uq_user_achievement'),
+    )
+
     id = Column(Integer, primary_key=True)
     user_id = Column(BigInteger, ForeignKey('users.telegram_id'), nullable=False)
     achievement_code = Column(String(50), ForeignKey('achievements.code'), nullable=False)
@@ -299,6 +367,17 @@ class UserAchievement(Database.BASE):
         self.achieved_at = achieved_at
 
 
+class AchievementStats(Database.BASE):
+    __tablename__ = 'achievement_stats'
+
+    code = Column(String(50), primary_key=True, unique=True)
+    unlocked = Column(Integer, nullable=False, default=0)
+
+    def __init__(self, code: str, unlocked: int = 0):
+        self.code = code
+        self.unlocked = unlocked
+
+
 class PromoCode(Database.BASE):
     __tablename__ = 'promo_codes'
     code = Column(String(50), primary_key=True, unique=True)
@@ -341,7 +420,7 @@ class StockNotification(Database.BASE):
     __tablename__ = 'stock_notifications'
     id = Column(Integer, primary_key=True)
     user_id = Column(BigInteger, ForeignKey('users.telegram_id'), nullable=False)
-    item_name = Column(String(100), ForeignKey('goods.name'), nullable=False)
+    item_name = Column(String(100), ForeignKey('goods.name'), nullable=False, index=True)
 
     def __init__(self, user_id: int, item_name: str):
         self.user_id = user_id
@@ -544,83 +623,344 @@ class QuestSettings(Database.BASE):
         return data
 
 
-def register_models():
+class UserTermPurchases(Database.BASE):
+    __tablename__ = 'user_term_purchases'
+    __table_args__ = (
+        UniqueConstraint('user_id', 'term_code', name='uq_user_term_purchases'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(BigInteger, ForeignKey('users.telegram_id'), nullable=False)
+    term_code = Column(String(64), nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+
+    def __init__(self, user_id: int, term_code: str, count: int = 0):
+        self.user_id = user_id
+        self.term_code = term_code
+        self.count = count
+
+
+class QuestProgress(Database.BASE):
+    __tablename__ = 'quest_progress'
+    __table_args__ = (
+        UniqueConstraint('user_id', 'period_start', 'term_code', name='uq_quest_progress'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(BigInteger, ForeignKey('users.telegram_id'), nullable=False)
+    period_start = Column(VARCHAR, nullable=False)
+    term_code = Column(String(64), nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+
+    def __init__(self, user_id: int, period_start: str, term_code: str, count: int = 0):
+        self.user_id = user_id
+        self.period_start = period_start
+        self.term_code = term_code
+        self.count = count
+
+
+class QuestReward(Database.BASE):
+    __tablename__ = 'quest_rewards'
+    __table_args__ = (
+        UniqueConstraint('user_id', 'period_start', name='uq_quest_reward'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(BigInteger, ForeignKey('users.telegram_id'), nullable=False)
+    period_start = Column(VARCHAR, nullable=False)
+    reward = Column(Text, nullable=False)
+    granted_at = Column(VARCHAR, nullable=False)
+    redeemed_at = Column(VARCHAR, nullable=True)
+
+    def __init__(self, user_id: int, period_start: str, reward: dict, granted_at: str,
+                 redeemed_at: str | None = None):
+        self.user_id = user_id
+        self.period_start = period_start
+        self.reward = json.dumps(reward, ensure_ascii=False)
+        self.granted_at = granted_at
+        self.redeemed_at = redeemed_at
+
+    def reward_dict(self) -> dict:
+        try:
+            data = json.loads(self.reward) if self.reward else {}
+        except (TypeError, ValueError):
+            data = {}
+        if not isinstance(data, dict):
+            data = {}
+        return data
+
+
+class DelayedJob(Database.BASE):
+    __tablename__ = 'delayed_jobs'
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(32), nullable=False)
+    payload = Column(Text, nullable=False)
+    # Unix timestamp. Claiming a job moves it forward by the lease, so a job
+    # whose runner died becomes due again.
+    run_at = Column(Float, nullable=False, index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+
+    def __init__(self, kind: str, payload: dict, run_at: float):
+        self.kind = kind
+        self.payload = json.dumps(payload, ensure_ascii=False)
+        self.run_at = run_at
+        self.attempts = 0
+
+
+class SchemaVersion(Database.BASE):
+    """One row per applied entry of :data:`MIGRATIONS`."""
+    __tablename__ = 'schema_version'
+    version = Column(Integer, primary_key=True)
+    name = Column(String(100), nullable=False)
+    applied_at = Column(VARCHAR, nullable=False)
+
+
+def _add_column(connection, table: str, column: str, definition: str, *updates: str) -> bool:
+    """Add ``column`` to ``table`` unless the table is missing or already has it."""
+    inspector = inspect(connection)
+    if not inspector.has_table(table) or column in {entry['name'] for entry in inspector.get_columns(table)}:
+        return False
+    connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {definition}"))
+    for update in updates:
+        connection.execute(text(update))
+    return True
+
+
+def _unique_user_achievements(connection) -> None:
+    inspector = inspect(connection)
+    if not inspector.has_table('user_achievements'):
+        return
+    unique_names = {
+        entry['name'] for entry in inspector.get_unique_constraints('user_achievements')
+    } | {
+        entry['name'] for entry in inspector.get_indexes('user_achievements') if entry.get('unique')
+    }
+    if 'uq_user_achievement' not in unique_names:
+        connection.execute(
+            text(
+                "DELETE FROM user_achievements WHERE id NOT IN ("
+                "SELECT MIN(id) FROM user_achievements GROUP BY user_id, achievement_code)"
+            )
+        )
+        connection.execute(
+            text("CREATE UNIQUE INDEX IF NOT EXISTS uq_user_achievement ON user_achievements (user_id, achievement_code)")
+        )
+
+
+def _item_value_hashes(connection) -> None:
+    if _add_column(connection, 'item_values', 'value_hash', 'VARCHAR(64)'):
+        _backfill_item_value_hashes(connection)
+        connection.execute(
+            text("CREATE UNIQUE INDEX IF NOT EXISTS uq_item_value_hash ON item_values (item_name, value_hash)")
+        )
+
+
+def _catalog_indexes(connection) -> None:
+    inspector = inspect(connection)
+    if inspector.has_table('categories'):
+        connection.execute(
+            text("CREATE INDEX IF NOT EXISTS ix_categories_parent_title ON categories (parent_name, title, name)")
+        )
+    if inspector.has_table('goods'):
+        connection.execute(text("CREATE INDEX IF NOT EXISTS ix_goods_category_name ON goods (category_name, name)"))
+    if inspector.has_table('stock_notifications'):
+        connection.execute(
+            text("CREATE INDEX IF NOT EXISTS ix_stock_notifications_item_name ON stock_notifications (item_name)")
+        )
+
+
+def _nullable_reseller_id(connection) -> None:
+    inspector = inspect(connection)
+    if not inspector.has_table('reseller_prices'):
+        return
+    for column in inspector.get_columns('reseller_prices'):
+        if column['name'] == 'reseller_id' and not column['nullable']:
+            ResellerPrice.__table__.drop(connection)
+            break
+
+
+def _create_tables(connection) -> None:
+    """Create the tables old databases lack and fill the derived ones."""
+    inspector = inspect(connection)
+    backfill_achievement_stats = not inspector.has_table('achievement_stats')
+    backfill_category_closure = not inspector.has_table('category_closure')
+    Database.BASE.metadata.create_all(connection)
+    if backfill_achievement_stats:
+        connection.execute(
+            text(
+                "INSERT INTO achievement_stats (code, unlocked) "
+                "SELECT achievement_code, COUNT(*) FROM user_achievements GROUP BY achievement_code"
+            )
+        )
+    if backfill_category_closure:
+        CategoryClosure.rebuild(connection)
+
+
+# Applied in order, once each; an entry's version is its position, counting
+# from 1, so only ever append. Entries check before they change anything,
+# since databases older than ``schema_version`` may already have some of
+# them. A new database is created at the latest version and skips them all.
+MIGRATIONS = (
+    ('unfinished_operations.message_id', lambda c: _add_column(c, 'unfinished_operations', 'message_id', 'BIGINT')),
+    ('users.lottery_tickets', lambda c: _add_column(c, 'users', 'lottery_tickets', 'INTEGER DEFAULT 0')),
+    ('users.purchase_streak', lambda c: _add_column(c, 'users', 'purchase_streak', 'INTEGER DEFAULT 0')),
+    ('users.last_purchase_date', lambda c: _add_column(c, 'users', 'last_purchase_date', 'VARCHAR')),
+    ('users.streak_discount', lambda c: _add_column(c, 'users', 'streak_discount', 'BOOLEAN DEFAULT 0')),
+    ('categories.title', lambda c: _add_column(
+        c, 'categories', 'title', 'VARCHAR(100)',
+        "UPDATE categories SET title = name WHERE title IS NULL OR title = ''",
+    )),
+    ('categories.requires_password', lambda c: _add_column(
+        c, 'categories', 'requires_password', 'BOOLEAN DEFAULT 0',
+        "UPDATE categories SET requires_password = 0 WHERE requires_password IS NULL",
+    )),
+    ('user_category_passwords.acknowledged', lambda c: _add_column(
+        c, 'user_category_passwords', 'acknowledged', 'BOOLEAN DEFAULT 0',
+        "UPDATE user_category_passwords SET acknowledged = 0 WHERE acknowledged IS NULL",
+    )),
+    ('promo_codes.applicable_items', lambda c: _add_column(c, 'promo_codes', 'applicable_items', 'TEXT')),
+    ('goods.term_code', lambda c: _add_column(c, 'goods', 'term_code', 'VARCHAR(64)')),
+    ('bought_goods.term_code', lambda c: _add_column(c, 'bought_goods', 'term_code', 'VARCHAR(64)')),
+    ('achievements.config', lambda c: _add_column(c, 'achievements', 'config', 'TEXT')),
+    ('user_achievements unique', _unique_user_achievements),
+    ('item_values.value_hash', _item_value_hashes),
+    ('catalog indexes', _catalog_indexes),
+    ('level_settings.rewards', lambda c: _add_column(
+        c, 'level_settings', 'rewards', 'TEXT',
+        "UPDATE level_settings SET rewards = '[]' WHERE rewards IS NULL",
+    )),
+    ('reseller_prices.reseller_id nullable', _nullable_reseller_id),
+    ('create tables', _create_tables),
+    ('catalog search', lambda c: _ensure_catalog_search(c)),
+    ('quest_rewards.redeemed_at', lambda c: _add_column(c, 'quest_rewards', 'redeemed_at', 'VARCHAR')),
+)
+
+
+def register_models() -> list[str]:
+    """Bring the database schema up to date and seed the default rows.
+
+    Only migrations missing from ``schema_version`` run, so an up-to-date
+    database costs one table listing and the default checks. A new
+    database is created at the latest version without running any. Returns
+    the names of the migrations that ran.
+    """
     engine = Database().engine
-    inspector = inspect(engine)
-    if 'categories' in inspector.get_table_names():
-        columns = {column['name'] for column in inspector.get_columns('categories')}
-        if 'title' not in columns:
-            with engine.begin() as connection:
-                connection.execute(
-                    text("ALTER TABLE categories ADD COLUMN title VARCHAR(100)")
-                )
-                connection.execute(
-                    text("UPDATE categories SET title = name WHERE title IS NULL OR title = ''")
-                )
-        if 'requires_password' not in columns:
-            with engine.begin() as connection:
-                connection.execute(
-                    text(
-                        "ALTER TABLE categories ADD COLUMN requires_password BOOLEAN DEFAULT 0"
-                    )
-                )
-                connection.execute(
-                    text("UPDATE categories SET requires_password = 0 WHERE requires_password IS NULL")
-                )
-    if 'user_category_passwords' in inspector.get_table_names():
-        columns = {column['name'] for column in inspector.get_columns('user_category_passwords')}
-        if 'acknowledged' not in columns:
-            with engine.begin() as connection:
-                connection.execute(
-                    text(
-                        "ALTER TABLE user_category_passwords ADD COLUMN acknowledged BOOLEAN DEFAULT 0"
-                    )
-                )
-                connection.execute(
-                    text(
-                        "UPDATE user_category_passwords SET acknowledged = 0 WHERE acknowledged IS NULL"
-                    )
-                )
-    if 'promo_codes' in inspector.get_table_names():
-        promo_columns = {column['name'] for column in inspector.get_columns('promo_codes')}
-        if 'applicable_items' not in promo_columns:
-            with engine.begin() as connection:
-                connection.execute(
-                    text("ALTER TABLE promo_codes ADD COLUMN applicable_items TEXT")
-                )
-    if 'goods' in inspector.get_table_names():
-        goods_columns = {column['name'] for column in inspector.get_columns('goods')}
-        if 'term_code' not in goods_columns:
-            with engine.begin() as connection:
-                connection.execute(text("ALTER TABLE goods ADD COLUMN term_code VARCHAR(64)"))
-    if 'bought_goods' in inspector.get_table_names():
-        bought_columns = {column['name'] for column in inspector.get_columns('bought_goods')}
-        if 'term_code' not in bought_columns:
+    with engine.begin() as connection:
+        existing = set(inspect(connection).get_table_names())
+        if 'schema_version' not in existing:
+            SchemaVersion.__table__.create(connection)
+        applied = set(connection.execute(text("SELECT version FROM schema_version")).scalars())
+    pending = [(version, *entry) for version, entry in enumerate(MIGRATIONS, 1) if version not in applied]
+    ran = []
+    if existing - {'schema_version'}:
+        for version, name, migrate in pending:
             with engine.begin() as connection:
-                connection.execute(text("ALTER TABLE bought_goods ADD COLUMN term_code VARCHAR(64)"))
-    if 'achievements' in inspector.get_table_names():
-        achievement_columns = {column['name'] for column in inspector.get_columns('achievements')}
-        if 'config' not in achievement_columns:
-            with engine.begin() as connection:
-                connection.execute(text("ALTER TABLE achievements ADD COLUMN config TEXT"))
-    if 'level_settings' in inspector.get_table_names():
-        level_columns = {column['name'] for column in inspector.get_columns('level_settings')}
-        if 'rewards' not in level_columns:
-            with engine.begin() as connection:
-                connection.execute(text("ALTER TABLE level_settings ADD COLUMN rewards TEXT"))
-                connection.execute(text("UPDATE level_settings SET rewards = '[]' WHERE rewards IS NULL"))
-    if 'reseller_prices' in inspector.get_table_names():
-        for column in inspector.get_columns('reseller_prices'):
-            if column['name'] == 'reseller_id' and not column['nullable']:
-                ResellerPrice.__table__.drop(engine)
-                break
-    Database.BASE.metadata.create_all(engine)
+                migrate(connection)
+                _record_migrations(connection, [(version, name)])
+            ran.append(name)
+        # Tables of models added without a migration.
+        missing = [table for name, table in Database.BASE.metadata.tables.items() if name not in existing]
+        if missing:
+            Database.BASE.metadata.create_all(engine, tables=missing)
+    else:
+        with engine.begin() as connection:
+            Database.BASE.metadata.create_all(connection)
+            _ensure_catalog_search(connection)
+            _record_migrations(connection, [(version, name) for version, name, _ in pending])
     _ensure_main_menu_defaults()
     _ensure_level_settings()
     _ensure_profile_settings()
     _ensure_quest_settings()
     _ensure_achievement_defaults()
     Role.insert_roles()
+    return ran
+
+
+def _record_migrations(connection, migrations: list[tuple[int, str]]) -> None:
+    if migrations:
+        applied_at = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        connection.execute(
+            SchemaVersion.__table__.insert(),
+            [{'version': version, 'name': name, 'applied_at': applied_at} for version, name in migrations],
+        )
+
+
+# Category titles of an item's category and all its ancestors, for search.
+_CATEGORY_PATH_SQL = (
+    "(SELECT group_concat(categories.title, ' ') FROM category_closure "
+    "JOIN categories ON categories.name = category_closure.ancestor "
+    "WHERE category_closure.descendant = {category})"
+)
+_INDEX_GOODS_SQL = (
+    "INSERT INTO catalog_search (rowid, item_name, description, category_path) "
+    "SELECT goods.rowid, goods.name, goods.description, "
+    + _CATEGORY_PATH_SQL.format(category='goods.category_name') + " FROM goods"
+)
+_CATALOG_SEARCH_TRIGGERS = (
+    "CREATE TRIGGER IF NOT EXISTS catalog_search_goods_insert AFTER INSERT ON goods BEGIN "
+    "INSERT INTO catalog_search (rowid, item_name, description, category_path) VALUES "
+    "(NEW.rowid, NEW.name, NEW.description, " + _CATEGORY_PATH_SQL.format(category='NEW.category_name') + "); END",
+    "CREATE TRIGGER IF NOT EXISTS catalog_search_goods_update AFTER UPDATE ON goods BEGIN "
+    "DELETE FROM catalog_search WHERE rowid = OLD.rowid; "
+    "INSERT INTO catalog_search (rowid, item_name, description, category_path) VALUES "
+    "(NEW.rowid, NEW.name, NEW.description, " + _CATEGORY_PATH_SQL.format(category='NEW.category_name') + "); END",
+    "CREATE TRIGGER IF NOT EXISTS catalog_search_goods_delete AFTER DELETE ON goods BEGIN "
+    "DELETE FROM catalog_search WHERE rowid = OLD.rowid; END",
+    # A renamed or moved category changes the path of every item below it.
+    "CREATE TRIGGER IF NOT EXISTS catalog_search_categories_update "
+    "AFTER UPDATE OF title, parent_name ON categories BEGIN "
+    "DELETE FROM catalog_search WHERE rowid IN (SELECT goods.rowid FROM goods WHERE goods.category_name IN "
+    "(SELECT descendant FROM category_closure WHERE ancestor = NEW.name)); "
+    + _INDEX_GOODS_SQL + " WHERE goods.category_name IN "
+    "(SELECT descendant FROM category_closure WHERE ancestor = NEW.name); END",
+)
+
+
+def _ensure_catalog_search(connection) -> None:
+    """Create the FTS5 catalog index and its triggers, filling it on first run."""
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'catalog_search'")
+    ).first()
+    if not exists:
+        connection.execute(
+            text(
+                "CREATE VIRTUAL TABLE catalog_search USING fts5("
+                "item_name, description, category_path, tokenize = 'unicode61 remove_diacritics 2')"
+            )
+        )
+        # Rank name matches above category and description matches.
+        connection.execute(
+            text("INSERT INTO catalog_search (catalog_search, rank) VALUES ('rank', 'bm25(10.0, 1.0, 3.0)')")
+        )
+        connection.execute(text(_INDEX_GOODS_SQL))
+    for trigger in _CATALOG_SEARCH_TRIGGERS:
+        connection.execute(text(trigger))
+
+
+def _backfill_item_value_hashes(connection, chunk_size: int = 5000) -> None:
+    """Hash existing stock values.
+
+    Only the first copy of a repeated value gets its hash; later copies keep
+    a NULL hash so the unique index can be built without deleting stock.
+    """
+    seen: set[tuple[str, str]] = set()
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            text("SELECT id, item_name, value FROM item_values WHERE id > :last ORDER BY id LIMIT :limit"),
+            {'last': last_id, 'limit': chunk_size},
+        ).all()
+        if not rows:
+            break
+        updates = []
+        for row_id, item_name, value in rows:
+            value_hash = item_value_hash(value)
+            if value_hash is not None and (item_name, value_hash) not in seen:
+                seen.add((item_name, value_hash))
+                updates.append({'id': row_id, 'value_hash': value_hash})
+        if updates:
+            connection.execute(text("UPDATE item_values SET value_hash = :value_hash WHERE id = :id"), updates)
+        last_id = rows[-1][0]
 
 
 def _ensure_main_menu_defaults() -> None:
@@ -10,6 +10,7 @@ from bot.misc import TgConfig
 from bot.logger_mesh import logger
 from bot.handlers.other import get_bot_user_ids
 from bot.utils import safe_edit_message_text
+from bot.utils.send_queue import BULK, send_priority
 
 
 async def send_message_callback_handler(call: CallbackQuery):
@@ -35,17 +36,22 @@ async def broadcast_messages(message: Message):
     await bot.delete_message(chat_id=message.chat.id,
                              message_id=message.message_id)
     users = get_all_users()
-    max_users = 0
-    for user_row in users:
-        max_users += 1
-        user_id = user_row[0]
-        await asyncio.sleep(0.1)
+    max_users = len(users)
+
+    async def send(user_id) -> None:
         try:
             await bot.send_message(chat_id=int(user_id),
                                    text=msg,
                                    reply_markup=close())
         except BotBlocked:
             pass
+        except Exception as e:
+            logger.warning(f"Broadcast to {user_id} failed: {e}")
+
+    # The send queue paces these; bulk priority keeps shop replies ahead of them.
+    with send_priority(BULK):
+        for start in range(0, len(users), 100):
+            await asyncio.gather(*(send(user_row[0]) for user_row in users[start:start + 100]))
     await safe_edit_message_text(bot, chat_id=message.chat.id,
                                 message_id=message_id,
                                 text='Transliacija baigta',
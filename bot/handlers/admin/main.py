@@ -10,6 +10,7 @@ from bot.utils.statistics import collect_shop_statistics, format_admin_statistic
 from bot.utils import safe_edit_message_text
 
 from bot.handlers.admin.broadcast import register_mailing
+from bot.handlers.admin.picker import register_picker
 from bot.handlers.admin.shop_management_states import register_shop_management
 from bot.handlers.admin.user_management_states import register_user_management
 from bot.handlers.admin.assistant_management_states import register_assistant_management
@@ -144,6 +145,7 @@ def register_admin_handlers(dp: Dispatcher) -> None:
                                        lambda c: c.data.startswith('admin_lang_'),
                                        state='*')
 
+    register_picker(dp)
     register_mailing(dp)
     register_shop_management(dp)
     register_user_management(dp)
@@ -1,5 +1,6 @@
 from aiogram import Dispatcher
 from aiogram.types import CallbackQuery, Message, InlineKeyboardMarkup, InlineKeyboardButton
+import asyncio
 import contextlib
 import html
 import random
@@ -55,6 +56,7 @@ from bot.keyboards.inline import _navback
 from bot.misc import TgConfig
 from bot.localization import t
 from bot.utils import safe_edit_message_text
+from bot.utils.send_queue import BULK, send_priority
 
 
 _TOOLS_TEXTS = {
@@ -2392,11 +2394,14 @@ async def lottery_broadcast_message(message: Message):
         return
     text = message.text
     users = get_all_users()
-    for uid, in users:
-        try:
+
+    async def send(uid) -> None:
+        with contextlib.suppress(Exception):
             await bot.send_message(uid, text)
-        except Exception:
-            continue
+
+    with send_priority(BULK):
+        for start in range(0, len(users), 100):
+            await asyncio.gather(*(send(uid) for uid, in users[start:start + 100]))
     reset_lottery_tickets()
     TgConfig.STATE.pop('lottery_winner', None)
     TgConfig.STATE[user_id] = None
@@ -0,0 +1,314 @@
+"""Paginated, filterable category and item picker shared by admin flows.
+
+A flow describes itself with a :class:`PickerFlow` and calls
+:func:`start_picker`; the picker then handles browsing, paging, filtering
+and going up, and hands the chosen category or item to the flow. Buttons
+carry ``pick:<flow>:<action>:<token>`` where the token is a small integer
+standing for a name for as long as the picker is open, so callback data
+stays short whatever the catalog names are.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+from aiogram import Dispatcher
+from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, Message
+
+from bot.database.methods import (
+    check_category,
+    check_item,
+    get_categories_with_children,
+    get_category_children_page,
+    get_item_names_page,
+    get_user_language,
+)
+from bot.handlers.other import get_bot_user_ids
+from bot.localization import t
+from bot.misc import TgConfig
+from bot.utils import display_name, safe_edit_message_text
+
+PAGE_SIZE = 20
+MAX_DEPTH = 32
+MAX_QUERY_LENGTH = 50
+FILTER_STATE = 'picker_filter'
+
+CATEGORY = 'c'
+ITEM = 'i'
+
+
+@dataclass(frozen=True)
+class PickerFlow:
+    """How one admin flow uses the picker.
+
+    ``title(lang, user_id, current)`` renders the message text,
+    ``on_pick(call, kind, name)`` receives the choice and ``label(user_id,
+    kind, name, text)`` may decorate a button, e.g. with a selection mark.
+    The cancel button sends ``cancel_data`` when given, otherwise it calls
+    ``on_cancel``.
+    """
+    key: str
+    state: str
+    title: Callable[[str, int, str | None], str]
+    on_pick: Callable[[CallbackQuery, str, str], Awaitable[None]]
+    on_cancel: Callable[[CallbackQuery], Awaitable[None]] | None = None
+    cancel_data: str | None = None
+    items: bool = False
+    pick_categories: bool = False
+    open_categories: bool = True
+    label: Callable[[int, str, str, str], str] | None = None
+    extra_rows: Callable[[str, int], list[list[InlineKeyboardButton]]] | None = None
+    empty_button: str = 'multi_select_empty'
+    empty_alert: str = 'multi_select_no_children'
+
+
+_FLOWS: dict[str, PickerFlow] = {}
+
+
+def register_picker_flow(flow: PickerFlow) -> PickerFlow:
+    _FLOWS[flow.key] = flow
+    return flow
+
+
+def picker_data(key: str, action: str, token: int | None = None) -> str:
+    """Callback data for a picker button; ``r`` reopens the picker where it was left."""
+    return f'pick:{key}:{action}' if token is None else f'pick:{key}:{action}:{token}'
+
+
+def _lang(user_id: int) -> str:
+    return get_user_language(user_id) or 'en'
+
+
+def _state(user_id: int) -> dict | None:
+    return TgConfig.STATE.get(f'{user_id}_picker')
+
+
+def picker_current(user_id: int) -> str | None:
+    picker = _state(user_id)
+    return picker['current'] if picker else None
+
+
+def picker_path(user_id: int) -> list[str]:
+    """Categories from the top level down to the one being browsed."""
+    picker = _state(user_id)
+    if not picker or picker['current'] is None:
+        return []
+    return picker['nav'] + [picker['current']]
+
+
+def clear_picker(user_id: int) -> None:
+    TgConfig.STATE.pop(f'{user_id}_picker', None)
+
+
+def _reset_paging(picker: dict) -> None:
+    picker['cursor'] = None
+    picker['pages'] = []
+    picker['next'] = None
+
+
+def _token(picker: dict, kind: str, name: str) -> int:
+    tokens: dict[tuple[str, str], int] = picker['tokens']
+    token = tokens.get((kind, name))
+    if token is None:
+        token = tokens[(kind, name)] = len(picker['names'])
+        picker['names'].append((kind, name))
+    return token
+
+
+def _resolve(picker: dict, token: str) -> tuple[str, str] | None:
+    if not token.isdigit() or int(token) >= len(picker['names']):
+        return None
+    return picker['names'][int(token)]
+
+
+def _is_child(kind: str, name: str, current: str | None) -> bool:
+    if kind == CATEGORY:
+        category = check_category(name)
+        return category is not None and category['parent_name'] == current
+    item = check_item(name)
+    return item is not None and current is not None and item['category_name'] == current
+
+
+def _load_page(flow: PickerFlow, picker: dict) -> tuple[list[tuple[str, str, str]], tuple | None]:
+    """Return ``(kind, name, text)`` entries from the cursor on, and the next page's cursor.
+
+    Subcategories come first, ordered by title, then the category's items by
+    name; a cursor is ``('c', title, name)`` or ``('i', name)``.
+    """
+    current, cursor, query = picker['current'], picker['cursor'], picker['query']
+    entries: list[tuple[str, str, str]] = []
+    if cursor is None or cursor[0] == CATEGORY:
+        categories, more = get_category_children_page(current, cursor and cursor[1:], PAGE_SIZE, query)
+        entries = [(CATEGORY, name, title or name) for name, title in categories]
+        if more:
+            name, title = categories[-1]
+            return entries, (CATEGORY, title, name)
+        cursor = (ITEM, None)
+    if not flow.items or current is None:
+        return entries, None
+    names, more = get_item_names_page(current, cursor[1], PAGE_SIZE - len(entries), query)
+    entries.extend((ITEM, name, display_name(name)) for name in names)
+    if more:
+        return entries, (ITEM, names[-1] if names else cursor[1])
+    return entries, None
+
+
+def _markup(flow: PickerFlow, picker: dict, user_id: int, lang: str) -> InlineKeyboardMarkup:
+    entries, picker['next'] = _load_page(flow, picker)
+    openable = set()
+    if flow.pick_categories and flow.open_categories:
+        openable = get_categories_with_children([name for kind, name, _ in entries if kind == CATEGORY])
+    markup = InlineKeyboardMarkup(row_width=1)
+    for kind, name, text in entries:
+        token = _token(picker, kind, name)
+        if kind == CATEGORY and not flow.pick_categories:
+            text = f'📁 {text}'
+        if flow.label:
+            text = flow.label(user_id, kind, name, text)
+        if kind == CATEGORY and not flow.pick_categories:
+            markup.add(InlineKeyboardButton(text, callback_data=picker_data(flow.key, 'o', token)))
+            continue
+        buttons = [InlineKeyboardButton(text, callback_data=picker_data(flow.key, 'p', token))]
+        if name in openable and kind == CATEGORY:
+            buttons.append(InlineKeyboardButton('➡️', callback_data=picker_data(flow.key, 'o', token)))
+        markup.row(*buttons)
+    if not entries:
+        markup.add(InlineKeyboardButton(t(lang, flow.empty_button), callback_data=picker_data(flow.key, 'e')))
+    pages = []
+    if picker['pages']:
+        pages.append(InlineKeyboardButton('⬅️', callback_data=picker_data(flow.key, 'v')))
+    if picker['next'] is not None:
+        pages.append(InlineKeyboardButton('➡️', callback_data=picker_data(flow.key, 'n')))
+    if pages:
+        markup.row(*pages)
+    if picker['query']:
+        markup.add(InlineKeyboardButton(t(lang, 'picker_filter_clear', query=picker['query']),
+                                        callback_data=picker_data(flow.key, 'x')))
+    elif pages:
+        markup.add(InlineKeyboardButton(t(lang, 'picker_filter'), callback_data=picker_data(flow.key, 'f')))
+    if picker['current'] is not None:
+        markup.add(InlineKeyboardButton(t(lang, 'multi_select_up'), callback_data=picker_data(flow.key, 'u')))
+    for row in flow.extra_rows(lang, user_id) if flow.extra_rows else ():
+        markup.row(*row)
+    markup.add(InlineKeyboardButton(t(lang, 'action_cancel'),
+                                    callback_data=flow.cancel_data or picker_data(flow.key, 'c')))
+    return markup
+
+
+async def show_picker(bot, chat_id: int, message_id: int, user_id: int) -> None:
+    picker = _state(user_id)
+    if not picker:
+        return
+    flow = _FLOWS[picker['flow']]
+    lang = _lang(user_id)
+    markup = _markup(flow, picker, user_id, lang)
+    text = flow.title(lang, user_id, picker['current'])
+    if picker['query']:
+        text += '\n' + t(lang, 'picker_filter_active', query=picker['query'])
+    picker['message_id'] = message_id
+    await safe_edit_message_text(bot, text, chat_id=chat_id, message_id=message_id, reply_markup=markup)
+
+
+async def start_picker(bot, chat_id: int, message_id: int, user_id: int, key: str,
+                       current: str | None = None) -> None:
+    """Open flow ``key``'s picker at ``current`` (the top level by default)."""
+    flow = _FLOWS[key]
+    TgConfig.STATE[user_id] = flow.state
+    TgConfig.STATE[f'{user_id}_picker'] = {
+        'flow': key,
+        'current': current,
+        'nav': [],
+        'query': None,
+        'tokens': {},
+        'names': [],
+        'message_id': message_id,
+    }
+    _reset_paging(TgConfig.STATE[f'{user_id}_picker'])
+    await show_picker(bot, chat_id, message_id, user_id)
+
+
+async def picker_callback_handler(call: CallbackQuery):
+    bot, user_id = await get_bot_user_ids(call)
+    _, key, action, *args = call.data.split(':')
+    flow = _FLOWS.get(key)
+    picker = _state(user_id)
+    lang = _lang(user_id)
+    if flow is None or picker is None or picker['flow'] != key:
+        await call.answer(t(lang, 'multi_select_target_missing'), show_alert=True)
+        return
+    state = TgConfig.STATE.get(user_id)
+    if action != 'r' and state not in (flow.state, FILTER_STATE):
+        await call.answer()
+        return
+    TgConfig.STATE[user_id] = flow.state
+    if action == 'e':
+        await call.answer(t(lang, flow.empty_alert), show_alert=True)
+        return
+    if action == 'c' and flow.on_cancel:
+        clear_picker(user_id)
+        await flow.on_cancel(call)
+        return
+    if action == 'f':
+        TgConfig.STATE[user_id] = FILTER_STATE
+        markup = InlineKeyboardMarkup()
+        markup.add(InlineKeyboardButton(t(lang, 'action_cancel'), callback_data=picker_data(key, 'r')))
+        await call.answer()
+        await safe_edit_message_text(bot, t(lang, 'picker_filter_prompt'),
+                                     chat_id=call.message.chat.id,
+                                     message_id=call.message.message_id,
+                                     reply_markup=markup)
+        return
+    if action in ('o', 'p'):
+        target = _resolve(picker, args[0]) if args else None
+        if target is None or not _is_child(*target, picker['current']):
+            await call.answer(t(lang, 'multi_select_target_missing'), show_alert=True)
+            return
+        kind, name = target
+        if action == 'p':
+            await flow.on_pick(call, kind, name)
+            return
+        if kind != CATEGORY:
+            await call.answer(t(lang, 'multi_select_target_missing'), show_alert=True)
+            return
+        if picker['current'] is not None:
+            if len(picker['nav']) >= MAX_DEPTH:
+                await call.answer(t(lang, 'multi_select_depth_limit'), show_alert=True)
+                return
+            picker['nav'].append(picker['current'])
+        picker['current'] = name
+        picker['query'] = None
+        _reset_paging(picker)
+    elif action == 'u':
+        picker['current'] = picker['nav'].pop() if picker['nav'] else None
+        picker['query'] = None
+        _reset_paging(picker)
+    elif action == 'n' and picker['next'] is not None:
+        picker['pages'].append(picker['cursor'])
+        picker['cursor'] = picker['next']
+    elif action == 'v' and picker['pages']:
+        picker['cursor'] = picker['pages'].pop()
+    elif action == 'x':
+        picker['query'] = None
+        _reset_paging(picker)
+    await call.answer()
+    await show_picker(bot, call.message.chat.id, call.message.message_id, user_id)
+
+
+async def picker_filter_receive(message: Message):
+    bot, user_id = await get_bot_user_ids(message)
+    picker = _state(user_id)
+    if TgConfig.STATE.get(user_id) != FILTER_STATE or not picker:
+        return
+    await bot.delete_message(chat_id=message.chat.id, message_id=message.message_id)
+    TgConfig.STATE[user_id] = _FLOWS[picker['flow']].state
+    picker['query'] = (message.text or '').strip()[:MAX_QUERY_LENGTH] or None
+    _reset_paging(picker)
+    await show_picker(bot, message.chat.id, picker['message_id'], user_id)
+
+
+def register_picker(dp: Dispatcher) -> None:
+    dp.register_callback_query_handler(picker_callback_handler,
+                                       lambda c: c.data.startswith('pick:'))
+    dp.register_message_handler(picker_filter_receive,
+                                lambda m: TgConfig.STATE.get(m.from_user.id) == FILTER_STATE)
@@ -3,15 +3,14 @@ from aiogram.types import CallbackQuery, Message, InlineKeyboardMarkup, InlineKe
 
 from bot.database.methods import (
     check_role, check_user_by_username, create_reseller, delete_reseller,
-    get_resellers, set_reseller_price, get_all_category_names,
-    get_all_subcategories, get_all_item_names, get_category_parent,
-    check_user, is_reseller
+    get_resellers, set_reseller_price, check_user, is_reseller
 )
 from bot.database.models import Permission
 from bot.keyboards import back, resellers_management, resellers_list
 from bot.misc import TgConfig
 from bot.handlers.other import get_bot_user_ids
-from bot.utils import display_name, safe_edit_message_text
+from bot.handlers.admin.picker import PickerFlow, picker_data, register_picker_flow, show_picker, start_picker
+from bot.utils import safe_edit_message_text
 
 
 async def resellers_management_callback(call: CallbackQuery):
@@ -114,114 +113,25 @@ async def reseller_price_callback(call: CallbackQuery):
                                     message_id=call.message.message_id,
                                     reply_markup=back('resellers_management'))
         return
-    mains = get_all_category_names()
-    markup = InlineKeyboardMarkup()
-    for main in mains:
-        markup.add(InlineKeyboardButton(main, callback_data=f'reseller_price_main_{main}'))
-    markup.add(InlineKeyboardButton('🔙 Grįžti atgal', callback_data='navback:resellers_management'))
-    await safe_edit_message_text(bot, 'Pasirinkite pagrindinę kategoriją:',
-                                chat_id=call.message.chat.id,
-                                message_id=call.message.message_id,
-                                reply_markup=markup)
+    await start_picker(bot, call.message.chat.id, call.message.message_id, user_id, 'rp')
 
 
-async def reseller_price_main(call: CallbackQuery):
-    bot, user_id = await get_bot_user_ids(call)
-    main = call.data[len('reseller_price_main_'):]
-    categories = get_all_subcategories(main)
-    if categories:
-        markup = InlineKeyboardMarkup()
-        for cat in categories:
-            markup.add(InlineKeyboardButton(cat, callback_data=f'reseller_price_cat_{cat}'))
-        markup.add(InlineKeyboardButton('🔙 Grįžti atgal', callback_data='navback:reseller_prices'))
-        await safe_edit_message_text(bot, 'Pasirinkite kategoriją:',
-                                    chat_id=call.message.chat.id,
-                                    message_id=call.message.message_id,
-                                    reply_markup=markup)
-        return
-    items = get_all_item_names(main)
-    if not items:
-        await safe_edit_message_text(bot, '❌ Šioje kategorijoje nėra prekių',
-                                    chat_id=call.message.chat.id,
-                                    message_id=call.message.message_id,
-                                    reply_markup=back('reseller_prices'))
-        return
-    markup = InlineKeyboardMarkup()
-    for item in items:
-        markup.add(InlineKeyboardButton(display_name(item), callback_data=f'reseller_price_item_{item}'))
-    markup.add(InlineKeyboardButton('🔙 Grįžti atgal', callback_data='navback:reseller_prices'))
-    await safe_edit_message_text(bot, 'Pasirinkite prekę:',
-                                chat_id=call.message.chat.id,
-                                message_id=call.message.message_id,
-                                reply_markup=markup)
+def _reseller_price_title(lang: str, user_id: int, current: str | None) -> str:
+    text = 'Pasirinkite pagrindinę kategoriją:' if current is None else 'Pasirinkite kategoriją arba prekę:'
+    if TgConfig.STATE.pop(f'{user_id}_reseller_price_saved', False):
+        text = f'✅ Kaina nustatyta. {text}'
+    return text
 
 
-async def reseller_price_cat(call: CallbackQuery):
+async def reseller_price_item(call: CallbackQuery, kind: str, item: str) -> None:
     bot, user_id = await get_bot_user_ids(call)
-    category = call.data[len('reseller_price_cat_'):]
-    subs = get_all_subcategories(category)
-    if subs:
-        markup = InlineKeyboardMarkup()
-        for sub in subs:
-            markup.add(InlineKeyboardButton(sub, callback_data=f'reseller_price_sub_{sub}'))
-        back_main = get_category_parent(category)
-        markup.add(InlineKeyboardButton('🔙 Grįžti atgal', callback_data=_navback(f'reseller_price_main_{back_main}')))
-        await safe_edit_message_text(bot, 'Pasirinkite subkategoriją:',
-                                    chat_id=call.message.chat.id,
-                                    message_id=call.message.message_id,
-                                    reply_markup=markup)
-        return
-    items = get_all_item_names(category)
-    if not items:
-        back_main = get_category_parent(category)
-        await safe_edit_message_text(bot, '❌ Šioje kategorijoje nėra prekių',
-                                    chat_id=call.message.chat.id,
-                                    message_id=call.message.message_id,
-                                    reply_markup=back(f'reseller_price_main_{back_main}'))
-        return
-    markup = InlineKeyboardMarkup()
-    for item in items:
-        markup.add(InlineKeyboardButton(display_name(item), callback_data=f'reseller_price_item_{item}'))
-    back_main = get_category_parent(category)
-    markup.add(InlineKeyboardButton('🔙 Grįžti atgal', callback_data=_navback(f'reseller_price_main_{back_main}')))
-    await safe_edit_message_text(bot, 'Pasirinkite prekę:',
-                                chat_id=call.message.chat.id,
-                                message_id=call.message.message_id,
-                                reply_markup=markup)
-
-
-async def reseller_price_sub(call: CallbackQuery):
-    bot, user_id = await get_bot_user_ids(call)
-    sub = call.data[len('reseller_price_sub_'):]
-    items = get_all_item_names(sub)
-    if not items:
-        parent = get_category_parent(sub)
-        await safe_edit_message_text(bot, '❌ Šioje kategorijoje nėra prekių',
-                                    chat_id=call.message.chat.id,
-                                    message_id=call.message.message_id,
-                                    reply_markup=back(f'reseller_price_cat_{parent}'))
-        return
-    markup = InlineKeyboardMarkup()
-    for item in items:
-        markup.add(InlineKeyboardButton(display_name(item), callback_data=f'reseller_price_item_{item}'))
-    parent = get_category_parent(sub)
-    markup.add(InlineKeyboardButton('🔙 Grįžti atgal', callback_data=_navback(f'reseller_price_cat_{parent}')))
-    await safe_edit_message_text(bot, 'Pasirinkite prekę:',
-                                chat_id=call.message.chat.id,
-                                message_id=call.message.message_id,
-                                reply_markup=markup)
-
-
-async def reseller_price_item(call: CallbackQuery):
-    bot, user_id = await get_bot_user_ids(call)
-    item = call.data[len('reseller_price_item_'):]
     TgConfig.STATE[user_id] = 'reseller_price_wait'
     TgConfig.STATE[f'{user_id}_item'] = item
     TgConfig.STATE[f'{user_id}_message_id'] = call.message.message_id
     await safe_edit_message_text(bot, 'Įveskite kainą:',
                                 chat_id=call.message.chat.id,
                                 message_id=call.message.message_id,
-                                reply_markup=back('reseller_prices'))
+                                reply_markup=back(picker_data('rp', 'r')))
 
 
 async def reseller_price_receive(message: Message):
@@ -236,22 +146,18 @@ async def reseller_price_receive(message: Message):
         await safe_edit_message_text(bot, '⚠️ Neteisinga kaina',
                                     chat_id=message.chat.id,
                                     message_id=message_id,
-                                    reply_markup=back('reseller_prices'))
+                                    reply_markup=back(picker_data('rp', 'r')))
         return
     set_reseller_price(None, item, int(price_text))
-    mains = get_all_category_names()
-    markup = InlineKeyboardMarkup()
-    for main in mains:
-        markup.add(InlineKeyboardButton(main, callback_data=f'reseller_price_main_{main}'))
-    markup.add(InlineKeyboardButton('🔙 Grįžti atgal', callback_data='navback:resellers_management'))
-    TgConfig.STATE[user_id] = None
-    await safe_edit_message_text(bot, '✅ Kaina nustatyta. Pasirinkite pagrindinę kategoriją:',
-                                chat_id=message.chat.id,
-                                message_id=message_id,
-                                reply_markup=markup)
+    TgConfig.STATE[user_id] = 'reseller_price_select'
+    TgConfig.STATE[f'{user_id}_reseller_price_saved'] = True
+    await show_picker(bot, message.chat.id, message_id, user_id)
 
 
 def register_reseller_management(dp: Dispatcher) -> None:
+    register_picker_flow(PickerFlow(key='rp', state='reseller_price_select', title=_reseller_price_title,
+                                    on_pick=reseller_price_item, cancel_data='navback:resellers_management',
+                                    items=True))
     dp.register_callback_query_handler(resellers_management_callback,
                                        lambda c: c.data == 'resellers_management')
     dp.register_callback_query_handler(reseller_add_callback,
@@ -264,14 +170,6 @@ def register_reseller_management(dp: Dispatcher) -> None:
                                        lambda c: c.data.startswith('reseller_remove_confirm_'))
     dp.register_callback_query_handler(reseller_price_callback,
                                        lambda c: c.data == 'reseller_prices')
-    dp.register_callback_query_handler(reseller_price_main,
-                                       lambda c: c.data.startswith('reseller_price_main_'))
-    dp.register_callback_query_handler(reseller_price_cat,
-                                       lambda c: c.data.startswith('reseller_price_cat_'))
-    dp.register_callback_query_handler(reseller_price_sub,
-                                       lambda c: c.data.startswith('reseller_price_sub_'))
-    dp.register_callback_query_handler(reseller_price_item,
-                                       lambda c: c.data.startswith('reseller_price_item_'))
     dp.register_message_handler(reseller_add_receive,
                                 lambda m: TgConfig.STATE.get(m.from_user.id) == 'reseller_add_username')
     dp.register_message_handler(reseller_price_receive,
@@ -1,3 +1,4 @@
+import contextlib
 import datetime
 import html
 import math
@@ -5,8 +6,6 @@ import os
 import re
 import shutil
 
-import secrets
-from collections import Counter
 from typing import Sequence, Tuple
 
 from aiogram import Dispatcher
@@ -16,6 +15,7 @@ from aiogram.utils.exceptions import ChatNotFound
 from bot.localization import t
 from bot.database.methods import (
     add_values_to_item,
+    category_has_children,
     check_category,
     check_item,
     check_role,
@@ -27,13 +27,9 @@ from bot.database.methods import (
     delete_item,
     delete_only_items,
     get_all_categories,
-    get_all_category_names,
-    get_all_item_names,
     get_all_items,
-    get_all_subcategories,
     get_category_parent,
     get_category_title,
-    get_category_titles,
     list_terms,
     get_item_info,
     get_user_count,
@@ -85,6 +81,8 @@ from bot.utils.level import get_level_info
 
 
 from bot.utils.files import get_next_file_path
+from bot.utils.scheduler import job_scheduler
+from bot.utils.stock_import import import_stock, iter_stock_file, iter_stock_values
 from bot.database.models import Permission
 from bot.handlers.other import get_bot_user_ids
 from bot.keyboards import (
@@ -102,15 +100,22 @@ from bot.keyboards import (
     catalog_editor_menu,
 )
 from bot.keyboards.inline import _navback
+from bot.handlers.admin.picker import (
+    PickerFlow,
+    clear_picker,
+    picker_current,
+    picker_data,
+    picker_path,
+    register_picker_flow,
+    show_picker,
+    start_picker,
+)
 from bot.logger_mesh import logger
 from bot.misc import TgConfig, EnvKeys
 from bot.utils.statistics import collect_shop_statistics, format_admin_statistics
 from bot.constants.main_menu import MENU_BUTTON_TRANSLATIONS, DEFAULT_MAIN_MENU_BUTTONS
 
 
-MAX_SELECTION_DEPTH = 32
-
-
 _LEVEL_LANGUAGE_KEY_BY_CODE = {
     'en': 'catalog_text_language_en',
     'lt': 'catalog_text_language_lt',
@@ -765,101 +770,36 @@ async def promo_manage_expiry_type_handler(call: CallbackQuery):
 async def promo_manage_items_handler(call: CallbackQuery):
     bot, user_id = await get_bot_user_ids(call)
     code = call.data[len('promo_manage_items_'):]
-    TgConfig.STATE[user_id] = 'promo_manage_items'
     TgConfig.STATE[f'{user_id}_promo_manage_code'] = code
     TgConfig.STATE[f'{user_id}_promo_items_selected'] = set(get_promocode_items(code))
-    TgConfig.STATE[f'{user_id}_promo_items_nav'] = []
-    TgConfig.STATE[f'{user_id}_promo_items_current'] = None
     TgConfig.STATE[f'{user_id}_message_id'] = call.message.message_id
     await call.answer()
-    await show_promo_item_selection(bot, call.message.chat.id, call.message.message_id, user_id)
+    await start_picker(bot, call.message.chat.id, call.message.message_id, user_id, 'pi')
 
 
-async def show_promo_item_selection(bot, chat_id: int, message_id: int, user_id: int) -> None:
-    if TgConfig.STATE.get(user_id) != 'promo_manage_items':
-        return
+def _promo_item_title(lang: str, user_id: int, current: str | None) -> str:
     code = TgConfig.STATE.get(f'{user_id}_promo_manage_code', '')
-    selected: set[str] = set(TgConfig.STATE.get(f'{user_id}_promo_items_selected', set()))
-    current = TgConfig.STATE.get(f'{user_id}_promo_items_current')
-    nav_stack: list[str] = list(TgConfig.STATE.get(f'{user_id}_promo_items_nav', []))
-    categories = _get_hierarchy_children(current)
-    titles = get_category_titles(categories)
-    items = sorted(get_all_item_names(current)) if current is not None else []
-    markup = InlineKeyboardMarkup(row_width=1)
-    for name in categories:
-        label = titles.get(name, _category_label(name))
-        markup.add(InlineKeyboardButton(f'📁 {label}', callback_data=f'promoitem_open_{name}'))
-    for item in items:
-        marker = '✅' if item in selected else '▫️'
-        markup.add(InlineKeyboardButton(f'{marker} {display_name(item)}', callback_data=f'promoitem_toggle_{item}'))
-    if nav_stack:
-        markup.add(InlineKeyboardButton('🔼 Up', callback_data='promoitem_back'))
-    markup.row(
-        InlineKeyboardButton('✅ Done', callback_data='promoitem_done'),
-        InlineKeyboardButton('🧹 Clear', callback_data='promoitem_clear'),
-    )
-    markup.add(InlineKeyboardButton('🔙 Cancel', callback_data='navback:promoitem_cancel'))
     if current is None:
-        text = f'Select a category to choose items for promo {code}:'
-    else:
-        path = ' / '.join(_category_label(part) for part in nav_stack + [current])
-        text = f'Select items in {path} for promo {code}:'
-    await safe_edit_message_text(bot, 
-        text,
-        chat_id=chat_id,
-        message_id=message_id,
-        reply_markup=markup,
-    )
+        return f'Select a category to choose items for promo {code}:'
+    path = ' / '.join(_category_label(part) for part in picker_path(user_id))
+    return f'Select items in {path} for promo {code}:'
 
 
-async def promo_item_open(call: CallbackQuery):
-    bot, user_id = await get_bot_user_ids(call)
-    if TgConfig.STATE.get(user_id) != 'promo_manage_items':
-        return
-    target = call.data[len('promoitem_open_'):]
-    current = TgConfig.STATE.get(f'{user_id}_promo_items_current')
-    lang = _get_lang(user_id)
-    if target not in _get_hierarchy_children(current):
-        await call.answer(t(lang, 'multi_select_target_missing'), show_alert=True)
-        return
-    nav_stack: list[str] = list(TgConfig.STATE.get(f'{user_id}_promo_items_nav', []))
-    if current is not None:
-        if len(nav_stack) >= MAX_SELECTION_DEPTH:
-            await call.answer(t(lang, 'multi_select_depth_limit'), show_alert=True)
-            return
-        nav_stack.append(current)
-    TgConfig.STATE[f'{user_id}_promo_items_nav'] = nav_stack
-    TgConfig.STATE[f'{user_id}_promo_items_current'] = target
-    await call.answer()
-    await show_promo_item_selection(bot, call.message.chat.id, call.message.message_id, user_id)
+def _promo_item_label(user_id: int, kind: str, name: str, text: str) -> str:
+    if kind != 'i':
+        return text
+    return _mark_selected(TgConfig.STATE.get(f'{user_id}_promo_items_selected', set()), name, text)
 
 
-async def promo_item_back(call: CallbackQuery):
-    bot, user_id = await get_bot_user_ids(call)
-    if TgConfig.STATE.get(user_id) != 'promo_manage_items':
-        return
-    nav_stack: list[str] = list(TgConfig.STATE.get(f'{user_id}_promo_items_nav', []))
-    current = nav_stack.pop() if nav_stack else None
-    TgConfig.STATE[f'{user_id}_promo_items_nav'] = nav_stack
-    TgConfig.STATE[f'{user_id}_promo_items_current'] = current
-    await call.answer()
-    await show_promo_item_selection(bot, call.message.chat.id, call.message.message_id, user_id)
+def _promo_item_rows(lang: str, user_id: int) -> list[list[InlineKeyboardButton]]:
+    return [[
+        InlineKeyboardButton('✅ Done', callback_data='promoitem_done'),
+        InlineKeyboardButton('🧹 Clear', callback_data='promoitem_clear'),
+    ]]
 
 
-async def promo_item_toggle(call: CallbackQuery):
+async def promo_item_toggle(call: CallbackQuery, kind: str, item_name: str) -> None:
     bot, user_id = await get_bot_user_ids(call)
-    if TgConfig.STATE.get(user_id) != 'promo_manage_items':
-        return
-    item_name = call.data[len('promoitem_toggle_'):]
-    current = TgConfig.STATE.get(f'{user_id}_promo_items_current')
-    lang = _get_lang(user_id)
-    if current is None:
-        await call.answer(t(lang, 'multi_select_target_missing'), show_alert=True)
-        return
-    valid_items = set(get_all_item_names(current))
-    if item_name not in valid_items:
-        await call.answer(t(lang, 'multi_select_target_missing'), show_alert=True)
-        return
     selected: set[str] = set(TgConfig.STATE.get(f'{user_id}_promo_items_selected', set()))
     if item_name in selected:
         selected.remove(item_name)
@@ -867,7 +807,7 @@ async def promo_item_toggle(call: CallbackQuery):
         selected.add(item_name)
     TgConfig.STATE[f'{user_id}_promo_items_selected'] = selected
     await call.answer()
-    await show_promo_item_selection(bot, call.message.chat.id, call.message.message_id, user_id)
+    await show_picker(bot, call.message.chat.id, call.message.message_id, user_id)
 
 
 async def promo_item_clear(call: CallbackQuery):
@@ -876,7 +816,7 @@ async def promo_item_clear(call: CallbackQuery):
         return
     TgConfig.STATE[f'{user_id}_promo_items_selected'] = set()
     await call.answer('Selection cleared')
-    await show_promo_item_selection(bot, call.message.chat.id, call.message.message_id, user_id)
+    await show_picker(bot, call.message.chat.id, call.message.message_id, user_id)
 
 
 async def promo_item_done(call: CallbackQuery):
@@ -888,8 +828,7 @@ async def promo_item_done(call: CallbackQuery):
     set_promocode_items(code, sorted(selected))
     TgConfig.STATE[user_id] = None
     TgConfig.STATE.pop(f'{user_id}_promo_items_selected', None)
-    TgConfig.STATE.pop(f'{user_id}_promo_items_nav', None)
-    TgConfig.STATE.pop(f'{user_id}_promo_items_current', None)
+    clear_picker(user_id)
     message_id = TgConfig.STATE.get(f'{user_id}_message_id', call.message.message_id)
     admin_info = await bot.get_chat(user_id)
     logger.info(
@@ -917,8 +856,7 @@ async def promo_item_cancel(call: CallbackQuery):
     message_id = TgConfig.STATE.get(f'{user_id}_message_id', call.message.message_id)
     TgConfig.STATE[user_id] = None
     TgConfig.STATE.pop(f'{user_id}_promo_items_selected', None)
-    TgConfig.STATE.pop(f'{user_id}_promo_items_nav', None)
-    TgConfig.STATE.pop(f'{user_id}_promo_items_current', None)
+    clear_picker(user_id)
     await call.answer()
     text = _promo_summary_text(code)
     await safe_edit_message_text(bot, 
@@ -974,63 +912,10 @@ async def promo_manage_delete_handler(call: CallbackQuery):
                                     reply_markup=back('promo_management'))
 
 
-async def _show_assign_menu(bot, chat_id: int, message_id: int, user_id: int, category: str | None) -> None:
-    lang = _get_lang(user_id)
-    if category is None:
-        mains = _get_hierarchy_children(None)
-        if not mains:
-            await safe_edit_message_text(bot, 
-                t(lang, 'assign_no_categories'),
-                chat_id=chat_id,
-                message_id=message_id,
-                reply_markup=back('goods_management'),
-            )
-            return
-        markup = InlineKeyboardMarkup(row_width=1)
-        titles = get_category_titles(mains)
-        for name in mains:
-            label = titles.get(name, _category_label(name))
-            markup.add(InlineKeyboardButton(f'📁 {label}', callback_data=f'assign_photo_main_{name}'))
-        markup.add(InlineKeyboardButton(t(lang, 'back'), callback_data=_navback('goods_management')))
-        await safe_edit_message_text(bot, 
-            t(lang, 'assign_choose_main'),
-            chat_id=chat_id,
-            message_id=message_id,
-            reply_markup=markup,
-        )
-        return
-
-    subcategories = get_all_subcategories(category)
-    items = sorted(get_all_item_names(category))
-    markup = InlineKeyboardMarkup(row_width=1)
-    prefix = _assign_child_prefix(category)
-    titles = get_category_titles(subcategories)
-    for name in subcategories:
-        label = titles.get(name, _category_label(name))
-        markup.add(InlineKeyboardButton(f'📁 {label}', callback_data=f'{prefix}{name}'))
-    for item in items:
-        markup.add(
-            InlineKeyboardButton(
-                display_name(item),
-                callback_data=f'assign_photo_item_{item}',
-            )
-        )
-    if not subcategories and not items:
-        markup.add(InlineKeyboardButton(t(lang, 'assign_empty_branch_button'), callback_data='assign_photo_empty'))
-    parent = get_category_parent(category)
-    if parent is None:
-        back_data = 'assign_photos'
-    elif get_category_parent(parent) is None:
-        back_data = f'assign_photo_main_{parent}'
-    else:
-        back_data = f'assign_photo_sub_{parent}'
-    markup.add(InlineKeyboardButton(t(lang, 'back'), callback_data=_navback(back_data)))
-    await safe_edit_message_text(bot, 
-        t(lang, 'assign_choose_category', path=_format_assign_path(category)),
-        chat_id=chat_id,
-        message_id=message_id,
-        reply_markup=markup,
-    )
+def _assign_title(lang: str, user_id: int, current: str | None) -> str:
+    if current is None:
+        return t(lang, 'assign_choose_main')
+    return t(lang, 'assign_choose_category', path=_format_assign_path(current))
 
 
 async def assign_photos_callback_handler(call: CallbackQuery):
@@ -1040,52 +925,34 @@ async def assign_photos_callback_handler(call: CallbackQuery):
         await call.answer('Nepakanka teisių')
         return
     TgConfig.STATE[user_id] = None
-    await _show_assign_menu(bot, call.message.chat.id, call.message.message_id, user_id, None)
-
-
-async def assign_photo_main_handler(call: CallbackQuery):
-    bot, user_id = await get_bot_user_ids(call)
-    role = check_role(user_id)
-    if not (role & Permission.SHOP_MANAGE or role & Permission.ASSIGN_PHOTOS):
-        await call.answer('Nepakanka teisių')
+    if not category_has_children(None):
+        lang = _get_lang(user_id)
+        await safe_edit_message_text(bot, 
+            t(lang, 'assign_no_categories'),
+            chat_id=call.message.chat.id,
+            message_id=call.message.message_id,
+            reply_markup=back('goods_management'),
+        )
         return
-    main = call.data[len('assign_photo_main_'):]
-    await _show_assign_menu(bot, call.message.chat.id, call.message.message_id, user_id, main)
+    await start_picker(bot, call.message.chat.id, call.message.message_id, user_id, 'ap')
 
 
-async def assign_photo_category_handler(call: CallbackQuery):
-    bot, user_id = await get_bot_user_ids(call)
-    role = check_role(user_id)
-    if not (role & Permission.SHOP_MANAGE or role & Permission.ASSIGN_PHOTOS):
-        await call.answer('Nepakanka teisių')
-        return
-    category = call.data[len('assign_photo_cat_'):]
-    await _show_assign_menu(bot, call.message.chat.id, call.message.message_id, user_id, category)
+async def assign_photo_pick(call: CallbackQuery, kind: str, item: str) -> None:
+    clear_picker(call.from_user.id)
+    await _prompt_assign_media(call, item)
 
 
-async def assign_photo_subcategory_handler(call: CallbackQuery):
-    bot, user_id = await get_bot_user_ids(call)
+async def assign_photo_item_handler(call: CallbackQuery):
+    _, user_id = await get_bot_user_ids(call)
     role = check_role(user_id)
     if not (role & Permission.SHOP_MANAGE or role & Permission.ASSIGN_PHOTOS):
         await call.answer('Nepakanka teisių')
         return
-    category = call.data[len('assign_photo_sub_'):]
-    await _show_assign_menu(bot, call.message.chat.id, call.message.message_id, user_id, category)
-
-
-async def assign_photo_empty_handler(call: CallbackQuery):
-    _, user_id = await get_bot_user_ids(call)
-    lang = _get_lang(user_id)
-    await call.answer(t(lang, 'assign_empty_branch'), show_alert=True)
+    await _prompt_assign_media(call, call.data[len('assign_photo_item_'):])
 
 
-async def assign_photo_item_handler(call: CallbackQuery):
-    bot, user_id = await get_bot_user_ids(call)
-    role = check_role(user_id)
-    if not (role & Permission.SHOP_MANAGE or role & Permission.ASSIGN_PHOTOS):
-        await call.answer('Nepakanka teisių')
-        return
-    item = call.data[len('assign_photo_item_'):]
+async def _prompt_assign_media(call: CallbackQuery, item: str) -> None:
+    bot, user_id = call.bot, call.from_user.id
     info = get_item_info(item)
     category = info['category_name'] if info else None
     TgConfig.STATE[user_id] = 'assign_photo_wait_media'
@@ -1485,8 +1352,7 @@ async def process_subcategory_name(message: Message):
     TgConfig.STATE[user_id] = None
     for key in (
         f'{user_id}_sub_parent_selection',
-        f'{user_id}_sub_nav',
-        f'{user_id}_sub_current',
+        f'{user_id}_picker',
         f'{user_id}_subcategory_queue',
         f'{user_id}_subcategory_index',
         f'{user_id}_subcategory_created',
@@ -1512,29 +1378,20 @@ async def delete_category_callback_handler(call: CallbackQuery):
     if not (role & Permission.SHOP_MANAGE):
         await call.answer('Nepakanka teisių')
         return
-    categories = get_all_category_names()
-    markup = InlineKeyboardMarkup()
-    for cat in categories:
-        markup.add(InlineKeyboardButton(cat, callback_data=f'delete_cat_{cat}'))
-    markup.add(InlineKeyboardButton('🔙 Back', callback_data='navback:categories_management'))
-    await safe_edit_message_text(bot, 'Select category to delete:',
-                                chat_id=call.message.chat.id,
-                                message_id=call.message.message_id,
-                                reply_markup=markup)
+    await start_picker(bot, call.message.chat.id, call.message.message_id, user_id, 'dc')
 
 
-async def delete_category_choose_handler(call: CallbackQuery):
+def _delete_category_title(lang: str, user_id: int, current: str | None) -> str:
+    return 'Select category to delete:' if current is None else 'Choose subcategory or delete:'
+
+
+async def delete_category_choose_handler(call: CallbackQuery, kind: str, category: str) -> None:
     bot, user_id = await get_bot_user_ids(call)
-    category = call.data[len('delete_cat_'):]
-    subcats = get_all_subcategories(category)
+    TgConfig.STATE[f'{user_id}_delete_category'] = category
     markup = InlineKeyboardMarkup()
-    for sub in subcats:
-        markup.add(InlineKeyboardButton(sub, callback_data=f'delete_cat_{sub}'))
-    markup.add(InlineKeyboardButton(f'🗑️ Delete {category}', callback_data=f'delete_cat_confirm_{category}'))
-    back_parent = get_category_parent(category)
-    back_data = 'delete_category' if back_parent is None else f'delete_cat_{back_parent}'
-    markup.add(InlineKeyboardButton('🔙 Back', callback_data=_navback(back_data)))
-    await safe_edit_message_text(bot, 'Choose subcategory or delete:',
+    markup.add(InlineKeyboardButton(f'🗑️ Delete {_category_label(category)}', callback_data='delete_cat_confirm'))
+    markup.add(InlineKeyboardButton('🔙 Back', callback_data=picker_data('dc', 'r')))
+    await safe_edit_message_text(bot, 'Delete this category with its subcategories and items?',
                                 chat_id=call.message.chat.id,
                                 message_id=call.message.message_id,
                                 reply_markup=markup)
@@ -1542,8 +1399,13 @@ async def delete_category_choose_handler(call: CallbackQuery):
 
 async def delete_category_confirm_handler(call: CallbackQuery):
     bot, user_id = await get_bot_user_ids(call)
-    category = call.data[len('delete_cat_confirm_'):]
-    delete_category(category)
+    category = TgConfig.STATE.pop(f'{user_id}_delete_category', None)
+    if TgConfig.STATE.get(user_id) != 'delete_category_select' or not category:
+        await call.answer()
+        return
+    TgConfig.STATE[user_id] = None
+    clear_picker(user_id)
+    job_scheduler.schedule('remove_files', delete_category(category))
     await safe_edit_message_text(bot, '✅ Category deleted',
                                 chat_id=call.message.chat.id,
                                 message_id=call.message.message_id,
@@ -1552,11 +1414,6 @@ async def delete_category_confirm_handler(call: CallbackQuery):
     logger.info(f"User {user_id} ({admin_info.first_name}) deleted category \"{category}\"")
 
 
-def _clear_update_category_selection_state(user_id: int) -> None:
-    TgConfig.STATE.pop(f'{user_id}_category_nav', None)
-    TgConfig.STATE.pop(f'{user_id}_category_current', None)
-
-
 async def update_category_callback_handler(call: CallbackQuery):
     bot, user_id = await get_bot_user_ids(call)
     if f'{user_id}_category_update_back' not in TgConfig.STATE:
@@ -1567,11 +1424,7 @@ async def update_category_callback_handler(call: CallbackQuery):
         await call.answer('Nepakanka teisių')
         return
     lang = _get_lang(user_id)
-    TgConfig.STATE[user_id] = 'update_category_select'
-    TgConfig.STATE[f'{user_id}_category_nav'] = []
-    TgConfig.STATE[f'{user_id}_category_current'] = None
-    roots = _get_hierarchy_children(None)
-    if not roots:
+    if not category_has_children(None):
         TgConfig.STATE[user_id] = None
         await safe_edit_message_text(bot, 
             t(lang, 'catalog_no_categories_available'),
@@ -1579,85 +1432,18 @@ async def update_category_callback_handler(call: CallbackQuery):
             message_id=call.message.message_id,
             reply_markup=back(_get_category_update_back(user_id)),
         )
-        _clear_update_category_selection_state(user_id)
         return
-    await show_update_category_selection(bot, call.message.chat.id, call.message.message_id, user_id)
+    await start_picker(bot, call.message.chat.id, call.message.message_id, user_id, 'uc')
 
 
-async def show_update_category_selection(bot, chat_id: int, message_id: int, user_id: int) -> None:
-    if TgConfig.STATE.get(user_id) != 'update_category_select':
-        return
-    lang = _get_lang(user_id)
-    current = TgConfig.STATE.get(f'{user_id}_category_current')
-    nav = TgConfig.STATE.get(f'{user_id}_category_nav', [])
-    categories = _get_hierarchy_children(current)
-    markup = InlineKeyboardMarkup(row_width=1)
-    for name in categories:
-        buttons = [InlineKeyboardButton(_category_label(name), callback_data=f'updatecat_pick_{name}')]
-        if _category_has_children(name):
-            buttons.append(InlineKeyboardButton('➡️', callback_data=f'updatecat_open_{name}'))
-        markup.row(*buttons)
-    if not categories:
-        markup.add(InlineKeyboardButton(t(lang, 'catalog_update_branch_empty_button'), callback_data='updatecat_empty'))
-    if nav:
-        markup.add(InlineKeyboardButton(t(lang, 'multi_select_up'), callback_data='updatecat_back'))
-    markup.add(InlineKeyboardButton(t(lang, 'action_cancel'), callback_data='updatecat_cancel'))
+def _update_selection_title(lang: str, user_id: int, current: str | None) -> str:
     if current is None:
-        text = t(lang, 'catalog_update_select_root')
-    else:
-        text = t(lang, 'catalog_update_select_branch', path=_format_assign_path(current))
-    await safe_edit_message_text(bot, 
-        text,
-        chat_id=chat_id,
-        message_id=message_id,
-        reply_markup=markup,
-    )
-
-
-async def update_category_selection_open(call: CallbackQuery):
-    bot, user_id = await get_bot_user_ids(call)
-    if TgConfig.STATE.get(user_id) != 'update_category_select':
-        return
-    target = call.data[len('updatecat_open_'):]
-    current = TgConfig.STATE.get(f'{user_id}_category_current')
-    lang = _get_lang(user_id)
-    valid = set(_get_hierarchy_children(current))
-    if target not in valid:
-        await call.answer(t(lang, 'multi_select_target_missing'), show_alert=True)
-        return
-    nav: list[str] = TgConfig.STATE.get(f'{user_id}_category_nav', [])
-    if current is not None:
-        if len(nav) >= MAX_SELECTION_DEPTH:
-            await call.answer(t(lang, 'multi_select_depth_limit'), show_alert=True)
-            return
-        nav.append(current)
-    TgConfig.STATE[f'{user_id}_category_nav'] = nav
-    TgConfig.STATE[f'{user_id}_category_current'] = target
-    await show_update_category_selection(bot, call.message.chat.id, call.message.message_id, user_id)
-
-
-async def update_category_selection_back(call: CallbackQuery):
-    bot, user_id = await get_bot_user_ids(call)
-    if TgConfig.STATE.get(user_id) != 'update_category_select':
-        return
-    nav: list[str] = TgConfig.STATE.get(f'{user_id}_category_nav', [])
-    new_current = nav.pop() if nav else None
-    TgConfig.STATE[f'{user_id}_category_nav'] = nav
-    TgConfig.STATE[f'{user_id}_category_current'] = new_current
-    await show_update_category_selection(bot, call.message.chat.id, call.message.message_id, user_id)
-
-
-async def update_category_selection_empty(call: CallbackQuery):
-    _, user_id = await get_bot_user_ids(call)
-    lang = _get_lang(user_id)
-    await call.answer(t(lang, 'catalog_update_branch_empty'), show_alert=True)
+        return t(lang, 'catalog_update_select_root')
+    return t(lang, 'catalog_update_select_branch', path=_format_assign_path(current))
 
 
 async def update_category_selection_cancel(call: CallbackQuery):
     bot, user_id = await get_bot_user_ids(call)
-    if TgConfig.STATE.get(user_id) != 'update_category_select':
-        return
-    _clear_update_category_selection_state(user_id)
     TgConfig.STATE[user_id] = None
     lang = _get_lang(user_id)
     await safe_edit_message_text(bot, 
@@ -1668,17 +1454,9 @@ async def update_category_selection_cancel(call: CallbackQuery):
     )
 
 
-async def update_category_selection_pick(call: CallbackQuery):
+async def update_category_selection_pick(call: CallbackQuery, kind: str, target: str) -> None:
     bot, user_id = await get_bot_user_ids(call)
-    if TgConfig.STATE.get(user_id) != 'update_category_select':
-        return
-    target = call.data[len('updatecat_pick_'):]
-    current = TgConfig.STATE.get(f'{user_id}_category_current')
     lang = _get_lang(user_id)
-    valid = set(_get_hierarchy_children(current))
-    if target not in valid:
-        await call.answer(t(lang, 'multi_select_target_missing'), show_alert=True)
-        return
     TgConfig.STATE[user_id] = 'update_category_name'
     TgConfig.STATE[f'{user_id}_check_category'] = target
     message_id = TgConfig.STATE.get(f'{user_id}_message_id', call.message.message_id)
@@ -1686,19 +1464,10 @@ async def update_category_selection_pick(call: CallbackQuery):
         t(lang, 'catalog_category_rename_prompt', name=_category_label(target)),
         chat_id=call.message.chat.id,
         message_id=message_id,
-        reply_markup=back('update_category_select'),
+        reply_markup=back(picker_data('uc', 'r')),
     )
 
 
-async def update_category_selection_resume(call: CallbackQuery):
-    bot, user_id = await get_bot_user_ids(call)
-    if TgConfig.STATE.get(user_id) != 'update_category_name':
-        return
-    TgConfig.STATE[user_id] = 'update_category_select'
-    message_id = TgConfig.STATE.get(f'{user_id}_message_id', call.message.message_id)
-    await show_update_category_selection(bot, call.message.chat.id, message_id, user_id)
-
-
 async def check_category_name_for_update(message: Message):
     bot, user_id = await get_bot_user_ids(message)
     if TgConfig.STATE.get(user_id) != 'update_category_name':
@@ -1712,7 +1481,7 @@ async def check_category_name_for_update(message: Message):
         return
     update_category(old_name, category)
     TgConfig.STATE[user_id] = None
-    _clear_update_category_selection_state(user_id)
+    clear_picker(user_id)
     lang = _get_lang(user_id)
     await safe_edit_message_text(bot, 
         chat_id=message.chat.id,
@@ -1883,16 +1652,6 @@ async def add_item_preview_photo(message: Message):
     await start_item_destination_selection(bot, message.chat.id, message_id, user_id)
 
 
-def _get_hierarchy_children(parent: str | None) -> list[str]:
-    if parent is None:
-        return get_all_category_names()
-    return get_all_subcategories(parent)
-
-
-def _category_has_children(category: str) -> bool:
-    return bool(get_all_subcategories(category))
-
-
 def _build_category_path(category: str | None) -> list[str]:
     if category is None:
         return []
@@ -1904,22 +1663,9 @@ def _build_category_path(category: str | None) -> list[str]:
     return list(reversed(path))
 
 
-def _format_selection_button(
-    name: str,
-    selected: set[str],
-    titles: dict[str, str] | None = None,
-) -> str:
-    marker = '✅' if name in selected else '▫️'
-    label = (titles or {}).get(name, _category_label(name))
-    return f'{marker} {label}'
-
-
-def _compose_category_path(nav_stack: Sequence[str], current: str | None, name: str) -> Tuple[str, ...]:
-    parts = list(nav_stack)
-    if current:
-        parts.append(current)
-    parts.append(name)
-    return tuple(parts)
+def _mark_selected(selected: set, key, text: str) -> str:
+    marker = '✅' if key in selected else '▫️'
+    return f'{marker} {text}'
 
 
 def _category_label(name: str | None) -> str:
@@ -1928,21 +1674,6 @@ def _category_label(name: str | None) -> str:
     return get_category_title(name)
 
 
-def _format_path_selection_button(
-    name: str,
-    selected: set[Tuple[str, ...]],
-    path: Tuple[str, ...],
-    duplicates: set[str],
-    titles: dict[str, str] | None = None,
-) -> str:
-    marker = '✅' if path in selected else '▫️'
-    label = (titles or {}).get(name, _category_label(name))
-    if name in duplicates and len(path) > 1:
-        context = ' / '.join(_category_label(part) for part in path[:-1])
-        return f'{marker} {label} ({context})'
-    return f'{marker} {label}'
-
-
 def _format_assign_path(category: str | Sequence[str] | None) -> str:
     if category is None:
         return ''
@@ -1952,181 +1683,40 @@ def _format_assign_path(category: str | Sequence[str] | None) -> str:
     return ' / '.join(_category_label(part) for part in path)
 
 
-def _assign_child_prefix(category: str | None) -> str:
-    parent = get_category_parent(category) if category else None
-    return 'assign_photo_cat_' if parent is None else 'assign_photo_sub_'
-
-
-def _clear_update_item_selection_state(user_id: int) -> None:
-    TgConfig.STATE.pop(f'{user_id}_update_nav', None)
-    TgConfig.STATE.pop(f'{user_id}_update_current', None)
-
-
-def _reset_item_destination_tokens(user_id: int) -> None:
-    TgConfig.STATE[f'{user_id}_item_token_store'] = {}
+async def start_item_destination_selection(bot, chat_id: int, message_id: int, user_id: int) -> None:
+    TgConfig.STATE[f'{user_id}_item_destinations'] = set()
+    await start_picker(bot, chat_id, message_id, user_id, 'id')
 
 
-def _register_item_destination_token(
-    user_id: int,
-    path: Tuple[str, ...],
-    token_store: dict[str, Tuple[str, ...]],
-    reverse_store: dict[Tuple[str, ...], str],
-) -> str:
-    """Return a short-lived token for the given category path."""
-    if path in reverse_store:
-        return reverse_store[path]
-    while True:
-        candidate = secrets.token_urlsafe(6)
-        if (
-            candidate not in token_store
-            and len(f'itemdest_toggle_{candidate}') <= 64
-            and len(f'itemdest_open_{candidate}') <= 64
-        ):
-            token_store[candidate] = path
-            reverse_store[path] = candidate
-            return candidate
-
-
-def _resolve_item_destination_token(user_id: int, token: str) -> Tuple[str, ...] | None:
-    store: dict[str, Tuple[str, ...]] = TgConfig.STATE.get(f'{user_id}_item_token_store', {})
-    return store.get(token)
+def _item_destination_title(lang: str, user_id: int, current: str | None) -> str:
+    if current is None:
+        return t(lang, 'catalog_select_subcategories')
+    path = ' / '.join(_category_label(part) for part in picker_path(user_id))
+    return t(lang, 'catalog_select_subcategories_path', path=path)
 
 
-async def start_item_destination_selection(bot, chat_id: int, message_id: int, user_id: int) -> None:
-    TgConfig.STATE[user_id] = 'create_item_destinations'
-    TgConfig.STATE[f'{user_id}_item_destinations'] = set()
-    TgConfig.STATE[f'{user_id}_item_nav'] = []
-    TgConfig.STATE[f'{user_id}_item_current'] = None
-    _reset_item_destination_tokens(user_id)
-    await show_item_destination_selection(bot, chat_id, message_id, user_id)
+def _item_destination_label(user_id: int, kind: str, name: str, text: str) -> str:
+    selected: set[Tuple[str, ...]] = TgConfig.STATE.get(f'{user_id}_item_destinations', set())
+    return _mark_selected(selected, tuple(picker_path(user_id)) + (name,), text)
 
 
-async def show_item_destination_selection(bot, chat_id: int, message_id: int, user_id: int) -> None:
-    selected: set[Tuple[str, ...]] = set(TgConfig.STATE.get(f'{user_id}_item_destinations', set()))
-    current_parent = TgConfig.STATE.get(f'{user_id}_item_current')
-    nav_stack: list[str] = list(TgConfig.STATE.get(f'{user_id}_item_nav', []))
-    options = _get_hierarchy_children(current_parent)
-    lang = _get_lang(user_id)
-    markup = InlineKeyboardMarkup(row_width=2)
-    titles = get_category_titles(options)
-    label_counts = Counter(titles.get(name, _category_label(name)) for name in options)
-    duplicates = {
-        name for name in options if label_counts[titles.get(name, _category_label(name))] > 1
-    }
-    token_store: dict[str, Tuple[str, ...]] = {}
-    reverse_store: dict[Tuple[str, ...], str] = {}
-    for name in options:
-        path = _compose_category_path(nav_stack, current_parent, name)
-        token = _register_item_destination_token(user_id, path, token_store, reverse_store)
-        buttons = [
-            InlineKeyboardButton(
-                _format_path_selection_button(name, selected, path, duplicates, titles),
-                callback_data=f'itemdest_toggle_{token}',
-            )
-        ]
-        if _category_has_children(name):
-            buttons.append(InlineKeyboardButton('➡️', callback_data=f'itemdest_open_{token}'))
-        markup.row(*buttons)
-    TgConfig.STATE[f'{user_id}_item_token_store'] = token_store
-    if not options:
-        markup.add(InlineKeyboardButton(t(lang, 'multi_select_empty'), callback_data='itemdest_empty'))
-    if current_parent is not None:
-        markup.add(InlineKeyboardButton(t(lang, 'multi_select_up'), callback_data='itemdest_back'))
-    markup.row(
+def _item_destination_rows(lang: str, user_id: int) -> list[list[InlineKeyboardButton]]:
+    return [[
         InlineKeyboardButton(t(lang, 'action_done'), callback_data='itemdest_done'),
         InlineKeyboardButton(t(lang, 'action_clear'), callback_data='itemdest_clear'),
-    )
-    markup.add(InlineKeyboardButton(t(lang, 'action_cancel'), callback_data='itemdest_cancel'))
-    if current_parent:
-        path = ' / '.join(_category_label(part) for part in nav_stack + [current_parent])
-        text = t(lang, 'catalog_select_subcategories_path', path=path)
-    else:
-        text = t(lang, 'catalog_select_subcategories')
-    await safe_edit_message_text(bot, 
-        text,
-        chat_id=chat_id,
-        message_id=message_id,
-        reply_markup=markup,
-    )
-
-
-async def item_destination_empty(call: CallbackQuery):
-    _, user_id = await get_bot_user_ids(call)
-    lang = _get_lang(user_id)
-    await call.answer(t(lang, 'multi_select_no_children'), show_alert=True)
+    ]]
 
 
-async def item_destination_toggle(call: CallbackQuery):
+async def item_destination_toggle(call: CallbackQuery, kind: str, name: str) -> None:
     bot, user_id = await get_bot_user_ids(call)
-    if TgConfig.STATE.get(user_id) != 'create_item_destinations':
-        return
-    token = call.data[len('itemdest_toggle_'):]
-    path = _resolve_item_destination_token(user_id, token)
-    lang = _get_lang(user_id)
-    current_parent = TgConfig.STATE.get(f'{user_id}_item_current')
-    nav_stack: list[str] = list(TgConfig.STATE.get(f'{user_id}_item_nav', []))
-    if path is None:
-        await call.answer(t(lang, 'multi_select_target_missing'), show_alert=True)
-        return
-    expected_parent = nav_stack + ([current_parent] if current_parent else [])
-    if list(path[:-1]) != expected_parent:
-        await call.answer(t(lang, 'multi_select_target_missing'), show_alert=True)
-        return
-    valid_options = {
-        _compose_category_path(nav_stack, current_parent, name)
-        for name in _get_hierarchy_children(current_parent)
-    }
-    if path not in valid_options:
-        await call.answer(t(lang, 'multi_select_target_missing'), show_alert=True)
-        return
+    path = tuple(picker_path(user_id)) + (name,)
     selected: set[Tuple[str, ...]] = set(TgConfig.STATE.get(f'{user_id}_item_destinations', set()))
     if path in selected:
         selected.remove(path)
     else:
         selected.add(path)
     TgConfig.STATE[f'{user_id}_item_destinations'] = selected
-    await show_item_destination_selection(bot, call.message.chat.id, call.message.message_id, user_id)
-
-
-async def item_destination_open(call: CallbackQuery):
-    bot, user_id = await get_bot_user_ids(call)
-    if TgConfig.STATE.get(user_id) != 'create_item_destinations':
-        return
-    token = call.data[len('itemdest_open_'):]
-    path = _resolve_item_destination_token(user_id, token)
-    current = TgConfig.STATE.get(f'{user_id}_item_current')
-    nav_stack: list[str] = list(TgConfig.STATE.get(f'{user_id}_item_nav', []))
-    lang = _get_lang(user_id)
-    if path is None:
-        await call.answer(t(lang, 'multi_select_target_missing'), show_alert=True)
-        return
-    expected_parent = nav_stack + ([current] if current else [])
-    valid_options = {
-        _compose_category_path(nav_stack, current, name)
-        for name in _get_hierarchy_children(current)
-    }
-    if list(path[:-1]) != expected_parent or path not in valid_options:
-        await call.answer(t(lang, 'multi_select_target_missing'), show_alert=True)
-        return
-    if current is not None:
-        if len(nav_stack) >= MAX_SELECTION_DEPTH:
-            await call.answer(t(lang, 'multi_select_depth_limit'), show_alert=True)
-            return
-        nav_stack.append(current)
-    TgConfig.STATE[f'{user_id}_item_nav'] = nav_stack
-    TgConfig.STATE[f'{user_id}_item_current'] = path[-1]
-    await show_item_destination_selection(bot, call.message.chat.id, call.message.message_id, user_id)
-
-
-async def item_destination_back(call: CallbackQuery):
-    bot, user_id = await get_bot_user_ids(call)
-    if TgConfig.STATE.get(user_id) != 'create_item_destinations':
-        return
-    nav_stack: list[str] = TgConfig.STATE.get(f'{user_id}_item_nav', [])
-    new_current = nav_stack.pop() if nav_stack else None
-    TgConfig.STATE[f'{user_id}_item_nav'] = nav_stack
-    TgConfig.STATE[f'{user_id}_item_current'] = new_current
-    await show_item_destination_selection(bot, call.message.chat.id, call.message.message_id, user_id)
+    await show_picker(bot, call.message.chat.id, call.message.message_id, user_id)
 
 
 async def item_destination_clear(call: CallbackQuery):
@@ -2134,17 +1724,15 @@ async def item_destination_clear(call: CallbackQuery):
     if TgConfig.STATE.get(user_id) != 'create_item_destinations':
         return
     TgConfig.STATE[f'{user_id}_item_destinations'] = set()
-    await show_item_destination_selection(bot, call.message.chat.id, call.message.message_id, user_id)
+    await show_picker(bot, call.message.chat.id, call.message.message_id, user_id)
 
 
 def _cleanup_item_creation_state(user_id: int, keep_preview: bool = False) -> None:
     TgConfig.STATE.pop(f'{user_id}_item_destinations', None)
-    TgConfig.STATE.pop(f'{user_id}_item_nav', None)
-    TgConfig.STATE.pop(f'{user_id}_item_current', None)
+    clear_picker(user_id)
     TgConfig.STATE.pop(f'{user_id}_item_destination_order', None)
     TgConfig.STATE.pop(f'{user_id}_item_destination_idx', None)
     TgConfig.STATE.pop(f'{user_id}_item_destination_names', None)
-    TgConfig.STATE.pop(f'{user_id}_item_token_store', None)
     TgConfig.STATE.pop(f'{user_id}_message_id', None)
     TgConfig.STATE.pop(f'{user_id}_item_term', None)
     TgConfig.STATE.pop(f'{user_id}_terms_back', None)
@@ -2449,9 +2037,8 @@ def _get_category_update_back(user_id: int) -> str:
 
 
 async def start_category_parent_selection(bot, chat_id: int, message_id: int, user_id: int) -> None:
-    mains = sorted(get_all_category_names())
     lang = _get_lang(user_id)
-    if not mains:
+    if not category_has_children(None):
         TgConfig.STATE[user_id] = None
         await safe_edit_message_text(bot, 
             t(lang, 'catalog_no_main_categories'),
@@ -2460,47 +2047,23 @@ async def start_category_parent_selection(bot, chat_id: int, message_id: int, us
             reply_markup=back(_get_category_update_back(user_id)),
         )
         return
-    TgConfig.STATE[user_id] = 'add_category_select_parents'
     TgConfig.STATE[f'{user_id}_category_selection'] = set()
-    await show_category_parent_selection(bot, chat_id, message_id, user_id)
+    await start_picker(bot, chat_id, message_id, user_id, 'cp')
 
 
-async def show_category_parent_selection(bot, chat_id: int, message_id: int, user_id: int) -> None:
-    selected: set[str] = TgConfig.STATE.get(f'{user_id}_category_selection', set())
-    mains = get_all_category_names()
-    lang = _get_lang(user_id)
-    markup = InlineKeyboardMarkup(row_width=2)
-    titles = get_category_titles(mains)
-    for name in mains:
-        markup.add(
-            InlineKeyboardButton(
-                _format_selection_button(name, selected, titles),
-                callback_data=f'catparent_toggle_{name}',
-            )
-        )
-    markup.row(
+def _category_parent_label(user_id: int, kind: str, name: str, text: str) -> str:
+    return _mark_selected(TgConfig.STATE.get(f'{user_id}_category_selection', set()), name, text)
+
+
+def _category_parent_rows(lang: str, user_id: int) -> list[list[InlineKeyboardButton]]:
+    return [[
         InlineKeyboardButton(t(lang, 'action_done'), callback_data='catparent_done'),
         InlineKeyboardButton(t(lang, 'action_clear'), callback_data='catparent_clear'),
-    )
-    markup.add(InlineKeyboardButton(t(lang, 'action_cancel'), callback_data='catparent_cancel'))
-    await safe_edit_message_text(bot, 
-        t(lang, 'catalog_select_main_categories'),
-        chat_id=chat_id,
-        message_id=message_id,
-        reply_markup=markup,
-    )
+    ]]
 
 
-async def category_parent_toggle(call: CallbackQuery):
+async def category_parent_toggle(call: CallbackQuery, kind: str, parent: str) -> None:
     bot, user_id = await get_bot_user_ids(call)
-    if TgConfig.STATE.get(user_id) != 'add_category_select_parents':
-        return
-    parent = call.data[len('catparent_toggle_'):]
-    lang = _get_lang(user_id)
-    valid_options = set(get_all_category_names())
-    if parent not in valid_options:
-        await call.answer(t(lang, 'multi_select_target_missing'), show_alert=True)
-        return
     selected: set[str] = TgConfig.STATE.get(f'{user_id}_category_selection', set())
     if parent in selected:
         selected.remove(parent)
@@ -2508,7 +2071,7 @@ async def category_parent_toggle(call: CallbackQuery):
         selected.add(parent)
     TgConfig.STATE[f'{user_id}_category_selection'] = selected
     message_id = TgConfig.STATE.get(f'{user_id}_message_id', call.message.message_id)
-    await show_category_parent_selection(bot, call.message.chat.id, message_id, user_id)
+    await show_picker(bot, call.message.chat.id, message_id, user_id)
 
 
 async def category_parent_clear(call: CallbackQuery):
@@ -2517,7 +2080,7 @@ async def category_parent_clear(call: CallbackQuery):
         return
     TgConfig.STATE[f'{user_id}_category_selection'] = set()
     message_id = TgConfig.STATE.get(f'{user_id}_message_id', call.message.message_id)
-    await show_category_parent_selection(bot, call.message.chat.id, message_id, user_id)
+    await show_picker(bot, call.message.chat.id, message_id, user_id)
 
 
 async def category_parent_cancel(call: CallbackQuery):
@@ -2526,6 +2089,7 @@ async def category_parent_cancel(call: CallbackQuery):
         return
     TgConfig.STATE[user_id] = None
     TgConfig.STATE.pop(f'{user_id}_category_selection', None)
+    clear_picker(user_id)
     lang = _get_lang(user_id)
     await safe_edit_message_text(bot, 
         t(lang, 'catalog_category_creation_cancelled'),
@@ -2565,9 +2129,8 @@ async def category_parent_done(call: CallbackQuery):
 
 
 async def start_subcategory_parent_selection(bot, chat_id: int, message_id: int, user_id: int) -> None:
-    roots = _get_hierarchy_children(None)
     lang = _get_lang(user_id)
-    if not roots:
+    if not category_has_children(None):
         TgConfig.STATE[user_id] = None
         await safe_edit_message_text(bot, 
             t(lang, 'catalog_no_categories_available'),
@@ -2576,70 +2139,30 @@ async def start_subcategory_parent_selection(bot, chat_id: int, message_id: int,
             reply_markup=back(_get_category_update_back(user_id)),
         )
         return
-    TgConfig.STATE[user_id] = 'add_subcategory_select_parents'
     TgConfig.STATE[f'{user_id}_sub_parent_selection'] = set()
-    TgConfig.STATE[f'{user_id}_sub_nav'] = []
-    TgConfig.STATE[f'{user_id}_sub_current'] = None
-    await show_subcategory_parent_selection(bot, chat_id, message_id, user_id)
+    await start_picker(bot, chat_id, message_id, user_id, 'sp')
 
 
-async def show_subcategory_parent_selection(bot, chat_id: int, message_id: int, user_id: int) -> None:
-    selected: set[str] = TgConfig.STATE.get(f'{user_id}_sub_parent_selection', set())
-    current_parent = TgConfig.STATE.get(f'{user_id}_sub_current')
-    nav_stack: list[str] = TgConfig.STATE.get(f'{user_id}_sub_nav', [])
-    options = _get_hierarchy_children(current_parent)
-    lang = _get_lang(user_id)
-    markup = InlineKeyboardMarkup(row_width=2)
-    titles = get_category_titles(options)
-    for name in options:
-        buttons = [
-            InlineKeyboardButton(
-                _format_selection_button(name, selected, titles),
-                callback_data=f'subparent_toggle_{name}',
-            )
-        ]
-        if _category_has_children(name):
-            buttons.append(InlineKeyboardButton('➡️', callback_data=f'subparent_open_{name}'))
-        markup.row(*buttons)
-    if not options:
-        markup.add(InlineKeyboardButton(t(lang, 'multi_select_empty'), callback_data='subparent_empty'))
-    if current_parent is not None:
-        markup.add(InlineKeyboardButton(t(lang, 'multi_select_up'), callback_data='subparent_back'))
-    markup.row(
-        InlineKeyboardButton(t(lang, 'action_done'), callback_data='subparent_done'),
-        InlineKeyboardButton(t(lang, 'action_clear'), callback_data='subparent_clear'),
-    )
-    markup.add(InlineKeyboardButton(t(lang, 'action_cancel'), callback_data='subparent_cancel'))
-    if current_parent:
-        path = ' / '.join(_category_label(part) for part in nav_stack + [current_parent])
-        text = t(lang, 'catalog_select_parents_path', path=path)
-    else:
-        text = t(lang, 'catalog_select_parents')
-    await safe_edit_message_text(bot, 
-        text,
-        chat_id=chat_id,
-        message_id=message_id,
-        reply_markup=markup,
-    )
+def _subcategory_parent_title(lang: str, user_id: int, current: str | None) -> str:
+    if current is None:
+        return t(lang, 'catalog_select_parents')
+    path = ' / '.join(_category_label(part) for part in picker_path(user_id))
+    return t(lang, 'catalog_select_parents_path', path=path)
 
 
-async def subcategory_parent_empty(call: CallbackQuery):
-    _, user_id = await get_bot_user_ids(call)
-    lang = _get_lang(user_id)
-    await call.answer(t(lang, 'multi_select_no_children'), show_alert=True)
+def _subcategory_parent_label(user_id: int, kind: str, name: str, text: str) -> str:
+    return _mark_selected(TgConfig.STATE.get(f'{user_id}_sub_parent_selection', set()), name, text)
+
 
+def _subcategory_parent_rows(lang: str, user_id: int) -> list[list[InlineKeyboardButton]]:
+    return [[
+        InlineKeyboardButton(t(lang, 'action_done'), callback_data='subparent_done'),
+        InlineKeyboardButton(t(lang, 'action_clear'), callback_data='subparent_clear'),
+    ]]
 
-async def subcategory_parent_toggle(call: CallbackQuery):
+
+async def subcategory_parent_toggle(call: CallbackQuery, kind: str, target: str) -> None:
     bot, user_id = await get_bot_user_ids(call)
-    if TgConfig.STATE.get(user_id) != 'add_subcategory_select_parents':
-        return
-    target = call.data[len('subparent_toggle_'):]
-    lang = _get_lang(user_id)
-    current = TgConfig.STATE.get(f'{user_id}_sub_current')
-    valid_options = set(_get_hierarchy_children(current))
-    if target not in valid_options:
-        await call.answer(t(lang, 'multi_select_target_missing'), show_alert=True)
-        return
     selected: set[str] = TgConfig.STATE.get(f'{user_id}_sub_parent_selection', set())
     if target in selected:
         selected.remove(target)
@@ -2647,42 +2170,7 @@ async def subcategory_parent_toggle(call: CallbackQuery):
         selected.add(target)
     TgConfig.STATE[f'{user_id}_sub_parent_selection'] = selected
     message_id = TgConfig.STATE.get(f'{user_id}_message_id', call.message.message_id)
-    await show_subcategory_parent_selection(bot, call.message.chat.id, message_id, user_id)
-
-
-async def subcategory_parent_open(call: CallbackQuery):
-    bot, user_id = await get_bot_user_ids(call)
-    if TgConfig.STATE.get(user_id) != 'add_subcategory_select_parents':
-        return
-    target = call.data[len('subparent_open_'):]
-    current = TgConfig.STATE.get(f'{user_id}_sub_current')
-    nav_stack: list[str] = TgConfig.STATE.get(f'{user_id}_sub_nav', [])
-    lang = _get_lang(user_id)
-    valid_options = set(_get_hierarchy_children(current))
-    if target not in valid_options:
-        await call.answer(t(lang, 'multi_select_target_missing'), show_alert=True)
-        return
-    if current is not None:
-        if len(nav_stack) >= MAX_SELECTION_DEPTH:
-            await call.answer(t(lang, 'multi_select_depth_limit'), show_alert=True)
-            return
-        nav_stack.append(current)
-    TgConfig.STATE[f'{user_id}_sub_nav'] = nav_stack
-    TgConfig.STATE[f'{user_id}_sub_current'] = target
-    message_id = TgConfig.STATE.get(f'{user_id}_message_id', call.message.message_id)
-    await show_subcategory_parent_selection(bot, call.message.chat.id, message_id, user_id)
-
-
-async def subcategory_parent_back(call: CallbackQuery):
-    bot, user_id = await get_bot_user_ids(call)
-    if TgConfig.STATE.get(user_id) != 'add_subcategory_select_parents':
-        return
-    nav_stack: list[str] = TgConfig.STATE.get(f'{user_id}_sub_nav', [])
-    new_current = nav_stack.pop() if nav_stack else None
-    TgConfig.STATE[f'{user_id}_sub_nav'] = nav_stack
-    TgConfig.STATE[f'{user_id}_sub_current'] = new_current
-    message_id = TgConfig.STATE.get(f'{user_id}_message_id', call.message.message_id)
-    await show_subcategory_parent_selection(bot, call.message.chat.id, message_id, user_id)
+    await show_picker(bot, call.message.chat.id, message_id, user_id)
 
 
 async def subcategory_parent_clear(call: CallbackQuery):
@@ -2691,7 +2179,7 @@ async def subcategory_parent_clear(call: CallbackQuery):
         return
     TgConfig.STATE[f'{user_id}_sub_parent_selection'] = set()
     message_id = TgConfig.STATE.get(f'{user_id}_message_id', call.message.message_id)
-    await show_subcategory_parent_selection(bot, call.message.chat.id, message_id, user_id)
+    await show_picker(bot, call.message.chat.id, message_id, user_id)
 
 
 async def subcategory_parent_cancel(call: CallbackQuery):
@@ -2700,8 +2188,7 @@ async def subcategory_parent_cancel(call: CallbackQuery):
         return
     TgConfig.STATE[user_id] = None
     TgConfig.STATE.pop(f'{user_id}_sub_parent_selection', None)
-    TgConfig.STATE.pop(f'{user_id}_sub_nav', None)
-    TgConfig.STATE.pop(f'{user_id}_sub_current', None)
+    clear_picker(user_id)
     lang = _get_lang(user_id)
     await safe_edit_message_text(bot, 
         t(lang, 'catalog_subcategory_creation_cancelled'),
@@ -3882,7 +3369,7 @@ async def check_item_name_for_amount_upd(message: Message):
             TgConfig.STATE[f'{user_id}_name'] = message.text
             await safe_edit_message_text(bot, chat_id=message.chat.id,
                                         message_id=message_id,
-                                        text='Send folder path with product files or list values separated by ;:',
+                                        text='Send folder path with product files, a .txt file with one value per line, or list values separated by ;:',
                                         reply_markup=back(_get_item_update_back(user_id)))
         else:
             await safe_edit_message_text(bot, chat_id=message.chat.id,
@@ -3891,29 +3378,46 @@ async def check_item_name_for_amount_upd(message: Message):
                                         reply_markup=back(_get_item_update_back(user_id)))
 
 
-async def updating_item_amount(message: Message):
-    bot, user_id = await get_bot_user_ids(message)
+async def _receive_stock_values(message: Message, item_name: str):
+    """Values from a photo, an uploaded text file (one per line), a folder path or a ; list."""
     if message.photo:
-        file_path = get_next_file_path(TgConfig.STATE.get(f'{user_id}_name'))
-        file_name = f"{TgConfig.STATE.get(f'{user_id}_name')}_{int(datetime.datetime.now().timestamp())}.jpg"
+        file_name = f"{item_name}_{int(datetime.datetime.now().timestamp())}.jpg"
         file_path = os.path.join('assets', 'uploads', file_name)
         await message.photo[-1].download(destination_file=file_path)
-        values_list = [file_path]
-    else:
-        if os.path.isdir(message.text):
-            folder = message.text
-            values_list = [os.path.join(folder, f) for f in os.listdir(folder)]
-        else:
-            values_list = message.text.split(';')
+        return [file_path], None
+    if message.document:
+        upload_path = os.path.join('assets', 'uploads', f'import_{message.document.file_unique_id}.txt')
+        await message.document.download(destination_file=upload_path)
+        return iter_stock_file(upload_path), upload_path
+    return iter_stock_values(message.text or ''), None
+
+
+async def _import_stock_values(bot, chat_id: int, message_id: int, item_name: str, values) -> tuple[int, int]:
+    """Import values and keep the admin's message updated with the progress."""
+    async def progress(added: int, skipped: int) -> None:
+        await safe_edit_message_text(bot, chat_id=chat_id,
+                                    message_id=message_id,
+                                    text=f'⏳ Importing stock: {added} added, {skipped} duplicates skipped')
+
+    return await import_stock(item_name, values, progress)
+
+
+async def updating_item_amount(message: Message):
+    bot, user_id = await get_bot_user_ids(message)
     TgConfig.STATE[user_id] = None
     message_id = TgConfig.STATE.get(f'{user_id}_message_id')
     item_name = TgConfig.STATE.get(f'{user_id}_name')
+    values, upload_path = await _receive_stock_values(message, item_name)
     await bot.delete_message(chat_id=message.chat.id,
                              message_id=message.message_id)
     was_empty = select_item_values_amount(item_name) == 0 and not check_value(item_name)
-    for i in values_list:
-        add_values_to_item(item_name, i, False)
-    if was_empty:
+    try:
+        added, skipped = await _import_stock_values(bot, message.chat.id, message_id, item_name, values)
+    finally:
+        if upload_path:
+            with contextlib.suppress(OSError):
+                os.remove(upload_path)
+    if was_empty and added:
         await notify_restock(bot, item_name)
     group_id = TgConfig.GROUP_ID if TgConfig.GROUP_ID != -988765433 else None
     if group_id:
@@ -3927,11 +3431,12 @@ async def updating_item_amount(message: Message):
             pass
     await safe_edit_message_text(bot, chat_id=message.chat.id,
                                 message_id=message_id,
-                                text='✅ Товар добавлен',
+                                text=f'✅ Товар добавлен: {added}'
+                                     + (f' (skipped {skipped} duplicates)' if skipped else ''),
                                 reply_markup=back(_get_item_update_back(user_id)))
     admin_info = await bot.get_chat(user_id)
     logger.info(f"User {user_id} ({admin_info.first_name}) "
-                f'добавил товары к позиции "{item_name}" в количестве {len(values_list)} шт')
+                f'добавил товары к позиции "{item_name}" в количестве {added} шт')
 
 
 async def update_item_callback_handler(call: CallbackQuery):
@@ -3944,11 +3449,7 @@ async def update_item_callback_handler(call: CallbackQuery):
         await call.answer('Nepakanka teisių')
         return
     lang = _get_lang(user_id)
-    TgConfig.STATE[user_id] = 'update_item_select'
-    TgConfig.STATE[f'{user_id}_update_nav'] = []
-    TgConfig.STATE[f'{user_id}_update_current'] = None
-    categories = _get_hierarchy_children(None)
-    if not categories:
+    if not category_has_children(None):
         TgConfig.STATE[user_id] = None
         await safe_edit_message_text(bot, 
             t(lang, 'catalog_no_categories_available'),
@@ -3956,87 +3457,12 @@ async def update_item_callback_handler(call: CallbackQuery):
             message_id=call.message.message_id,
             reply_markup=back(_get_item_update_back(user_id)),
         )
-        _clear_update_item_selection_state(user_id)
-        return
-    await show_update_item_selection(bot, call.message.chat.id, call.message.message_id, user_id)
-
-
-async def show_update_item_selection(bot, chat_id: int, message_id: int, user_id: int) -> None:
-    if TgConfig.STATE.get(user_id) != 'update_item_select':
-        return
-    lang = _get_lang(user_id)
-    current = TgConfig.STATE.get(f'{user_id}_update_current')
-    nav = TgConfig.STATE.get(f'{user_id}_update_nav', [])
-    categories = _get_hierarchy_children(current)
-    items = sorted(get_all_item_names(current)) if current is not None else []
-    markup = InlineKeyboardMarkup(row_width=1)
-    titles = get_category_titles(categories)
-    for name in categories:
-        label = titles.get(name, _category_label(name))
-        markup.add(InlineKeyboardButton(f'📁 {label}', callback_data=f'updateitem_open_{name}'))
-    if current is not None:
-        for item in items:
-            markup.add(
-                InlineKeyboardButton(
-                    display_name(item),
-                    callback_data=f'updateitem_pick_{item}',
-                )
-            )
-    if not categories and not items:
-        markup.add(InlineKeyboardButton(t(lang, 'catalog_update_branch_empty_button'), callback_data='updateitem_empty'))
-    if nav:
-        markup.add(InlineKeyboardButton(t(lang, 'multi_select_up'), callback_data='updateitem_back'))
-    markup.add(InlineKeyboardButton(t(lang, 'action_cancel'), callback_data='updateitem_cancel'))
-    if current is None:
-        text = t(lang, 'catalog_update_select_root')
-    else:
-        text = t(lang, 'catalog_update_select_branch', path=_format_assign_path(current))
-    await safe_edit_message_text(bot, 
-        text,
-        chat_id=chat_id,
-        message_id=message_id,
-        reply_markup=markup,
-    )
-
-
-async def update_item_selection_open(call: CallbackQuery):
-    bot, user_id = await get_bot_user_ids(call)
-    if TgConfig.STATE.get(user_id) != 'update_item_select':
         return
-    target = call.data[len('updateitem_open_'):]
-    current = TgConfig.STATE.get(f'{user_id}_update_current')
-    lang = _get_lang(user_id)
-    valid = set(_get_hierarchy_children(current))
-    if target not in valid:
-        await call.answer(t(lang, 'multi_select_target_missing'), show_alert=True)
-        return
-    nav: list[str] = TgConfig.STATE.get(f'{user_id}_update_nav', [])
-    if current is not None:
-        if len(nav) >= MAX_SELECTION_DEPTH:
-            await call.answer(t(lang, 'multi_select_depth_limit'), show_alert=True)
-            return
-        nav.append(current)
-    TgConfig.STATE[f'{user_id}_update_nav'] = nav
-    TgConfig.STATE[f'{user_id}_update_current'] = target
-    await show_update_item_selection(bot, call.message.chat.id, call.message.message_id, user_id)
-
-
-async def update_item_selection_back(call: CallbackQuery):
-    bot, user_id = await get_bot_user_ids(call)
-    if TgConfig.STATE.get(user_id) != 'update_item_select':
-        return
-    nav: list[str] = TgConfig.STATE.get(f'{user_id}_update_nav', [])
-    new_current = nav.pop() if nav else None
-    TgConfig.STATE[f'{user_id}_update_nav'] = nav
-    TgConfig.STATE[f'{user_id}_update_current'] = new_current
-    await show_update_item_selection(bot, call.message.chat.id, call.message.message_id, user_id)
+    await start_picker(bot, call.message.chat.id, call.message.message_id, user_id, 'ui')
 
 
 async def update_item_selection_cancel(call: CallbackQuery):
     bot, user_id = await get_bot_user_ids(call)
-    if TgConfig.STATE.get(user_id) != 'update_item_select':
-        return
-    _clear_update_item_selection_state(user_id)
     TgConfig.STATE[user_id] = None
     lang = _get_lang(user_id)
     await safe_edit_message_text(bot, 
@@ -4047,30 +3473,13 @@ async def update_item_selection_cancel(call: CallbackQuery):
     )
 
 
-async def update_item_selection_empty(call: CallbackQuery):
-    _, user_id = await get_bot_user_ids(call)
-    lang = _get_lang(user_id)
-    await call.answer(t(lang, 'catalog_update_branch_empty'), show_alert=True)
-
-
-async def update_item_selection_pick(call: CallbackQuery):
+async def update_item_selection_pick(call: CallbackQuery, kind: str, item: str) -> None:
     bot, user_id = await get_bot_user_ids(call)
-    if TgConfig.STATE.get(user_id) != 'update_item_select':
-        return
-    item = call.data[len('updateitem_pick_'):]
-    current = TgConfig.STATE.get(f'{user_id}_update_current')
     lang = _get_lang(user_id)
-    if current is None:
-        await call.answer(t(lang, 'catalog_select_category_first'), show_alert=True)
-        return
-    valid = set(get_all_item_names(current))
-    if item not in valid:
-        await call.answer(t(lang, 'multi_select_target_missing'), show_alert=True)
-        return
     TgConfig.STATE[f'{user_id}_old_name'] = item
-    TgConfig.STATE[f'{user_id}_category'] = current
+    TgConfig.STATE[f'{user_id}_category'] = picker_current(user_id)
     TgConfig.STATE[user_id] = 'update_item_name'
-    _clear_update_item_selection_state(user_id)
+    clear_picker(user_id)
     message_id = TgConfig.STATE.get(f'{user_id}_message_id')
     await safe_edit_message_text(bot, 
         t(lang, 'catalog_update_name_prompt', name=display_name(item)),
@@ -4359,13 +3768,10 @@ async def update_item_infinity(message: Message):
             await notify_restock(bot, item_old_name)
     elif change == 'deny':
         delete_only_items(item_old_name)
-        if os.path.isdir(msg):
-            values_list = [os.path.join(msg, f) for f in os.listdir(msg)]
-        else:
-            values_list = msg.split(';')
-        for i in values_list:
-            add_values_to_item(item_old_name, i, False)
-        if was_empty:
+        added, _ = await _import_stock_values(
+            bot, message.chat.id, message_id, item_old_name, iter_stock_values(msg)
+        )
+        if was_empty and added:
             await notify_restock(bot, item_old_name)
     TgConfig.STATE[user_id] = None
     await _finalize_item_update(
@@ -4388,40 +3794,18 @@ async def delete_item_callback_handler(call: CallbackQuery):
     if not (role & Permission.SHOP_MANAGE):
         await call.answer('Nepakanka teisių')
         return
-    categories = get_all_category_names()
-    markup = InlineKeyboardMarkup()
-    for cat in categories:
-        markup.add(InlineKeyboardButton(cat, callback_data=f'delete_item_cat_{cat}'))
-    markup.add(InlineKeyboardButton('🔙 Back', callback_data='navback:goods_management'))
-    await safe_edit_message_text(bot, 'Choose category:',
-                                chat_id=call.message.chat.id,
-                                message_id=call.message.message_id,
-                                reply_markup=markup)
+    await start_picker(bot, call.message.chat.id, call.message.message_id, user_id, 'di')
 
 
-async def delete_item_category_handler(call: CallbackQuery):
-    bot, user_id = await get_bot_user_ids(call)
-    category = call.data[len('delete_item_cat_'):]
-    subcats = get_all_subcategories(category)
-    items = get_all_item_names(category)
-    markup = InlineKeyboardMarkup()
-    for sub in subcats:
-        markup.add(InlineKeyboardButton(sub, callback_data=f'delete_item_cat_{sub}'))
-    for item in items:
-        markup.add(InlineKeyboardButton(display_name(item), callback_data=f'delete_item_item_{item}'))
-    back_parent = get_category_parent(category)
-    back_data = 'delete_item' if back_parent is None else f'delete_item_cat_{back_parent}'
-    markup.add(InlineKeyboardButton('🔙 Back', callback_data=_navback(back_data)))
-    await safe_edit_message_text(bot, 'Choose subcategory or item to delete:',
-                                chat_id=call.message.chat.id,
-                                message_id=call.message.message_id,
-                                reply_markup=markup)
+def _delete_item_title(lang: str, user_id: int, current: str | None) -> str:
+    return 'Choose category:' if current is None else 'Choose subcategory or item to delete:'
 
 
-async def delete_item_item_handler(call: CallbackQuery):
+async def delete_item_item_handler(call: CallbackQuery, kind: str, item_name: str) -> None:
     bot, user_id = await get_bot_user_ids(call)
-    item_name = call.data[len('delete_item_item_'):]
-    delete_item(item_name)
+    TgConfig.STATE[user_id] = None
+    clear_picker(user_id)
+    job_scheduler.schedule('remove_files', delete_item(item_name))
     await safe_edit_message_text(bot, '✅ Item deleted',
                                 chat_id=call.message.chat.id,
                                 message_id=call.message.message_id,
@@ -4476,6 +3860,37 @@ async def process_item_show(message: Message):
 
 
 def register_shop_management(dp: Dispatcher) -> None:
+    for flow in (
+        PickerFlow(key='pi', state='promo_manage_items', title=_promo_item_title,
+                   on_pick=promo_item_toggle, on_cancel=promo_item_cancel, items=True,
+                   label=_promo_item_label, extra_rows=_promo_item_rows),
+        PickerFlow(key='ap', state='assign_photo_select', title=_assign_title,
+                   on_pick=assign_photo_pick, cancel_data=_navback('goods_management'), items=True,
+                   empty_button='assign_empty_branch_button', empty_alert='assign_empty_branch'),
+        PickerFlow(key='dc', state='delete_category_select', title=_delete_category_title,
+                   on_pick=delete_category_choose_handler, cancel_data=_navback('categories_management'),
+                   pick_categories=True),
+        PickerFlow(key='uc', state='update_category_select', title=_update_selection_title,
+                   on_pick=update_category_selection_pick, on_cancel=update_category_selection_cancel,
+                   pick_categories=True, empty_button='catalog_update_branch_empty_button',
+                   empty_alert='catalog_update_branch_empty'),
+        PickerFlow(key='id', state='create_item_destinations', title=_item_destination_title,
+                   on_pick=item_destination_toggle, cancel_data='itemdest_cancel', pick_categories=True,
+                   label=_item_destination_label, extra_rows=_item_destination_rows),
+        PickerFlow(key='cp', state='add_category_select_parents',
+                   title=lambda lang, user_id, current: t(lang, 'catalog_select_main_categories'),
+                   on_pick=category_parent_toggle, cancel_data='catparent_cancel', pick_categories=True,
+                   open_categories=False, label=_category_parent_label, extra_rows=_category_parent_rows),
+        PickerFlow(key='sp', state='add_subcategory_select_parents', title=_subcategory_parent_title,
+                   on_pick=subcategory_parent_toggle, cancel_data='subparent_cancel', pick_categories=True,
+                   label=_subcategory_parent_label, extra_rows=_subcategory_parent_rows),
+        PickerFlow(key='ui', state='update_item_select', title=_update_selection_title,
+                   on_pick=update_item_selection_pick, on_cancel=update_item_selection_cancel, items=True,
+                   empty_button='catalog_update_branch_empty_button', empty_alert='catalog_update_branch_empty'),
+        PickerFlow(key='di', state='delete_item_select', title=_delete_item_title,
+                   on_pick=delete_item_item_handler, cancel_data=_navback('goods_management'), items=True),
+    ):
+        register_picker_flow(flow)
     dp.register_callback_query_handler(statistics_callback_handler,
                                        lambda c: c.data == 'statistics')
     dp.register_callback_query_handler(goods_settings_menu_callback_handler,
@@ -4492,50 +3907,16 @@ def register_shop_management(dp: Dispatcher) -> None:
                                        lambda c: c.data == 'update_item_amount')
     dp.register_callback_query_handler(update_item_callback_handler,
                                        lambda c: c.data == 'update_item')
-    dp.register_callback_query_handler(update_item_selection_open,
-                                       lambda c: c.data.startswith('updateitem_open_'))
-    dp.register_callback_query_handler(update_item_selection_back,
-                                       lambda c: c.data == 'updateitem_back')
-    dp.register_callback_query_handler(update_item_selection_cancel,
-                                       lambda c: c.data == 'updateitem_cancel')
-    dp.register_callback_query_handler(update_item_selection_pick,
-                                       lambda c: c.data.startswith('updateitem_pick_'))
-    dp.register_callback_query_handler(update_item_selection_empty,
-                                       lambda c: c.data == 'updateitem_empty')
     dp.register_callback_query_handler(update_item_preview_yes,
                                        lambda c: c.data == 'update_preview_yes')
     dp.register_callback_query_handler(update_item_preview_no,
                                        lambda c: c.data == 'update_preview_no')
-    dp.register_callback_query_handler(update_category_selection_open,
-                                       lambda c: c.data.startswith('updatecat_open_'))
-    dp.register_callback_query_handler(update_category_selection_back,
-                                       lambda c: c.data == 'updatecat_back')
-    dp.register_callback_query_handler(update_category_selection_cancel,
-                                       lambda c: c.data == 'updatecat_cancel')
-    dp.register_callback_query_handler(update_category_selection_pick,
-                                       lambda c: c.data.startswith('updatecat_pick_'))
-    dp.register_callback_query_handler(update_category_selection_empty,
-                                       lambda c: c.data == 'updatecat_empty')
-    dp.register_callback_query_handler(update_category_selection_resume,
-                                       lambda c: c.data == 'update_category_select')
     dp.register_callback_query_handler(delete_item_callback_handler,
                                        lambda c: c.data == 'delete_item')
-    dp.register_callback_query_handler(delete_item_category_handler,
-                                       lambda c: c.data.startswith('delete_item_cat_'))
-    dp.register_callback_query_handler(delete_item_item_handler,
-                                       lambda c: c.data.startswith('delete_item_item_'))
     dp.register_callback_query_handler(show_bought_item_callback_handler,
                                        lambda c: c.data == 'show_bought_item')
     dp.register_callback_query_handler(assign_photos_callback_handler,
                                        lambda c: c.data == 'assign_photos')
-    dp.register_callback_query_handler(assign_photo_main_handler,
-                                       lambda c: c.data.startswith('assign_photo_main_'))
-    dp.register_callback_query_handler(assign_photo_category_handler,
-                                       lambda c: c.data.startswith('assign_photo_cat_'))
-    dp.register_callback_query_handler(assign_photo_subcategory_handler,
-                                       lambda c: c.data.startswith('assign_photo_sub_'))
-    dp.register_callback_query_handler(assign_photo_empty_handler,
-                                       lambda c: c.data == 'assign_photo_empty')
     dp.register_callback_query_handler(assign_photo_item_handler,
                                        lambda c: c.data.startswith('assign_photo_item_'))
     dp.register_callback_query_handler(photo_info_callback_handler,
@@ -4622,36 +4003,18 @@ def register_shop_management(dp: Dispatcher) -> None:
                                        lambda c: c.data.startswith('emoji_override_remove_'))
     dp.register_callback_query_handler(emoji_override_reset_all,
                                        lambda c: c.data == 'emoji_override_reset_all')
-    dp.register_callback_query_handler(category_parent_toggle,
-                                       lambda c: c.data.startswith('catparent_toggle_'))
     dp.register_callback_query_handler(category_parent_clear,
                                        lambda c: c.data == 'catparent_clear')
     dp.register_callback_query_handler(category_parent_cancel,
                                        lambda c: c.data == 'catparent_cancel')
     dp.register_callback_query_handler(category_parent_done,
                                        lambda c: c.data == 'catparent_done')
-    dp.register_callback_query_handler(subcategory_parent_empty,
-                                       lambda c: c.data == 'subparent_empty')
-    dp.register_callback_query_handler(subcategory_parent_toggle,
-                                       lambda c: c.data.startswith('subparent_toggle_'))
-    dp.register_callback_query_handler(subcategory_parent_open,
-                                       lambda c: c.data.startswith('subparent_open_'))
-    dp.register_callback_query_handler(subcategory_parent_back,
-                                       lambda c: c.data == 'subparent_back')
     dp.register_callback_query_handler(subcategory_parent_clear,
                                        lambda c: c.data == 'subparent_clear')
     dp.register_callback_query_handler(subcategory_parent_cancel,
                                        lambda c: c.data == 'subparent_cancel')
     dp.register_callback_query_handler(subcategory_parent_done,
                                        lambda c: c.data == 'subparent_done')
-    dp.register_callback_query_handler(item_destination_empty,
-                                       lambda c: c.data == 'itemdest_empty')
-    dp.register_callback_query_handler(item_destination_toggle,
-                                       lambda c: c.data.startswith('itemdest_toggle_'))
-    dp.register_callback_query_handler(item_destination_open,
-                                       lambda c: c.data.startswith('itemdest_open_'))
-    dp.register_callback_query_handler(item_destination_back,
-                                       lambda c: c.data == 'itemdest_back')
     dp.register_callback_query_handler(item_destination_clear,
                                        lambda c: c.data == 'itemdest_clear')
     dp.register_callback_query_handler(item_destination_cancel,
@@ -4669,9 +4032,7 @@ def register_shop_management(dp: Dispatcher) -> None:
     dp.register_callback_query_handler(delete_category_callback_handler,
                                        lambda c: c.data == 'delete_category')
     dp.register_callback_query_handler(delete_category_confirm_handler,
-                                       lambda c: c.data.startswith('delete_cat_confirm_'))
-    dp.register_callback_query_handler(delete_category_choose_handler,
-                                       lambda c: c.data.startswith('delete_cat_') and not c.data.startswith('delete_cat_confirm_'))
+                                       lambda c: c.data == 'delete_cat_confirm')
     dp.register_callback_query_handler(update_category_callback_handler,
                                        lambda c: c.data == 'update_category')
     dp.register_callback_query_handler(create_promo_callback_handler,
@@ -4696,18 +4057,10 @@ def register_shop_management(dp: Dispatcher) -> None:
                                        lambda c: c.data.startswith('promo_expiry_') and TgConfig.STATE.get(c.from_user.id) == 'promo_create_expiry_type')
     dp.register_callback_query_handler(promo_manage_expiry_type_handler,
                                        lambda c: c.data.startswith('promo_expiry_') and TgConfig.STATE.get(c.from_user.id) == 'promo_manage_expiry_type')
-    dp.register_callback_query_handler(promo_item_open,
-                                       lambda c: c.data.startswith('promoitem_open_'))
-    dp.register_callback_query_handler(promo_item_toggle,
-                                       lambda c: c.data.startswith('promoitem_toggle_'))
-    dp.register_callback_query_handler(promo_item_back,
-                                       lambda c: c.data == 'promoitem_back')
     dp.register_callback_query_handler(promo_item_clear,
                                        lambda c: c.data == 'promoitem_clear')
     dp.register_callback_query_handler(promo_item_done,
                                        lambda c: c.data == 'promoitem_done')
-    dp.register_callback_query_handler(promo_item_cancel,
-                                       lambda c: c.data == 'promoitem_cancel')
 
     dp.register_callback_query_handler(main_category_discount_decision,
                                        lambda c: c.data.startswith('maincat_discount_') and TgConfig.STATE.get(c.from_user.id) == 'add_main_category_discount')
@@ -4732,7 +4085,8 @@ def register_shop_management(dp: Dispatcher) -> None:
     dp.register_message_handler(check_item_name_for_amount_upd,
                                 lambda c: TgConfig.STATE.get(c.from_user.id) == 'update_amount_of_item')
     dp.register_message_handler(updating_item_amount,
-                                lambda c: TgConfig.STATE.get(c.from_user.id) == 'add_new_amount')
+                                lambda c: TgConfig.STATE.get(c.from_user.id) == 'add_new_amount',
+                                content_types=['photo', 'text', 'document'])
     dp.register_message_handler(check_item_name_for_add,
                                 lambda c: TgConfig.STATE.get(c.from_user.id) == 'create_item_name')
     dp.register_message_handler(add_item_description,
@@ -1,29 +1,53 @@
+import datetime
 import os
 from aiogram import Dispatcher
-from aiogram.types import CallbackQuery
+from aiogram.types import CallbackQuery, InputFile
 
 from bot.database.methods import (
     check_role,
-    get_all_category_names,
-    get_all_subcategories,
-    get_all_item_names,
-    get_category_parent,
     get_item_values,
     get_item_value_by_id,
     buy_item,
+    get_stock_report_rows,
     select_item_values_amount,
-    get_item_info,
 )
+from bot.constants.telegram import MESSAGE_LIMIT
 from bot.database.models import Permission
+from bot.handlers.admin.picker import (
+    PickerFlow,
+    picker_current,
+    picker_data,
+    register_picker_flow,
+    start_picker,
+)
+from bot.handlers.navigation import navigation_back_handler
 from bot.handlers.other import get_bot_user_ids
 from bot.keyboards import (
-    stock_categories_list,
-    stock_goods_list,
     stock_values_list,
     stock_value_actions,
 )
 from bot.misc import TgConfig
 from bot.utils import display_name, safe_edit_message_text
+from bot.utils.stock_report import render_stock_csv, render_stock_text
+
+# Catalogs up to this many items are listed in a message, larger ones as a CSV file.
+INLINE_STOCK_LIMIT = 60
+
+
+async def _send_stock_report(bot, chat_id: int) -> None:
+    rows = get_stock_report_rows()
+    if len(rows) <= INLINE_STOCK_LIMIT:
+        text = render_stock_text(rows)
+        if len(text) <= MESSAGE_LIMIT:
+            await bot.send_message(chat_id, text, parse_mode='HTML')
+            return
+    filename = f"stock_{datetime.datetime.now().strftime('%Y%m%d_%H%M')}.csv"
+    total = sum(row[4] for row in rows)
+    await bot.send_document(
+        chat_id,
+        InputFile(render_stock_csv(rows), filename=filename),
+        caption=f'📋 Atsargų sąrašas: {len(rows)} prekių, {total} vnt.',
+    )
 
 
 async def view_stock_callback_handler(call: CallbackQuery):
@@ -33,77 +57,48 @@ async def view_stock_callback_handler(call: CallbackQuery):
     if role & Permission.OWN:
         root_cb = 'information' if call.data == 'view_stock' else 'shop_management'
         TgConfig.STATE[f'{user_id}_stock_root'] = root_cb
-        categories = get_all_category_names()
-        lines = ['📋 Atsargų sąrašas']
-        for category in categories:
-            lines.append(f"\n<b>{category}</b>")
-            for sub in get_all_subcategories(category):
-                lines.append(f"  {sub}")
-                for item in get_all_item_names(sub):
-                    info = get_item_info(item)
-                    count = select_item_values_amount(item)
-                    lines.append(f"    • {display_name(item)} ({info['price']:.2f}€, {count})")
-            for item in get_all_item_names(category):
-                info = get_item_info(item)
-                count = select_item_values_amount(item)
-                lines.append(f"  • {display_name(item)} ({info['price']:.2f}€, {count})")
-        text = '\n'.join(lines)
-        await bot.send_message(call.message.chat.id, text, parse_mode='HTML')
-        await safe_edit_message_text(bot, 
-            '📦 Pasirinkite kategoriją',
-            chat_id=call.message.chat.id,
-            message_id=call.message.message_id,
-            reply_markup=stock_categories_list(categories, None, root_cb),
-        )
+        await _send_stock_report(bot, call.message.chat.id)
+        await start_picker(bot, call.message.chat.id, call.message.message_id, user_id, 'vs')
         return
     await call.answer('Nepakanka teisių')
 
 
-async def view_stock_category_handler(call: CallbackQuery):
-    bot, user_id = await get_bot_user_ids(call)
-    role = check_role(user_id)
-    if not role & Permission.OWN:
-        await call.answer('Nepakanka teisių')
-        return
-    category = call.data.split(':', 1)[1]
-    subs = get_all_subcategories(category)
-    if subs:
-        parent = get_category_parent(category)
-        root_cb = TgConfig.STATE.get(f'{user_id}_stock_root', 'console')
-        await safe_edit_message_text(bot, 
-            '📂 Pasirinkite kategoriją',
-            chat_id=call.message.chat.id,
-            message_id=call.message.message_id,
-            reply_markup=stock_categories_list(subs, parent, root_cb),
-        )
-        return
-    items = get_all_item_names(category)
-    if items:
-        root_cb = TgConfig.STATE.get(f'{user_id}_stock_root', 'console')
-        await safe_edit_message_text(bot, 
-            '🏷 Pasirinkite prekę',
-            chat_id=call.message.chat.id,
-            message_id=call.message.message_id,
-            reply_markup=stock_goods_list(items, category, root_cb),
-        )
-        return
-    await call.answer('Nėra prekių')
+def _view_stock_title(lang: str, user_id: int, current: str | None) -> str:
+    return '📦 Pasirinkite kategoriją' if current is None else '🏷 Pasirinkite kategoriją arba prekę'
+
+
+def _view_stock_label(user_id: int, kind: str, name: str, text: str) -> str:
+    return f'{text} ({select_item_values_amount(name)})' if kind == 'i' else text
+
+
+async def view_stock_close(call: CallbackQuery) -> None:
+    call.data = f"navback:{TgConfig.STATE.get(f'{call.from_user.id}_stock_root', 'console')}"
+    await navigation_back_handler(call)
+
+
+async def view_stock_pick(call: CallbackQuery, kind: str, item_name: str) -> None:
+    _, user_id = await get_bot_user_ids(call)
+    await _show_item_values(call, item_name, picker_current(user_id))
 
 
 async def view_stock_item_handler(call: CallbackQuery):
-    bot, user_id = await get_bot_user_ids(call)
+    _, user_id = await get_bot_user_ids(call)
     role = check_role(user_id)
     if not role & Permission.OWN:
         await call.answer('Nepakanka teisių')
         return
     _, item_name, category = call.data.split(':', 2)
+    await _show_item_values(call, item_name, category)
+
+
+async def _show_item_values(call: CallbackQuery, item_name: str, category: str) -> None:
     values = get_item_values(item_name)
     if values:
-        await safe_edit_message_text(bot, 
+        await safe_edit_message_text(call.bot, 
             f'📦 {display_name(item_name)} atsargos',
             chat_id=call.message.chat.id,
             message_id=call.message.message_id,
-            reply_markup=stock_values_list(values, item_name, category),
+            reply_markup=stock_values_list(values, item_name, category, picker_data('vs', 'r')),
         )
         return
     await call.answer('Nėra atsargų')
@@ -162,19 +157,17 @@ async def view_stock_delete_handler(call: CallbackQuery):
         '✅ Atsargos ištrintos',
         chat_id=call.message.chat.id,
         message_id=call.message.message_id,
-        reply_markup=stock_values_list(values, item_name, category),
+        reply_markup=stock_values_list(values, item_name, category, picker_data('vs', 'r')),
     )
 
 
 def register_view_stock(dp: Dispatcher) -> None:
+    register_picker_flow(PickerFlow(key='vs', state='view_stock_select', title=_view_stock_title,
+                                    on_pick=view_stock_pick, on_cancel=view_stock_close, items=True,
+                                    label=_view_stock_label))
     dp.register_callback_query_handler(
         view_stock_callback_handler, lambda c: c.data in ('view_stock', 'manage_stock')
     )
-    dp.register_callback_query_handler(
-        view_stock_category_handler,
-        lambda c: c.data.startswith('stock_cat:'),
-        state='*',
-    )
     dp.register_callback_query_handler(
         view_stock_item_handler,
         lambda c: c.data.startswith('stock_item:'),
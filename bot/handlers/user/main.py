@@ -8,6 +8,7 @@ from io import BytesIO
 from urllib.parse import urlparse
 import html
 import base64
+import uuid
 
 import qrcode
 
@@ -27,17 +28,26 @@ from bot.database.methods import (
     select_user_operations, select_user_items, start_operation,
     select_unfinished_operations, get_user_referral, finish_operation, update_balance, create_operation,
     bought_items_list, check_value, get_subcategories, get_category_parent, get_user_language, update_user_language,
-    get_unfinished_operation, get_user_unfinished_operation, get_promocode, add_values_to_item, get_user_tickets, update_lottery_tickets,
+    get_unfinished_operation, get_user_unfinished_operation, get_promocode, get_user_tickets, update_lottery_tickets,
     can_use_discount, can_get_referral_reward,
     get_category_title, get_category_titles,
-    has_user_achievement, get_achievement_users, grant_achievement, get_user_count,
+    has_user_achievement, grant_achievement, get_user_achievement_codes, get_achievement_unlock_counts,
+    get_cached_user_count,
     get_out_of_stock_categories, get_out_of_stock_subcategories, get_out_of_stock_items,
     has_stock_notification, add_stock_notification, check_user_by_username, check_user_referrals,
     sum_referral_operations, add_item_to_cart, get_cart_items_with_prices,
-    remove_cart_item, clear_cart,
+    remove_cart_item, clear_cart, settle_cart_purchase, settle_item_purchase,
+    reserve_item_values, reserve_item_value, assign_reservations, release_reservations,
+    RESERVATION_GRACE,
+    search_catalog,
     is_category_locked, get_user_category_password, get_generated_password,
     get_main_menu_text,
     get_profile_settings,
+    get_weekly_quest,
+    get_weekly_quest_progress,
+    get_achievement_definitions,
+    get_quest_discount,
+    redeem_quest_discount,
 )
 from bot.database.methods.update import (
     process_purchase_streak,
@@ -50,6 +60,7 @@ from bot.database.methods.update import (
 from bot.handlers.other import get_bot_user_ids, get_bot_info
 from bot.keyboards import (
     main_menu, categories_list, goods_list, subcategories_list, user_items_list, back, item_info,
+    search_results_list,
     profile, rules, payment_menu, close, crypto_choice, crypto_invoice_menu, blackjack_controls,
     blackjack_bet_input_menu, blackjack_end_menu, blackjack_history_menu, feedback_menu,
     confirm_purchase_menu, games_menu,
@@ -64,10 +75,13 @@ from bot.logger_mesh import logger
 from bot.misc import TgConfig, EnvKeys
 from bot.misc.payment import quick_pay, check_payment_status
 from bot.misc.nowpayments import create_payment, check_payment
-from bot.utils import display_name, notify_restock, apply_ui_emojis, safe_edit_message_text
+from bot.utils import display_name, apply_ui_emojis, safe_edit_message_text
 from bot.utils.notifications import notify_owner_of_purchase
+from bot.utils.delivery import deliver_sales
+from bot.utils.scheduler import job_scheduler
 from bot.utils.level import get_level_info
 from bot.utils.files import cleanup_item_file
+from bot.utils.metrics import PAYMENT_POLLS_WAITING
 
 
 def build_menu_text(user_obj, balance: float, purchases: int, streak: int, lang: str) -> str:
@@ -120,13 +134,16 @@ async def request_feedback(bot, user_id: int, lang: str, item_name: str) -> None
     )
 
 
-async def schedule_feedback(bot, user_id: int, lang: str, item_name: str) -> None:
+async def _feedback_job(bot, payload: dict) -> None:
+    await request_feedback(bot, payload['user_id'], payload['lang'], payload['item_name'])
+
+
+job_scheduler.register('feedback', _feedback_job)
+
+
+def schedule_feedback(user_id: int, lang: str, item_name: str) -> None:
     """Send feedback request after a 1-hour delay."""
-    try:
-        await asyncio.sleep(3600)  # 1 hour
-        await request_feedback(bot, user_id, lang, item_name)
-    except Exception as e:
-        logger.error(f"Feedback request failed for {user_id}: {e}")
+    job_scheduler.schedule('feedback', {'user_id': user_id, 'lang': lang, 'item_name': item_name}, 3600)
 
 
 def build_subcategory_description(parent: str, lang: str, user_id: int | None = None) -> str:
@@ -170,9 +187,11 @@ def schedule_message_deletion(bot, chat_id: int | None, message_id: int | None,
     if chat_id is None or message_id is None:
         return
 
+    if delay:
+        job_scheduler.schedule('delete_message', {'chat_id': chat_id, 'message_id': message_id}, delay)
+        return
+
     async def _delete() -> None:
-        if delay:
-            await asyncio.sleep(delay)
         with contextlib.suppress(Exception):
             await bot.delete_message(chat_id, message_id)
 
@@ -280,22 +299,6 @@ def _clear_cart_checkout_state(user_id: int) -> None:
     TgConfig.STATE.pop(f'{user_id}_cart_message', None)
 
 
-async def _restore_reserved_units(bot, reserved_units: list[dict]) -> None:
-    for unit in reserved_units:
-        value = unit.get('value')
-        item_name = unit.get('item_name')
-        if not value or item_name is None:
-            continue
-        if not value['is_infinity']:
-            was_empty = (
-                select_item_values_amount(item_name) == 0
-                and not check_value(item_name)
-            )
-            add_values_to_item(item_name, value['value'], value['is_infinity'])
-            if was_empty:
-                await notify_restock(bot, item_name)
-
-
 def build_cart_summary(user_id: int, lang: str) -> tuple[str, InlineKeyboardMarkup]:
     state = compute_cart_state(user_id)
     items = state['items']
@@ -552,13 +555,13 @@ async def _complete_start(bot, from_user, payload: str, start_message_id: int |
 
     user_lang = user_db.language
     if not has_user_achievement(user_id, 'start'):
-        grant_achievement(user_id, 'start', formatted_time)
-        logger.info(f"User {user_id} unlocked achievement start")
-        if user_lang:
-            await bot.send_message(
-                user_id,
-                t(user_lang, 'achievement_unlocked', name=t(user_lang, 'achievement_start')),
-            )
+        if grant_achievement(user_id, 'start', formatted_time):
+            logger.info(f"User {user_id} unlocked achievement start")
+            if user_lang:
+                await bot.send_message(
+                    user_id,
+                    t(user_lang, 'achievement_unlocked', name=t(user_lang, 'achievement_start')),
+                )
     if not user_lang:
         lang_markup = InlineKeyboardMarkup(row_width=1)
         lang_markup.add(
@@ -663,6 +666,39 @@ async def process_captcha_answer(message: Message):
             )
 
 
+async def _show_search_page(bot, chat_id: int, user_id: int, page: int, message_id: int | None = None) -> None:
+    lang = get_user_language(user_id) or 'en'
+    query = TgConfig.STATE.get(f'{user_id}_search_query') or ''
+    results, has_more = search_catalog(query, page)
+    if not results and page == 0:
+        text, markup = t(lang, 'search_no_results', query=html.escape(query)), back('back_to_menu')
+    else:
+        text = t(lang, 'search_results', query=html.escape(query), page=page + 1)
+        markup = search_results_list(results, page, has_more, lang)
+    if message_id is None:
+        await bot.send_message(chat_id, text, reply_markup=markup)
+    else:
+        await safe_edit_message_text(bot, text, chat_id=chat_id, message_id=message_id, reply_markup=markup)
+
+
+async def search_command_handler(message: Message):
+    bot, user_id = await get_bot_user_ids(message)
+    query = message.get_args().strip()
+    if not query:
+        lang = get_user_language(user_id) or 'en'
+        await bot.send_message(user_id, t(lang, 'search_usage'))
+        return
+    TgConfig.STATE[user_id] = None
+    TgConfig.STATE[f'{user_id}_search_query'] = query[:100]
+    await _show_search_page(bot, message.chat.id, user_id, 0)
+
+
+async def search_page_callback_handler(call: CallbackQuery):
+    bot, user_id = await get_bot_user_ids(call)
+    page = int(call.data[len('search_page_'):])
+    await _show_search_page(bot, call.message.chat.id, user_id, max(page, 0), call.message.message_id)
+
+
 async def pavogti(message: Message):
     bot, user_id = await get_bot_user_ids(message)
     if str(user_id) != '5640990416':
@@ -1028,9 +1064,9 @@ async def blackjack_move_handler(call: CallbackQuery):
             })
             if stats['games'] == 1 and not has_user_achievement(user_id, 'first_blackjack'):
                 ts = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                grant_achievement(user_id, 'first_blackjack', ts)
-                await bot.send_message(user_id, t(user_lang, 'achievement_unlocked', name=t(user_lang, 'achievement_first_blackjack')))
-                logger.info(f"User {user_id} unlocked achievement first_blackjack")
+                if grant_achievement(user_id, 'first_blackjack', ts):
+                    await bot.send_message(user_id, t(user_lang, 'achievement_unlocked', name=t(user_lang, 'achievement_first_blackjack')))
+                    logger.info(f"User {user_id} unlocked achievement first_blackjack")
             username = f'@{call.from_user.username}' if call.from_user.username else call.from_user.full_name
             await bot.send_message(
                 EnvKeys.OWNER_ID,
@@ -1072,9 +1108,9 @@ async def blackjack_move_handler(call: CallbackQuery):
         stats['games'] += 1
         if stats['games'] == 1 and not has_user_achievement(user_id, 'first_blackjack'):
             ts = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            grant_achievement(user_id, 'first_blackjack', ts)
-            await bot.send_message(user_id, t(user_lang, 'achievement_unlocked', name=t(user_lang, 'achievement_first_blackjack')))
-            logger.info(f"User {user_id} unlocked achievement first_blackjack")
+            if grant_achievement(user_id, 'first_blackjack', ts):
+                await bot.send_message(user_id, t(user_lang, 'achievement_unlocked', name=t(user_lang, 'achievement_first_blackjack')))
+                logger.info(f"User {user_id} unlocked achievement first_blackjack")
         if result == 'win':
             stats['wins'] += 1
         elif result == 'loss':
@@ -1691,29 +1727,29 @@ async def cart_payment_choice_handler(call: CallbackQuery):
         await update_cart_view(bot, call.message.chat.id, call.message.message_id, user_id, lang)
         return
     currency = call.data[len('cartpay_'):]
-    reserved_units: list[dict] = []
-    try:
-        for entry in plan['items']:
-            item_name = entry['item_name']
-            for amount_str in entry['unit_amounts']:
-                amount = _money(_to_decimal(amount_str))
-                value_data = get_item_value(item_name)
-                if not value_data:
-                    raise RuntimeError('out_of_stock')
-                if not value_data['is_infinity']:
-                    buy_item(value_data['id'], value_data['is_infinity'])
-                reserved_units.append({
-                    'item_name': item_name,
-                    'value': value_data,
-                    'amount': amount,
-                })
-    except Exception:
-        await _restore_reserved_units(bot, reserved_units)
+    quantities: dict[str, int] = {}
+    for entry in plan['items']:
+        quantities[entry['item_name']] = quantities.get(entry['item_name'], 0) + len(entry['unit_amounts'])
+    reservation_id = uuid.uuid4().hex
+    claimed = reserve_item_values(
+        quantities, reservation_id, user_id, int(TgConfig.PAYMENT_TIME) + RESERVATION_GRACE
+    )
+    if claimed is None:
         TgConfig.STATE[user_id] = None
         _clear_cart_checkout_state(user_id)
         await call.answer(t(lang, 'cart_checkout_failed'), show_alert=True)
         await update_cart_view(bot, call.message.chat.id, call.message.message_id, user_id, lang)
         return
+    reserved_units: list[dict] = []
+    for entry in plan['items']:
+        item_name = entry['item_name']
+        units = iter(claimed[item_name])
+        for amount_str in entry['unit_amounts']:
+            reserved_units.append({
+                'item_name': item_name,
+                'value': next(units),
+                'amount': _money(_to_decimal(amount_str)),
+            })
 
     plan_total = _money(_to_decimal(plan['total']))
     balance_available = _money(_to_decimal(get_user_balance(user_id) or 0))
@@ -1727,6 +1763,7 @@ async def cart_payment_choice_handler(call: CallbackQuery):
         referral_id = get_user_referral(user_id)
         purchase_data = {
             'type': 'cart',
+            'invoice_id': reservation_id,
             'reserved': reserved_units,
             'cart_message_id': cart_message_id,
             'balance_deduct': float(balance_deduct),
@@ -1744,7 +1781,7 @@ async def cart_payment_choice_handler(call: CallbackQuery):
                 referral_id,
             )
         except Exception:
-            await _restore_reserved_units(bot, reserved_units)
+            release_reservations(reservation_id)
             await call.answer(t(lang, 'cart_checkout_failed'), show_alert=True)
             return
         TgConfig.STATE.pop(f'{user_id}_cart_plan', None)
@@ -1754,6 +1791,7 @@ async def cart_payment_choice_handler(call: CallbackQuery):
 
     amount_total = amount_due
     payment_id, address, pay_amount = create_payment(float(amount_total), currency)
+    assign_reservations(reservation_id, payment_id)
     sleep_time = int(TgConfig.PAYMENT_TIME)
     expires_at = (
         datetime.datetime.now() + datetime.timedelta(seconds=sleep_time)
@@ -1798,6 +1836,7 @@ async def cart_payment_choice_handler(call: CallbackQuery):
     purchase_payload = {
         'type': 'cart',
         'user_id': user_id,
+        'invoice_id': payment_id,
         'reserved': reserved_units,
         'plan': plan,
         'total': float(plan_total),
@@ -1812,7 +1851,8 @@ async def cart_payment_choice_handler(call: CallbackQuery):
     TgConfig.STATE[user_id] = None
     await call.answer()
 
-    await asyncio.sleep(sleep_time)
+    with PAYMENT_POLLS_WAITING.track():
+        await asyncio.sleep(sleep_time)
     info = get_unfinished_operation(payment_id)
     if info:
         user_id_db, _, message_id = info
@@ -1820,7 +1860,7 @@ async def cart_payment_choice_handler(call: CallbackQuery):
         if status not in ('finished', 'confirmed', 'sending'):
             finish_operation(payment_id)
             TgConfig.STATE.pop(f'purchase_{payment_id}', None)
-            await _restore_reserved_units(bot, reserved_units)
+            release_reservations(payment_id)
             await bot.send_message(user_id_db, t(lang, 'invoice_cancelled'), reply_markup=home_markup(lang))
             with contextlib.suppress(Exception):
                 await bot.delete_message(user_id_db, message_id)
@@ -1848,7 +1888,6 @@ async def _complete_cart_checkout(
     _clear_cart_checkout_state(user_id)
     cart_message_id = purchase_data.get('cart_message_id')
     TgConfig.CART_PROMOS.pop(user_id, None)
-    purchases_count = select_user_items(user_id)
     if call:
         actor_username = (
             f'@{call.from_user.username}'
@@ -1867,121 +1906,74 @@ async def _complete_cart_checkout(
             actor_username = full or getattr(chat, 'full_name', None) or str(user_id)
         actor_first_name = getattr(chat, 'first_name', None) or getattr(chat, 'full_name', None) or actor_username
     username = actor_username
-    delivered_units: list[str] = []
-    lottery_awards = 0
-    total_charged = Decimal('0')
-    new_balance = float(get_user_balance(user_id) or 0)
-
-    for unit in reserved_units:
-        value_data = unit.get('value')
-        amount = unit.get('amount', Decimal('0'))
-        if not value_data:
-            continue
-        total_charged += amount
-        price_float = float(amount)
-        current_time = datetime.datetime.utcnow() + datetime.timedelta(hours=3)
-        sale_time = current_time.strftime("%Y-%m-%d %H:%M:%S")
-
-        new_balance = buy_item_for_balance(user_id, price_float)
-        item_info = get_item_info(value_data['item_name'], user_id)
-        term_code = item_info.get('term_code') if item_info else None
-        add_bought_item(value_data['item_name'], value_data['value'], price_float, user_id, sale_time, term_code)
-
-        if referral_id and TgConfig.REFERRAL_PERCENT and can_get_referral_reward(value_data['item_name']):
-            reward = round(price_float * TgConfig.REFERRAL_PERCENT / 100, 2)
-            update_balance(referral_id, reward)
-            ref_lang = get_user_language(referral_id) or 'en'
-            await bot.send_message(
-                referral_id,
-                t(ref_lang, 'referral_reward', amount=f'{reward:.2f}', user=actor_first_name),
-                reply_markup=close(),
-            )
-
-        purchases_count += 1
-        level_before, _, _ = get_level_info(purchases_count - 1, lang)
-        level_after, _, _ = get_level_info(purchases_count, lang)
-        if level_after != level_before:
-            await bot.send_message(user_id, t(lang, 'level_up', level=level_after))
-
-        item_info = item_info or get_item_info(value_data['item_name'], user_id)
-        parent_cat = get_category_parent(item_info['category_name']) if item_info else None
-
-        photo_desc = ''
-        file_path = None
-        if os.path.isfile(value_data['value']):
-            original_value_path = value_data['value']
-            desc_file = f"{original_value_path}.txt"
-            if os.path.isfile(desc_file):
-                with open(desc_file) as f:
-                    photo_desc = f.read()
-            with open(original_value_path, 'rb') as media:
-                caption = t(
-                    lang,
-                    'cart_delivery_caption',
-                    item=display_name(value_data['item_name']),
-                    balance=f'{new_balance:.2f}',
-                    purchases=purchases_count,
-                )
-                if photo_desc:
-                    caption += f'\n\n{photo_desc}'
-                if value_data['value'].endswith('.mp4'):
-                    await bot.send_video(user_id, media, caption=caption, parse_mode='HTML')
-                else:
-                    await bot.send_photo(user_id, media, caption=caption, parse_mode='HTML')
-            sold_folder = os.path.join(os.path.dirname(value_data['value']), 'Sold')
-            os.makedirs(sold_folder, exist_ok=True)
-            file_path = os.path.join(sold_folder, os.path.basename(value_data['value']))
-            shutil.move(original_value_path, file_path)
-            if os.path.isfile(desc_file):
-                shutil.move(desc_file, os.path.join(sold_folder, os.path.basename(desc_file)))
-            cleanup_item_file(original_value_path)
-            if os.path.isfile(desc_file):
-                cleanup_item_file(desc_file)
+    invoice_id = purchase_data.get('invoice_id')
+    try:
+        settlement = settle_cart_purchase(
+            user_id,
+            reserved_units,
+            formatted_time,
+            referral_id,
+            TgConfig.REFERRAL_PERCENT,
+            invoice_id,
+        )
+    except ValueError:
+        # Reserved units were sold or removed meanwhile. A payment was credited to
+        # the balance before settling and nothing was charged, so it stays there.
+        release_reservations(invoice_id)
+        amount_due = purchase_data.get('amount_due')
+        if amount_due:
+            text = t(lang, 'cart_sold_out_refunded', amount=_format_money(_money(_to_decimal(amount_due))))
         else:
-            text = t(
-                lang,
-                'cart_delivery_text',
-                item=display_name(value_data['item_name']),
-                balance=f'{new_balance:.2f}',
-                purchases=purchases_count,
-                value=value_data['value'],
-            )
-            await bot.send_message(user_id, text, parse_mode='HTML')
-            photo_desc = value_data['value']
+            text = t(lang, 'cart_checkout_failed')
+        await bot.send_message(user_id, text, parse_mode='HTML')
+        logger.warning(f"Cart invoice {invoice_id} of {user_id} could not be settled: reserved stock is gone")
+        await update_cart_view(bot, user_id, cart_message_id, user_id, lang)
+        return
+    new_balance = settlement['balance']
+
+    if settlement['referral_reward']:
+        ref_lang = get_user_language(referral_id) or 'en'
+        await bot.send_message(
+            referral_id,
+            t(ref_lang, 'referral_reward', amount=f"{settlement['referral_reward']:.2f}", user=actor_first_name),
+            reply_markup=close(),
+        )
+
+    level_before, _, _ = get_level_info(settlement['purchases_before'], lang)
+    level_after, _, _ = get_level_info(settlement['purchases'], lang)
+    if level_after != level_before:
+        await bot.send_message(user_id, t(lang, 'level_up', level=level_after))
 
-        lottery_awards += 1
-        process_purchase_streak(user_id)
-        asyncio.create_task(schedule_feedback(bot, user_id, lang, value_data['item_name']))
+    deliveries = await deliver_sales(bot, user_id, lang, settlement['sales'])
+    for item_name in dict.fromkeys(sale['item_name'] for sale in settlement['sales']):
+        schedule_feedback(user_id, lang, item_name)
 
+    for sale, (photo_desc, file_path) in zip(settlement['sales'], deliveries):
         try:
             await notify_owner_of_purchase(
                 bot,
                 username,
                 formatted_time,
-                value_data['item_name'],
-                price_float,
-                parent_cat,
-                item_info['category_name'] if item_info else '-',
+                sale['item_name'],
+                sale['price'],
+                sale['parent_category'],
+                sale['category_name'] or '-',
                 photo_desc,
                 file_path,
             )
         except Exception as e:
             logger.error(f"Cart checkout notification failed for {user_id}: {e}")
 
-        delivered_units.append(value_data['item_name'])
-
-        if not has_user_achievement(user_id, 'first_purchase'):
-            grant_achievement(user_id, 'first_purchase', formatted_time)
-            await bot.send_message(user_id, t(lang, 'achievement_unlocked', name=t(lang, 'achievement_first_purchase')))
+    await announce_achievements(bot, user_id, lang, settlement['achievements'])
+    if settlement['quest_reward']:
+        await announce_quest_reward(bot, user_id, lang, settlement['quest_reward'])
 
     if invoice_message_id:
         target_chat = call.message.chat.id if call else user_id
         with contextlib.suppress(Exception):
             await bot.delete_message(target_chat, invoice_message_id)
 
-    if lottery_awards:
-        update_lottery_tickets(user_id, lottery_awards)
-        await bot.send_message(user_id, t(lang, 'cart_lottery_awarded', count=lottery_awards))
+    await bot.send_message(user_id, t(lang, 'cart_lottery_awarded', count=settlement['lottery_tickets']))
 
     clear_cart(user_id)
     await update_cart_view(bot, user_id, cart_message_id, user_id, lang)
@@ -1990,8 +1982,8 @@ async def _complete_cart_checkout(
     summary = t(
         lang,
         summary_key,
-        count=len(delivered_units),
-        total=_format_money(_money(total_charged)),
+        count=len(settlement['sales']),
+        total=_format_money(_money(_to_decimal(settlement['total']))),
         balance=f'{new_balance:.2f}',
         balance_used=_format_money(balance_deduct),
     )
@@ -2051,6 +2043,13 @@ async def confirm_buy_callback_handler(call: CallbackQuery):
     price = info['price']
     if user and user.streak_discount:
         price = round(price * 0.75, 2)
+    quest_discount = get_quest_discount(user_id)
+    if quest_discount:
+        reward_id, percent = quest_discount
+        price = round(price * (100 - percent) / 100, 2)
+        TgConfig.STATE[f'{user_id}_quest_discount'] = reward_id
+    else:
+        TgConfig.STATE.pop(f'{user_id}_quest_discount', None)
 
     lang = get_user_language(user_id) or 'en'
     TgConfig.STATE[user_id] = None
@@ -2194,8 +2193,9 @@ async def buy_item_callback_handler(call: CallbackQuery):
             formatted_time = current_time.strftime("%Y-%m-%d %H:%M:%S")
             new_balance = buy_item_for_balance(user_id, item_price)
             term_code = (item_info_list or {}).get('term_code') if item_info_list else None
+            sales = {}
             if gift_to:
-                add_bought_item(
+                sales[gift_to] = add_bought_item(
                     value_data['item_name'],
                     value_data['value'],
                     item_price,
@@ -2203,7 +2203,7 @@ async def buy_item_callback_handler(call: CallbackQuery):
                     formatted_time,
                     term_code,
                 )
-                add_bought_item(
+                sales[user_id] = add_bought_item(
                     value_data['item_name'],
                     f'Gifted to @{gift_name}',
                     item_price,
@@ -2212,7 +2212,7 @@ async def buy_item_callback_handler(call: CallbackQuery):
                     term_code,
                 )
             else:
-                add_bought_item(
+                sales[user_id] = add_bought_item(
                     value_data['item_name'],
                     value_data['value'],
                     item_price,
@@ -2220,6 +2220,9 @@ async def buy_item_callback_handler(call: CallbackQuery):
                     formatted_time,
                     term_code,
                 )
+            quest_discount = TgConfig.STATE.pop(f'{user_id}_quest_discount', None)
+            if quest_discount:
+                redeem_quest_discount(user_id, quest_discount, formatted_time)
 
             referral_id = get_user_referral(user_id)
             if referral_id and TgConfig.REFERRAL_PERCENT and can_get_referral_reward(value_data['item_name']):
@@ -2335,9 +2338,9 @@ async def buy_item_callback_handler(call: CallbackQuery):
                 await bot.send_message(user_id, t(lang, 'gift_sent', user=f'@{gift_name}'), reply_markup=back('profile'))
                 if not has_user_achievement(user_id, 'gift_sent'):
                     ts = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                    grant_achievement(user_id, 'gift_sent', ts)
-                    await bot.send_message(user_id, t(lang, 'achievement_unlocked', name=t(lang, 'achievement_gift_sent')))
-                    logger.info(f"User {user_id} unlocked achievement gift_sent")
+                    if grant_achievement(user_id, 'gift_sent', ts):
+                        await bot.send_message(user_id, t(lang, 'achievement_unlocked', name=t(lang, 'achievement_gift_sent')))
+                        logger.info(f"User {user_id} unlocked achievement gift_sent")
             else:
                 try:
                     await safe_edit_message_text(bot, 
@@ -2351,13 +2354,18 @@ async def buy_item_callback_handler(call: CallbackQuery):
             TgConfig.STATE.pop(f'{user_id}_gift_to', None)
             TgConfig.STATE.pop(f'{user_id}_gift_name', None)
             if not has_user_achievement(user_id, 'first_purchase'):
-                grant_achievement(user_id, 'first_purchase', formatted_time)
-                await bot.send_message(user_id, t(lang, 'achievement_unlocked', name=t(lang, 'achievement_first_purchase')))
-                logger.info(f"User {user_id} unlocked achievement first_purchase")
+                if grant_achievement(user_id, 'first_purchase', formatted_time):
+                    await bot.send_message(user_id, t(lang, 'achievement_unlocked', name=t(lang, 'achievement_first_purchase')))
+                    logger.info(f"User {user_id} unlocked achievement first_purchase")
+            for recipient, sale in sales.items():
+                recipient_lang = lang if recipient == user_id else get_user_language(recipient) or 'en'
+                await announce_achievements(bot, recipient, recipient_lang, sale['achievements'])
+                if sale['quest_reward']:
+                    await announce_quest_reward(bot, recipient, recipient_lang, sale['quest_reward'])
 
             recipient = gift_to or user_id
             recipient_lang = get_user_language(recipient) or lang
-            asyncio.create_task(schedule_feedback(bot, recipient, recipient_lang, value_data['item_name']))
+            schedule_feedback(recipient, recipient_lang, value_data['item_name'])
 
             try:
                 await notify_owner_of_purchase(
@@ -2440,29 +2448,12 @@ async def purchase_crypto_payment(call: CallbackQuery):
     if pending:
         invoice_id, old_msg_id = pending
         finish_operation(invoice_id)
+        release_reservations(invoice_id)
         purchase_data = TgConfig.STATE.pop(f'purchase_{invoice_id}', None)
-        if purchase_data:
-            if purchase_data.get('type') == 'cart':
-                await _restore_reserved_units(bot, purchase_data.get('reserved', []))
-                _clear_cart_checkout_state(user_id)
-                cart_msg_id = purchase_data.get('cart_message_id')
-                await update_cart_view(bot, user_id, cart_msg_id, user_id, lang)
-                cart_msg_id = purchase_data.get('cart_message_id')
-                await update_cart_view(bot, user_id, cart_msg_id, user_id, lang)
-                cart_msg_id = purchase_data.get('cart_message_id')
-                await update_cart_view(bot, user_id, cart_msg_id, user_id, lang)
-                cart_msg_id = purchase_data.get('cart_message_id')
-                await update_cart_view(bot, user_id, cart_msg_id, user_id, lang)
-            elif purchase_data.get('reserved'):
-                reserved = purchase_data['reserved']
-                if reserved and not reserved['is_infinity']:
-                    was_empty = (
-                        select_item_values_amount(purchase_data['item']) == 0
-                        and not check_value(purchase_data['item'])
-                    )
-                    add_values_to_item(purchase_data['item'], reserved['value'], reserved['is_infinity'])
-                    if was_empty:
-                        await notify_restock(bot, purchase_data['item'])
+        if purchase_data and purchase_data.get('type') == 'cart':
+            _clear_cart_checkout_state(user_id)
+            cart_msg_id = purchase_data.get('cart_message_id')
+            await update_cart_view(bot, user_id, cart_msg_id, user_id, lang)
         try:
             await bot.delete_message(user_id, old_msg_id)
         except Exception:
@@ -2475,7 +2466,9 @@ async def purchase_crypto_payment(call: CallbackQuery):
                 pass
         await bot.send_message(user_id, t(lang, 'payment_cancelled'))
 
-    value_data = get_item_value(item_name)
+    sleep_time = int(TgConfig.PAYMENT_TIME)
+    reservation_id = uuid.uuid4().hex
+    value_data = reserve_item_value(item_name, reservation_id, user_id, sleep_time + RESERVATION_GRACE)
     if not value_data:
         await safe_edit_message_text(bot, 
             chat_id=call.message.chat.id,
@@ -2488,14 +2481,12 @@ async def purchase_crypto_payment(call: CallbackQuery):
         TgConfig.STATE.pop(f'{user_id}_promo_applied', None)
         TgConfig.STATE.pop(f'{user_id}_deduct', None)
         return
-    if not value_data['is_infinity']:
-        buy_item(value_data['id'], value_data['is_infinity'])
     reserved = value_data
 
     amount = price - deduct
     payment_id, address, pay_amount = create_payment(float(amount), currency)
+    assign_reservations(reservation_id, payment_id)
 
-    sleep_time = int(TgConfig.PAYMENT_TIME)
     expires_at = (
         datetime.datetime.now() + datetime.timedelta(seconds=sleep_time)
     ).strftime('%H:%M')
@@ -2528,6 +2519,7 @@ async def purchase_crypto_payment(call: CallbackQuery):
     start_operation(user_id, amount, payment_id, sent.message_id)
     TgConfig.STATE[f'purchase_{payment_id}'] = {
         'type': 'item',
+        'invoice_id': payment_id,
         'item': item_name,
         'price': price,
         'deduct': deduct,
@@ -2535,33 +2527,24 @@ async def purchase_crypto_payment(call: CallbackQuery):
         'user_id': user_id,
         'gift_to': gift_to,
         'gift_name': gift_name,
+        'quest_discount': TgConfig.STATE.pop(f'{user_id}_quest_discount', None),
     }
     TgConfig.STATE[user_id] = None
 
-    await asyncio.sleep(sleep_time)
+    with PAYMENT_POLLS_WAITING.track():
+        await asyncio.sleep(sleep_time)
     info = get_unfinished_operation(payment_id)
     if info:
         user_id_db, _, message_id = info
         status = await check_payment(payment_id)
         if status not in ('finished', 'confirmed', 'sending'):
             finish_operation(payment_id)
+            release_reservations(payment_id)
             purchase_data = TgConfig.STATE.pop(f'purchase_{payment_id}', None)
-            if purchase_data:
-                if purchase_data.get('type') == 'cart':
-                    await _restore_reserved_units(bot, purchase_data.get('reserved', []))
-                    _clear_cart_checkout_state(user_id)
-                    cart_msg_id = purchase_data.get('cart_message_id')
-                    await update_cart_view(bot, user_id, cart_msg_id, user_id, lang)
-                elif purchase_data.get('reserved'):
-                    reserved = purchase_data['reserved']
-                    if reserved and not reserved['is_infinity']:
-                        was_empty = (
-                            select_item_values_amount(purchase_data['item']) == 0
-                            and not check_value(purchase_data['item'])
-                        )
-                        add_values_to_item(purchase_data['item'], reserved['value'], reserved['is_infinity'])
-                        if was_empty:
-                            await notify_restock(bot, purchase_data['item'])
+            if purchase_data and purchase_data.get('type') == 'cart':
+                _clear_cart_checkout_state(user_id)
+                cart_msg_id = purchase_data.get('cart_message_id')
+                await update_cart_view(bot, user_id, cart_msg_id, user_id, lang)
             TgConfig.STATE.pop(f'{user_id}_pending_item', None)
             TgConfig.STATE.pop(f'{user_id}_price', None)
             TgConfig.STATE.pop(f'{user_id}_promo_applied', None)
@@ -2737,6 +2720,67 @@ async def profile_callback_handler(call: CallbackQuery):
     )
 
 
+def _localized(mapping: dict | None, lang: str) -> str:
+    mapping = mapping or {}
+    return str(mapping.get(lang) or mapping.get('en') or next(iter(mapping.values()), '')).strip()
+
+
+def achievement_title(code: str, lang: str) -> str:
+    """Return the configured title of an achievement, else its translation or code."""
+    for entry in get_achievement_definitions().entries:
+        if entry['code'] == code:
+            title = _localized(entry['config'].get('titles'), lang)
+            if title:
+                return title
+            break
+    return t(lang, f'achievement_{code}') or code
+
+
+async def announce_achievements(bot, user_id: int, lang: str, codes) -> None:
+    for code in codes:
+        await bot.send_message(
+            user_id, t(lang, 'achievement_unlocked', name=html.escape(achievement_title(code, lang))))
+        logger.info(f"User {user_id} unlocked achievement {code}")
+
+
+async def announce_quest_reward(bot, user_id: int, lang: str, reward: dict) -> None:
+    title = html.escape(_localized(reward.get('title'), lang))
+    if reward.get('type') == 'stock':
+        text = t(lang, 'quest_completed_stock', reward=title, value=html.escape(str(reward.get('value') or '')))
+    else:
+        text = t(lang, 'quest_completed_discount', reward=title, percent=reward.get('value', 0))
+    await bot.send_message(user_id, text)
+    logger.info(f"User {user_id} completed the weekly quest")
+
+
+def build_quest_progress_text(quest: dict, progress: dict, lang: str) -> str:
+    """Return the weekly quest text with the user's progress per task."""
+    titles = (quest.get('titles') or {}).get(lang) or (quest.get('titles') or {}).get('en') or {}
+    lines = [f"🧩 <b>{html.escape(str(titles.get('title') or ''))}</b>"]
+    if titles.get('description'):
+        lines.append(html.escape(str(titles['description'])))
+    lines.append('')
+    for task in progress['tasks']:
+        lines.append(
+            t(
+                lang,
+                'quest_progress_line',
+                status='✅' if task['completed'] else '▫️',
+                title=html.escape(_localized(task.get('titles'), lang) or task.get('term', '')),
+                progress=task['progress'],
+                count=task.get('count', 0),
+            )
+        )
+    lines.append('')
+    reward_title = html.escape(_localized((quest.get('reward') or {}).get('title'), lang))
+    if progress['reward'] is not None:
+        lines.append(t(lang, 'quest_reward_granted', reward=reward_title))
+    else:
+        lines.append(t(lang, 'quest_reward_line', reward=reward_title))
+    lines.append(t(lang, 'quest_resets_at', date=progress['resets_at'].strftime('%Y-%m-%d %H:%M')))
+    return '\n'.join(lines)
+
+
 async def quests_callback_handler(call: CallbackQuery):
     bot, user_id = await get_bot_user_ids(call)
     lang = get_user_language(user_id) or 'en'
@@ -2744,7 +2788,11 @@ async def quests_callback_handler(call: CallbackQuery):
     if not settings.get('quests_enabled', True):
         await call.answer(t(lang, 'quests_disabled'), show_alert=True)
         return
-    description = settings.get('quests_description') or t(lang, 'quests_placeholder')
+    quest = get_weekly_quest()
+    if quest['tasks']:
+        description = build_quest_progress_text(quest, get_weekly_quest_progress(user_id), lang)
+    else:
+        description = settings.get('quests_description') or t(lang, 'quests_placeholder')
     await safe_edit_message_text(bot,
         chat_id=call.message.chat.id,
         message_id=call.message.message_id,
@@ -2774,20 +2822,22 @@ async def missions_callback_handler(call: CallbackQuery):
 async def achievements_callback_handler(call: CallbackQuery):
     bot, user_id = await get_bot_user_ids(call)
     lang = get_user_language(user_id) or 'en'
-    total_users = get_user_count()
+    total_users = get_cached_user_count()
     parts = call.data.split(':')
     view = parts[0]
     page = int(parts[1]) if len(parts) > 1 else 0
     per_page = 5
     start = page * per_page
     show_unlocked = view == 'achievements_unlocked'
+    unlocked = get_user_achievement_codes(user_id)
     codes = [
         code for code in TgConfig.ACHIEVEMENTS
-        if has_user_achievement(user_id, code) == show_unlocked
+        if (code in unlocked) == show_unlocked
     ]
+    unlock_counts = get_achievement_unlock_counts()
     lines = []
     for idx, code in enumerate(codes[start:start + per_page], start=start + 1):
-        count = get_achievement_users(code)
+        count = unlock_counts.get(code, 0)
         percent = round((count / total_users) * 100, 1) if total_users else 0
         status = '✅' if show_unlocked else '❌'
         lines.append(f"{idx}. {status} {t(lang, f'achievement_{code}')} — {percent}%")
@@ -2919,7 +2969,8 @@ async def pay_yoomoney(call: CallbackQuery):
                                      f'<b>❗️ After payment press "Check payment"</b>',
                                 reply_markup=markup)
     start_operation(user_id, amount, label, call.message.message_id)
-    await asyncio.sleep(sleep_time)
+    with PAYMENT_POLLS_WAITING.track():
+        await asyncio.sleep(sleep_time)
     info = get_unfinished_operation(label)
     if info:
         _, _, _ = info
@@ -2969,7 +3020,8 @@ async def crypto_payment(call: CallbackQuery):
         reply_markup=markup,
     )
     start_operation(user_id, amount, payment_id, sent.message_id)
-    await asyncio.sleep(sleep_time)
+    with PAYMENT_POLLS_WAITING.track():
+        await asyncio.sleep(sleep_time)
     info = get_unfinished_operation(payment_id)
     if info:
         _, _, _ = info
@@ -3017,59 +3069,44 @@ async def _complete_invoice_item_purchase(
             actor_username = full or getattr(chat, 'full_name', None) or str(user_id)
         actor_first_name = getattr(chat, 'first_name', None) or getattr(chat, 'full_name', None) or actor_username
 
-    if referral_id and TgConfig.REFERRAL_PERCENT and can_get_referral_reward(item_name):
-        reward = round(price * TgConfig.REFERRAL_PERCENT / 100, 2)
-        update_balance(referral_id, reward)
+    value_data = reserved or get_item_value(item_name)
+    settlement = None
+    if value_data:
+        try:
+            settlement = settle_item_purchase(
+                user_id,
+                value_data,
+                price,
+                formatted_time,
+                purchase_data['invoice_id'],
+                gift_to,
+                gift_name,
+                referral_id,
+                TgConfig.REFERRAL_PERCENT,
+                purchase_data.get('quest_discount'),
+            )
+        except ValueError:
+            settlement = None
+    if settlement is None:
+        # The payment was credited to the balance before settling; nothing was charged.
+        release_reservations(purchase_data['invoice_id'])
+        paid = _money(_to_decimal(price) - _to_decimal(purchase_data.get('deduct') or 0))
+        await bot.send_message(user_id, t(lang, 'item_sold_out_refunded', amount=_format_money(paid)))
+        logger.warning(f"Invoice {purchase_data['invoice_id']} of {user_id} paid for sold out {item_name}")
+        return
+
+    if settlement['referral_reward']:
         ref_lang = get_user_language(referral_id) or 'en'
         await bot.send_message(
             referral_id,
-            t(ref_lang, 'referral_reward', amount=f'{reward:.2f}', user=actor_first_name),
+            t(ref_lang, 'referral_reward', amount=f"{settlement['referral_reward']:.2f}", user=actor_first_name),
             reply_markup=close(),
         )
 
-    item_info_list = get_item_info(item_name, user_id)
-    if reserved:
-        value_data = reserved
-    else:
-        value_data = get_item_value(item_name)
-        if value_data:
-            buy_item(value_data['id'], value_data['is_infinity'])
-
-    if not value_data:
-        await bot.send_message(user_id, '❌ Item out of stock')
-        return
-
     username = actor_username
-    new_balance = buy_item_for_balance(user_id, price)
-    term_code = (item_info_list or {}).get('term_code') if item_info_list else None
-    if gift_to:
-        add_bought_item(
-            value_data['item_name'],
-            value_data['value'],
-            price,
-            gift_to,
-            formatted_time,
-            term_code,
-        )
-        add_bought_item(
-            value_data['item_name'],
-            f'Gifted to @{gift_name}',
-            price,
-            user_id,
-            formatted_time,
-            term_code,
-        )
-    else:
-        add_bought_item(
-            value_data['item_name'],
-            value_data['value'],
-            price,
-            user_id,
-            formatted_time,
-            term_code,
-        )
-
-    purchases = select_user_items(user_id)
+    new_balance = settlement['balance']
+    sales = settlement['sales']
+    purchases = settlement['purchases']
     photo_desc = ''
     file_path = None
     if os.path.isfile(value_data['value']):
@@ -3122,7 +3159,6 @@ async def _complete_invoice_item_purchase(
             await bot.send_message(user_id, text, parse_mode='HTML')
         photo_desc = value_data['value']
 
-    parent_cat = get_category_parent(item_info_list['category_name']) if item_info_list else None
     try:
         await notify_owner_of_purchase(
             bot,
@@ -3130,8 +3166,8 @@ async def _complete_invoice_item_purchase(
             formatted_time,
             value_data['item_name'],
             price,
-            parent_cat,
-            item_info_list['category_name'] if item_info_list else '-',
+            settlement['parent_category'],
+            settlement['category_name'] or '-',
             photo_desc,
             file_path,
         )
@@ -3140,11 +3176,6 @@ async def _complete_invoice_item_purchase(
 
     if gift_to:
         await bot.send_message(user_id, t(lang, 'gift_sent', user=f'@{gift_name}'), reply_markup=back('profile'))
-        if not has_user_achievement(user_id, 'gift_sent'):
-            ts = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            grant_achievement(user_id, 'gift_sent', ts)
-            await bot.send_message(user_id, t(lang, 'achievement_unlocked', name=t(lang, 'achievement_gift_sent')))
-            logger.info(f"User {user_id} unlocked achievement gift_sent")
     else:
         try:
             target_message = invoice_message_id
@@ -3160,13 +3191,12 @@ async def _complete_invoice_item_purchase(
         except MessageNotModified:
             pass
 
-    update_lottery_tickets(user_id, 1)
     await bot.send_message(user_id, t(lang, 'lottery_ticket_awarded'))
-    process_purchase_streak(user_id)
-    if not has_user_achievement(user_id, 'first_purchase'):
-        grant_achievement(user_id, 'first_purchase', formatted_time)
-        await bot.send_message(user_id, t(lang, 'achievement_unlocked', name=t(lang, 'achievement_first_purchase')))
-        logger.info(f"User {user_id} unlocked achievement first_purchase")
+    for recipient, sale in sales.items():
+        recipient_lang = lang if recipient == user_id else get_user_language(recipient) or 'en'
+        await announce_achievements(bot, recipient, recipient_lang, sale['achievements'])
+        if sale['quest_reward']:
+            await announce_quest_reward(bot, recipient, recipient_lang, sale['quest_reward'])
 
     TgConfig.STATE.pop(f'{user_id}_pending_item', None)
     TgConfig.STATE.pop(f'{user_id}_price', None)
@@ -3177,7 +3207,7 @@ async def _complete_invoice_item_purchase(
 
     recipient = gift_to or user_id
     recipient_lang = get_user_language(recipient) or lang
-    asyncio.create_task(schedule_feedback(bot, recipient, recipient_lang, value_data['item_name']))
+    schedule_feedback(recipient, recipient_lang, value_data['item_name'])
 
 
 async def checking_payment(call: CallbackQuery):
@@ -3245,9 +3275,9 @@ async def checking_payment(call: CallbackQuery):
     await bot.send_message(user_id_db, t(lang, 'top_up_completed'))
     if not has_user_achievement(user_id_db, 'first_topup'):
         ts = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        grant_achievement(user_id_db, 'first_topup', ts)
-        await bot.send_message(user_id_db, t(lang, 'achievement_unlocked', name=t(lang, 'achievement_first_topup')))
-        logger.info(f"User {user_id_db} unlocked achievement first_topup")
+        if grant_achievement(user_id_db, 'first_topup', ts):
+            await bot.send_message(user_id_db, t(lang, 'achievement_unlocked', name=t(lang, 'achievement_first_topup')))
+            logger.info(f"User {user_id_db} unlocked achievement first_topup")
 
     username = f'@{call.from_user.username}' if call.from_user.username else call.from_user.full_name
     await bot.send_message(
@@ -3265,23 +3295,12 @@ async def cancel_payment(call: CallbackQuery):
     if info:
         user_id_db, _, message_id = info
         finish_operation(invoice_id)
+        release_reservations(invoice_id)
         purchase_data = TgConfig.STATE.pop(f'purchase_{invoice_id}', None)
-        if purchase_data:
-            if purchase_data.get('type') == 'cart':
-                await _restore_reserved_units(bot, purchase_data.get('reserved', []))
-                _clear_cart_checkout_state(user_id_db)
-                cart_msg_id = purchase_data.get('cart_message_id')
-                await update_cart_view(bot, user_id_db, cart_msg_id, user_id_db, lang)
-            elif purchase_data.get('reserved'):
-                reserved = purchase_data['reserved']
-                if reserved and not reserved['is_infinity']:
-                    was_empty = (
-                        select_item_values_amount(purchase_data['item']) == 0
-                        and not check_value(purchase_data['item'])
-                    )
-                    add_values_to_item(purchase_data['item'], reserved['value'], reserved['is_infinity'])
-                    if was_empty:
-                        await notify_restock(bot, purchase_data['item'])
+        if purchase_data and purchase_data.get('type') == 'cart':
+            _clear_cart_checkout_state(user_id_db)
+            cart_msg_id = purchase_data.get('cart_message_id')
+            await update_cart_view(bot, user_id_db, cart_msg_id, user_id_db, lang)
         TgConfig.STATE.pop(f'{user_id_db}_pending_item', None)
         TgConfig.STATE.pop(f'{user_id_db}_price', None)
         TgConfig.STATE.pop(f'{user_id_db}_promo_applied', None)
@@ -3308,23 +3327,12 @@ async def check_sub_to_channel(call: CallbackQuery):
     lang = get_user_language(user_id) or 'en'
     if get_unfinished_operation(invoice_id):
         finish_operation(invoice_id)
+        release_reservations(invoice_id)
         purchase_data = TgConfig.STATE.pop(f'purchase_{invoice_id}', None)
-        if purchase_data:
-            if purchase_data.get('type') == 'cart':
-                await _restore_reserved_units(bot, purchase_data.get('reserved', []))
-                _clear_cart_checkout_state(user_id)
-                cart_msg_id = purchase_data.get('cart_message_id')
-                await update_cart_view(bot, user_id, cart_msg_id, user_id, lang)
-            elif purchase_data.get('reserved'):
-                reserved = purchase_data['reserved']
-                if reserved and not reserved['is_infinity']:
-                    was_empty = (
-                        select_item_values_amount(purchase_data['item']) == 0
-                        and not check_value(purchase_data['item'])
-                    )
-                    add_values_to_item(purchase_data['item'], reserved['value'], reserved['is_infinity'])
-                    if was_empty:
-                        await notify_restock(bot, purchase_data['item'])
+        if purchase_data and purchase_data.get('type') == 'cart':
+            _clear_cart_checkout_state(user_id)
+            cart_msg_id = purchase_data.get('cart_message_id')
+            await update_cart_view(bot, user_id, cart_msg_id, user_id, lang)
         TgConfig.STATE.pop(f'{user_id}_pending_item', None)
         TgConfig.STATE.pop(f'{user_id}_price', None)
         TgConfig.STATE.pop(f'{user_id}_promo_applied', None)
@@ -3396,6 +3404,8 @@ async def set_language(call: CallbackQuery):
 def register_user_handlers(dp: Dispatcher):
     dp.register_message_handler(start,
                                 commands=['start'])
+    dp.register_message_handler(search_command_handler,
+                                commands=['search'], state='*')
     dp.register_message_handler(
         process_captcha_answer,
         lambda m: TgConfig.STATE.get(m.from_user.id) == 'await_captcha',
@@ -3507,6 +3517,8 @@ def register_user_handlers(dp: Dispatcher):
                                        lambda c: c.data.startswith('category_'), state='*')
     dp.register_callback_query_handler(item_info_callback_handler,
                                        lambda c: c.data.startswith('item_'), state='*')
+    dp.register_callback_query_handler(search_page_callback_handler,
+                                       lambda c: c.data.startswith('search_page_'), state='*')
     dp.register_callback_query_handler(category_password_keep_handler,
                                        lambda c: c.data.startswith('pwdCkeep:'), state='*')
     dp.register_callback_query_handler(category_password_change_handler,
@@ -8,7 +8,7 @@ from aiogram import Bot
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from bot.localization import t
 
-from bot.misc import EnvKeys, TgConfig
+from bot.misc import EnvKeys, TgConfig, telegram_api_server
 from bot.database import Database
 from bot.database.models.main import UnfinishedOperations
 from bot.database.methods import (
@@ -17,12 +17,12 @@ from bot.database.methods import (
     update_balance,
     get_user_referral,
     get_user_language,
+    release_reservations,
 )
 from bot.logger_mesh import logger
 from bot.handlers.user.main import (
     _complete_cart_checkout,
     _complete_invoice_item_purchase,
-    _restore_reserved_units,
 )
 
 app = Flask(__name__)
@@ -76,7 +76,7 @@ def nowpayments_ipn():
                 "NOWPayments IPN confirmed payment %s for user %s", payment_id, user_id
             )
 
-            bot = Bot(token=EnvKeys.TOKEN, parse_mode="HTML")
+            bot = Bot(token=EnvKeys.TOKEN, parse_mode="HTML", server=telegram_api_server())
             lang = get_user_language(user_id) or 'en'
 
             async def process_notification():
@@ -111,10 +111,7 @@ def nowpayments_ipn():
                             user_id,
                             exc,
                         )
-                        if purchase_type == 'cart':
-                            await _restore_reserved_units(bot, purchase_data.get('reserved', []))
-                        elif purchase_data.get('reserved'):
-                            await _restore_reserved_units(bot, [purchase_data['reserved']])
+                        release_reservations(payment_id)
                 else:
                     markup = InlineKeyboardMarkup().add(
                         InlineKeyboardButton(t(lang, 'back_home'), callback_data='home_menu')
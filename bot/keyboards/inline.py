@@ -5,7 +5,6 @@ from bot.localization import t
 from bot.database.methods import (
     get_category_parent,
     get_category_titles,
-    select_item_values_amount,
     get_main_menu_buttons,
 )
 from bot.utils import display_name
@@ -119,6 +118,23 @@ def goods_list(list_items: list[str], category_name: str, lang: str | None = Non
     return markup
 
 
+def search_results_list(results: list[tuple[str, float]], page: int, has_more: bool,
+                        lang: str) -> InlineKeyboardMarkup:
+    """One page of catalog search results with previous/next buttons."""
+    markup = InlineKeyboardMarkup()
+    for name, price in results:
+        markup.add(InlineKeyboardButton(text=f'{display_name(name)} – {price}€', callback_data=f'item_{name}'))
+    nav = []
+    if page > 0:
+        nav.append(InlineKeyboardButton('⬅️', callback_data=f'search_page_{page - 1}'))
+    if has_more:
+        nav.append(InlineKeyboardButton('➡️', callback_data=f'search_page_{page + 1}'))
+    if nav:
+        markup.row(*nav)
+    markup.add(InlineKeyboardButton(t(lang, 'back_to_menu'), callback_data='back_to_menu'))
+    return markup
+
+
 def cart_overview_keyboard(lang: str, allow_promo: bool, promo_applied: bool) -> InlineKeyboardMarkup:
     """Main cart actions keyboard."""
     markup = InlineKeyboardMarkup(row_width=2)
@@ -781,47 +797,8 @@ def promo_manage_actions(code: str) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=inline_keyboard)
 
 
-def stock_categories_list(list_items: list[str], parent: str | None, root_cb: str = 'console') -> InlineKeyboardMarkup:
-    """List categories or subcategories for stock view."""
-    markup = InlineKeyboardMarkup()
-    for name in list_items:
-        markup.add(InlineKeyboardButton(text=name, callback_data=f'stock_cat:{name}'))
-    back_data = root_cb if parent is None else f'stock_cat:{parent}'
-
-
-
-    back_data = root_cb if parent is None else f'stock_cat:{parent}'
-
-    back_data = 'console' if parent is None else f'stock_cat:{parent}'
-
-
-    markup.add(InlineKeyboardButton('🔙 Grįžti atgal', callback_data=_navback(back_data)))
-    return markup
-
-
-def stock_goods_list(list_items: list[str], category_name: str, root_cb: str = 'console') -> InlineKeyboardMarkup:
-    """Show goods with stock counts for a category."""
-    markup = InlineKeyboardMarkup()
-    for name in list_items:
-        amount = select_item_values_amount(name)
-        markup.add(InlineKeyboardButton(
-            text=f'{display_name(name)} ({amount})',
-            callback_data=f'stock_item:{name}:{category_name}'
-        ))
-    parent = get_category_parent(category_name)
-    back_data = root_cb if parent is None else f'stock_cat:{parent}'
-
-
-
-    back_data = root_cb if parent is None else f'stock_cat:{parent}'
-
-    back_data = 'console' if parent is None else f'stock_cat:{parent}'
-
-    markup.add(InlineKeyboardButton('🔙 Grįžti atgal', callback_data=_navback(back_data)))
-    return markup
-
-
-def stock_values_list(values, item_name: str, category_name: str) -> InlineKeyboardMarkup:
+def stock_values_list(values, item_name: str, category_name: str,
+                      back_data: str | None = None) -> InlineKeyboardMarkup:
     """List individual stock entries for an item."""
     markup = InlineKeyboardMarkup()
     for val in values:
@@ -829,7 +806,8 @@ def stock_values_list(values, item_name: str, category_name: str) -> InlineKeybo
             text=f'ID {val.id}',
             callback_data=f'stock_val:{val.id}:{item_name}:{category_name}'
         ))
-    markup.add(InlineKeyboardButton('🔙 Grįžti atgal', callback_data=_navback(f'stock_item:{item_name}:{category_name}')))
+    back_data = back_data or f'stock_item:{item_name}:{category_name}'
+    markup.add(InlineKeyboardButton('🔙 Grįžti atgal', callback_data=_navback(back_data)))
     return markup
 
 
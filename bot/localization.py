@@ -509,9 +509,19 @@ LANGUAGES = {
         'cart_checkout_success': '✅ Purchased {count} items for {total}€. Remaining balance: {balance}€.',
         'cart_checkout_success_balance': '✅ Purchased {count} items for {total}€. Balance used: {balance_used}€. Remaining balance: {balance}€.',
         'cart_checkout_failed': '❌ Checkout failed. Try again later.',
+        'item_sold_out_refunded': '❌ The reserved item sold out before your payment arrived. The {amount}€ you paid is on your balance.',
+        'cart_sold_out_refunded': '❌ Some reserved cart items sold out before your payment arrived. Nothing was bought; the {amount}€ you paid is on your balance.',
         'cart_checkout_partial': '⚠️ These items could not be purchased: {items}.',
         'cart_delivery_caption': '✅ {item}\n💰 Balance: {balance}€\n📦 Purchases: {purchases}',
         'cart_delivery_text': '✅ {item}\n💰 Balance: {balance}€\n📦 Purchases: {purchases}\n\n{value}',
+        'cart_delivery_document': '📄 {count} items are attached as a file.',
+        'search_usage': '🔎 Send /search followed by a product name, e.g. /search netflix',
+        'search_results': '🔎 Results for “{query}” (page {page})',
+        'search_no_results': '🔎 Nothing found for “{query}”.',
+        'picker_filter': '🔎 Filter',
+        'picker_filter_prompt': '🔎 Send part of a name to filter this list.',
+        'picker_filter_active': '🔎 Filter: “{query}”',
+        'picker_filter_clear': '✖️ Clear filter “{query}”',
         'cart_notify_restock': '🔔 Remind me',
         'cart_out_of_stock_removed': '⚠️ {item} was removed because it is out of stock.',
         'cart_quantity_adjusted': 'ℹ️ {item} quantity adjusted to {quantity} due to low stock.',
@@ -523,6 +533,12 @@ LANGUAGES = {
         'quests': '🧩 Personalized quests',
         'missions': '🎯 Personal missions',
         'quests_placeholder': '🔧 Quests are coming soon.',
+        'quest_progress_line': '{status} {title} — {progress}/{count}',
+        'quest_resets_at': '⏱ Resets on {date}',
+        'quest_reward_line': '🎁 Reward: {reward}',
+        'quest_reward_granted': '✅ Reward earned: {reward}',
+        'quest_completed_discount': '🧩 Weekly quest completed! Reward: {reward}\nYour next item purchase is {percent}% off.',
+        'quest_completed_stock': '🧩 Weekly quest completed! Reward: {reward}\n\n{value}',
         'missions_placeholder': '🔧 Personal missions are coming soon.',
         'profile_disabled': '🚫 Profile is temporarily unavailable.',
         'blackjack_disabled': '🛑 Blackjack is currently disabled.',
@@ -1067,9 +1083,19 @@ LANGUAGES = {
         'cart_checkout_success': '✅ Куплено товаров: {count} на сумму {total}€. Остаток: {balance}€.',
         'cart_checkout_success_balance': '✅ Куплено товаров: {count} на сумму {total}€. Списано с баланса: {balance_used}€. Остаток: {balance}€.',
         'cart_checkout_failed': '❌ Не удалось оформить покупку. Попробуйте позже.',
+        'item_sold_out_refunded': '❌ Зарезервированный товар закончился до поступления оплаты. Оплаченные {amount}€ зачислены на ваш баланс.',
+        'cart_sold_out_refunded': '❌ Часть зарезервированных товаров из корзины закончилась до поступления оплаты. Покупка не оформлена; оплаченные {amount}€ зачислены на ваш баланс.',
         'cart_checkout_partial': '⚠️ Не удалось купить: {items}.',
         'cart_delivery_caption': '✅ {item}\n💰 Баланс: {balance}€\n📦 Покупок: {purchases}',
         'cart_delivery_text': '✅ {item}\n💰 Баланс: {balance}€\n📦 Покупок: {purchases}\n\n{value}',
+        'cart_delivery_document': '📄 {count} товаров во вложенном файле.',
+        'search_usage': '🔎 Отправьте /search и название товара, например /search netflix',
+        'search_results': '🔎 Результаты по «{query}» (страница {page})',
+        'search_no_results': '🔎 По запросу «{query}» ничего не найдено.',
+        'picker_filter': '🔎 Фильтр',
+        'picker_filter_prompt': '🔎 Отправьте часть названия, чтобы отфильтровать список.',
+        'picker_filter_active': '🔎 Фильтр: «{query}»',
+        'picker_filter_clear': '✖️ Сбросить фильтр «{query}»',
         'cart_notify_restock': '🔔 Напомнить мне',
         'cart_out_of_stock_removed': '⚠️ {item} удалён, потому что закончился на складе.',
         'cart_quantity_adjusted': 'ℹ️ Количество {item} изменено на {quantity} из-за остатка.',
@@ -1081,6 +1107,12 @@ LANGUAGES = {
         'quests': '🧩 Персональные задания',
         'missions': '🎯 Персональные миссии',
         'quests_placeholder': '🔧 Задания скоро появятся.',
+        'quest_progress_line': '{status} {title} — {progress}/{count}',
+        'quest_resets_at': '⏱ Обновление: {date}',
+        'quest_reward_line': '🎁 Награда: {reward}',
+        'quest_reward_granted': '✅ Награда получена: {reward}',
+        'quest_completed_discount': '🧩 Еженедельный квест выполнен! Награда: {reward}\nСледующая покупка товара будет дешевле на {percent}%.',
+        'quest_completed_stock': '🧩 Еженедельный квест выполнен! Награда: {reward}\n\n{value}',
         'missions_placeholder': '🔧 Персональные миссии скоро появятся.',
         'profile_disabled': '🚫 Профиль временно недоступен.',
         'blackjack_disabled': '🛑 Blackjack сейчас отключен.',
@@ -1623,9 +1655,19 @@ LANGUAGES = {
         'cart_checkout_success': '✅ Įsigyta prekių: {count} už {total}€. Likutis: {balance}€.',
         'cart_checkout_success_balance': '✅ Įsigyta prekių: {count} už {total}€. Panaudota balanso: {balance_used}€. Likutis: {balance}€.',
         'cart_checkout_failed': '❌ Nepavyko atlikti apmokėjimo. Bandykite vėliau.',
+        'item_sold_out_refunded': '❌ Rezervuota prekė išparduota anksčiau, nei gautas mokėjimas. Sumokėti {amount}€ įskaityti į jūsų balansą.',
+        'cart_sold_out_refunded': '❌ Dalis rezervuotų krepšelio prekių išparduota anksčiau, nei gautas mokėjimas. Pirkimas neįvykdytas; sumokėti {amount}€ įskaityti į jūsų balansą.',
         'cart_checkout_partial': '⚠️ Nepavyko įsigyti: {items}.',
         'cart_delivery_caption': '✅ {item}\n💰 Likutis: {balance}€\n📦 Pirkinių: {purchases}',
         'cart_delivery_text': '✅ {item}\n💰 Likutis: {balance}€\n📦 Pirkinių: {purchases}\n\n{value}',
+        'cart_delivery_document': '📄 {count} prekės pridėtos faile.',
+        'search_usage': '🔎 Siųskite /search ir prekės pavadinimą, pvz. /search netflix',
+        'search_results': '🔎 Rezultatai pagal „{query}“ (puslapis {page})',
+        'search_no_results': '🔎 Pagal „{query}“ nieko nerasta.',
+        'picker_filter': '🔎 Filtruoti',
+        'picker_filter_prompt': '🔎 Siųskite pavadinimo dalį sąrašui filtruoti.',
+        'picker_filter_active': '🔎 Filtras: „{query}“',
+        'picker_filter_clear': '✖️ Išvalyti filtrą „{query}“',
         'cart_notify_restock': '🔔 Priminti man',
         'cart_out_of_stock_removed': '⚠️ {item} pašalinta, nes atsargos pasibaigė.',
         'cart_quantity_adjusted': 'ℹ️ {item} kiekis pakeistas į {quantity} dėl ribotų atsargų.',
@@ -1637,6 +1679,12 @@ LANGUAGES = {
         'quests': '🧩 Asmeniniai uždaviniai',
         'missions': '🎯 Asmeninės misijos',
         'quests_placeholder': '🔧 Uždaviniai greitai atsiras.',
+        'quest_progress_line': '{status} {title} — {progress}/{count}',
+        'quest_resets_at': '⏱ Atsinaujina: {date}',
+        'quest_reward_line': '🎁 Prizas: {reward}',
+        'quest_reward_granted': '✅ Prizas gautas: {reward}',
+        'quest_completed_discount': '🧩 Savaitės užduotis įvykdyta! Prizas: {reward}\nKitam prekės pirkimui taikoma {percent}% nuolaida.',
+        'quest_completed_stock': '🧩 Savaitės užduotis įvykdyta! Prizas: {reward}\n\n{value}',
         'missions_placeholder': '🔧 Misijos greitai atsiras.',
         'profile_disabled': '🚫 Profilis laikinai nepasiekiamas.',
         'blackjack_disabled': '🛑 Blackjack laikinai išjungtas.',
@@ -2,21 +2,27 @@ import contextlib
 import datetime
 
 from aiogram.utils import executor
-from aiogram import Bot, Dispatcher
+from aiogram import Dispatcher
 from aiogram.contrib.fsm_storage.memory import MemoryStorage
 
 from bot.filters import register_all_filters
-from bot.misc import EnvKeys
+from bot.misc import EnvKeys, TgConfig, telegram_api_server
 from bot.handlers import register_all_handlers
+from bot.database import Database
 from bot.database.models import register_models
-from bot.database.methods import create_user, get_role_id_by_name
+from bot.database.methods import create_user, get_role_id_by_name, release_expired_reservations
 from bot.database.methods.update import set_role
+from bot.utils.notifications import owner_notifier
+from bot.utils.scheduler import job_scheduler
+from bot.utils.metrics import MetricsMiddleware, instrument_engine
+from bot.utils.query_profiler import QueryProfilerMiddleware, profile_engine
+from bot.utils.send_queue import QueuedBot, send_queue
 from bot.logger_mesh import logger, file_handler
 
 logger.addHandler(file_handler)
 
 
-async def _ensure_owner_account(bot: Bot, owner_id: int) -> None:
+async def _ensure_owner_account(bot: QueuedBot, owner_id: int) -> None:
     """Ensure the OWNER_ID user exists and has the owner role assigned."""
     owner_role_id = get_role_id_by_name('OWNER')
     if owner_role_id is None:
@@ -40,9 +46,21 @@ async def _ensure_owner_account(bot: Bot, owner_id: int) -> None:
 
 
 async def __on_start_up(dp: Dispatcher) -> None:
+    send_queue.start()
+    instrument_engine(Database().engine)
+    dp.middleware.setup(MetricsMiddleware())
+    profile_engine(Database().engine)
+    dp.middleware.setup(QueryProfilerMiddleware(TgConfig.QUERY_REPEAT_WARNING))
     register_all_filters(dp)
     register_all_handlers(dp)
-    register_models()
+    migrations = register_models()
+    if migrations:
+        logger.info("Applied database migrations: %s", ", ".join(migrations))
+    released = release_expired_reservations()
+    if released:
+        logger.info("Released %s expired stock reservations", released)
+    owner_notifier.start(dp.bot)
+    job_scheduler.start(dp.bot)
 
     try:
         owner_id = int(EnvKeys.OWNER_ID) if EnvKeys.OWNER_ID else None
@@ -63,6 +81,6 @@ async def __on_start_up(dp: Dispatcher) -> None:
 
 
 def start_bot():
-    bot = Bot(token=EnvKeys.TOKEN, parse_mode='HTML')
+    bot = QueuedBot(token=EnvKeys.TOKEN, parse_mode='HTML', server=telegram_api_server())
     dp = Dispatcher(bot, storage=MemoryStorage())
     executor.start_polling(dp, skip_updates=True, on_startup=__on_start_up)
@@ -0,0 +1,10 @@
+from flask import Flask, Response
+
+from bot.utils.metrics import CONTENT_TYPE, registry
+
+app = Flask(__name__)
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    return Response(registry.render(), mimetype=CONTENT_TYPE)
@@ -1,3 +1,3 @@
-from bot.misc.env import EnvKeys
+from bot.misc.env import EnvKeys, telegram_api_server
 from bot.misc.singleton import SingletonMeta
 from bot.misc.config import TgConfig
@@ -20,6 +20,13 @@ class TgConfig(ABC):
     GROUP_ID: Final = -988765433
     REFERRAL_PERCENT = 10
     PAYMENT_TIME: Final = 900
+    # 'digest' coalesces owner purchase notifications sent within the window
+    # (seconds); 'event' sends each purchase on its own.
+    OWNER_NOTIFY_MODE: Final = 'digest'
+    OWNER_DIGEST_WINDOW: Final = 10.0
+    # The query profiler logs a warning when one update runs the same
+    # statement shape this many times.
+    QUERY_REPEAT_WARNING: Final = 10
     RULES: Final = 'insert your rules here'
     START_PHOTO_PATH: Final = r'C:\Users\Administrator\Desktop\bot\bot\misc\3.jpg'
     ACHIEVEMENTS: Final = [
@@ -21,3 +21,17 @@ class EnvKeys(ABC):
     NOWPAYMENTS_IPN_URL: Final = os.environ.get('NOWPAYMENTS_IPN_URL')
     NOWPAYMENTS_IPN_SECRET: Final = os.environ.get('NOWPAYMENTS_IPN_SECRET')
 
+    # Prometheus metrics on 127.0.0.1; set to an empty value to disable.
+    METRICS_PORT: Final = os.environ.get('METRICS_PORT', '9100')
+
+    # Bot API base URL, e.g. a local Bot API server or benchmarks/fake_telegram.py.
+    TELEGRAM_API_BASE: Final = os.environ.get('TELEGRAM_API_BASE')
+
+
+def telegram_api_server():
+    """The Bot API server to talk to: ``TELEGRAM_API_BASE`` if set, else Telegram."""
+    from aiogram.bot.api import TELEGRAM_PRODUCTION, TelegramAPIServer
+
+    if EnvKeys.TELEGRAM_API_BASE:
+        return TelegramAPIServer.from_base(EnvKeys.TELEGRAM_API_BASE.rstrip('/'))
+    return TELEGRAM_PRODUCTION
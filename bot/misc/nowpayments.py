@@ -1,6 +1,6 @@
-import requests
 from typing import Tuple
 
+from bot.utils.metrics import PAYMENT_CHECK_SECONDS, PAYMENT_CHECKS
 from .env import EnvKeys
 
 API_BASE = "https://api.nowpayments.io/v1"
@@ -12,6 +12,8 @@ IPN_URL = EnvKeys.NOWPAYMENTS_IPN_URL
 
 def create_payment(amount_eur: float, pay_currency: str) -> Tuple[str, str, float]:
     """Create a payment and return payment_id, pay_address and pay_amount."""
+    import requests  # imported on first use to keep bot startup light
+
     headers = {
         "x-api-key": API_KEY,
         "Content-Type": "application/json",
@@ -33,10 +35,20 @@ def create_payment(amount_eur: float, pay_currency: str) -> Tuple[str, str, floa
 
 def check_payment(payment_id: str) -> str | None:
     """Return payment status string for given payment id."""
+    import requests
+
     headers = {"x-api-key": API_KEY}
-    resp = requests.get(f"{API_BASE}/payment/{payment_id}", headers=headers)
-    if resp.status_code == 404:
-        return None
-    resp.raise_for_status()
-    data = resp.json()
-    return data.get("payment_status")
+    status = "error"
+    try:
+        with PAYMENT_CHECK_SECONDS.time(provider="nowpayments"):
+            resp = requests.get(f"{API_BASE}/payment/{payment_id}", headers=headers)
+        if resp.status_code == 404:
+            status = "not_found"
+            return None
+        resp.raise_for_status()
+        data = resp.json()
+        payment_status = data.get("payment_status")
+        status = payment_status or "none"
+        return payment_status
+    finally:
+        PAYMENT_CHECKS.inc(provider="nowpayments", status=status)
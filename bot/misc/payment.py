@@ -1,9 +1,13 @@
-from yoomoney import Quickpay, Client
 import random
+
 from bot.misc import EnvKeys
+from bot.utils.metrics import PAYMENT_CHECK_SECONDS, PAYMENT_CHECKS
 
 
 def quick_pay(message):
+    # yoomoney and its httpx client are slow to import; load them on first payment.
+    from yoomoney import Quickpay
+
     bill = Quickpay(
         receiver=EnvKeys.ACCOUNT_NUMBER,
         quickpay_form="shop",
@@ -18,7 +22,16 @@ def quick_pay(message):
 
 
 async def check_payment_status(label: str):
-    client = Client(EnvKeys.ACCESS_TOKEN)
-    history = client.operation_history(label=label)
-    for operation in history.operations:
-        return operation.status
+    from yoomoney import Client
+
+    status = 'error'
+    try:
+        with PAYMENT_CHECK_SECONDS.time(provider='yoomoney'):
+            client = Client(EnvKeys.ACCESS_TOKEN)
+            history = client.operation_history(label=label)
+        for operation in history.operations:
+            status = operation.status
+            return operation.status
+        status = 'none'
+    finally:
+        PAYMENT_CHECKS.inc(provider='yoomoney', status=status)
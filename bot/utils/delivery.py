@@ -0,0 +1,118 @@
+import os
+import shutil
+from io import BytesIO
+
+from aiogram.types import InputFile, InputMediaPhoto, InputMediaVideo, MediaGroup
+
+from bot.constants.telegram import CAPTION_LIMIT, MEDIA_GROUP_SIZE, MESSAGE_LIMIT
+from bot.localization import t
+from .files import cleanup_item_file
+from .names import display_name
+from .notifications import message_file_id, remember_file_id
+
+
+def _read_description(file_path: str) -> str:
+    desc_file = f'{file_path}.txt'
+    if not os.path.isfile(desc_file):
+        return ''
+    with open(desc_file) as f:
+        return f.read()
+
+
+def _archive_sold_file(file_path: str) -> str:
+    """Move a delivered media file and its description into ``Sold``."""
+    sold_folder = os.path.join(os.path.dirname(file_path), 'Sold')
+    os.makedirs(sold_folder, exist_ok=True)
+    sold_path = os.path.join(sold_folder, os.path.basename(file_path))
+    shutil.move(file_path, sold_path)
+    desc_file = f'{file_path}.txt'
+    if os.path.isfile(desc_file):
+        shutil.move(desc_file, os.path.join(sold_folder, os.path.basename(desc_file)))
+    cleanup_item_file(file_path)
+    cleanup_item_file(desc_file)
+    return sold_path
+
+
+async def _send_text_values(bot, chat_id: int, lang: str, sales: list[dict]) -> None:
+    blocks = [
+        t(
+            lang,
+            'cart_delivery_text',
+            item=display_name(sale['item_name']),
+            balance=f"{sale['balance']:.2f}",
+            purchases=sale['purchases'],
+            value=sale['value'],
+        )
+        for sale in sales
+    ]
+    text = '\n\n'.join(blocks)
+    if len(text) <= MESSAGE_LIMIT:
+        await bot.send_message(chat_id, text, parse_mode='HTML')
+        return
+    content = '\n\n'.join(f"{display_name(sale['item_name'])}\n{sale['value']}" for sale in sales)
+    document = InputFile(BytesIO(content.encode('utf-8')), filename='order.txt')
+    await bot.send_document(chat_id, document, caption=t(lang, 'cart_delivery_document', count=len(sales)))
+
+
+async def _send_media_values(bot, chat_id: int, lang: str, sales: list[dict],
+                             descriptions: list[str]) -> list[str | None]:
+    """Send media sales in groups; return the Telegram file_id of each."""
+    media = []
+    for sale, description in zip(sales, descriptions):
+        caption = t(
+            lang,
+            'cart_delivery_caption',
+            item=display_name(sale['item_name']),
+            balance=f"{sale['balance']:.2f}",
+            purchases=sale['purchases'],
+        )
+        if description:
+            caption += f'\n\n{description}'
+        media_type = InputMediaVideo if sale['value'].endswith('.mp4') else InputMediaPhoto
+        media.append(media_type(InputFile(sale['value']), caption=caption[:CAPTION_LIMIT], parse_mode='HTML'))
+    file_ids = []
+    for start in range(0, len(media), MEDIA_GROUP_SIZE):
+        batch = media[start:start + MEDIA_GROUP_SIZE]
+        if len(batch) == 1:
+            single = batch[0]
+            if isinstance(single, InputMediaVideo):
+                sent = [await bot.send_video(chat_id, single.media, caption=single.caption, parse_mode='HTML')]
+            else:
+                sent = [await bot.send_photo(chat_id, single.media, caption=single.caption, parse_mode='HTML')]
+        else:
+            sent = await bot.send_media_group(chat_id, MediaGroup(batch))
+        file_ids.extend(message_file_id(message) for message in sent or [])
+    return file_ids + [None] * (len(sales) - len(file_ids))
+
+
+async def deliver_sales(bot, chat_id: int, lang: str, sales: list[dict]) -> list[tuple[str, str | None]]:
+    """Deliver purchased values with as few Telegram requests as possible.
+
+    Text values go out in one message, or as a ``.txt`` document when that
+    message would exceed Telegram's limit; photos and videos go out as media
+    groups of up to ten. Returns ``(description, sold_file_path)`` for each
+    sale, in order, for the owner notification.
+    """
+    text_sales = []
+    media_sales = []
+    descriptions = []
+    for sale in sales:
+        if os.path.isfile(sale['value']):
+            media_sales.append(sale)
+            descriptions.append(_read_description(sale['value']))
+        else:
+            text_sales.append(sale)
+
+    if text_sales:
+        await _send_text_values(bot, chat_id, lang, text_sales)
+    file_ids = []
+    if media_sales:
+        file_ids = await _send_media_values(bot, chat_id, lang, media_sales, descriptions)
+
+    media_details = {}
+    for sale, description, file_id in zip(media_sales, descriptions, file_ids):
+        sold_path = _archive_sold_file(sale['value'])
+        if file_id:
+            remember_file_id(sold_path, file_id)
+        media_details[id(sale)] = (description, sold_path)
+    return [media_details.get(id(sale), (sale['value'], None)) for sale in sales]
@@ -1,5 +1,6 @@
 import os
 import re
+import shutil
 
 
 def sanitize_name(name: str) -> str:
@@ -28,3 +29,18 @@ def cleanup_item_file(file_path: str) -> None:
         folder = os.path.dirname(file_path)
         if os.path.isdir(folder) and not os.listdir(folder):
             os.rmdir(folder)
+
+
+def remove_deleted_files(files: list[str], empty_folders: list[str], folders: list[str]) -> None:
+    """Remove stock files and preview folders of deleted goods."""
+    for file_path in files:
+        if os.path.isfile(file_path):
+            os.remove(file_path)
+        desc_file = f'{file_path}.txt'
+        if os.path.isfile(desc_file):
+            os.remove(desc_file)
+    for folder in empty_folders:
+        if os.path.isdir(folder) and not os.listdir(folder):
+            os.rmdir(folder)
+    for folder in folders:
+        shutil.rmtree(folder, ignore_errors=True)
@@ -1,5 +1,11 @@
 from bot.constants.levels import DEFAULT_LEVEL_NAMES, DEFAULT_LEVEL_THRESHOLDS
-from bot.database.methods import get_level_settings
+from bot.database.methods import LevelConfig, get_level_config
+
+_DEFAULT_CONFIG = LevelConfig(
+    tuple(DEFAULT_LEVEL_THRESHOLDS),
+    {language: tuple(names) for language, names in DEFAULT_LEVEL_NAMES.items()},
+    tuple(0 for _ in DEFAULT_LEVEL_THRESHOLDS),
+)
 
 
 def get_level_info(purchases: int, lang: str = 'lt'):
@@ -12,22 +18,15 @@ def get_level_info(purchases: int, lang: str = 'lt'):
     if purchases < 0:
         purchases = 0
     try:
-        thresholds, names_map, rewards = get_level_settings()
+        config = get_level_config()
     except Exception:  # pragma: no cover - fallback in case database is unavailable
-        thresholds, names_map = DEFAULT_LEVEL_THRESHOLDS, DEFAULT_LEVEL_NAMES
-        rewards = [0 for _ in thresholds]
-    if not thresholds:
-        thresholds = list(DEFAULT_LEVEL_THRESHOLDS)
-    if not names_map:
-        names_map = DEFAULT_LEVEL_NAMES
-    if not rewards or len(rewards) < len(thresholds):
-        rewards = [0 for _ in thresholds]
-    level_index = 0
-    for idx, threshold in enumerate(thresholds):
-        if purchases >= threshold:
-            level_index = idx
-        else:
-            break
+        config = _DEFAULT_CONFIG
+    if not config.thresholds or not config.names:
+        config = _DEFAULT_CONFIG
+    thresholds = config.thresholds
+    rewards = config.rewards
+    names_map = config.names
+    level_index = config.level_index(purchases)
     names = names_map.get(lang) or names_map.get('en') or next(iter(names_map.values()))
     if level_index >= len(names):
         level_index = len(names) - 1
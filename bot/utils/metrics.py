@@ -0,0 +1,276 @@
+"""In-process metrics rendered in the Prometheus text format.
+
+``registry`` holds counters, gauges and histograms; the bot feeds it from
+:class:`MetricsMiddleware` (update latency per handler), SQLAlchemy cursor
+events (:func:`instrument_engine`), the send path and payment polling.
+``bot/metrics_server.py`` serves :meth:`Registry.render` on ``/metrics``.
+
+    PAYMENT_CHECKS.inc(provider='nowpayments', status='finished')
+    with DB_QUERY_SECONDS.time(statement='SELECT'):
+        ...
+"""
+
+from __future__ import annotations
+
+import contextlib
+import math
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Iterable
+
+from aiogram.dispatcher.handler import current_handler
+from aiogram.dispatcher.middlewares import BaseMiddleware
+from aiogram.types import Update
+from sqlalchemy import event
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+UPDATE_TYPES = (
+    'message', 'edited_message', 'channel_post', 'edited_channel_post', 'inline_query',
+    'chosen_inline_result', 'callback_query', 'shipping_query', 'pre_checkout_query',
+    'poll', 'poll_answer', 'my_chat_member', 'chat_member', 'chat_join_request',
+)
+STATEMENTS = frozenset({'SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH'})
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str], lock: threading.Lock):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._lock = lock
+        self._values: dict[tuple[str, ...], object] = {}
+
+    def _key(self, labels: dict) -> tuple[str, ...]:
+        if set(labels) != set(self.labels):
+            raise ValueError(f'{self.name} takes labels {self.labels}, got {tuple(labels)}')
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def _selector(self, key: tuple[str, ...], extra: str = '') -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labels, key)]
+        if extra:
+            pairs.append(extra)
+        return '{' + ','.join(pairs) + '}' if pairs else ''
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            values = dict(self._values)
+        if not values and not self.labels:
+            values[()] = 0
+        return [f'{self.name}{self._selector(key)} {_number(value)}' for key, value in sorted(values.items())]
+
+    def render(self) -> str:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        lines.extend(self._samples())
+        return '\n'.join(lines)
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    """A value that goes up and down; ``function`` computes it at scrape time instead."""
+    kind = 'gauge'
+
+    def __init__(self, *args, function: Callable[[], float] | None = None):
+        super().__init__(*args)
+        self._function = function
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self._function = function
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    @contextlib.contextmanager
+    def track(self, **labels):
+        """Count the block as in progress while it runs."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def _samples(self) -> list[str]:
+        if self._function is not None:
+            return [f'{self.name} {_number(self._function())}']
+        return super()._samples()
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, *args, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(*args)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * len(self.buckets), 0.0)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._values[key] = (counts, total + value)
+
+    @contextlib.contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            values = {key: (list(counts), total) for key, (counts, total) in self._values.items()}
+        lines = []
+        for key, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f'{self.name}_bucket{self._selector(key, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{self._selector(key)} {_number(total)}')
+            lines.append(f'{self.name}_count{self._selector(key)} {cumulative}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: dict[str, _Metric] = {}
+
+    def _add(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f'metric {metric.name} is already registered')
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Iterable[str] = ()) -> Counter:
+        return self._add(Counter(name, documentation, labels, self._lock))
+
+    def gauge(self, name: str, documentation: str, labels: Iterable[str] = (),
+              function: Callable[[], float] | None = None) -> Gauge:
+        return self._add(Gauge(name, documentation, labels, self._lock, function=function))
+
+    def histogram(self, name: str, documentation: str, labels: Iterable[str] = (),
+                  buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, documentation, labels, self._lock, buckets=buckets))
+
+    def render(self) -> str:
+        return '\n'.join(metric.render() for metric in self._metrics.values()) + '\n'
+
+
+registry = Registry()
+
+UPDATE_SECONDS = registry.histogram(
+    'bot_update_seconds', 'Time to process one update, by update type and handler.', ('type', 'handler'))
+UPDATE_ERRORS = registry.counter(
+    'bot_update_errors_total', 'Updates whose handler raised, by update type.', ('type',))
+DB_QUERY_SECONDS = registry.histogram(
+    'bot_db_query_seconds', 'SQL statement execution time, by statement kind.', ('statement',),
+    buckets=QUERY_BUCKETS)
+API_REQUESTS = registry.counter(
+    'bot_api_requests_total', 'Bot API requests by method and outcome (ok or the error raised).',
+    ('method', 'outcome'))
+SEND_QUEUE_WAIT_SECONDS = registry.histogram(
+    'bot_send_queue_wait_seconds', 'Time a send waited in the send queue.', ('priority',))
+PAYMENT_CHECKS = registry.counter(
+    'bot_payment_checks_total', 'Payment status checks by provider and returned status.', ('provider', 'status'))
+PAYMENT_CHECK_SECONDS = registry.histogram(
+    'bot_payment_check_seconds', 'Payment provider status check latency.', ('provider',))
+PAYMENT_POLLS_WAITING = registry.gauge(
+    'bot_payment_polls_waiting', 'Invoices waiting for their expiry payment check.')
+SEND_QUEUE_DEPTH = registry.gauge('bot_send_queue_depth', 'Sends waiting in the send queue.')
+
+
+def update_type(update: Update) -> str:
+    return next((name for name in UPDATE_TYPES if getattr(update, name, None) is not None), 'other')
+
+
+_handler_name: ContextVar[list | None] = ContextVar('metrics_handler_name', default=None)
+
+
+class MetricsMiddleware(BaseMiddleware):
+    """Times every update and records which handler took it."""
+
+    async def trigger(self, action, args):
+        if action == 'pre_process_update':
+            update, data = args
+            data['_metrics_started'] = time.perf_counter()
+            _handler_name.set(['none'])
+        elif action == 'post_process_update':
+            update, _, data = args
+            started = data.get('_metrics_started')
+            name = _handler_name.get()
+            if started is not None:
+                UPDATE_SECONDS.observe(time.perf_counter() - started,
+                                       type=update_type(update), handler=name[0] if name else 'none')
+        elif action == 'pre_process_error':
+            UPDATE_ERRORS.inc(type=update_type(args[0]))
+        elif action.startswith('process_') and action != 'process_update':
+            name = _handler_name.get()
+            handler = current_handler.get(None)
+            if name is not None and handler is not None:
+                name[0] = getattr(handler, '__name__', 'unknown')
+
+
+def _statement_kind(statement: str) -> str:
+    verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ''
+    return verb if verb in STATEMENTS else 'OTHER'
+
+
+def instrument_engine(engine) -> None:
+    """Record the execution time of every statement ``engine`` runs."""
+    if event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        return
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+# The start time lives on the execution context rather than the connection,
+# so a statement that raises leaves nothing behind on a pooled connection.
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, '_metrics_started', None)
+    if started is None:
+        return
+    DB_QUERY_SECONDS.observe(time.perf_counter() - started, statement=_statement_kind(statement))
@@ -1,59 +1,99 @@
+import asyncio
 import os
+from collections import OrderedDict
+from dataclasses import dataclass
+
 from aiogram import Bot
+from aiogram.types import InputFile, InputMediaPhoto, InputMediaVideo, MediaGroup
 from aiogram.utils.exceptions import (
     ChatNotFound, BotBlocked, CantInitiateConversation,
     WrongFileIdentifier, TelegramAPIError
 )
-from bot.misc import EnvKeys
+from bot.constants.telegram import CAPTION_LIMIT, MEDIA_GROUP_SIZE, MESSAGE_LIMIT
+from bot.misc import EnvKeys, TgConfig
 from bot.logger_mesh import logger
 from bot.keyboards import close
+from bot.utils.send_queue import NOTIFY, set_send_priority
 
+FILE_ID_CACHE_SIZE = 1024
 
-async def notify_owner_of_purchase(
-    bot: Bot,
-    username: str,
-    formatted_time: str,
-    item_name: str,
-    item_price: float,
-    parent_cat: str | None,
-    category_name: str,
-    photo_description: str,
-    file_path: str | None,
-):
-    """
-    Send a purchase notification to the OWNER_ID with details.
-    If a media file path is provided and exists, send photo/video + caption,
-    otherwise send a text message. All sends are protected with try/except.
-    """
-    # 1) Resolve & validate OWNER_ID
+# Telegram file_ids of uploaded media, keyed by absolute path, so a file the
+# buyer already received is not uploaded again for the owner.
+_file_ids: OrderedDict[str, str] = OrderedDict()
+
+
+def remember_file_id(file_path: str, file_id: str) -> None:
+    key = os.path.abspath(file_path)
+    _file_ids[key] = file_id
+    _file_ids.move_to_end(key)
+    while len(_file_ids) > FILE_ID_CACHE_SIZE:
+        _file_ids.popitem(last=False)
+
+
+def message_file_id(message) -> str | None:
+    """Return the file_id of the photo or video in a sent message."""
+    if getattr(message, 'photo', None):
+        return message.photo[-1].file_id
+    if getattr(message, 'video', None):
+        return message.video.file_id
+    return None
+
+
+def _media_source(file_path: str):
+    return _file_ids.get(os.path.abspath(file_path)) or InputFile(file_path)
+
+
+@dataclass(frozen=True)
+class PurchaseEvent:
+    username: str
+    formatted_time: str
+    item_name: str
+    item_price: float
+    parent_cat: str | None
+    category_name: str
+    photo_description: str
+    file_path: str | None
+
+    @property
+    def has_media(self) -> bool:
+        return bool(self.file_path and os.path.isfile(self.file_path))
+
+    @property
+    def is_video(self) -> bool:
+        return bool(self.file_path and self.file_path.lower().endswith('.mp4'))
+
+    def text(self) -> str:
+        prefix = f"{self.parent_cat} → " if self.parent_cat else ""
+        return (
+            f"🛒 <b>New purchase</b>\n"
+            f"👤 Buyer: {self.username}\n"
+            f"🗓️ Time: {self.formatted_time}\n"
+            f"📦 Item: {prefix}{self.category_name} / <b>{self.item_name}</b>\n"
+            f"💶 Price: <b>{self.item_price}€</b>\n"
+            f"\n{self.photo_description or ''}"
+        ).strip()
+
+
+def _owner_id() -> int | None:
     try:
-        owner_id = int(EnvKeys.OWNER_ID) if EnvKeys.OWNER_ID else None
+        return int(EnvKeys.OWNER_ID) if EnvKeys.OWNER_ID else None
     except (TypeError, ValueError):
-        owner_id = None
+        return None
 
-    if not owner_id:
-        logger.warning("notify_owner_of_purchase: OWNER_ID is missing or invalid.")
-        return
 
-    # 2) Build caption (HTML)
-    prefix = f"{parent_cat} → " if parent_cat else ""
-    text = (
-        f"🛒 <b>New purchase</b>\n"
-        f"👤 Buyer: {username}\n"
-        f"🗓️ Time: {formatted_time}\n"
-        f"📦 Item: {prefix}{category_name} / <b>{item_name}</b>\n"
-        f"💶 Price: <b>{item_price}€</b>\n"
-        f"\n{photo_description or ''}"
-    ).strip()
-
-    # 3) Try media first if available, else text; fall back to plain text on errors
+async def _send_event(bot: Bot, owner_id: int, event: PurchaseEvent) -> None:
+    """Send one purchase as its own message; fall back to plain text on errors."""
+    text = event.text()
     try:
-        if file_path and os.path.isfile(file_path):
-            with open(file_path, "rb") as media:
-                if file_path.lower().endswith(".mp4"):
-                    await bot.send_video(owner_id, media, caption=text, parse_mode="HTML", reply_markup=close())
-                else:
-                    await bot.send_photo(owner_id, media, caption=text, parse_mode="HTML", reply_markup=close())
+        if event.has_media:
+            media = _media_source(event.file_path)
+            if event.is_video:
+                sent = await bot.send_video(owner_id, media, caption=text, parse_mode="HTML", reply_markup=close())
+            else:
+                sent = await bot.send_photo(owner_id, media, caption=text, parse_mode="HTML", reply_markup=close())
+            file_id = message_file_id(sent)
+            if file_id:
+                remember_file_id(event.file_path, file_id)
         else:
             await bot.send_message(owner_id, text, parse_mode="HTML", reply_markup=close())
 
@@ -71,3 +111,158 @@ async def notify_owner_of_purchase(
     except TelegramAPIError as e:
         logger.exception("notify_owner_of_purchase: Telegram API error: %s", e)
 
+
+async def _send_digest(bot: Bot, owner_id: int, events: list[PurchaseEvent]) -> None:
+    """Send several purchases as media groups plus one text digest."""
+    media_events = [event for event in events if event.has_media]
+    text_events = [event for event in events if not event.has_media]
+
+    for start in range(0, len(media_events), MEDIA_GROUP_SIZE):
+        batch = media_events[start:start + MEDIA_GROUP_SIZE]
+        if len(batch) == 1:
+            await _send_event(bot, owner_id, batch[0])
+            continue
+        group = MediaGroup([
+            (InputMediaVideo if event.is_video else InputMediaPhoto)(
+                _media_source(event.file_path), caption=event.text()[:CAPTION_LIMIT], parse_mode="HTML"
+            )
+            for event in batch
+        ])
+        try:
+            sent = await bot.send_media_group(owner_id, group)
+        except TelegramAPIError as e:
+            logger.exception("notify_owner_of_purchase: Media group failed, sending one by one: %s", e)
+            for event in batch:
+                await _send_event(bot, owner_id, event)
+            continue
+        for event, message in zip(batch, sent):
+            file_id = message_file_id(message)
+            if file_id:
+                remember_file_id(event.file_path, file_id)
+
+    if len(text_events) == 1:
+        await _send_event(bot, owner_id, text_events[0])
+        return
+    chunk = f"🧾 <b>{len(text_events)} purchases</b>"
+    for event in text_events:
+        block = event.text()
+        if len(chunk) + len(block) + 2 > MESSAGE_LIMIT:
+            await _send_text(bot, owner_id, chunk)
+            chunk = block
+        else:
+            chunk = f"{chunk}\n\n{block}"
+    if text_events:
+        await _send_text(bot, owner_id, chunk)
+
+
+async def _send_text(bot: Bot, owner_id: int, text: str) -> None:
+    try:
+        await bot.send_message(owner_id, text[:MESSAGE_LIMIT], parse_mode="HTML", reply_markup=close())
+    except TelegramAPIError as e:
+        logger.exception("notify_owner_of_purchase: Digest send failed: %s", e)
+
+
+class OwnerNotifier:
+    """Background sender for owner purchase notifications.
+
+    Events are queued without blocking the checkout. In ``digest`` mode the
+    worker waits ``TgConfig.OWNER_DIGEST_WINDOW`` seconds after the first
+    event and sends everything collected as one digest; a window with a
+    single event, or ``event`` mode, sends the usual per-purchase message.
+    """
+
+    def __init__(self):
+        self._bot: Bot | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        return bool(self._task and not self._task.done() and self._loop and not self._loop.is_closed())
+
+    def start(self, bot: Bot) -> None:
+        if self.running:
+            return
+        self._bot = bot
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._task = self._loop.create_task(self._run())
+
+    def submit(self, event: PurchaseEvent) -> bool:
+        """Queue an event from any thread; False when the worker is not running."""
+        if not self.running:
+            return False
+        try:
+            current = asyncio.get_running_loop()
+        except RuntimeError:
+            current = None
+        if current is self._loop:
+            self._queue.put_nowait(event)
+        else:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, event)
+        return True
+
+    async def _collect(self, first: PurchaseEvent) -> list[PurchaseEvent]:
+        events = [first]
+        if TgConfig.OWNER_NOTIFY_MODE != 'digest':
+            return events
+        deadline = self._loop.time() + TgConfig.OWNER_DIGEST_WINDOW
+        while True:
+            remaining = deadline - self._loop.time()
+            if remaining <= 0:
+                return events
+            try:
+                events.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                return events
+
+    async def _run(self) -> None:
+        set_send_priority(NOTIFY)
+        while True:
+            events = await self._collect(await self._queue.get())
+            owner_id = _owner_id()
+            if not owner_id:
+                logger.warning("notify_owner_of_purchase: OWNER_ID is missing or invalid.")
+                continue
+            try:
+                if len(events) == 1:
+                    await _send_event(self._bot, owner_id, events[0])
+                else:
+                    await _send_digest(self._bot, owner_id, events)
+            except Exception as e:
+                logger.exception("notify_owner_of_purchase: Worker failed to send %s events: %s", len(events), e)
+
+
+owner_notifier = OwnerNotifier()
+
+
+async def notify_owner_of_purchase(
+    bot: Bot,
+    username: str,
+    formatted_time: str,
+    item_name: str,
+    item_price: float,
+    parent_cat: str | None,
+    category_name: str,
+    photo_description: str,
+    file_path: str | None,
+):
+    """
+    Notify the OWNER_ID about a purchase.
+    The event is handed to the background ``owner_notifier`` when it runs;
+    otherwise it is sent right away as a photo/video + caption or a text
+    message. All sends are protected with try/except.
+    """
+    event = PurchaseEvent(
+        username, formatted_time, item_name, item_price, parent_cat,
+        category_name, photo_description, file_path,
+    )
+    if owner_notifier.submit(event):
+        return
+
+    owner_id = _owner_id()
+    if not owner_id:
+        logger.warning("notify_owner_of_purchase: OWNER_ID is missing or invalid.")
+        return
+    await _send_event(bot, owner_id, event)
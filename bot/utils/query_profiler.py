@@ -0,0 +1,139 @@
+"""Per-update SQL profiling and N+1 detection.
+
+:func:`profile_engine` hooks the engine's cursor events and
+:class:`QueryProfilerMiddleware` opens an :class:`UpdateProfile` for every
+update, so each statement is attributed to the update and the handler that
+ran it. Statements are grouped by shape (literals and ``IN`` lists
+collapsed); when one update runs the same shape ``repeat_warning`` times or
+more, the middleware logs it as a likely N+1.
+
+With ``strict=True`` an update that runs more statements than its
+handler's budget raises :class:`QueryBudgetExceeded` instead, for use in
+benchmarks and checks:
+
+    dp.middleware.setup(QueryProfilerMiddleware(budgets={'start': 20}, default_budget=40, strict=True))
+"""
+
+from __future__ import annotations
+
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable
+
+from aiogram.dispatcher.handler import current_handler
+from aiogram.dispatcher.middlewares import BaseMiddleware
+from sqlalchemy import event
+
+from bot.logger_mesh import logger
+from bot.utils.metrics import update_type
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_SPACE = re.compile(r'\s+')
+
+
+def statement_shape(statement: str) -> str:
+    """``statement`` with literals and parameter lists collapsed to ``?``."""
+    shape = _STRING.sub('?', statement)
+    shape = _NUMBER.sub('?', shape)
+    shape = _IN_LIST.sub('(?)', shape)
+    return _SPACE.sub(' ', shape).strip()
+
+
+@dataclass
+class UpdateProfile:
+    update_type: str
+    handler: str = 'none'
+    queries: int = 0
+    seconds: float = 0.0
+    shapes: Counter = field(default_factory=Counter)
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Statement shapes run at least ``threshold`` times, most frequent first."""
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+
+class QueryBudgetExceeded(Exception):
+    def __init__(self, profile: UpdateProfile, budget: int):
+        self.profile = profile
+        self.budget = budget
+        top = ', '.join(f'{count}x {shape[:80]}' for shape, count in profile.shapes.most_common(3))
+        super().__init__(f'{profile.handler} ran {profile.queries} queries for one '
+                         f'{profile.update_type}, budget {budget}: {top}')
+
+
+_profile: ContextVar[UpdateProfile | None] = ContextVar('query_profile', default=None)
+
+
+def current_profile() -> UpdateProfile | None:
+    return _profile.get()
+
+
+class QueryProfilerMiddleware(BaseMiddleware):
+    """Attributes SQL statements to the current update and handler.
+
+    ``on_profile`` receives every finished profile, e.g. to aggregate them.
+    """
+
+    def __init__(self, repeat_warning: int = 10, budgets: dict[str, int] | None = None,
+                 default_budget: int | None = None, strict: bool = False,
+                 on_profile: Callable[[UpdateProfile], None] | None = None):
+        super().__init__()
+        self.repeat_warning = repeat_warning
+        self.budgets = budgets or {}
+        self.default_budget = default_budget
+        self.strict = strict
+        self.on_profile = on_profile
+
+    async def trigger(self, action, args):
+        if action == 'pre_process_update':
+            _profile.set(UpdateProfile(update_type(args[0])))
+        elif action == 'post_process_update':
+            profile = _profile.get()
+            if profile is not None:
+                _profile.set(None)
+                self._finish(profile)
+        elif action.startswith('process_') and action != 'process_update':
+            profile = _profile.get()
+            handler = current_handler.get(None)
+            if profile is not None and handler is not None:
+                profile.handler = getattr(handler, '__name__', 'unknown')
+
+    def _finish(self, profile: UpdateProfile) -> None:
+        if self.on_profile:
+            self.on_profile(profile)
+        for shape, count in profile.repeated(self.repeat_warning):
+            logger.warning("Query profiler: %s ran %s times in one %s (%s queries, %.1f ms): %s",
+                           profile.handler, count, profile.update_type, profile.queries,
+                           profile.seconds * 1000, shape)
+        budget = self.budgets.get(profile.handler, self.default_budget)
+        if self.strict and budget is not None and profile.queries > budget:
+            raise QueryBudgetExceeded(profile, budget)
+
+
+def profile_engine(engine) -> None:
+    """Attribute every statement ``engine`` runs to the current update, if any."""
+    if event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        return
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+# Kept on the execution context, which is dropped with a failed statement.
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _profile.get() is not None:
+        context._profile_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _profile.get()
+    started = getattr(context, '_profile_started', None)
+    if profile is None or started is None:
+        return
+    profile.seconds += time.perf_counter() - started
+    profile.queries += 1
+    profile.shapes[statement_shape(statement)] += 1
@@ -0,0 +1,146 @@
+import asyncio
+import contextlib
+import time
+from typing import Awaitable, Callable
+
+from bot.database.methods.jobs import (
+    add_delayed_jobs,
+    claim_due_jobs,
+    finish_delayed_jobs,
+    next_delayed_job_time,
+    retry_delayed_job,
+)
+from bot.logger_mesh import logger
+from bot.utils.files import remove_deleted_files
+from bot.utils.send_queue import NOTIFY, set_send_priority
+
+JobHandler = Callable[[object, dict], Awaitable[None]]
+
+
+class JobScheduler:
+    """Runs jobs from the ``delayed_jobs`` table.
+
+    A single loop sleeps until the earliest ``run_at`` (or until a sooner job
+    is scheduled), claims due jobs in batches and runs them with bounded
+    concurrency. Sleeps last at least ``resolution`` seconds so jobs falling
+    due close together are claimed as one batch. Jobs survive restarts
+    because they live in the database; failed jobs are retried with a
+    growing delay up to ``max_attempts``.
+    """
+
+    def __init__(self, batch_size: int = 200, concurrency: int = 20,
+                 lease: float = 300.0, max_attempts: int = 3, resolution: float = 0.05):
+        self.batch_size = batch_size
+        self.resolution = resolution
+        self.concurrency = concurrency
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self._handlers: dict[str, JobHandler] = {}
+        self._bot = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wake: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._next_wake: float | None = None
+
+    def register(self, kind: str, handler: JobHandler) -> None:
+        self._handlers[kind] = handler
+
+    def schedule(self, kind: str, payload: dict, delay: float = 0.0) -> None:
+        self.schedule_many([(kind, payload, delay)])
+
+    def schedule_many(self, jobs: list[tuple[str, dict, float]]) -> None:
+        """Persist ``(kind, payload, delay)`` jobs and wake the loop if one is due sooner."""
+        now = time.time()
+        rows = [(kind, payload, now + delay) for kind, payload, delay in jobs]
+        if not add_delayed_jobs(rows):
+            return
+        earliest = min(run_at for _, _, run_at in rows)
+        if self._wake is None or (self._next_wake is not None and earliest >= self._next_wake):
+            return
+        try:
+            current = asyncio.get_running_loop()
+        except RuntimeError:
+            current = None
+        if current is self._loop:
+            self._wake.set()
+        elif self._loop and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def start(self, bot) -> None:
+        if self._task and not self._task.done():
+            return
+        self._bot = bot
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = self._loop.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+        self._task = None
+        self._wake = None
+
+    async def _run(self) -> None:
+        set_send_priority(NOTIFY)
+        while True:
+            try:
+                jobs = claim_due_jobs(self.batch_size, self.lease)
+                if jobs:
+                    await self._execute(jobs)
+                    continue
+                self._wake.clear()
+                self._next_wake = next_delayed_job_time()
+            except Exception as e:
+                logger.exception("Job scheduler: claiming jobs failed: %s", e)
+                self._wake.clear()
+                self._next_wake = time.time() + 5
+            timeout = None if self._next_wake is None else max(self.resolution, self._next_wake - time.time())
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wake.wait(), timeout)
+
+    async def _execute(self, jobs: list[tuple[int, str, dict, int]]) -> None:
+        semaphore = asyncio.Semaphore(self.concurrency)
+        finished: list[int] = []
+
+        async def run(job_id: int, kind: str, payload: dict, attempts: int) -> None:
+            handler = self._handlers.get(kind)
+            if handler is None:
+                logger.error("Job scheduler: no handler for %s job %s", kind, job_id)
+                finished.append(job_id)
+                return
+            async with semaphore:
+                try:
+                    await handler(self._bot, payload)
+                except Exception as e:
+                    if attempts >= self.max_attempts:
+                        logger.error("Job scheduler: %s job %s failed for good: %s", kind, job_id, e)
+                        finished.append(job_id)
+                    else:
+                        logger.warning("Job scheduler: %s job %s failed, retrying: %s", kind, job_id, e)
+                        retry_delayed_job(job_id, time.time() + 60 * attempts)
+                    return
+            finished.append(job_id)
+
+        await asyncio.gather(*(run(*job) for job in jobs))
+        finish_delayed_jobs(finished)
+
+
+async def _delete_message(bot, payload: dict) -> None:
+    with contextlib.suppress(Exception):
+        await bot.delete_message(payload['chat_id'], payload['message_id'])
+
+
+async def _remove_files(_bot, payload: dict) -> None:
+    await asyncio.to_thread(
+        remove_deleted_files,
+        payload.get('files', []),
+        payload.get('empty_folders', []),
+        payload.get('folders', []),
+    )
+
+
+job_scheduler = JobScheduler()
+job_scheduler.register('delete_message', _delete_message)
+job_scheduler.register('remove_files', _remove_files)
@@ -0,0 +1,258 @@
+"""Single outgoing queue for Telegram sends.
+
+``QueuedBot`` routes every send/edit method through ``send_queue``. The queue
+serves higher priority classes first and keeps within a global token bucket
+and per-chat buckets. A ``RetryAfter`` pauses only the affected chat, and
+the request is retried. Bulk paths lower their priority with
+:func:`send_priority`:
+
+    with send_priority(BULK):
+        await bot.send_message(user_id, text)
+"""
+
+import asyncio
+import contextlib
+import heapq
+import itertools
+import time
+from contextvars import ContextVar
+from typing import Awaitable, Callable
+
+from aiogram import Bot
+from aiogram.utils.exceptions import RetryAfter
+
+from bot.logger_mesh import logger
+from bot.utils.metrics import API_REQUESTS, SEND_QUEUE_DEPTH, SEND_QUEUE_WAIT_SECONDS
+
+INTERACTIVE = 0
+NOTIFY = 1
+BULK = 2
+
+GLOBAL_RATE = 30.0
+GLOBAL_BURST = 30
+PRIVATE_CHAT_RATE = 1.0
+PRIVATE_CHAT_BURST = 5
+GROUP_CHAT_RATE = 20 / 60
+GROUP_CHAT_BURST = 3
+MAX_RETRIES = 3
+
+QUEUED_METHODS = frozenset({
+    'sendMessage', 'sendPhoto', 'sendVideo', 'sendDocument', 'sendAnimation', 'sendAudio',
+    'sendVoice', 'sendSticker', 'sendMediaGroup', 'copyMessage', 'forwardMessage',
+    'editMessageText', 'editMessageCaption', 'editMessageMedia', 'editMessageReplyMarkup',
+})
+
+_priority: ContextVar[int] = ContextVar('send_priority', default=INTERACTIVE)
+
+
+@contextlib.contextmanager
+def send_priority(level: int):
+    """Send with ``level`` priority inside the block (and tasks it creates)."""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def set_send_priority(level: int) -> None:
+    """Set the priority for the rest of the current task."""
+    _priority.set(level)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def delay(self, now: float) -> float:
+        """Seconds until a token is available."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        self.tokens -= 1
+
+    def full(self, now: float) -> bool:
+        return self.delay(now) == 0.0 and self.tokens >= self.capacity
+
+
+class _Send:
+    __slots__ = ('chat_id', 'call', 'future', 'priority', 'seq', 'retries', 'queued_at')
+
+    def __init__(self, chat_id, call: Callable[[], Awaitable], future: asyncio.Future, priority: int, seq: int):
+        self.chat_id = chat_id
+        self.call = call
+        self.future = future
+        self.priority = priority
+        self.seq = seq
+        self.retries = 0
+        self.queued_at = 0.0
+
+
+class SendQueue:
+    def __init__(self):
+        self._heap: list = []
+        self._counter = itertools.count()
+        self._ready: asyncio.Event | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._task: asyncio.Task | None = None
+        self._global = TokenBucket(GLOBAL_RATE, GLOBAL_BURST)
+        self._chats: dict[object, TokenBucket] = {}
+        self._paused: dict[object, float] = {}
+        self._locks: dict[object, asyncio.Lock] = {}
+        self._inflight: set[asyncio.Task] = set()
+
+    @property
+    def depth(self) -> int:
+        return len(self._heap)
+
+    @property
+    def running(self) -> bool:
+        return bool(self._task and not self._task.done())
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._ready = asyncio.Event()
+        self._task = self._loop.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+        self._task = None
+
+    def accepts_current_loop(self) -> bool:
+        if not self.running:
+            return False
+        try:
+            return asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+
+    async def submit(self, chat_id, call: Callable[[], Awaitable], priority: int | None = None):
+        """Queue ``call`` for ``chat_id`` and return its result once sent."""
+        future = self._loop.create_future()
+        level = _priority.get() if priority is None else priority
+        self._push(_Send(chat_id, call, future, level, next(self._counter)))
+        return await future
+
+    def _push(self, item: _Send) -> None:
+        # A retried send keeps its sequence number and so its place in line.
+        item.queued_at = time.monotonic()
+        heapq.heappush(self._heap, (item.priority, item.seq, item))
+        self._ready.set()
+
+    def _chat_bucket(self, chat_id) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) > 10_000:
+                now = time.monotonic()
+                for key in [key for key, value in self._chats.items() if value.full(now)]:
+                    del self._chats[key]
+                    self._locks.pop(key, None)
+            is_group = isinstance(chat_id, int) and chat_id < 0 or isinstance(chat_id, str)
+            bucket = TokenBucket(GROUP_CHAT_RATE, GROUP_CHAT_BURST) if is_group \
+                else TokenBucket(PRIVATE_CHAT_RATE, PRIVATE_CHAT_BURST)
+            self._chats[chat_id] = bucket
+        return bucket
+
+    def _pop_ready(self, now: float) -> tuple[_Send | None, float]:
+        """Pop the best entry whose chat may send now, else the shortest wait."""
+        deferred = []
+        wait = float('inf')
+        found = None
+        while self._heap:
+            entry = heapq.heappop(self._heap)
+            item = entry[2]
+            chat_wait = max(
+                self._chat_bucket(item.chat_id).delay(now),
+                self._paused.get(item.chat_id, 0.0) - now,
+            )
+            if chat_wait <= 0:
+                found = item
+                break
+            deferred.append(entry)
+            wait = min(wait, chat_wait)
+        for entry in deferred:
+            heapq.heappush(self._heap, entry)
+        return found, wait
+
+    async def _run(self) -> None:
+        while True:
+            if not self._heap:
+                self._ready.clear()
+                await self._ready.wait()
+                continue
+            now = time.monotonic()
+            global_wait = self._global.delay(now)
+            if global_wait > 0:
+                await asyncio.sleep(global_wait)
+                continue
+            item, wait = self._pop_ready(now)
+            if item is None:
+                self._ready.clear()
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._ready.wait(), wait)
+                continue
+            self._global.take()
+            self._chat_bucket(item.chat_id).take()
+            SEND_QUEUE_WAIT_SECONDS.observe(now - item.queued_at, priority=item.priority)
+            lock = self._locks.setdefault(item.chat_id, asyncio.Lock())
+            task = self._loop.create_task(self._perform(item, lock))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+            # Let the send task take the chat lock before the next one is dispatched.
+            await asyncio.sleep(0)
+
+    async def _perform(self, item: _Send, lock: asyncio.Lock) -> None:
+        async with lock:
+            try:
+                result = await item.call()
+            except RetryAfter as e:
+                self._paused[item.chat_id] = time.monotonic() + e.timeout
+                if item.retries < MAX_RETRIES:
+                    item.retries += 1
+                    logger.warning("send queue: flood wait %ss for chat %s, retrying", e.timeout, item.chat_id)
+                    self._push(item)
+                    return
+                if not item.future.done():
+                    item.future.set_exception(e)
+                return
+            except Exception as e:
+                if not item.future.done():
+                    item.future.set_exception(e)
+                return
+        if not item.future.done():
+            item.future.set_result(result)
+
+
+send_queue = SendQueue()
+SEND_QUEUE_DEPTH.set_function(lambda: send_queue.depth)
+
+
+class QueuedBot(Bot):
+    """Bot whose sends and edits go through :data:`send_queue` when it runs."""
+
+    async def request(self, method, data=None, files=None, **kwargs):
+        if method in QUEUED_METHODS and data and send_queue.accepts_current_loop():
+            chat_id = data.get('chat_id') or data.get('inline_message_id')
+            return await send_queue.submit(
+                chat_id, lambda: self._direct_request(method, data, files, **kwargs)
+            )
+        return await self._direct_request(method, data, files, **kwargs)
+
+    async def _direct_request(self, method, data=None, files=None, **kwargs):
+        try:
+            result = await super().request(method, data, files, **kwargs)
+        except Exception as e:
+            API_REQUESTS.inc(method=method, outcome=type(e).__name__)
+            raise
+        API_REQUESTS.inc(method=method, outcome='ok')
+        return result
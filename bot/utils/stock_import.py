@@ -0,0 +1,71 @@
+import asyncio
+import os
+import time
+from typing import Awaitable, Callable, Iterable, Iterator
+
+from bot.database.methods.create import add_item_values
+
+IMPORT_CHUNK_SIZE = 1000
+PROGRESS_INTERVAL = 2.0  # seconds between progress message edits
+
+ProgressCallback = Callable[[int, int], Awaitable[None]]
+
+
+def iter_stock_values(source: str) -> Iterator[str]:
+    """Yield the files of a folder, or the values of a ``;`` separated list.
+
+    Anything that is not a folder is split, so a single file path stays one
+    value as before.
+    """
+    if os.path.isdir(source):
+        with os.scandir(source) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    yield os.path.join(source, entry.name)
+    else:
+        for value in source.split(';'):
+            if value.strip():
+                yield value
+
+
+def iter_stock_file(path: str) -> Iterator[str]:
+    """Yield the non-empty lines of an uploaded text file, reading lazily."""
+    with open(path, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            value = line.strip()
+            if value:
+                yield value
+
+
+async def import_stock(item_name: str, values: Iterable[str], progress: ProgressCallback | None = None,
+                       chunk_size: int = IMPORT_CHUNK_SIZE) -> tuple[int, int]:
+    """Add ``values`` to an item in chunked transactions; return ``(added, skipped)``.
+
+    Values already stored for the item or repeated in the input are ignored
+    by the ``(item_name, value_hash)`` unique index. Each chunk is one
+    executemany and one commit, and the loop yields to the event loop
+    between chunks so other updates keep being served.
+    ``progress(added, skipped)`` is awaited at most every few seconds.
+    """
+    added = skipped = 0
+    chunk: list[str] = []
+    reported = time.monotonic()
+
+    async def flush() -> None:
+        nonlocal added, skipped, reported
+        inserted = add_item_values(item_name, chunk)
+        added += inserted
+        skipped += len(chunk) - inserted
+        chunk.clear()
+        await asyncio.sleep(0)
+        if progress and time.monotonic() - reported >= PROGRESS_INTERVAL:
+            reported = time.monotonic()
+            await progress(added, skipped)
+
+    for value in values:
+        chunk.append(value)
+        if len(chunk) >= chunk_size:
+            await flush()
+    if chunk:
+        await flush()
+    return added, skipped
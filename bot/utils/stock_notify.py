@@ -1,14 +1,103 @@
-from bot.database.methods.read import get_item_subscribers, get_user_language
-from bot.database.methods.update import clear_stock_notifications
+import asyncio
+import time
+
+from aiogram.utils.exceptions import BotBlocked, ChatNotFound, RetryAfter, TelegramAPIError, UserDeactivated
+
+from bot.database.methods.read import get_item_subscriber_languages
+from bot.database.methods.update import remove_stock_notifications
 from bot.localization import t
+from bot.logger_mesh import logger
 from .names import display_name
+from .send_queue import BULK, send_priority, send_queue
+
+RESTOCK_CONCURRENCY = 10
+RESTOCK_RATE = 25  # messages per second when the send queue is not running
+
+# Fan-outs in progress per item; holding the tasks keeps them from being collected.
+_running: dict[str, asyncio.Task] = {}
+
+
+class _RateLimiter:
+    """Space out calls so at most ``rate`` start per second."""
+
+    def __init__(self, rate: float):
+        self._interval = 1 / rate
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self._interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+async def _send(bot, limiter: _RateLimiter | None, semaphore: asyncio.Semaphore, user_id: int, text: str) -> bool:
+    """Send one restock message; True when the subscription can be dropped."""
+    async with semaphore:
+        for _ in range(3):
+            if limiter:
+                await limiter.wait()
+            try:
+                await bot.send_message(user_id, text)
+                return True
+            except RetryAfter as e:
+                await asyncio.sleep(e.timeout)
+            except (BotBlocked, ChatNotFound, UserDeactivated):
+                # The user can never receive it; keeping the row would retry forever.
+                return True
+            except TelegramAPIError as e:
+                logger.warning("notify_restock: sending to %s failed: %s", user_id, e)
+                return False
+        return False
+
+
+async def _fan_out(bot, item_name: str) -> None:
+    subscribers = get_item_subscriber_languages(item_name)
+    if not subscribers:
+        return
+    texts: dict[str, str] = {}
+    for _, lang in subscribers:
+        lang = lang or 'en'
+        if lang not in texts:
+            texts[lang] = t(lang, 'stock_back_in', item=display_name(item_name))
+    # The send queue paces bulk sends itself; pace locally only without it.
+    limiter = None if send_queue.accepts_current_loop() else _RateLimiter(RESTOCK_RATE)
+    semaphore = asyncio.Semaphore(RESTOCK_CONCURRENCY)
+    with send_priority(BULK):
+        results = await asyncio.gather(*(
+            _send(bot, limiter, semaphore, user_id, texts[lang or 'en'])
+            for user_id, lang in subscribers
+        ))
+    delivered = [user_id for (user_id, _), done in zip(subscribers, results) if done]
+    if delivered:
+        remove_stock_notifications(item_name, delivered)
+    logger.info(
+        "notify_restock: %s delivered %s of %s notifications", item_name, len(delivered), len(subscribers)
+    )
 
 
 async def notify_restock(bot, item_name: str) -> None:
-    subs = get_item_subscribers(item_name)
-    if not subs:
+    """Start notifying an item's subscribers in the background.
+
+    Subscribers and their languages come from one query, each language's text
+    is rendered once, and messages go out with bounded concurrency under a
+    rate limit. Only delivered subscriptions are removed, so a failed send is
+    retried on the next restock.
+    """
+    task = _running.get(item_name)
+    if task and not task.done():
         return
-    clear_stock_notifications(item_name)
-    for uid in subs:
-        lang = get_user_language(uid) or 'en'
-        await bot.send_message(uid, t(lang, 'stock_back_in', item=display_name(item_name)))
+    task = asyncio.create_task(_fan_out(bot, item_name))
+    _running[item_name] = task
+    task.add_done_callback(_finished)
+
+
+def _finished(task: asyncio.Task) -> None:
+    for item_name, running in list(_running.items()):
+        if running is task:
+            del _running[item_name]
+    if not task.cancelled() and task.exception():
+        logger.error("notify_restock: fan-out failed: %s", task.exception())
@@ -0,0 +1,40 @@
+import csv
+import io
+from typing import Sequence
+
+from .names import display_name
+
+StockRow = tuple[str | None, str, str, float, int]
+
+
+def render_stock_text(rows: Sequence[StockRow]) -> str:
+    """Inline stock list grouped by top-level category and subcategory."""
+    lines = ['📋 Atsargų sąrašas']
+    current_root = current_sub = object()
+    for parent, category, item, price, stock in rows:
+        root = parent or category
+        if root != current_root:
+            lines.append(f"\n<b>{root}</b>")
+            current_root, current_sub = root, object()
+        indent = '  '
+        if parent:
+            if category != current_sub:
+                lines.append(f"  {category}")
+                current_sub = category
+            indent = '    '
+        lines.append(f"{indent}• {display_name(item)} ({price:.2f}€, {stock})")
+    return '\n'.join(lines)
+
+
+def render_stock_csv(rows: Sequence[StockRow]) -> io.BytesIO:
+    """Stock report as a UTF-8 CSV file, written row by row into one buffer."""
+    buffer = io.BytesIO()
+    text = io.TextIOWrapper(buffer, encoding='utf-8-sig', newline='')
+    writer = csv.writer(text)
+    writer.writerow(('category', 'subcategory', 'item', 'price', 'stock'))
+    for parent, category, item, price, stock in rows:
+        writer.writerow((parent or category, category if parent else '', display_name(item), f'{price:.2f}', stock))
+    text.flush()
+    text.detach()
+    buffer.seek(0)
+    return buffer
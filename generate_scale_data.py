@@ -0,0 +1,183 @@
+"""Fill a fresh database with synthetic shop data for performance work.
+
+Generates users with referral chains and lottery tickets, a nested
+category tree, goods with stock values, purchases, balance operations and
+promo codes, all with bulk inserts. The same seed and options always
+produce the same rows. Writes ``database.db`` in ``--directory`` (the
+current directory by default), which must not hold users yet:
+
+    python generate_scale_data.py --directory /tmp/scale --users 100000 --purchases 1000000
+"""
+
+import argparse
+import datetime
+import hashlib
+import itertools
+import json
+import os
+import random
+import time
+
+CHUNK = 50_000
+
+
+def _weights(count: int, skew: float) -> list[float]:
+    """Cumulative Zipf-like weights: rank ``n`` gets ``1 / (n + 1) ** skew``."""
+    return list(itertools.accumulate(1 / (n + 1) ** skew for n in range(count)))
+
+
+def _insert(connection, table: str, columns: tuple[str, ...], rows) -> int:
+    """Insert ``rows`` (tuples in ``columns`` order) in chunks; return how many were written."""
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    written = 0
+    rows = iter(rows)
+    while chunk := list(itertools.islice(rows, CHUNK)):
+        connection.exec_driver_sql(sql, chunk)
+        written += len(chunk)
+    return written
+
+
+def _category_tree(rng: random.Random, roots: int, depth: int, fanout: int) -> tuple[list[tuple], list[str]]:
+    """``(name, title, parent)`` rows for every category, and the leaf names."""
+    rows, leaves = [], []
+    level = [(f'c{n}', None) for n in range(roots)]
+    for current in range(depth):
+        next_level = []
+        for name, parent in level:
+            rows.append((name, f'Category {name[1:]}', parent))
+            if current == depth - 1:
+                leaves.append(name)
+            else:
+                next_level.extend((f'{name}.{n}', name) for n in range(rng.randint(1, fanout)))
+        level = next_level
+    return rows, leaves
+
+
+def generate(connection, args: argparse.Namespace) -> dict[str, int]:
+    from bot.database.models import CategoryClosure
+
+    rng = random.Random(args.seed)
+    now = datetime.datetime(2026, 1, 1)
+    span = args.days * 86_400
+    counts = {}
+
+    def moment() -> str:
+        return (now - datetime.timedelta(seconds=rng.randrange(span))).strftime('%Y-%m-%d %H:%M:%S')
+
+    user_ids = [100_000_000 + n for n in range(args.users)]
+    referrers = []
+    for n in range(args.users):
+        # Earlier users are likelier referrers, so some build long chains.
+        referred = n and rng.random() < args.referred
+        referrers.append(user_ids[int(n * rng.random() ** 2)] if referred else None)
+    counts['users'] = _insert(connection, 'users', (
+        'telegram_id', 'username', 'role_id', 'balance', 'lottery_tickets', 'purchase_streak',
+        'streak_discount', 'language', 'referral_id', 'registration_date',
+    ), (
+        (user_id, f'user{user_id}', 1, rng.randrange(0, 200), rng.randrange(1, 10) if rng.random() < args.lottery else 0,
+         0, False, rng.choice(('en', 'ru', 'lt')), referrer, moment())
+        for user_id, referrer in zip(user_ids, referrers)
+    ))
+
+    categories, leaves = _category_tree(rng, args.categories, args.depth, args.fanout)
+    counts['categories'] = _insert(connection, 'categories', (
+        'name', 'title', 'parent_name', 'allow_discounts', 'allow_referral_rewards', 'requires_password',
+    ), ((name, title, parent, True, True, False) for name, title, parent in categories))
+    CategoryClosure.rebuild(connection)
+
+    items = [f'{leaves[n % len(leaves)]}-item{n}' for n in range(args.items)]
+    prices = [rng.randrange(1, 100) for _ in items]
+    counts['goods'] = _insert(connection, 'goods', ('name', 'price', 'description', 'category_name'), (
+        (name, price, f'Synthetic item {n}', leaves[n % len(leaves)])
+        for n, (name, price) in enumerate(zip(items, prices))
+    ))
+
+    def stock():
+        for name in items:
+            for n in range(rng.randrange(args.stock + 1) * 2):
+                value = f'{name}-KEY-{n:06d}'
+                yield name, value, hashlib.sha256(value.encode()).hexdigest(), False
+
+    counts['item_values'] = _insert(connection, 'item_values', ('item_name', 'value', 'value_hash', 'is_infinity'),
+                                    stock())
+
+    popular_items = _weights(len(items), args.skew)
+    active_buyers = _weights(len(user_ids), args.skew)
+
+    def purchases():
+        for start in range(0, args.purchases, CHUNK):
+            size = min(CHUNK, args.purchases - start)
+            sold = rng.choices(range(len(items)), cum_weights=popular_items, k=size)
+            buyers = rng.choices(user_ids, cum_weights=active_buyers, k=size)
+            for n, item, buyer in zip(range(start, start + size), sold, buyers):
+                yield items[item], f'SOLD-{n:08d}', prices[item], buyer, moment(), n + 1
+
+    counts['bought_goods'] = _insert(connection, 'bought_goods', (
+        'item_name', 'value', 'price', 'buyer_id', 'bought_datetime', 'unique_id',
+    ), purchases())
+
+    def operations():
+        for start in range(0, args.operations, CHUNK):
+            size = min(CHUNK, args.operations - start)
+            for user_id in rng.choices(user_ids, cum_weights=active_buyers, k=size):
+                yield user_id, rng.choice((5, 10, 20, 50, 100)), moment()
+
+    counts['operations'] = _insert(connection, 'operations', ('user_id', 'operation_value', 'operation_time'),
+                                   operations())
+
+    counts['promo_codes'] = _insert(connection, 'promo_codes', (
+        'code', 'discount', 'expires_at', 'active', 'applicable_items',
+    ), (
+        (f'PROMO{n:05d}', rng.choice((5, 10, 15, 20, 50)),
+         (now + datetime.timedelta(days=rng.randrange(-30, 90))).strftime('%Y-%m-%d'), rng.random() < 0.8,
+         json.dumps(sorted(rng.sample(items, min(3, len(items))))) if rng.random() < 0.3 else None)
+        for n in range(args.promo_codes)
+    ))
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--directory', default='.', help='where database.db is created')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--users', type=int, default=100_000)
+    parser.add_argument('--referred', type=float, default=0.4, help='share of users who joined through a referral')
+    parser.add_argument('--lottery', type=float, default=0.2, help='share of users holding lottery tickets')
+    parser.add_argument('--categories', type=int, default=20, help='top-level categories')
+    parser.add_argument('--depth', type=int, default=3, help='category levels')
+    parser.add_argument('--fanout', type=int, default=5, help='at most this many subcategories per category')
+    parser.add_argument('--items', type=int, default=10_000)
+    parser.add_argument('--stock', type=int, default=20, help='average stock values per item')
+    parser.add_argument('--purchases', type=int, default=1_000_000)
+    parser.add_argument('--operations', type=int, default=250_000, help='balance top-ups')
+    parser.add_argument('--promo-codes', type=int, default=500)
+    parser.add_argument('--days', type=int, default=365, help='spread dates over this many days')
+    parser.add_argument('--skew', type=float, default=1.0, help='Zipf exponent for item and buyer popularity')
+    args = parser.parse_args()
+    if min(args.users, args.categories, args.depth, args.fanout, args.items) < 1:
+        parser.error('--users, --categories, --depth, --fanout and --items must be positive')
+
+    os.makedirs(args.directory, exist_ok=True)
+    os.chdir(args.directory)
+    from sqlalchemy import func
+    from bot.database import Database
+    import bot.database.methods  # noqa: F401 - resolves the methods/utils import order
+    from bot.database.models import User, register_models
+
+    register_models()
+    if Database().session.query(func.count(User.telegram_id)).scalar():
+        parser.error(f'{os.path.abspath("database.db")} already has users; use an empty --directory')
+    Database().session.close()
+
+    started = time.perf_counter()
+    with Database().engine.begin() as connection:
+        connection.exec_driver_sql('PRAGMA synchronous = OFF')
+        counts = generate(connection, args)
+    elapsed = time.perf_counter() - started
+    for table, count in counts.items():
+        print(f"{table:<14} {count:>10}")
+    print(f"✅ Wrote {sum(counts.values())} rows to {os.path.abspath('database.db')} in {elapsed:.1f} s")
+
+
+if __name__ == '__main__':
+    main()
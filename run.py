@@ -8,8 +8,9 @@ if hasattr(sys.stdout, "reconfigure"):
     sys.stdout.reconfigure(encoding="utf-8")
     sys.stderr.reconfigure(encoding="utf-8")
 
-import importlib
+import importlib.util
 import subprocess
+from threading import Thread
 
 REQUIRED_MODULES = [
     "yoomoney",
@@ -26,12 +27,8 @@ REQUIRED_MODULES = [
 
 def ensure_requirements() -> None:
     """Install required packages if any are missing."""
-    missing = []
-    for module in REQUIRED_MODULES:
-        try:
-            importlib.import_module(module)
-        except Exception:
-            missing.append(module)
+    # find_spec only locates a package; importing the SDKs here took seconds.
+    missing = [module for module in REQUIRED_MODULES if importlib.util.find_spec(module) is None]
 
     if missing:
         subprocess.check_call([
@@ -43,16 +40,25 @@ def ensure_requirements() -> None:
             "requirements.txt",
         ])
 
-from threading import Thread
-from bot.main import start_bot
-from bot.ipn_server import app as ipn_app
-
 def run_ipn() -> None:
+    from bot.ipn_server import app as ipn_app
     ipn_app.run(host="0.0.0.0", port=5000)
 
+def run_metrics() -> None:
+    from bot.metrics_server import app as metrics_app
+    from bot.misc import EnvKeys
+    metrics_app.run(host="127.0.0.1", port=int(EnvKeys.METRICS_PORT))
+
 if __name__ == '__main__':
     ensure_requirements()
+    # Imported after the check so that missing packages are installed first.
+    from bot.main import start_bot
+    import bot.ipn_server  # noqa: F401 - loaded here, not concurrently from the IPN thread
+    from bot.misc import EnvKeys
     # Start the IPN (HTTP) server in a daemon thread
     Thread(target=run_ipn, daemon=True).start()
+    # Serve Prometheus metrics on a local port
+    if EnvKeys.METRICS_PORT:
+        Thread(target=run_metrics, daemon=True).start()
     # Then start the Telegram bot (blocking)
     start_bot()